@@ -1,758 +1,628 @@
 # -*- coding: utf-8 -*-
-import pulp
-import numpy as np
-import pandas as pd
+"""
+Auslegung eines Energiesystems (PV + Wind + Batterie) mit realen Ertragsdaten: Skript mit allen Optionen.
+
+Parameter und Optionen stehen in main() (Abschnitte 1-7). Die Schritte selbst (Parametersatz, Eingangsdaten, Modell,
+Lösung, Kennzahlen, Ausgaben) liegen als importierbare Funktionen in sizing_pipeline.py; der Import dieses Skripts
+führt nichts aus.
+
+    python LP_Optimierung.py
+"""
 import datetime # Wird für Zeitberechnung benötigt
-import matplotlib.pyplot as plt # Für Diagramme hinzugefügt
-import os # Für Pfadausgabe der Excel-Datei
-import math # Für Wurzelberechnung
+import os # Für Pfadausgabe der Ergebnisdatei
+import sys
+import numpy as np
+import result_plots # Diagramme (matplotlib wird erst beim ersten Diagramm importiert)
+from lp_matrix import build_operational_lp, set_grid_connection_limit # Modelle in Matrixform
+from solver_backend import LPSolution, compare_profiles, highspy, resolve_profile, solve_lp # Solver-Anbindung (HiGHS im Speicher, CBC als Fallback)
+from cost_landscape import ParametricOperationalSolver, compute_cost_landscape, compute_cost_landscape_parallel, no_battery_cost_landscape, screen_cost_landscape # Kostenlandschaft
+from greedy_dispatch import greedy_dispatch # Regelbasierte Betriebssimulation (obere Schranke, Vorauswahl)
+from input_data import cache_directory, constant_profile, feed_in_tariff_profile, load_price_profiles, load_yield_profiles # Ertragsprofile aus Excel mit Cache, Einspeise-/Preisprofile
+from sizing_pipeline import SizingParameters, build_model, evaluate, load_inputs, solve_model # Parametersatz, Eingangsdaten, Modell, Lösung, Kennzahlen
+from run_log import RunLog, lp_size, solution_metrics # Zeit, Speicher und Solver-Statistik je Abschnitt (JSON)
+from result_sink import FILE_EXTENSIONS, convert_to_excel, pyarrow, write_timeseries # Ergebnisdateien (CSV/Parquet/HDF5)
+from benders_decomposition import benders_sizing # Zerlegung Investition/Betrieb in Zeitfenstern
+from stochastic_sizing import WeatherYear, solve_stochastic_sizing # Auslegung über mehrere Wetterjahre
+from temporal_aggregation import capacity_values, aggregated_initial_soc, aggregation_error_report, build_aggregated_sizing_lp, cluster_periods, full_resolution_dispatch # Typische Perioden
 # try:
 #     import numpy_financial as npf # Für IRR Berechnung (momentan nicht verwendet)
 # except ImportError:
 #     print("WARNUNG: 'numpy-financial' nicht gefunden. IRR kann nicht berechnet werden.")
 #     npf = None
 
-# --- 1. Eingabedaten und Annahmen ---
-
-print("--- Initialisiere Modellparameter ---")
-
-# Zeitliche Auflösung
-time_resolution_hours = 0.25 # 15 Minuten
-
-# *** ANGEPASST: Feste Zeitschritte für 366 Tage (Jahr 2024) ***
-days_in_period = 366 # 2024 ist ein Schaltjahr
-num_timesteps = int(days_in_period * 24 / time_resolution_hours) # 366 * 24 * 4 = 35136
-hours_in_period = num_timesteps * time_resolution_hours # Stundenzahl für diesen Zeitraum
-print(f"Zeitschritte angepasst an Daten: {num_timesteps} (entspricht {hours_in_period} Stunden / {days_in_period} Tagen)")
-# *** ENDE ANPASSUNG ***
-
-# Konstantes Lastprofil (skaliert auf 366 Tage)
-demand_per_hour_kwh = 3629
-demand_per_timestep_kwh = demand_per_hour_kwh * time_resolution_hours
-demand_per_timestep_mwh = demand_per_timestep_kwh / 1000
-demand_profile_mwh = np.full(num_timesteps, demand_per_timestep_mwh) # Korrekte Länge
-total_demand_period = np.sum(demand_profile_mwh) # Umbenannt zur Klarheit
-print(f"Gesamtbedarf für Analyseperiode ({num_timesteps} Intervalle / {days_in_period} Tage): {total_demand_period:,.2f} MWh")
-
-# Kosten PV & Wind
-specific_capex_pv_eur_per_mw = 800 * 1000
-specific_opex_pv_eur_per_mw_pa = 13.3 * 1000 # Pro Jahr
-specific_capex_wind_eur_per_mw = 1600 * 1000
-specific_opex_wind_eur_per_mw_pa = 32 * 1000 # Pro Jahr
-
-# Kosten Batterie
-specific_capex_battery_eur_per_mw  = 600 * 1000
-specific_opex_battery_eur_per_mwh_pa = 6.65 * 1000 # Pro Jahr
-print(f"Annahme Batterie CAPEX:  {specific_capex_battery_eur_per_mw/1000:.0f} k€/MW")
-print(f"Annahme Batterie OPEX: {specific_opex_battery_eur_per_mwh_pa/1000:.1f} k€/MWh/Jahr")
-
-# Ökonomische Parameter
-discount_rate = 0.06
-lifetime_pv_wind_years = 20
-lifetime_battery_years = 15
-print(f"Diskontierungsrate: {discount_rate:.1%}")
-print(f"Lebensdauer PV/Wind: {lifetime_pv_wind_years} Jahre")
-print(f"Annahme Lebensdauer Batterie: {lifetime_battery_years} Jahre")
-
-# Batterie Technische Parameter
-battery_efficiency = 0.88
-battery_soc_min_percent = 0.10
-try:
-    if not (0 <= battery_efficiency <= 1): raise ValueError("Effizienz nicht zwischen 0 und 1.")
-    charge_discharge_eff_sqrt = math.sqrt(battery_efficiency)
-    if charge_discharge_eff_sqrt > 1e-9: charge_discharge_eff_sqrt_inv = 1.0 / charge_discharge_eff_sqrt
-    elif battery_efficiency == 0: print("WARNUNG: Batt Wirkungsgrad 0."); charge_discharge_eff_sqrt_inv = 1e12
-    else: print("WARNUNG: Batt Wirkungsgrad nahe Null!"); charge_discharge_eff_sqrt_inv = 1.0 / 1e-9
-except ValueError as e: print(f"WARNUNG: Batterie Wirkungsgrad ungültig ({battery_efficiency}). Fallback: 100%. Fehler: {e}"); charge_discharge_eff_sqrt = 1.0; charge_discharge_eff_sqrt_inv = 1.0
-print(f"Annahme Batterie Wirkungsgrad (round-trip): {battery_efficiency:.1%}")
-print(f"Annahme Min. Ladezustand (SoC): {battery_soc_min_percent:.1%}")
-
-# Netzinteraktion
-grid_purchase_price_eur_per_mwh = 169.9
-feed_in_tariff_eur_per_mwh = 50
-negative_price_hours = 459 # Absolute Anzahl Stunden mit 0€ Vergütung
-print(f"Netzbezugspreis: {grid_purchase_price_eur_per_mwh:.2f} €/MWh")
-print(f"Einspeisevergütung: {feed_in_tariff_eur_per_mwh:.2f} €/MWh")
-print(f"Stunden mit neg. Preisen (Vergütung=0): {negative_price_hours} h")
-
-# --- 2. Lade reale Zeitreihen aus Excel ---
-print("\n--- Lade reale Ertragsdaten aus Excel ---")
-excel_filename = "Smard_Daten_Jahreswert.xlsx" # <-- HIER DEINEN DATEINAMEN EINGEBEN
-print("\n!!! WICHTIGER HINWEIS !!!")
-print(f"Stelle sicher, dass die Excel-Datei '{excel_filename}' exakt {num_timesteps} Zeilen")
-print(f"(für {days_in_period} Tage von 01.01.2024 00:00 bis 31.12.2024 23:45) enthält.")
-print("Andernfalls wird das Skript mit einem Fehler abbrechen.")
-
-try:
-    print(f"Lese Daten aus: {excel_filename}")
-    df_input = pd.read_excel(excel_filename, sheet_name=0, header=0)
-    print(f"Datei geladen. {len(df_input)} Zeilen gefunden.")
-
-    # *** ANGEPASST: Überprüfen, ob die Anzahl der Zeitschritte übereinstimmt (jetzt mit 35136) ***
-    if len(df_input) != num_timesteps:
-         raise ValueError(f"Fehler: Anzahl Zeilen in Excel ({len(df_input)}) stimmt nicht mit erwarteten Zeitschriten ({num_timesteps}) für {days_in_period} Tage überein. Bitte Excel-Datei prüfen.")
 
+def main():
+    """ Führt die Auslegung mit den Einstellungen unten aus. Liefert den Exit-Code (0 = ok, 1 = Fehler in den Eingaben). """
+    # Laufprotokoll: Wandzeit, CPU-Zeit, Speicher je Abschnitt, Modellgröße und Solver-Statistik (run_log.py)
+    run_log_filename = "laufprotokoll.json" # None = kein Protokoll schreiben (Zeiten werden trotzdem am Ende ausgegeben)
+    run_log = RunLog("LP_Optimierung")
+
+    # --- 1. Eingabedaten und Annahmen ---
+    run_log.begin("1_eingabedaten")
+
+    print("--- Initialisiere Modellparameter ---")
+
+    # Zeitliche Auflösung
+    time_resolution_hours = 0.25 # 15 Minuten
+
+    # *** ANGEPASST: Zeitschritte aus dem Datenjahr (365 bzw. 366 Tage) ***
+    data_year = 2024 # Jahr der Ertragsdaten (Excel-Datei unten); 2024 ist ein Schaltjahr
+    data_start_date = datetime.datetime(data_year, 1, 1) # Startdatum der Daten (erste Zeile der Excel-Datei)
+    days_in_period = (datetime.datetime(data_year + 1, 1, 1) - data_start_date).days
+    num_timesteps = int(days_in_period * 24 / time_resolution_hours) # 366 * 24 * 4 = 35136 für 2024
+    hours_in_period = num_timesteps * time_resolution_hours # Stundenzahl für diesen Zeitraum
+    print(f"Zeitschritte angepasst an Daten: {num_timesteps} (entspricht {hours_in_period} Stunden / {days_in_period} Tagen)")
+    # *** ENDE ANPASSUNG ***
+
+    # Konstantes Lastprofil (skaliert auf 366 Tage)
+    demand_per_hour_kwh = 3629
+    demand_per_timestep_kwh = demand_per_hour_kwh * time_resolution_hours
+    demand_per_timestep_mwh = demand_per_timestep_kwh / 1000
+    demand_profile_mwh = constant_profile(demand_per_timestep_mwh, num_timesteps) # Korrekte Länge (Sicht auf einen Wert, keine Kopie je Zeitschritt)
+    total_demand_period = np.sum(demand_profile_mwh) # Umbenannt zur Klarheit
+    print(f"Gesamtbedarf für Analyseperiode ({num_timesteps} Intervalle / {days_in_period} Tage): {total_demand_period:,.2f} MWh")
+
+    # Kosten PV & Wind
+    specific_capex_pv_eur_per_mw = 800 * 1000
+    specific_opex_pv_eur_per_mw_pa = 13.3 * 1000 # Pro Jahr
+    specific_capex_wind_eur_per_mw = 1600 * 1000
+    specific_opex_wind_eur_per_mw_pa = 32 * 1000 # Pro Jahr
+
+    # Kosten Batterie
+    specific_capex_battery_eur_per_mw  = 600 * 1000
+    specific_opex_battery_eur_per_mwh_pa = 6.65 * 1000 # Pro Jahr
+    print(f"Annahme Batterie CAPEX:  {specific_capex_battery_eur_per_mw/1000:.0f} k€/MW")
+    print(f"Annahme Batterie OPEX: {specific_opex_battery_eur_per_mwh_pa/1000:.1f} k€/MWh/Jahr")
+
+    # Ökonomische Parameter
+    discount_rate = 0.06
+    lifetime_pv_wind_years = 20
+    lifetime_battery_years = 15
+    print(f"Diskontierungsrate: {discount_rate:.1%}")
+    print(f"Lebensdauer PV/Wind: {lifetime_pv_wind_years} Jahre")
+    print(f"Annahme Lebensdauer Batterie: {lifetime_battery_years} Jahre")
+
+    # Batterie Technische Parameter
+    battery_efficiency = 0.88
+    battery_soc_min_percent = 0.10
+    print(f"Annahme Batterie Wirkungsgrad (round-trip): {battery_efficiency:.1%}")
+    print(f"Annahme Min. Ladezustand (SoC): {battery_soc_min_percent:.1%}")
+
+    # Netzinteraktion
+    grid_purchase_price_eur_per_mwh = 169.9
+    feed_in_tariff_eur_per_mwh = 50
+    negative_price_hours = 459 # Absolute Anzahl Stunden mit 0€ Vergütung
+    print(f"Netzbezugspreis: {grid_purchase_price_eur_per_mwh:.2f} €/MWh")
+    print(f"Einspeisevergütung: {feed_in_tariff_eur_per_mwh:.2f} €/MWh")
+    print(f"Stunden mit neg. Preisen (Vergütung=0): {negative_price_hours} h")
+    # Reale Preiszeitreihen (optional): z.B. Day-Ahead-Preise aus einem SMARD-Export (stündlich oder viertelstündlich, Excel oder CSV).
+    # Ersetzen den festen Netzbezugspreis und das Einspeiseprofil oben; ein anderes Preisjahr tauscht nur die Zielfunktionskoeffizienten.
+    price_filename = None # z.B. "Smard_Preise_2024.csv" oder excel_filename (Preisspalte in derselben Arbeitsmappe); None = feste Preise
+    price_column = None # Spalte der Preise (Name oder Index; None = erste Spalte mit '€/MWh' im Namen)
+    export_price_column = None # Eigene Spalte für die Einspeisevergütung (None = derselbe Preis)
+    import_price_surcharge_eur_per_mwh = 0 # Aufschlag auf den Börsenpreis beim Netzbezug (Netzentgelte, Umlagen, Steuern); Bezugspreis wird nach unten auf 0 begrenzt
+    grid_connection_limit_mw = None # Netzanschlussleistung (begrenzt Bezug und Einspeisung in Auslegung, Betrieb und Kostenlandschaft). Nötig, falls die
+                                    # Einspeiseerlöse je MW die annualisierten Anlagenkosten übersteigen oder die Einspeisevergütung (eigene Spalte,
+                                    # negativer Aufschlag) über dem Bezugspreis liegt; sonst ist das LP unbeschränkt (ValueError beim Einlesen der Preise)
+
+    # Stochastische Auslegung über mehrere Wetterjahre (optional, stochastic_sizing.py): gemeinsame Kapazitäten, Betrieb je Jahr,
+    # Zielfunktion mit den erwarteten Betriebskosten. Das Datenjahr oben ist immer enthalten; Abschnitt 6 wertet dessen Betrieb aus.
+    use_stochastic_sizing = False
+    weather_year_files = {}         # Weitere Jahre: Jahr -> Excel-Datei im selben Format, z.B. {2022: "Smard_Daten_2022.xlsx", 2023: "Smard_Daten_2023.xlsx"}
+    weather_year_price_files = {}   # Jahr -> Preisdatei (wie price_filename; auch für das Datenjahr wird price_filename verwendet); sonst feste Preise
+    weather_year_probabilities = {} # Jahr -> Wahrscheinlichkeit; Jahre ohne Angabe teilen sich den Rest gleichmäßig
+    stochastic_decompose = True     # Je Jahr (bzw. Fenster von benders_window_days) ein Betriebs-LP, parallel gelöst; False = Gesamtmodell
+
+    # Parametersatz für die Pipeline (sizing_pipeline.py); prüft Wirkungsgrad und Mindest-SoC
     try:
-        timestamp_col = df_input.columns[0]; wind_mwh_col = df_input.columns[1]; pv_mwh_col = df_input.columns[2]
-        wind_cap_col = df_input.columns[3]; pv_cap_col = df_input.columns[4]
-        # Lese installierte Leistung nur, wenn Spalten vorhanden sind (für spezifische Erträge)
-        if len(df_input.columns) >= 5:
-             installed_wind_cap = df_input[wind_cap_col].iloc[0]; installed_pv_cap = df_input[pv_cap_col].iloc[0]
-             print(f"Aus Excel gelesene installierte Leistung (Basis für spezif. Ertrag): Wind={installed_wind_cap:.2f} MW, PV={installed_pv_cap:.2f} MWp")
-             if installed_wind_cap <= 1e-6 or installed_pv_cap <= 1e-6: raise ValueError(f"Fehler: Installierte Leistung in Excel ungültig (<= 0).")
-             specific_yield_wind_mwh_per_mw = (df_input[wind_mwh_col].values / installed_wind_cap)
-             specific_yield_pv_mwh_per_mw = (df_input[pv_mwh_col].values / installed_pv_cap)
-        else:
-             # Fallback, wenn Kapazitätsspalten fehlen: Nimm die MWh-Werte direkt an, setze spezifisch = MWh
-             # Dies funktioniert nur sinnvoll, wenn die Optimierungsvariablen später als 1 MW interpretiert werden.
-             # Oder: Setze Kapazität auf 1 MW als Annahme.
-             print("WARNUNG: Spalten für installierte Leistung nicht gefunden. Nehme an, die Ertragsspalten sind spezifisch (pro 1 MW).")
-             installed_wind_cap = 1.0
-             installed_pv_cap = 1.0
-             specific_yield_wind_mwh_per_mw = df_input[wind_mwh_col].values
-             specific_yield_pv_mwh_per_mw = df_input[pv_mwh_col].values
-
-
-        specific_yield_wind_mwh_per_mw = np.maximum(0, specific_yield_wind_mwh_per_mw)
-        specific_yield_pv_mwh_per_mw = np.maximum(0, specific_yield_pv_mwh_per_mw)
-        print("Reale Ertragsprofile erfolgreich geladen und spezifische Profile berechnet.")
-    except IndexError: raise IndexError("Fehler: Nicht genügend Spalten in Excel gefunden (mind. A-C erwartet, A-E für spez. Ertrag).")
-    except KeyError as e: raise KeyError(f"Fehler: Spalte {e} konnte nicht zugeordnet werden.")
-
-    # Kontrollen (aktualisiert für 366 Tage)
-    total_spec_yield_pv = np.sum(specific_yield_pv_mwh_per_mw); total_spec_yield_wind = np.sum(specific_yield_wind_mwh_per_mw)
-    # Ausgabe auf MWh/MW pro Periode (366 Tage)
-    print(f"\nKontrolle Ertrag pro MW (Periode, aus Daten): PV={total_spec_yield_pv:.2f} MWh/MWp, Wind={total_spec_yield_wind:.2f} MWh/MW")
-
-    # Einspeisevergütungsprofil (passt sich an num_timesteps an)
-    # Umrechnung von Stunden in Timesteps: Anzahl Stunden * (Intervalle pro Stunde)
-    timesteps_per_hour = 1 / time_resolution_hours
-    negative_price_timesteps = negative_price_hours * timesteps_per_hour # Stunden in Timesteps umrechnen
-    num_negative_timesteps = int(min(negative_price_timesteps, num_timesteps)) # Absolute Anzahl TS, max. alle TS
-    feed_in_tariff_profile_eur_per_mwh = np.full(num_timesteps, feed_in_tariff_eur_per_mwh)
-    np.random.seed(42) # Für Reproduzierbarkeit
-    random_indices = np.random.choice(num_timesteps, num_negative_timesteps, replace=False)
-    feed_in_tariff_profile_eur_per_mwh[random_indices] = 0
-    print(f"Einspeiseprofil: {num_negative_timesteps} Zeitschritte mit 0 € Vergütung generiert.")
-
-except FileNotFoundError: print(f"FEHLER: Excel-Datei '{excel_filename}' nicht gefunden."); exit()
-except ImportError: print("FEHLER: Benötigte Bibliotheken ('pandas', 'openpyxl') fehlen. Bitte installieren."); exit()
-except ValueError as e: print(f"FEHLER bei der Datenverarbeitung: {e}"); exit()
-except Exception as e: print(f"FEHLER beim Laden/Verarbeiten der Excel-Datei: {e}"); exit()
-
-# --- 3. Annuitätenfaktor berechnen ---
-# ... (Funktion bleibt unverändert) ...
-def annuity_factor(rate, years):
-    if years <= 0: return 0;
-    if rate == 0: return 1 / years # Sonderfall Zinssatz 0
-
-    # Rate ggf. anpassen, wenn sie extrem klein ist
-    if rate < 1e-9:
-        # print(f"WARNUNG: Annuitätsfaktor - sehr kleiner Zinssatz ({rate}) wird auf 1e-9 angehoben.") # Weniger Output
-        rate = 1e-9
-
-    # q = 1 + rate *jetzt für alle gültigen Raten definieren*
-    q = 1 + rate
+        params = SizingParameters(time_resolution_hours=time_resolution_hours, data_year=data_year, demand_per_hour_kwh=demand_per_hour_kwh,
+                                  specific_capex_pv_eur_per_mw=specific_capex_pv_eur_per_mw, specific_opex_pv_eur_per_mw_pa=specific_opex_pv_eur_per_mw_pa,
+                                  specific_capex_wind_eur_per_mw=specific_capex_wind_eur_per_mw, specific_opex_wind_eur_per_mw_pa=specific_opex_wind_eur_per_mw_pa,
+                                  specific_capex_battery_eur_per_mw=specific_capex_battery_eur_per_mw,
+                                  specific_opex_battery_eur_per_mwh_pa=specific_opex_battery_eur_per_mwh_pa, discount_rate=discount_rate,
+                                  lifetime_pv_wind_years=lifetime_pv_wind_years, lifetime_battery_years=lifetime_battery_years,
+                                  battery_efficiency=battery_efficiency, battery_soc_min_percent=battery_soc_min_percent,
+                                  grid_purchase_price_eur_per_mwh=grid_purchase_price_eur_per_mwh, feed_in_tariff_eur_per_mwh=feed_in_tariff_eur_per_mwh,
+                                  negative_price_hours=negative_price_hours, grid_connection_limit_mw=grid_connection_limit_mw)
+    except ValueError as e: print(f"FEHLER in den Parametern: {e}"); return 1
+    charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv = params.efficiency_factors()
+
+    # --- 2. Lade reale Zeitreihen aus Excel ---
+    run_log.begin("2_daten_laden")
+    print("\n--- Lade reale Ertragsdaten aus Excel ---")
+    excel_filename = "Smard_Daten_Jahreswert.xlsx" # <-- HIER DEINEN DATEINAMEN EINGEBEN
+    print("\n!!! WICHTIGER HINWEIS !!!")
+    print(f"Stelle sicher, dass die Excel-Datei '{excel_filename}' exakt {num_timesteps} Zeilen")
+    print(f"(für {days_in_period} Tage von {data_start_date:%d.%m.%Y %H:%M} bis "
+          f"{data_start_date + datetime.timedelta(hours=(num_timesteps - 1) * time_resolution_hours):%d.%m.%Y %H:%M}) enthält.")
+    print("Andernfalls wird das Skript mit einem Fehler abbrechen.")
+
+    use_input_cache = True # Abgeleitete Ertragsprofile in '<Datei>.cache/' zwischenspeichern (neu erzeugt, wenn sich die Excel-Datei ändert)
 
     try:
-        qn = q**years
-        denominator = qn - 1
-
-        # Verhindere Division durch Null im Hauptterm (sollte bei rate != 0 kaum vorkommen)
-        if abs(denominator) < 1e-9:
-             # print(f"WARNUNG: Annuitätsfaktor-Nenner nahe Null für rate={rate}, years={years}") # Weniger Output
-             # Fallback auf 1/years wie bei rate=0 könnte sinnvoll sein
-             try:
-                 return 1 / years
-             except ZeroDivisionError: # Falls years auch 0 ist (bereits oben abgefangen)
-                 return 0
-
-        # Hauptformel
-        return (rate * qn) / denominator
-
-    except OverflowError:
-        # Fehler bei sehr großen Jahren oder Raten
-        print(f"ERROR: Overflow bei Annuitätsfaktor-Berechnung für rate={rate}, years={years}.")
-        return 0 # Im Fehlerfall 0 zurückgeben
-    except Exception as e:
-        # Andere unerwartete Fehler abfangen
-        print(f"ERROR: Unerwarteter Fehler bei Annuitätsfaktor-Berechnung: {e}")
-        return 0
-
-af_pv_wind = annuity_factor(discount_rate, lifetime_pv_wind_years); af_battery = annuity_factor(discount_rate, lifetime_battery_years)
-print(f"\nAnnuitätsfaktor PV/Wind (r={discount_rate:.1%}, n={lifetime_pv_wind_years}): {af_pv_wind:.4f}")
-print(f"Annuitätsfaktor Batterie (r={discount_rate:.1%}, n={lifetime_battery_years}): {af_battery:.4f}")
-
-# --- 4. Optimierungsproblem definieren ---
-print("\n--- Definiere Optimierungsmodell ---")
-# *** ANGEPASST: Modellname ***
-model = pulp.LpProblem(f"Renewable_Energy_System_Optimization_{days_in_period}Days", pulp.LpMinimize)
-# Variablen (verwenden das angepasste num_timesteps)
-pv_capacity_mw = pulp.LpVariable("PV_Capacity_MWp", lowBound=0); wind_capacity_mw = pulp.LpVariable("Wind_Capacity_MW", lowBound=0)
-battery_capacity_mwh = pulp.LpVariable("Battery_Capacity_MWh", lowBound=0); battery_power_mw = pulp.LpVariable("Battery_Power_MW", lowBound=0)
-timesteps = range(num_timesteps); soc_timesteps = range(num_timesteps + 1) # SoC braucht t=0 bis t=num_timesteps
-grid_import = pulp.LpVariable.dicts("Grid_Import", timesteps, lowBound=0); grid_export = pulp.LpVariable.dicts("Grid_Export", timesteps, lowBound=0)
-curtailment = pulp.LpVariable.dicts("Curtailment", timesteps, lowBound=0); battery_soc = pulp.LpVariable.dicts("Battery_SoC", soc_timesteps, lowBound=0)
-battery_charge = pulp.LpVariable.dicts("Battery_Charge", timesteps, lowBound=0); battery_discharge = pulp.LpVariable.dicts("Battery_Discharge", timesteps, lowBound=0)
-print("Variablen definiert.")
-
-# Zielfunktion (Kosten sind weiterhin "pro Jahr", basierend auf Annuitäten)
-# Die Betriebsoptimierung minimiert jedoch die Kosten/Erlöse über die tatsächliche Periode (366 Tage)
-annualized_capex_pv_wind = af_pv_wind * (pv_capacity_mw * specific_capex_pv_eur_per_mw + wind_capacity_mw * specific_capex_wind_eur_per_mw)
-annualized_capex_battery = af_battery * (battery_power_mw * specific_capex_battery_eur_per_mw)
-total_annualized_capex = annualized_capex_pv_wind + annualized_capex_battery
-
-# OPEX sind auch Jahreswerte
-total_opex_pv_wind = pv_capacity_mw * specific_opex_pv_eur_per_mw_pa + wind_capacity_mw * specific_opex_wind_eur_per_mw_pa
-total_opex_battery = battery_capacity_mwh * specific_opex_battery_eur_per_mwh_pa # OPEX Batterie pro MWh Kapazität
-total_annual_opex = total_opex_pv_wind + total_opex_battery
-
-# Netzinteraktionskosten/-erlöse beziehen sich auf die SUMME über die PERIODE (366 Tage)
-total_grid_import_cost_period = pulp.lpSum(grid_import[t] * grid_purchase_price_eur_per_mwh for t in timesteps)
-total_feed_in_revenue_period = pulp.lpSum(grid_export[t] * feed_in_tariff_profile_eur_per_mwh[t] for t in timesteps) # Verwendet das Profil
-
-# Zielfunktion: Annualisierte Investitions- und Fixkosten + Betriebskosten (Netzbezug) der Periode - Betriebserlöse (Einspeisung) der Periode
-# WICHTIG: Diese Mischung ist üblich, kann aber zu leichten Inkonsistenzen führen, wenn man z.B. LCOE berechnet.
-# Alternativ könnte man die Netzinteraktionskosten/-erlöse auf ein Jahr hochrechnen, aber das verzerrt bei stark saisonalen Profilen.
-# Wir bleiben bei der üblichen Methode: Ann. CAPEX/OPEX + Perioden-Netzkosten/-erlöse
-model += (total_annualized_capex + total_annual_opex + total_grid_import_cost_period - total_feed_in_revenue_period), "Total_Annualized_System_Cost"
-print("Zielfunktion definiert.")
-
-# Nebenbedingungen (laufen jetzt über 35136 Zeitschritte)
-print("Definiere Nebenbedingungen...")
-for t in timesteps:
-    # Energiebilanz: Erzeugung + Netzbezug + Batterieentladung = Bedarf + Netzeinspeisung + Abregelung + Batterieladung
-    available_pv_gen = specific_yield_pv_mwh_per_mw[t] * pv_capacity_mw; available_wind_gen = specific_yield_wind_mwh_per_mw[t] * wind_capacity_mw
-    model += available_pv_gen + available_wind_gen + grid_import[t] + battery_discharge[t] == demand_profile_mwh[t] + grid_export[t] + curtailment[t] + battery_charge[t], f"Energy_Balance_{t}"
-
-    # Batterie SoC Update: SoC(t+1) = SoC(t) + Ladung * Wirkungsgrad_in - Entladung / Wirkungsgrad_out
-    # Mit Roundtrip-Effizienz: efficiency = eff_in * eff_out => eff_in = sqrt(eff), eff_out = sqrt(eff)
-    # SoC(t+1) = SoC(t) + charge[t] * sqrt(eff) - discharge[t] / sqrt(eff)
-    model += battery_soc[t+1] == battery_soc[t] + battery_charge[t] * charge_discharge_eff_sqrt - battery_discharge[t] * charge_discharge_eff_sqrt_inv, f"Battery_SoC_Update_{t}"
-
-    # Batterie Leistungslimits (Laden/Entladen)
-    model += battery_charge[t] <= battery_power_mw * time_resolution_hours, f"Battery_Charge_Power_Limit_{t}"
-    model += battery_discharge[t] <= battery_power_mw * time_resolution_hours, f"Battery_Discharge_Power_Limit_{t}"
-
-    # Batterie SoC Grenzen (bezogen auf Energiekapazität MWh)
-    # WICHTIG: SoC(t) ist der Zustand *vor* der Aktion in Zeitschritt t.
-    model += battery_soc[t] >= battery_soc_min_percent * battery_capacity_mwh, f"Battery_SoC_Min_Limit_{t}"
-    model += battery_soc[t] <= battery_capacity_mwh, f"Battery_SoC_Max_Limit_{t}" # Max = 100% der Kapazität
-
-# SoC Grenzen auch für den letzten Zeitschritt (t = num_timesteps) sicherstellen
-model += battery_soc[num_timesteps] >= battery_soc_min_percent * battery_capacity_mwh, f"Battery_SoC_Min_Limit_End"
-model += battery_soc[num_timesteps] <= battery_capacity_mwh, f"Battery_SoC_Max_Limit_End"
-
-# Zyklische Randbedingung für den Speicher: SoC am Ende = SoC am Anfang
-model += battery_soc[num_timesteps] == battery_soc[0], "Battery_Cyclic_SoC"
-print("Nebenbedingungen definiert.")
-
-# --- 5. Optimierung lösen ---
-print(f"\n--- Starte Optimierung ({num_timesteps} Zeitschritte / {days_in_period} Tage) ---")
-start_time = datetime.datetime.now()
-solver = pulp.PULP_CBC_CMD(msg=True) # msg=True zeigt Solver-Output
-model.solve(solver)
-end_time = datetime.datetime.now()
-print(f"Optimierung abgeschlossen. Dauer: {end_time - start_time}")
-
-# --- 6. Ergebnisse ausgeben ---
-print("\n--- Optimierungsergebnisse ---")
-print(f"Status: {pulp.LpStatus[model.status]}")
-opt_pv_mw = 0; opt_wind_mw = 0; opt_batt_mwh = 0; opt_batt_mw = 0; opt_total_cost = np.inf
-
-if pulp.LpStatus[model.status] == 'Optimal':
-    opt_pv_mw = pv_capacity_mw.varValue; opt_wind_mw = wind_capacity_mw.varValue
-    opt_batt_mwh = battery_capacity_mwh.varValue; opt_batt_mw = battery_power_mw.varValue
-    opt_total_cost = pulp.value(model.objective) # Dies sind die *annualisierten* Systemkosten + *Perioden*-Netzkosten/-Erlöse
-
-    print(f"\nOptimale Kapazitäten:")
-    print(f"  PV Leistung: {opt_pv_mw:.2f} MWp"); print(f"  Wind Leistung: {opt_wind_mw:.2f} MW")
-    print(f"  Batterie Energie: {opt_batt_mwh:.2f} MWh"); print(f"  Batterie Leistung: {opt_batt_mw:.2f} MW")
-    if opt_wind_mw > 1e-3: print(f"  -> Hinweis Wind: Entspricht ideal {opt_wind_mw / 6.8:.2f} Anlagen á 6.8 MW.") # Beispielrechnung
-
-    # Kosten / Erlöse (nochmal berechnen für Klarheit)
-    capex_pv_annual = af_pv_wind * opt_pv_mw * specific_capex_pv_eur_per_mw if opt_pv_mw > 0 else 0
-    opex_pv_annual = opt_pv_mw * specific_opex_pv_eur_per_mw_pa if opt_pv_mw > 0 else 0
-    capex_wind_annual = af_pv_wind * opt_wind_mw * specific_capex_wind_eur_per_mw if opt_wind_mw > 0 else 0
-    opex_wind_annual = opt_wind_mw * specific_opex_wind_eur_per_mw_pa if opt_wind_mw > 0 else 0
-    capex_batt_annual = af_battery * (opt_batt_mw * specific_capex_battery_eur_per_mw) if opt_batt_mwh > 0 else 0
-    opex_batt_annual = opt_batt_mwh * specific_opex_battery_eur_per_mwh_pa if opt_batt_mwh > 0 else 0
-
-    opt_annualized_capex = capex_pv_annual + capex_wind_annual + capex_batt_annual
-    opt_total_annual_opex = opex_pv_annual + opex_wind_annual + opex_batt_annual
-
-    # Netzinteraktion für die *gesamte Periode* (366 Tage) auslesen
-    # Sicherstellen, dass die Ausdrücke existieren (könnten 0 sein, wenn z.B. kein Netzbezug stattfindet)
-    opt_total_grid_import_cost_period = pulp.value(total_grid_import_cost_period) if isinstance(total_grid_import_cost_period, pulp.LpAffineExpression) else 0
-    opt_total_feed_in_revenue_period = pulp.value(total_feed_in_revenue_period) if isinstance(total_feed_in_revenue_period, pulp.LpAffineExpression) else 0
-
-    # Gesamtkosten aus Zielwert (Kontrolle)
-    calculated_total_cost = opt_annualized_capex + opt_total_annual_opex + opt_total_grid_import_cost_period - opt_total_feed_in_revenue_period
-
-    print(f"\nKosten und Erlöse (annualisiert bzw. für die {days_in_period}-Tage-Periode):")
-    print(f"  Gesamtkosten (Zielwert): {opt_total_cost:,.2f} €")
-    print(f"    - Ann. CAPEX: {opt_annualized_capex:,.2f} € (PV: {capex_pv_annual:,.0f}, Wind: {capex_wind_annual:,.0f}, Batt: {capex_batt_annual:,.0f})")
-    print(f"    - Ann. OPEX: {opt_total_annual_opex:,.2f} € (PV: {opex_pv_annual:,.0f}, Wind: {opex_wind_annual:,.0f}, Batt: {opex_batt_annual:,.0f})")
-    print(f"    - Netzbezugskosten (Periode): {opt_total_grid_import_cost_period:,.2f} €")
-    print(f"    - Einspeiseerlöse (Periode): {opt_total_feed_in_revenue_period:,.2f} €")
-    print(f"  -> Kontrollsumme: {calculated_total_cost:,.2f} € {'(OK)' if abs(opt_total_cost - calculated_total_cost) < 1 else '(Abweichung!)'}")
-
-
-    # Zeitreihenwerte und Gesamtwerte für die PERIODE (366 Tage)
-    actual_pv_gen_profile = specific_yield_pv_mwh_per_mw * opt_pv_mw; actual_wind_gen_profile = specific_yield_wind_mwh_per_mw * opt_wind_mw
-    grid_import_values = np.array([grid_import[t].varValue for t in timesteps]); grid_export_values = np.array([grid_export[t].varValue for t in timesteps])
-    curtailment_values = np.array([curtailment[t].varValue for t in timesteps]); battery_charge_values = np.array([battery_charge[t].varValue for t in timesteps])
-    battery_discharge_values = np.array([battery_discharge[t].varValue for t in timesteps]); battery_soc_values = np.array([battery_soc[t].varValue for t in soc_timesteps]) # Länge num_timesteps + 1
-
-    total_pv_gen_period = np.sum(actual_pv_gen_profile); total_wind_gen_period = np.sum(actual_wind_gen_profile); total_generation_period = total_pv_gen_period + total_wind_gen_period
-    total_grid_import_period = np.sum(grid_import_values); total_grid_export_period = np.sum(grid_export_values); total_curtailment_period = np.sum(curtailment_values)
-    total_battery_charge_period = np.sum(battery_charge_values); total_battery_discharge_period = np.sum(battery_discharge_values)
-
-    print(f"\nEnergiebilanz (für Analyseperiode von {num_timesteps} Zeitschritten / {days_in_period} Tagen):")
-    print(f"  Gesamtbedarf (Periode): {total_demand_period:,.2f} MWh"); print(f"  Gesamte PV Erzeugung (Periode): {total_pv_gen_period:,.2f} MWh"); print(f"  Gesamte Wind Erzeugung (Periode): {total_wind_gen_period:,.2f} MWh")
-    print(f"  Gesamte Erzeugung (PV+Wind, Periode): {total_generation_period:,.2f} MWh"); print(f"  Gesamter Netzbezug (Periode): {total_grid_import_period:,.2f} MWh"); print(f"  Gesamte Netzeinspeisung (Periode): {total_grid_export_period:,.2f} MWh")
-    print(f"  Gesamte Abregelung (Periode): {total_curtailment_period:,.2f} MWh"); print(f"  Gesamte Batterieladung (Periode): {total_battery_charge_period:,.2f} MWh"); print(f"  Gesamte Batterieentladung (Periode): {total_battery_discharge_period:,.2f} MWh")
-
-    # Bilanz-Check über die Periode
-    total_sources = total_generation_period + total_grid_import_period + total_battery_discharge_period
-    total_sinks = total_demand_period + total_grid_export_period + total_curtailment_period + total_battery_charge_period
-    # Berücksichtige Batterie-SoC-Änderung (sollte nahe 0 sein wegen zyklischer Bedingung)
-    soc_diff = battery_soc_values[-1] - battery_soc_values[0]
-    # Korrigierte Bilanz: Quellen = Senken + SoC-Änderung (wenn SoC steigt, ist es eine "Senke")
-    # Oder: Quellen - Senken = SoC-Änderung
-    balance_diff = total_sources - total_sinks
-    print(f"  -> Bilanz-Check: Quellen={total_sources:,.2f} MWh, Senken={total_sinks:,.2f} MWh")
-    print(f"     SoC-Änderung (Ende-Anfang): {soc_diff:,.4f} MWh")
-    print(f"     Differenz (Quellen-Senken): {balance_diff:,.4f} MWh {'(OK)' if abs(balance_diff - soc_diff) < 1 else '(Abweichung!)'}")
-
-
-    # --- LCOE Gesamt (bezogen auf Bedarf der Periode) ---
-    print("\nLevelized Cost of Energy (LCOE):")
-    lcoe_system_eur_per_mwh = 0
-    # Verwende die annualisierten Gesamtkosten (CAPEX+OPEX) und teile sie durch den *jährlichen* Bedarf
-    # Annahme: Der Bedarf der Periode (366 Tage) entspricht ungefähr dem Jahresbedarf
-    annual_demand_approx = total_demand_period * (365.25 / days_in_period) # Skalierung auf Standardjahr
-    total_annualized_costs_only = opt_annualized_capex + opt_total_annual_opex
-
-    if annual_demand_approx > 1e-6:
-         # LCOE der Erzeugung (nur ann. CAPEX/OPEX der Anlagen / Jährlicher Bedarf)
-         lcoe_generation_eur_per_mwh = total_annualized_costs_only / annual_demand_approx
-         print(f"  LCOE (nur Erzeugung+Speicher CAPEX/OPEX / Jahresbedarf approx.): {lcoe_generation_eur_per_mwh:.2f} €/MWh")
-
-         # LCOE Gesamtsystem (inkl. Netzinteraktion, bezogen auf Jahresbedarf)
-         # Hier ist die Verwendung des Zielwerts problematisch, da er Perioden-Netzkosten enthält.
-         # Besser: Annualisierte Kosten + (Perioden-Netzkosten - Perioden-Erlöse) * Skalierungsfaktor
-         net_cost_period = opt_total_grid_import_cost_period - opt_total_feed_in_revenue_period
-         net_cost_annual_approx = net_cost_period * (365.25 / days_in_period)
-         total_system_cost_annual_approx = total_annualized_costs_only + net_cost_annual_approx
-         lcoe_system_annual_approx = total_system_cost_annual_approx / annual_demand_approx
-         print(f"  LCOE Gesamtsystem (alle ann. Kosten inkl. Netz approx. / Jahresbedarf approx.): {lcoe_system_annual_approx:.2f} €/MWh")
-         print(f"  (Vergleich: Netzbezugspreis = {grid_purchase_price_eur_per_mwh:.2f} €/MWh)")
-
-    else: print("  LCOE: nicht berechenbar (Bedarf ist Null).")
-
-
-    # --- Autarkiegrad etc. (bezogen auf die Periode von 366 Tagen) ---
-    self_sufficiency_rate = 0; renewable_coverage_rate = 0
-    if total_demand_period > 1e-6:
-        # Autarkiegrad = (Bedarf - Netzbezug) / Bedarf
-        self_sufficiency_rate = (total_demand_period - total_grid_import_period) / total_demand_period * 100
-        # EE-Deckungsrate = (PV-Erzeugung + Wind-Erzeugung) / Bedarf
-        renewable_coverage_rate = total_generation_period / total_demand_period * 100
-    print(f"\nAutarkiegrad (Periode {days_in_period} Tage): {self_sufficiency_rate:.2f}%"); print(f"Erneuerbare Deckungsrate (Periode {days_in_period} Tage): {renewable_coverage_rate:.2f}%")
-
-    # --- Diagramme ---
-    print("\n--- Erstelle Diagramme ---")
-
-    # Zeitachse für Plots erstellen (für 366 Tage)
-    start_date_plot = datetime.datetime(2024, 1, 1) # Startdatum der Daten
-    try:
-        time_index_plot = pd.date_range(start_date_plot, periods=num_timesteps, freq=pd.Timedelta(hours=time_resolution_hours))
-        # Sicherstellen, dass es ein DatetimeIndex ist
-        if not isinstance(time_index_plot, pd.DatetimeIndex):
-            raise TypeError("Fehler bei der Erstellung des Zeitindex für Plots.")
-    except Exception as e:
-        print(f"FEHLER beim Erstellen des Zeitindex für Plots: {e}")
-        # Fallback: Einfacher Zahlenindex
-        time_index_plot = range(num_timesteps)
-
-
-    # --- Diagramm 1: Lastprofil und EE-Erzeugung (15-Minuten-Werte) ---
-    print("Erstelle Diagramm: Lastprofil und EE-Erzeugung...")
-    try:
-        plt.figure(figsize=(15, 7))
-        plt.plot(time_index_plot, demand_profile_mwh, label='Bedarf', color='black', linewidth=1.0)
-        plt.plot(time_index_plot, actual_pv_gen_profile, label=f'PV Erzeugung ({opt_pv_mw:.1f} MWp)', color='orange', linewidth=0.7, alpha=0.8)
-        plt.plot(time_index_plot, actual_wind_gen_profile, label=f'Wind Erzeugung ({opt_wind_mw:.1f} MW)', color='deepskyblue', linewidth=0.7, alpha=0.8)
-        # *** ANGEPASST: Titel und Dateiname ***
-        plt.title(f'Lastprofil und Optimierte Erzeugung ({days_in_period} Tage, reale Daten)')
-        plt.xlabel('Datum'); plt.ylabel(f'Energie (MWh pro {time_resolution_hours*60:.0f} min)')
-        plt.grid(True, linestyle=':', alpha=0.7); plt.legend(loc='upper left'); plt.ylim(bottom=0); plt.tight_layout()
-        plot_filename = f"lastprofil_reale_erzeugung_{days_in_period}tage.png"; plt.savefig(plot_filename); print(f"Diagramm '{plot_filename}' gespeichert.")
-        plt.close() # Schließt die Figur, um Speicher freizugeben
-    except Exception as e: print(f"Fehler beim Erstellen des Lastprofil/Erzeugungs-Diagramms: {e}")
-
-
-    # --- Diagramm 2: Monatliche Erzeugung (PV/Wind) als Balkendiagramm ---
-    print("\nErstelle Diagramm: Monatliche Erzeugung (PV/Wind)...")
-    try:
-        # DataFrame für Resampling erstellen (nur wenn time_index_plot ein DatetimeIndex ist)
-        if isinstance(time_index_plot, pd.DatetimeIndex):
-            df_gen_plot_monthly = pd.DataFrame({
-                # 'Timestamp': time_index_plot, # Wird Index
-                'PV_Gen_MWh': actual_pv_gen_profile,
-                'Wind_Gen_MWh': actual_wind_gen_profile
-            }, index=time_index_plot)
-            # df_gen_plot_monthly.set_index('Timestamp', inplace=True) # Bereits als Index gesetzt
-
-            # Nach Monat resampling und summieren ('M' = Monatsende)
-            monthly_gen = df_gen_plot_monthly.resample('M').sum()
-
-            # Monatnamen für die Achse extrahieren (Format YYYY-MM)
-            months_labels = [f"{idx.year}-{idx.month:02d}" for idx in monthly_gen.index]
-            pv_monthly_mwh = monthly_gen['PV_Gen_MWh']
-            wind_monthly_mwh = monthly_gen['Wind_Gen_MWh']
-
-            # Gestapeltes Säulendiagramm
-            plt.figure(figsize=(12, 7))
-            bar_width = 0.8 # Breite der Säulen
-            plt.bar(months_labels, pv_monthly_mwh, width=bar_width, label='PV Erzeugung', color='orange')
-            plt.bar(months_labels, wind_monthly_mwh, bottom=pv_monthly_mwh, width=bar_width, label='Wind Erzeugung', color='deepskyblue')
-
-            plt.xlabel('Monat (YYYY-MM)')
-            plt.ylabel('Monatlicher Energieertrag (MWh)')
-            # *** ANGEPASST: Titel und Dateiname ***
-            plt.title(f'Optimierter monatlicher Energieertrag ({days_in_period} Tage)')
-            plt.xticks(rotation=45, ha='right') # Rotiert Monatslabel für bessere Lesbarkeit
-            plt.legend()
-            plt.grid(axis='y', linestyle=':')
-            plt.tight_layout()
-            plot_filename_monthly = f"monatliche_erzeugung_pv_wind_{days_in_period}tage.png"
-            plt.savefig(plot_filename_monthly)
-            print(f"Diagramm '{plot_filename_monthly}' gespeichert.")
-            plt.close() # Schließt die Figur
+        print(f"Lese Daten aus: {excel_filename}")
+        # Ertragsprofile (mit Cache), Bedarf, Einspeiseprofil und Netzbezugspreis; prüft die Anzahl der Zeilen gegen num_timesteps
+        inputs = load_inputs(params, excel_filename, price_filename, price_column, export_price_column, import_price_surcharge_eur_per_mwh,
+                             use_cache=use_input_cache)
+        input_info = inputs.info['yields']
+        print(f"Datei geladen ({'Cache' if input_info['source'] == 'cache' else 'Excel'}). {input_info['num_rows']} Zeilen gefunden.")
+        specific_yield_pv_mwh_per_mw = inputs.specific_yield_pv_mwh_per_mw; specific_yield_wind_mwh_per_mw = inputs.specific_yield_wind_mwh_per_mw
+        installed_wind_cap = input_info['installed_wind_cap']; installed_pv_cap = input_info['installed_pv_cap']
+        print(f"Installierte Leistung (Basis für spezif. Ertrag): Wind={installed_wind_cap:.2f} MW, PV={installed_pv_cap:.2f} MWp")
+        print("Reale Ertragsprofile erfolgreich geladen und spezifische Profile berechnet.")
 
+        # Kontrollen (aktualisiert für 366 Tage)
+        total_spec_yield_pv = np.sum(specific_yield_pv_mwh_per_mw); total_spec_yield_wind = np.sum(specific_yield_wind_mwh_per_mw)
+        # Ausgabe auf MWh/MW pro Periode (366 Tage)
+        print(f"\nKontrolle Ertrag pro MW (Periode, aus Daten): PV={total_spec_yield_pv:.2f} MWh/MWp, Wind={total_spec_yield_wind:.2f} MWh/MW")
+
+        # Einspeisevergütungsprofil (passt sich an num_timesteps an): negative_price_hours zufällige Stunden mit 0 € (reproduzierbar, seed=42)
+        feed_in_tariff_profile_eur_per_mwh = inputs.feed_in_tariff_profile_eur_per_mwh
+        grid_purchase_price_profile_eur_per_mwh = inputs.grid_purchase_price_profile_eur_per_mwh # Netzbezugspreis je Zeitschritt
+        demand_profile_mwh = inputs.demand_profile_mwh
+        if not price_filename:
+            num_negative_timesteps = int(min(negative_price_hours / time_resolution_hours, num_timesteps))
+            print(f"Einspeiseprofil: {num_negative_timesteps} Zeitschritte mit 0 € Vergütung generiert.")
         else:
-             print("Monatliches Diagramm kann nicht erstellt werden, da Zeitindex kein DatetimeIndex ist.")
-
-    except Exception as e:
-        print(f"Fehler beim Erstellen des monatlichen Erzeugungsdiagramms: {e}")
-
-
-    # --- *** NEU: Diagramm 3: Tägliche Erzeugung (PV/Wind) als Liniendiagramm *** ---
-    print("\nErstelle Diagramm: Tägliche Erzeugung (PV/Wind) als Liniendiagramm...")
-    try:
-         # DataFrame für Resampling erstellen (nur wenn time_index_plot ein DatetimeIndex ist)
-         if isinstance(time_index_plot, pd.DatetimeIndex):
-             df_gen_plot_daily = pd.DataFrame({
-                 'PV_Gen_MWh': actual_pv_gen_profile,
-                 'Wind_Gen_MWh': actual_wind_gen_profile
-             }, index=time_index_plot)
-
-             # Nach Tag resampling ('D') und summieren
-             daily_gen = df_gen_plot_daily.resample('D').sum()
-
-             # Daten für den Plot extrahieren
-             daily_dates = daily_gen.index
-             pv_daily_mwh = daily_gen['PV_Gen_MWh']
-             wind_daily_mwh = daily_gen['Wind_Gen_MWh']
-
-             # Liniendiagramm erstellen
-             plt.figure(figsize=(15, 7))
-             plt.plot(daily_dates, pv_daily_mwh, label=f'Tägliche PV Erzeugung ({opt_pv_mw:.1f} MWp)', color='orange', linewidth=1.0)
-             plt.plot(daily_dates, wind_daily_mwh, label=f'Tägliche Wind Erzeugung ({opt_wind_mw:.1f} MW)', color='deepskyblue', linewidth=1.0)
-
-             plt.xlabel('Datum (Tag)')
-             plt.ylabel('Täglicher Energieertrag (MWh)')
-             plt.title(f'Optimierter täglicher Energieertrag ({days_in_period} Tage)')
-             plt.legend()
-             plt.grid(True, linestyle=':', alpha=0.7)
-             plt.ylim(bottom=0) # Startet Y-Achse bei 0
-             plt.tight_layout()
-
-             plot_filename_daily = f"taegliche_erzeugung_pv_wind_{days_in_period}tage.png"
-             plt.savefig(plot_filename_daily)
-             print(f"Diagramm '{plot_filename_daily}' gespeichert.")
-             plt.close() # Schließt die Figur
-         else:
-              print("Tägliches Liniendiagramm kann nicht erstellt werden, da Zeitindex kein DatetimeIndex ist.")
-
-    except Exception as e:
-         print(f"Fehler beim Erstellen des täglichen Erzeugungs-Liniendiagramms: {e}")
-    # --- *** ENDE NEU *** ---
-
-
-    # --- Diagramm 4: Batterie Ladezustand (SoC) ---
-    print("\nErstelle Diagramm: Batterie Ladezustand (SoC) über die Periode...")
-    if opt_batt_mwh > 1e-3: # Nur wenn Batteriekapazität > 0
+            price_info = inputs.info['prices']
+            print(f"Reale Preise aus '{price_filename}' ({price_info['num_rows']} Werte): Mittel {price_info['mean_price']:.2f} €/MWh, "
+                  f"{price_info['negative_price_hours']:.0f} h mit negativer Vergütung, {price_info['clipped_import_hours']:.0f} h Netzbezugspreis auf 0 begrenzt. "
+                  f"Feste Preise oben werden nicht verwendet.")
+
+        # Wetterjahre für die stochastische Auslegung: Bedarf, Einspeiseprofil und Netzbezugspreis je Jahr wie oben gebildet
+        weather_years = [WeatherYear(data_year, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                                     feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_profile_eur_per_mwh, weather_year_probabilities.get(data_year))]
+        for year, year_filename in (weather_year_files.items() if use_stochastic_sizing else []):
+            year_timesteps = int((datetime.datetime(year + 1, 1, 1) - datetime.datetime(year, 1, 1)).days * 24 / time_resolution_hours)
+            year_pv, year_wind, year_info = load_yield_profiles(year_filename, use_cache=use_input_cache)
+            if year_info['num_rows'] != year_timesteps:
+                raise ValueError(f"Wetterjahr {year}: Anzahl Zeilen in '{year_filename}' ({year_info['num_rows']}) passt nicht zum Kalenderjahr ({year_timesteps}).")
+            year_tariff = feed_in_tariff_profile(year_timesteps, feed_in_tariff_eur_per_mwh, negative_price_hours, time_resolution_hours)
+            year_price = np.full(year_timesteps, float(grid_purchase_price_eur_per_mwh))
+            if year in weather_year_price_files:
+                year_price, year_tariff, _ = load_price_profiles(weather_year_price_files[year], year_timesteps, time_resolution_hours, price_column,
+                                                                export_price_column, import_price_surcharge_eur_per_mwh, grid_connection_limit_mw)
+            weather_years.append(WeatherYear(year, year_pv, year_wind, np.full(year_timesteps, demand_per_timestep_mwh), year_tariff, year_price,
+                                             weather_year_probabilities.get(year)))
+            print(f"Wetterjahr {year} aus '{year_filename}': {year_timesteps} Zeitschritte, Ertrag PV={np.sum(year_pv):.2f} MWh/MWp, "
+                  f"Wind={np.sum(year_wind):.2f} MWh/MW")
+
+    except FileNotFoundError as e: print(f"FEHLER: {e}"); return 1
+    except ImportError: print("FEHLER: Benötigte Bibliotheken ('pandas', 'openpyxl') fehlen. Bitte installieren."); return 1
+    except ValueError as e: print(f"FEHLER bei der Datenverarbeitung: {e}"); return 1
+    except Exception as e: print(f"FEHLER beim Laden/Verarbeiten der Excel-Datei: {e}"); return 1
+
+    # --- 3. Annuitätenfaktor berechnen ---
+    run_log.begin("3_annuitaeten")
+    # Funktion annuity_factor (unverändert) liegt in lp_matrix.py, damit auch der Szenario-Lauf (scenario_runner.py) sie nutzen kann
+
+    af_pv_wind, af_battery = params.annuity_factors()
+    print(f"\nAnnuitätsfaktor PV/Wind (r={discount_rate:.1%}, n={lifetime_pv_wind_years}): {af_pv_wind:.4f}")
+    print(f"Annuitätsfaktor Batterie (r={discount_rate:.1%}, n={lifetime_battery_years}): {af_battery:.4f}")
+
+    # --- 4. Optimierungsproblem definieren ---
+    run_log.begin("4_modellaufbau")
+    print("\n--- Definiere Optimierungsmodell ---")
+    # Das Modell wird direkt in Matrixform aufgebaut (lp_matrix.py), statt >210k PuLP-Nebenbedingungen in einer Schleife anzulegen.
+    # Variablen (verwenden das angepasste num_timesteps): Kapazitäten PV/Wind/Batterie (MWh, MW) sowie je Zeitschritt
+    # Netzbezug, Netzeinspeisung, Abregelung, Batterieladung, Batterieentladung und SoC (t=0 bis t=num_timesteps)
+
+    # Zielfunktion (Kosten sind weiterhin "pro Jahr", basierend auf Annuitäten)
+    # Die Betriebsoptimierung minimiert jedoch die Kosten/Erlöse über die tatsächliche Periode (366 Tage)
+    # Zielfunktion: Annualisierte Investitions- und Fixkosten + Betriebskosten (Netzbezug) der Periode - Betriebserlöse (Einspeisung) der Periode
+    # WICHTIG: Diese Mischung ist üblich, kann aber zu leichten Inkonsistenzen führen, wenn man z.B. LCOE berechnet.
+    # Wir bleiben bei der üblichen Methode: Ann. CAPEX/OPEX + Perioden-Netzkosten/-erlöse
+    # Batterie: CAPEX bezogen auf die Leistung (MW), OPEX bezogen auf die Energiekapazität (MWh)
+    capacity_costs = params.capacity_costs()
+
+    # Nebenbedingungen (je Zeitschritt): Energiebilanz, SoC-Update mit sqrt(Wirkungsgrad), Lade-/Entladeleistung <= P*dt,
+    # SoC_min*E <= SoC <= E (auch für t = num_timesteps) und zyklische Randbedingung SoC(Ende) = SoC(Anfang)
+    # Modell-Cache (model_cache.py): Bei gleicher Struktur (Ertragsprofile, Wirkungsgrad, Mindest-SoC, Zeitauflösung) wird das LP aus
+    # '<Excel-Datei>.cache/' geladen und nur Zielfunktion, Bedarf und Anschlussleistung neu gesetzt; mit HiGHS startet die Lösung
+    # aus der Basis des letzten Laufs (z.B. nach Änderung von discount_rate oder CAPEX).
+    use_model_cache = True
+    sizing_lp, model_cache_info = build_model(params, inputs, cache_directory(excel_filename) if use_model_cache else None)
+    if model_cache_info is not None:
+        print(f"Modell-Cache: {'Modell geladen' if model_cache_info['source'] == 'cache' else 'Modell aufgebaut und gespeichert'} "
+              f"(Schlüssel {model_cache_info['key'][:16]}).")
+    run_log.record("model", **lp_size(sizing_lp), num_timesteps=num_timesteps, cache=model_cache_info["source"] if model_cache_info else None)
+    print(f"Modell definiert: {sizing_lp.num_variables} Variablen, {sizing_lp.A_eq.shape[0] + sizing_lp.A_ub.shape[0]} Nebenbedingungen.")
+
+    # Zeitliche Aggregation (optional, für frühe Studien): Auslegung über k typische Perioden statt über alle Zeitschritte.
+    # Der Speicher wird über alle Perioden in ihrer Reihenfolge verknüpft; anschließend wird der Betrieb mit den so bestimmten
+    # Kapazitäten in voller Auflösung berechnet (Grundlage für Abschnitt 6).
+    use_temporal_aggregation = False
+    aggregation_period_days = 1      # Länge einer Periode: 1 = typische Tage, 7 = typische Wochen
+    aggregation_num_periods = 24     # Anzahl typischer Perioden (k)
+    aggregation_method = "kmedoids"  # "kmedoids" (reale Perioden) oder "kmeans" (Mittelwert der Gruppe)
+    aggregation_compare_full = False # Zusätzlich mit voller Auflösung lösen und Abweichung ausgeben (hebt den Zeitvorteil auf)
+    dispatch_window_days = None      # Betrieb mit festen Kapazitäten rollierend in Fenstern lösen (z.B. 7; None = ein LP über den ganzen Zeitraum)
+    dispatch_lookahead_days = 1      # Vorausschau je Fenster (wird gelöst, aber nicht übernommen)
+    if use_temporal_aggregation:
+        period_clustering = cluster_periods([specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh, feed_in_tariff_profile_eur_per_mwh,
+                                            grid_purchase_price_profile_eur_per_mwh],
+                                            int(aggregation_period_days * 24 / time_resolution_hours), aggregation_num_periods, method=aggregation_method)
+        aggregated_lp = build_aggregated_sizing_lp(period_clustering, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                                                   feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_profile_eur_per_mwh, capacity_costs,
+                                                   charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours)
+        set_grid_connection_limit(aggregated_lp, grid_connection_limit_mw, time_resolution_hours)
+        print(f"Aggregiertes Modell ({aggregation_num_periods} typische Perioden à {aggregation_period_days} Tag(e), {aggregation_method}): "
+              f"{aggregated_lp.num_variables} Variablen, {aggregated_lp.A_eq.shape[0] + aggregated_lp.A_ub.shape[0]} Nebenbedingungen "
+              f"({sizing_lp.num_variables / aggregated_lp.num_variables:.1f}x weniger Variablen).")
+        print(f"  Rekonstruktionsfehler (RMSE): PV {period_clustering.profile_rmse(specific_yield_pv_mwh_per_mw):.4f} MWh/MW, "
+              f"Wind {period_clustering.profile_rmse(specific_yield_wind_mwh_per_mw):.4f} MWh/MW")
+
+    # Benders-Zerlegung (optional, für mehrjährige Zeitreihen): Master über die vier Kapazitäten, Betrieb in Fenstern mit
+    # festem Start-/End-SoC (parallel, je Fenster ein kleines LP). Liefert dieselbe Lösung wie das Gesamtmodell (bis auf benders_tolerance).
+    use_benders_decomposition = False
+    benders_window_days = 28  # Länge eines Betriebsfensters (z.B. 7 = Wochen, 28 = vier Wochen)
+    benders_tolerance = 1e-4  # Relative Lücke zwischen bester Lösung und Master-Schranke
+    benders_num_workers = None # Prozesse für die Fenster (None = alle Kerne)
+
+    # --- 5. Optimierung lösen ---
+    run_log.begin("5_optimierung")
+    # Solver-Backend: "highs" (HiGHS im Speicher über scipy), "highspy" (HiGHS direkt, optional) oder "cbc" (Fallback: PuLP/CBC über LP-Datei)
+    solver_backend = "highs"
+    solver_method = "simplex" # "simplex" (duales Simplex) oder "ipm" (Innere-Punkte-Verfahren, bei CBC: CLP-Barrier)
+    # Solver-Profil (solver_backend.SOLVER_PROFILES): "default", "dual_simplex", "barrier", "barrier_no_crossover", "barrier_fast",
+    # "no_presolve", "time_limited"; legt Verfahren, Threads, Zeitlimit, Presolve, Crossover und Toleranz fest
+    solver_profile = "default"
+    solver_profile_comparison = [] # Zusätzlich das Auslegungs-LP mit diesen Profilen lösen und als Tabelle vergleichen, z.B. ["default", "barrier", "barrier_fast"]
+    solver_method = resolve_profile(solver_profile).get("method", solver_method)
+    run_log.settings.update(solver_backend=solver_backend, solver_method=solver_method, solver_profile=solver_profile)
+    print(f"\n--- Starte Optimierung ({num_timesteps} Zeitschritte / {days_in_period} Tage, Solver: {solver_backend}/{solver_method}) ---")
+    start_time = datetime.datetime.now()
+    try: # RuntimeError: Teilproblem der Zerlegung bzw. Fenster des rollierenden Betriebs nicht lösbar
+        if use_temporal_aggregation:
+            aggregated_solution = solve_lp(aggregated_lp, backend=solver_backend, method=solver_method, msg=True, profile=solver_profile)
+            print(f"Aggregiertes Modell gelöst ({aggregated_solution.status}) in {aggregated_solution.solve_seconds:.2f} s. Betrieb in voller Auflösung mit festen Kapazitäten...")
+            aggregated_caps = capacity_values(aggregated_lp, aggregated_solution.x) if aggregated_solution.status == 'Optimal' else np.zeros(4)
+            solution = full_resolution_dispatch(aggregated_caps, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                                                feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_profile_eur_per_mwh, capacity_costs,
+                                                charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                                                backend=solver_backend, method=solver_method,
+                                                window_steps=int(dispatch_window_days * 24 / time_resolution_hours) if dispatch_window_days else None,
+                                                lookahead_steps=int(dispatch_lookahead_days * 24 / time_resolution_hours),
+                                                grid_connection_limit_mw=grid_connection_limit_mw,
+                                                initial_soc_mwh=aggregated_initial_soc(aggregated_lp, aggregated_solution.x) if aggregated_solution.status == 'Optimal' else None)
+            if aggregated_solution.status != 'Optimal': solution.status = aggregated_solution.status # Ohne Auslegung keine gültigen Ergebnisse
+            if aggregation_compare_full and aggregated_solution.status == 'Optimal':
+                full_solution = solve_lp(sizing_lp, backend=solver_backend, method=solver_method)
+                if full_solution.status == 'Optimal':
+                    aggregation_error_report(capacity_values(sizing_lp, full_solution.x), full_solution.objective, aggregated_caps,
+                                             aggregated_solution.objective, solution.objective)
+        elif use_stochastic_sizing:
+            stochastic_result = solve_stochastic_sizing(weather_years, capacity_costs, charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv,
+                                                        battery_soc_min_percent, time_resolution_hours, grid_connection_limit_mw=grid_connection_limit_mw,
+                                                        decompose=stochastic_decompose, window_steps=int(benders_window_days * 24 / time_resolution_hours),
+                                                        backend=solver_backend, method=solver_method, num_workers=benders_num_workers,
+                                                        **({"tolerance": benders_tolerance} if stochastic_decompose else {"msg": True}))
+            print(f"Stochastische Auslegung über {len(weather_years)} Wetterjahre: {stochastic_result.status}, "
+                  f"erwartete Kosten {stochastic_result.expected_cost:,.2f} €/Jahr in {stochastic_result.solve_seconds:.1f} s")
+            print(stochastic_result.year_costs.to_string(float_format=lambda v: f"{v:,.2f}"))
+            cost_spread = stochastic_result.cost_spread()
+            print(f"Kosten je Jahr bei gemeinsamen Kapazitäten: {cost_spread['min_eur']:,.2f} € bis {cost_spread['max_eur']:,.2f} € "
+                  f"(Spannweite {cost_spread['range_eur']:,.2f} €, Standardabweichung {cost_spread['std_eur']:,.2f} €, ungünstigstes Jahr {cost_spread['worst_year']})")
+            # Abschnitt 6 wertet den Betrieb des Datenjahres mit den gemeinsamen Kapazitäten aus
+            solution = LPSolution(status=stochastic_result.status, objective=float(stochastic_result.year_costs.loc[str(data_year), "total_cost_eur"]),
+                                  x=stochastic_result.x[str(data_year)], backend=solver_backend, method=solver_method,
+                                  solve_seconds=stochastic_result.solve_seconds)
+        elif use_benders_decomposition:
+            solution, benders_history = benders_sizing(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                                                       feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_profile_eur_per_mwh, capacity_costs,
+                                                       charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                                                       window_steps=int(benders_window_days * 24 / time_resolution_hours),
+                                                       grid_connection_limit_mw=grid_connection_limit_mw, tolerance=benders_tolerance,
+                                                       backend=solver_backend, method=solver_method, num_workers=benders_num_workers)
+            print(f"Benders-Zerlegung: {solution.status} nach {len(benders_history)} Iterationen in {solution.solve_seconds:.1f} s.")
+        else: # Mit Modell-Cache und HiGHS-Simplex: Warmstart aus der gespeicherten Basis; msg=True zeigt Solver-Output
+            solution = solve_model(sizing_lp, backend=solver_backend, method=solver_method, profile=solver_profile, cache_info=model_cache_info, msg=True)
+    except RuntimeError as e: print(f"FEHLER bei der Optimierung: {e}"); return 1
+    end_time = datetime.datetime.now()
+    print(f"Optimierung abgeschlossen. Dauer: {end_time - start_time}")
+    run_log.record("solver", **solution_metrics(solution))
+    if solver_profile_comparison:
+        run_log.begin("5_profilvergleich")
+        import pandas as pd
+        print("\n--- Vergleich der Solver-Profile (Auslegungs-LP) ---")
+        profile_rows = compare_profiles(sizing_lp, solver_profile_comparison, backend="highspy" if highspy is not None else "highs")
+        print(pd.DataFrame(profile_rows).set_index("profile").to_string(float_format=lambda v: f"{v:.6g}"))
+        run_log.record("profile_comparison", rows=profile_rows)
+
+    # --- 6. Ergebnisse ausgeben ---
+    run_log.begin("6_auswertung")
+    print("\n--- Optimierungsergebnisse ---")
+    print(f"Status: {solution.status}")
+    opt_pv_mw = 0; opt_wind_mw = 0; opt_batt_mwh = 0; opt_batt_mw = 0; opt_total_cost = np.inf
+
+    if solution.status == 'Optimal':
+        # Kapazitäten, Kostenaufschlüsselung, Energiebilanz, LCOE und Grenzkosten der Lösung (sizing_pipeline.evaluate)
+        sizing_result = evaluate(params, inputs, sizing_lp, solution)
+        opt_pv_mw = sizing_result.capacities["pv_capacity_mw"]; opt_wind_mw = sizing_result.capacities["wind_capacity_mw"]
+        opt_batt_mwh = sizing_result.capacities["battery_capacity_mwh"]; opt_batt_mw = sizing_result.capacities["battery_power_mw"]
+        opt_total_cost = solution.objective # Dies sind die *annualisierten* Systemkosten + *Perioden*-Netzkosten/-Erlöse
+
+        print(f"\nOptimale Kapazitäten:")
+        print(f"  PV Leistung: {opt_pv_mw:.2f} MWp"); print(f"  Wind Leistung: {opt_wind_mw:.2f} MW")
+        print(f"  Batterie Energie: {opt_batt_mwh:.2f} MWh"); print(f"  Batterie Leistung: {opt_batt_mw:.2f} MW")
+        if opt_wind_mw > 1e-3: print(f"  -> Hinweis Wind: Entspricht ideal {opt_wind_mw / 6.8:.2f} Anlagen á 6.8 MW.") # Beispielrechnung
+
+        battery_soc_values = sizing_result.view("battery_soc") # Länge num_timesteps + 1
+        # Energiebilanz, Netzkosten/-erlöse und Kennzahlen der Periode (vektorisiert aus den Sichten)
+        kpis = sizing_result.kpis; flow_cube = sizing_result.cube # Summen der Flüsse kommen aus flow_cube (lp_results.flow_cube)
+
+        # Kosten / Erlöse (annualisierte CAPEX/OPEX je Technologie)
+        costs = sizing_result.costs
+        capex_pv_annual = costs["capex_pv"]; opex_pv_annual = costs["opex_pv"]
+        capex_wind_annual = costs["capex_wind"]; opex_wind_annual = costs["opex_wind"]
+        capex_batt_annual = costs["capex_battery"]; opex_batt_annual = costs["opex_battery"]
+
+        opt_annualized_capex = costs["annualized_capex"]
+        opt_total_annual_opex = costs["annual_opex"]
+
+        # Netzinteraktion für die *gesamte Periode* (366 Tage)
+        opt_total_grid_import_cost_period = kpis["grid_import_cost"]
+        opt_total_feed_in_revenue_period = kpis["feed_in_revenue"] # Verwendet das Profil
+
+        # Gesamtkosten aus Zielwert (Kontrolle)
+        calculated_total_cost = opt_annualized_capex + opt_total_annual_opex + opt_total_grid_import_cost_period - opt_total_feed_in_revenue_period
+
+        print(f"\nKosten und Erlöse (annualisiert bzw. für die {days_in_period}-Tage-Periode):")
+        print(f"  Gesamtkosten (Zielwert): {opt_total_cost:,.2f} €")
+        print(f"    - Ann. CAPEX: {opt_annualized_capex:,.2f} € (PV: {capex_pv_annual:,.0f}, Wind: {capex_wind_annual:,.0f}, Batt: {capex_batt_annual:,.0f})")
+        print(f"    - Ann. OPEX: {opt_total_annual_opex:,.2f} € (PV: {opex_pv_annual:,.0f}, Wind: {opex_wind_annual:,.0f}, Batt: {opex_batt_annual:,.0f})")
+        print(f"    - Netzbezugskosten (Periode): {opt_total_grid_import_cost_period:,.2f} €")
+        print(f"    - Einspeiseerlöse (Periode): {opt_total_feed_in_revenue_period:,.2f} €")
+        print(f"  -> Kontrollsumme: {calculated_total_cost:,.2f} € {'(OK)' if abs(opt_total_cost - calculated_total_cost) < 1 else '(Abweichung!)'}")
+
+        # Vergleich: Regelbasierter Betrieb (ohne Optimierung) derselben Anlagen -> obere Schranke der Betriebskosten
+        opt_residual_load = demand_profile_mwh - specific_yield_pv_mwh_per_mw * opt_pv_mw - specific_yield_wind_mwh_per_mw * opt_wind_mw
+        greedy_result = greedy_dispatch(opt_residual_load, feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_profile_eur_per_mwh, opt_batt_mwh, opt_batt_mw,
+                                        charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                                        grid_connection_limit_mw=grid_connection_limit_mw)
+        opt_operational_cost_period = opt_total_grid_import_cost_period - opt_total_feed_in_revenue_period
+        print(f"  Betriebskosten (Periode): LP-Optimum {opt_operational_cost_period:,.2f} €, regelbasierter Betrieb (obere Schranke) "
+              f"{greedy_result['operational_cost']:,.2f} € (+{greedy_result['operational_cost'] - opt_operational_cost_period:,.2f} €)")
+
+
+        # Zeitreihenwerte und Gesamtwerte für die PERIODE (366 Tage)
+        actual_pv_gen_profile = specific_yield_pv_mwh_per_mw * opt_pv_mw; actual_wind_gen_profile = specific_yield_wind_mwh_per_mw * opt_wind_mw
+
+        total_pv_gen_period = kpis["total_pv_gen"]; total_wind_gen_period = kpis["total_wind_gen"]; total_generation_period = kpis["total_generation"]
+        total_grid_import_period = kpis["total_grid_import"]; total_grid_export_period = kpis["total_grid_export"]; total_curtailment_period = kpis["total_curtailment"]
+        total_battery_charge_period = kpis["total_battery_charge"]; total_battery_discharge_period = kpis["total_battery_discharge"]
+
+        print(f"\nEnergiebilanz (für Analyseperiode von {num_timesteps} Zeitschritten / {days_in_period} Tagen):")
+        print(f"  Gesamtbedarf (Periode): {total_demand_period:,.2f} MWh"); print(f"  Gesamte PV Erzeugung (Periode): {total_pv_gen_period:,.2f} MWh"); print(f"  Gesamte Wind Erzeugung (Periode): {total_wind_gen_period:,.2f} MWh")
+        print(f"  Gesamte Erzeugung (PV+Wind, Periode): {total_generation_period:,.2f} MWh"); print(f"  Gesamter Netzbezug (Periode): {total_grid_import_period:,.2f} MWh"); print(f"  Gesamte Netzeinspeisung (Periode): {total_grid_export_period:,.2f} MWh")
+        print(f"  Gesamte Abregelung (Periode): {total_curtailment_period:,.2f} MWh"); print(f"  Gesamte Batterieladung (Periode): {total_battery_charge_period:,.2f} MWh"); print(f"  Gesamte Batterieentladung (Periode): {total_battery_discharge_period:,.2f} MWh")
+
+        # Bilanz-Check über die Periode
+        total_sources = kpis["total_sources"]; total_sinks = kpis["total_sinks"]
+        # Berücksichtige Batterie-SoC-Änderung (sollte nahe 0 sein wegen zyklischer Bedingung)
+        soc_diff = kpis["soc_diff"]
+        # Korrigierte Bilanz: Quellen = Senken + SoC-Änderung (wenn SoC steigt, ist es eine "Senke")
+        # Oder: Quellen - Senken = SoC-Änderung
+        balance_diff = kpis["balance_diff"]
+        print(f"  -> Bilanz-Check: Quellen={total_sources:,.2f} MWh, Senken={total_sinks:,.2f} MWh")
+        print(f"     SoC-Änderung (Ende-Anfang): {soc_diff:,.4f} MWh")
+        print(f"     Differenz (Quellen-Senken): {balance_diff:,.4f} MWh {'(OK)' if abs(balance_diff - soc_diff) < 1 else '(Abweichung!)'}")
+
+
+        # --- Grenzkosten der Versorgung (Dualwerte der Energiebilanz) ---
+        balance_duals = sizing_result.marginal_cost
+        if balance_duals is not None:
+            print(f"\nGrenzkosten der Versorgung (Dualwert der Energiebilanz): Mittel {np.mean(balance_duals):.2f} €/MWh, "
+                  f"Min {np.min(balance_duals):.2f} €/MWh, Max {np.max(balance_duals):.2f} €/MWh")
+
+        # --- LCOE Gesamt (bezogen auf Bedarf der Periode) ---
+        print("\nLevelized Cost of Energy (LCOE):")
+        # Verwende die annualisierten Gesamtkosten (CAPEX+OPEX) und teile sie durch den *jährlichen* Bedarf
+        # Annahme: Der Bedarf der Periode (366 Tage) entspricht ungefähr dem Jahresbedarf (Skalierung auf Standardjahr)
+        # LCOE Gesamtsystem: Annualisierte Kosten + (Perioden-Netzkosten - Perioden-Erlöse) * Skalierungsfaktor
+        lcoe_generation_eur_per_mwh, lcoe_system_annual_approx = sizing_result.lcoe_generation, sizing_result.lcoe_system
+        if lcoe_generation_eur_per_mwh is not None:
+             print(f"  LCOE (nur Erzeugung+Speicher CAPEX/OPEX / Jahresbedarf approx.): {lcoe_generation_eur_per_mwh:.2f} €/MWh")
+             print(f"  LCOE Gesamtsystem (alle ann. Kosten inkl. Netz approx. / Jahresbedarf approx.): {lcoe_system_annual_approx:.2f} €/MWh")
+             print(f"  (Vergleich: mittlerer Netzbezugspreis = {np.mean(grid_purchase_price_profile_eur_per_mwh):.2f} €/MWh)")
+        else: print("  LCOE: nicht berechenbar (Bedarf ist Null).")
+
+
+        # --- Autarkiegrad etc. (bezogen auf die Periode von 366 Tagen) ---
+        # Autarkiegrad = (Bedarf - Netzbezug) / Bedarf, EE-Deckungsrate = (PV-Erzeugung + Wind-Erzeugung) / Bedarf
+        self_sufficiency_rate = kpis["self_sufficiency_rate"]; renewable_coverage_rate = kpis["renewable_coverage_rate"]
+        print(f"\nAutarkiegrad (Periode {days_in_period} Tage): {self_sufficiency_rate:.2f}%"); print(f"Erneuerbare Deckungsrate (Periode {days_in_period} Tage): {renewable_coverage_rate:.2f}%")
+
+        # Monatsübersicht aus den Monatssummen (flow_cube: Tages-/Wochen-/Monatswerte aller Flüsse, einmal berechnet für
+        # Konsole, Diagramme 2/3 und Excel-Export)
+        print("\nMonatsübersicht (MWh, SoC-Mittel in % der Batteriekapazität):")
+        print(f"  {'Monat':<8} {'Bedarf':>9} {'PV':>9} {'Wind':>9} {'Netzbezug':>10} {'Einspeisung':>12} {'Abregelung':>11} {'Entladung':>10} {'SoC':>6}")
+        for k, month_start in enumerate(np.datetime_as_string(flow_cube.starts["month"], unit="M")):
+            month = {name: flow_cube.flow(name, "month")[k] for name in ("demand", "pv_gen", "wind_gen", "grid_import", "grid_export", "curtailment", "battery_discharge")}
+            soc_mean_percent = flow_cube.soc["month"][1][k] / opt_batt_mwh * 100 if opt_batt_mwh > 1e-3 else 0.0
+            print(f"  {month_start:<8} {month['demand']:>9,.1f} {month['pv_gen']:>9,.1f} {month['wind_gen']:>9,.1f} {month['grid_import']:>10,.1f} "
+                  f"{month['grid_export']:>12,.1f} {month['curtailment']:>11,.1f} {month['battery_discharge']:>10,.1f} {soc_mean_percent:>5.1f}%")
+
+        # --- Diagramme ---
+        run_log.begin("6_diagramme")
+        print("\n--- Erstelle Diagramme ---")
+        # Diagrammfunktionen in result_plots.py (matplotlib wird erst hier importiert)
+        plot_workers = 4       # Diagramme parallel in Worker-Prozessen rendern (Agg); 1 = nacheinander in diesem Prozess
+        plot_decimation = True # Zeitreihen (Diagramme 1 und 4) auf Min/Max je Pixelspalte ausdünnen statt alle Punkte zu zeichnen
+
+        # Zeitachse für Plots einmal erstellen (für 366 Tage); die SoC-Zeitachse hat einen Punkt mehr (t=0 bis t=num_timesteps)
         try:
-            # Zeitachse für SoC (hat einen Punkt mehr: t=0 bis t=num_timesteps)
-            start_date_soc = datetime.datetime(2024, 1, 1)
-            soc_time_freq = pd.Timedelta(hours=time_resolution_hours)
-            soc_time_index = pd.date_range(start_date_soc, periods=num_timesteps + 1, freq=soc_time_freq) # Korrekte Länge
-
-            battery_soc_percent = (np.array(battery_soc_values) / opt_batt_mwh) * 100
-            plt.figure(figsize=(15, 6)); plt.plot(soc_time_index, battery_soc_percent, label='Batterie SoC (%)', color='purple', linewidth=0.7)
-            plt.axhline(battery_soc_min_percent * 100, color='red', linestyle='--', linewidth=0.8, label=f'Min SoC ({battery_soc_min_percent:.0%})')
-            plt.axhline(100, color='grey', linestyle='--', linewidth=0.8, label='Max SoC (100%)')
-            # *** ANGEPASST: Titel und Dateiname ***
-            plt.title(f'Batterie Ladezustand (SoC) über die Analyseperiode ({days_in_period} Tage)'); plt.xlabel('Datum'); plt.ylabel('Ladezustand (SoC) [%]')
-            plt.ylim(-5, 105); plt.grid(True, linestyle=':', alpha=0.6); plt.legend(loc='best'); plt.tight_layout()
-            soc_plot_filename = f"batterie_soc_{days_in_period}tage.png"; plt.savefig(soc_plot_filename); print(f"  Diagramm '{soc_plot_filename}' gespeichert.")
-            plt.close() # Schließt die Figur
-        except ZeroDivisionError: print("  Fehler: Batteriekapazität ist Null (sollte durch obige Prüfung nicht passieren).")
-        except Exception as e: print(f"  Fehler beim Erstellen des Batterie SoC-Diagramms: {e}")
-    else: print("  Keine Batterie im Optimum, SoC-Diagramm wird nicht erstellt.")
-
-    # --- Excel-Datei mit Ergebnissen ---
-    # *** ANGEPASST: Dateiname ***
-    print(f"\nErstelle Excel-Datei mit 15-Minuten-Intervall-Daten für {days_in_period} Tage...")
-    try:
-        # Zeitindex für Excel (Länge num_timesteps)
-        if isinstance(time_index_plot, pd.DatetimeIndex): # Prüfe ob Zeitindex korrekt erstellt wurde
-             time_index_excel = time_index_plot
-        else: # Fallback, falls time_index_plot nur ein RangeIndex ist
-            start_date_excel = datetime.datetime(2024, 1, 1)
-            time_index_excel = pd.date_range(start_date_excel, periods=num_timesteps, freq=pd.Timedelta(hours=time_resolution_hours))
-
-        # Eigenverbrauch berechnen: Min(Bedarf, Lokale Erzeugung + Batterieentladung)
-        # Oder einfacher: Bedarf - Netzbezug (wenn positiv)
-        self_consumption_values = np.maximum(0, demand_profile_mwh - grid_import_values)
-
-        excel_data = {
-            'Timestamp': time_index_excel, 'Bedarf (MWh)': demand_profile_mwh, 'PV Erzeugung (MWh)': actual_pv_gen_profile,
-            'Wind Erzeugung (MWh)': actual_wind_gen_profile, 'Netzbezug (MWh)': grid_import_values, 'Netzeinspeisung (MWh)': grid_export_values,
-            'Abregelung (MWh)': curtailment_values, 'Batterie Ladung (MWh)': battery_charge_values, 'Batterie Entladung (MWh)': battery_discharge_values,
-            'Batterie SoC (MWh)': battery_soc_values[:-1], # SoC am *Anfang* des Timesteps t
-            'Eigenverbrauch (MWh)': self_consumption_values
-             }
-        df_export = pd.DataFrame(excel_data)
-        excel_filename_out = f"energiebilanz_15min_{days_in_period}tage.xlsx" # Name angepasst
-        df_export.to_excel(excel_filename_out, index=False, engine='openpyxl'); print(f"Excel-Datei '{excel_filename_out}' erfolgreich erstellt.")
-        try: print(f"Pfad: {os.path.abspath(excel_filename_out)}")
-        except Exception: print("Konnte absoluten Pfad nicht bestimmen.")
-    except ImportError: print("\nFEHLER: 'openpyxl' fehlt. Excel-Export nicht möglich. Bitte installieren: pip install openpyxl")
-    except Exception as e: print(f"Fehler beim Erstellen der Excel-Datei: {e}")
-
-    # --- 7. Visualisierung der Kostenlandschaft (optional, kann lange dauern) ---
-    # Diese Sektion bleibt funktional gleich, verwendet aber die optimalen Batterieparameter
-    # aus der 366-Tage-Optimierung als Fixpunkt. Die Berechnungsschleife läuft weiterhin
-    # über die 366 Tage (num_timesteps = 35136).
-    create_cost_landscape = False # Standardmäßig AUS, da sehr rechenintensiv
-    if create_cost_landscape:
-        print("\n--- Erstelle Visualisierung der Kostenlandschaft (PV/Wind bei opt. Batterie) ---")
-        print(f"Hinweis: Verwendet feste Batteriegröße (MWh={opt_batt_mwh:.1f}, MW={opt_batt_mw:.1f}) aus Hauptoptimierung.")
-        print("ACHTUNG: Dies kann SEHR lange dauern! Ggf. 'pv_steps' und 'wind_steps' reduzieren.")
-
+            soc_time_index = inputs.time_index(num_timesteps + 1)
+            time_index_plot = soc_time_index[:-1]
+        except Exception as e:
+            print(f"FEHLER beim Erstellen des Zeitindex für Plots: {e}")
+            # Fallback: Einfacher Zahlenindex
+            soc_time_index = range(num_timesteps + 1); time_index_plot = range(num_timesteps)
+
+        # Je Diagramm: (Bezeichnung für Fehlermeldungen, Funktion, Argumente); Zeitreihen-Diagramme nutzen dieselbe Zeitachse,
+        # monatliche und tägliche Erzeugung die Monats-/Tagessummen aus flow_cube (kein eigenes Resampling)
+        plot_jobs = [("Lastprofil/Erzeugungs-Diagramms", result_plots.plot_generation_profile,
+                      (time_index_plot, demand_profile_mwh, actual_pv_gen_profile, actual_wind_gen_profile, opt_pv_mw, opt_wind_mw, days_in_period,
+                       time_resolution_hours, f"lastprofil_reale_erzeugung_{days_in_period}tage.png", plot_decimation)),
+                     ("monatlichen Erzeugungsdiagramms", result_plots.plot_monthly_generation,
+                      (flow_cube, days_in_period, f"monatliche_erzeugung_pv_wind_{days_in_period}tage.png")),
+                     ("täglichen Erzeugungs-Liniendiagramms", result_plots.plot_daily_generation,
+                      (flow_cube, opt_pv_mw, opt_wind_mw, days_in_period, f"taegliche_erzeugung_pv_wind_{days_in_period}tage.png"))]
+        if opt_batt_mwh > 1e-3: # Nur wenn Batteriekapazität > 0
+            plot_jobs.append(("Batterie SoC-Diagramms", result_plots.plot_battery_soc,
+                              (soc_time_index, battery_soc_values, opt_batt_mwh, battery_soc_min_percent, days_in_period,
+                               f"batterie_soc_{days_in_period}tage.png", plot_decimation)))
+        else: print("Keine Batterie im Optimum, SoC-Diagramm wird nicht erstellt.")
+
+        print(f"Erstelle {len(plot_jobs)} Diagramme...")
+        plot_results = result_plots.render_plots([(function, args) for _, function, args in plot_jobs], num_workers=plot_workers)
+        for (label, _, _), (plot_filename, plot_error) in zip(plot_jobs, plot_results):
+            if plot_error is None: print(f"Diagramm '{plot_filename}' gespeichert.")
+            else: print(f"Fehler beim Erstellen des {label}: {plot_error}")
+
+        # --- Ergebnisdatei (Zeitreihen) ---
+        run_log.begin("6_ergebnisdatei")
+        # Blockweises Schreiben nach CSV/Parquet/HDF5 (result_sink.py); Excel nur als optionale Umwandlung am Ende
+        result_format = "parquet"  # "csv", "parquet" (benötigt pyarrow) oder "hdf5" (benötigt tables)
+        result_excel_copy = False  # Zusätzlich eine Excel-Datei erzeugen (langsam, ganze Tabelle im Speicher)
+        result_float32 = False     # Kompakte Speicherung: Zeitreihen als float32 (halbe Dateigröße, ca. 7 signifikante Stellen)
+        if result_format == "parquet" and pyarrow is None:
+            print("WARNUNG: 'pyarrow' nicht gefunden. Ergebnisse werden als CSV geschrieben."); result_format = "csv"
+        print(f"\nSchreibe 15-Minuten-Intervall-Daten für {days_in_period} Tage ({result_format})...")
         try:
-            fixed_optimal_batt_mwh = opt_batt_mwh
-            fixed_optimal_batt_mw = opt_batt_mw
-            if fixed_optimal_batt_mwh > 1e-3 and fixed_optimal_batt_mw > 1e-3: # Nur wenn Batterie sinnvoll ist
-                fixed_annual_capex_batt_opt = af_battery * ( fixed_optimal_batt_mw * specific_capex_battery_eur_per_mw)
-                fixed_annual_opex_batt_opt = fixed_optimal_batt_mwh * specific_opex_battery_eur_per_mwh_pa
-            else: # Setze Batterie auf Null, falls sie im Optimum nicht gebaut wurde
-                fixed_optimal_batt_mwh = 0
-                fixed_optimal_batt_mw = 0
-                fixed_annual_capex_batt_opt = 0
-                fixed_annual_opex_batt_opt = 0
-                print("Info: Keine optimale Batterie gefunden, Kostenlandschaft wird ohne Batterie berechnet.")
-
-            # --- Funktion zur Kostenberechnung für feste Anlagen ---
-            def calculate_total_cost_for_fixed_pv_wind_optimal_battery(fixed_pv_mw, fixed_wind_mw):
-                """ Berechnet min. Gesamtkosten für feste PV/Wind-Caps und feste (ggf. 0) Batt-Größe. Optimiert nur den Betrieb über 366 Tage. """
-
-                # Feste Kosten (unabhängig von Betriebsoptimierung)
-                capex_pv_wind = af_pv_wind * (fixed_pv_mw * specific_capex_pv_eur_per_mw + fixed_wind_mw * specific_capex_wind_eur_per_mw)
-                opex_pv_wind = fixed_pv_mw * specific_opex_pv_eur_per_mw_pa + fixed_wind_mw * specific_opex_wind_eur_per_mw_pa
-                # Batterie CAPEX/OPEX wurden schon außerhalb berechnet (fixed_annual_capex_batt_opt, fixed_annual_opex_batt_opt)
-                base_fixed_costs = capex_pv_wind + opex_pv_wind + fixed_annual_capex_batt_opt + fixed_annual_opex_batt_opt
-
-                # Modell für Betriebsoptimierung
-                op_model = pulp.LpProblem(f"OperationalOptimization_{fixed_pv_mw:.0f}PV_{fixed_wind_mw:.0f}W", pulp.LpMinimize)
-
-                # Betriebsvariablen
-                grid_import_op = pulp.LpVariable.dicts("Grid_Import_Op", timesteps, lowBound=0)
-                grid_export_op = pulp.LpVariable.dicts("Grid_Export_Op", timesteps, lowBound=0)
-                curtailment_op = pulp.LpVariable.dicts("Curtailment_Op", timesteps, lowBound=0)
-
-                # Nur Batterievariablen hinzufügen, wenn Batteriekapazität > 0
-                if fixed_optimal_batt_mwh > 1e-3 and fixed_optimal_batt_mw > 1e-3:
-                    battery_charge_op = pulp.LpVariable.dicts("Battery_Charge_Op", timesteps, lowBound=0)
-                    battery_discharge_op = pulp.LpVariable.dicts("Battery_Discharge_Op", timesteps, lowBound=0)
-                    battery_soc_op = pulp.LpVariable.dicts("Battery_SoC_Op", soc_timesteps, lowBound=0)
-                else: # Keine Batterie
-                    battery_charge_op = None
-                    battery_discharge_op = None
-                    battery_soc_op = None
-
-                # Feste Erzeugungsprofile für diesen Punkt
-                pv_gen_fixed = specific_yield_pv_mwh_per_mw * fixed_pv_mw
-                wind_gen_fixed = specific_yield_wind_mwh_per_mw * fixed_wind_mw
-
-                # Kosten der Betriebsführung (Netzinteraktion über die 366 Tage)
-                operational_grid_import_cost = pulp.lpSum(grid_import_op[t] * grid_purchase_price_eur_per_mwh for t in timesteps)
-                operational_feed_in_revenue = pulp.lpSum(grid_export_op[t] * feed_in_tariff_profile_eur_per_mwh[t] for t in timesteps) # Nutzt Profil!
-
-                # Zielfunktion: Feste ann. Kosten + Perioden-Betriebskosten - Perioden-Betriebserlöse
-                op_model += (base_fixed_costs + operational_grid_import_cost - operational_feed_in_revenue), "Total_System_Cost_Operational"
-
-                # Nebenbedingungen für den Betrieb (über 366 Tage)
-                for t in timesteps:
-                    # Energiebilanz
-                    balance = pv_gen_fixed[t] + wind_gen_fixed[t] + grid_import_op[t]
-                    if battery_discharge_op: balance += battery_discharge_op[t]
-
-                    demand_sink = demand_profile_mwh[t] + grid_export_op[t] + curtailment_op[t]
-                    if battery_charge_op: demand_sink += battery_charge_op[t]
-
-                    op_model += balance == demand_sink, f"Op_Energy_Balance_{t}"
-
-                    # Batteriebedingungen (nur wenn Batterie vorhanden)
-                    if battery_soc_op and battery_charge_op and battery_discharge_op:
-                        op_model += battery_soc_op[t+1] == battery_soc_op[t] + battery_charge_op[t] * charge_discharge_eff_sqrt - battery_discharge_op[t] * charge_discharge_eff_sqrt_inv, f"Op_Battery_SoC_Update_{t}"
-                        op_model += battery_charge_op[t] <= fixed_optimal_batt_mw * time_resolution_hours, f"Op_Battery_Charge_Power_Limit_{t}"
-                        op_model += battery_discharge_op[t] <= fixed_optimal_batt_mw * time_resolution_hours, f"Op_Battery_Discharge_Power_Limit_{t}"
-                        op_model += battery_soc_op[t] >= battery_soc_min_percent * fixed_optimal_batt_mwh, f"Op_Battery_SoC_Min_Limit_{t}"
-                        op_model += battery_soc_op[t] <= fixed_optimal_batt_mwh, f"Op_Battery_SoC_Max_Limit_{t}"
-
-                # End-SoC Bedingungen (nur wenn Batterie vorhanden)
-                if battery_soc_op:
-                    op_model += battery_soc_op[num_timesteps] >= battery_soc_min_percent * fixed_optimal_batt_mwh, f"Op_Battery_SoC_Min_Limit_End"
-                    op_model += battery_soc_op[num_timesteps] <= fixed_optimal_batt_mwh, f"Op_Battery_SoC_Max_Limit_End"
-                    # Zyklische Bedingung für SoC
-                    op_model += battery_soc_op[num_timesteps] == battery_soc_op[0], "Op_Battery_Cyclic_SoC"
-
-                # Lösen der Betriebsoptimierung (leiser Modus)
-                op_model.solve(solver=pulp.PULP_CBC_CMD(msg=False))
-
-                # Ergebnis zurückgeben
-                if pulp.LpStatus[op_model.status] == 'Optimal':
-                    return pulp.value(op_model.objective)
+            # Zeitstempel, Bedarf, Erzeugung, Energieflüsse, SoC am Anfang des Zeitschritts und Eigenverbrauch (Bedarf - Netzbezug)
+            result_columns = sizing_result.timeseries(inputs)
+            result_filename_out = f"energiebilanz_15min_{days_in_period}tage{FILE_EXTENSIONS[result_format]}" # Name angepasst
+            write_timeseries(result_filename_out, result_columns, fmt=result_format, dtype=np.float32 if result_float32 else None); print(f"Ergebnisdatei '{result_filename_out}' erfolgreich erstellt.")
+            try: print(f"Pfad: {os.path.abspath(result_filename_out)}")
+            except Exception: print("Konnte absoluten Pfad nicht bestimmen.")
+            if result_excel_copy:
+                excel_filename_out = f"energiebilanz_15min_{days_in_period}tage.xlsx"
+                convert_to_excel(result_filename_out, excel_filename_out, fmt=result_format, aggregates=flow_cube); print(f"Excel-Datei '{excel_filename_out}' erfolgreich erstellt.")
+        except ImportError as e: print(f"\nFEHLER: Benötigtes Paket für den Ergebnisexport fehlt ({e}).")
+        except Exception as e: print(f"Fehler beim Schreiben der Ergebnisdatei: {e}")
+
+        # --- 7. Visualisierung der Kostenlandschaft (optional, kann lange dauern) ---
+        run_log.begin("7_kostenlandschaft")
+        # Diese Sektion bleibt funktional gleich, verwendet aber die optimalen Batterieparameter
+        # aus der 366-Tage-Optimierung als Fixpunkt. Die Berechnungsschleife läuft weiterhin
+        # über die 366 Tage (num_timesteps = 35136).
+        create_cost_landscape = False # Standardmäßig AUS, da rechenintensiv
+        if create_cost_landscape:
+            print("\n--- Erstelle Visualisierung der Kostenlandschaft (PV/Wind bei opt. Batterie) ---")
+            print(f"Hinweis: Verwendet feste Batteriegröße (MWh={opt_batt_mwh:.1f}, MW={opt_batt_mw:.1f}) aus Hauptoptimierung.")
+            print("ACHTUNG: Dies kann SEHR lange dauern! Ggf. 'pv_steps' und 'wind_steps' reduzieren.")
+
+            try:
+                fixed_optimal_batt_mwh = opt_batt_mwh
+                fixed_optimal_batt_mw = opt_batt_mw
+                if fixed_optimal_batt_mwh > 1e-3 and fixed_optimal_batt_mw > 1e-3: # Nur wenn Batterie sinnvoll ist
+                    fixed_annual_capex_batt_opt = af_battery * ( fixed_optimal_batt_mw * specific_capex_battery_eur_per_mw)
+                    fixed_annual_opex_batt_opt = fixed_optimal_batt_mwh * specific_opex_battery_eur_per_mwh_pa
+                else: # Setze Batterie auf Null, falls sie im Optimum nicht gebaut wurde
+                    fixed_optimal_batt_mwh = 0
+                    fixed_optimal_batt_mw = 0
+                    fixed_annual_capex_batt_opt = 0
+                    fixed_annual_opex_batt_opt = 0
+                    print("Info: Keine optimale Batterie gefunden, Kostenlandschaft wird ohne Batterie berechnet.")
+
+                # --- Betriebsmodell für feste Anlagen (wird nur einmal aufgebaut) ---
+                # Über das Raster ändern sich nur PV- und Wind-Erzeugung, also nur die rechte Seite der Energiebilanz.
+                # Jeder Punkt wird daher mit Warmstart aus der Basis des vorherigen (benachbarten) Punktes gelöst.
+                operational_lp_args = (grid_purchase_price_profile_eur_per_mwh, fixed_optimal_batt_mwh, fixed_optimal_batt_mw, charge_discharge_eff_sqrt,
+                                       charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours)
+                landscape_workers = 1 # Anzahl paralleler Prozesse (1 = sequentiell in diesem Prozess, None = alle CPU-Kerne)
+                landscape_screening = False # Vorauswahl: LP nur für Punkte, deren untere Kostenschranke unter der besten regelbasierten Lösung liegt; übrige bleiben leer (NaN)
+
+                # --- Raster definieren ---
+                pv_steps = 10   # Reduziert für schnelleren Test (Original: 15)
+                wind_steps = 10 # Reduziert für schnelleren Test (Original: 15)
+                # Dynamischere Grenzen basierend auf dem Optimum
+                max_pv_plot = max(10, opt_pv_mw * 2.0 if opt_pv_mw > 1 else 50)   # Etwas weiterer Bereich
+                max_wind_plot = max(10, opt_wind_mw * 2.0 if opt_wind_mw > 1 else 50) # Etwas weiterer Bereich
+                pv_range = np.linspace(0, max_pv_plot, pv_steps)
+                wind_range = np.linspace(0, max_wind_plot, wind_steps)
+
+                # Feste Kosten (unabhängig von Betriebsoptimierung): ann. CAPEX/OPEX PV/Wind + feste Batterie
+                pv_mesh, wind_mesh = np.meshgrid(pv_range, wind_range) # Meshgrid für die Achsen (Wind-Zeilen, PV-Spalten)
+                base_fixed_costs = capacity_costs[0] * pv_mesh + capacity_costs[1] * wind_mesh + fixed_annual_capex_batt_opt + fixed_annual_opex_batt_opt
+
+                # --- Kosten berechnen (Raster in Schlangenlinie, Warmstart) ---
+                start_time_sens = datetime.datetime.now()
+                print(f"Starte Berechnung der Kostenlandschaft ({pv_steps * wind_steps} Punkte)...")
+                if fixed_optimal_batt_mwh == 0: # Ohne Batterie: Betrieb je Zeitschritt trivial, ganzes Raster geschlossen berechnen (kein LP)
+                    op_cost_grid = no_battery_cost_landscape(pv_range, wind_range, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw,
+                                                             demand_profile_mwh, feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_profile_eur_per_mwh,
+                                                             grid_connection_limit_mw=grid_connection_limit_mw, time_resolution_hours=time_resolution_hours)
                 else:
-                    # print(f"\nWARNUNG: Betriebsoptimierung fehlgeschlagen für PV={fixed_pv_mw:.1f}, Wind={fixed_wind_mw:.1f}. Status: {pulp.LpStatus[op_model.status]}")
-                    return np.inf # Gib unendlich zurück bei Fehler
-
-            # --- Raster definieren ---
-            pv_steps = 10   # Reduziert für schnelleren Test (Original: 15)
-            wind_steps = 10 # Reduziert für schnelleren Test (Original: 15)
-            # Dynamischere Grenzen basierend auf dem Optimum
-            max_pv_plot = max(10, opt_pv_mw * 2.0 if opt_pv_mw > 1 else 50)   # Etwas weiterer Bereich
-            max_wind_plot = max(10, opt_wind_mw * 2.0 if opt_wind_mw > 1 else 50) # Etwas weiterer Bereich
-            pv_range = np.linspace(0, max_pv_plot, pv_steps)
-            wind_range = np.linspace(0, max_wind_plot, wind_steps)
-            cost_grid = np.full((wind_steps, pv_steps), np.nan) # Korrekte Dimensionen (Wind-Zeilen, PV-Spalten)
-
-            # --- Kosten berechnen (Schleife) ---
-            total_combinations = pv_steps * wind_steps
-            current_combination = 0
-            start_time_sens = datetime.datetime.now()
-            print(f"Starte Berechnung der Kostenlandschaft ({total_combinations} Punkte)...")
-
-            for i, wind_val in enumerate(wind_range):      # Schleife über Wind (Zeilenindex i)
-                for j, pv_val in enumerate(pv_range):      # Schleife über PV (Spaltenindex j)
-                    current_combination += 1
-                    # Fortschrittsanzeige (weniger häufig updaten)
-                    if current_combination % 5 == 0 or current_combination == total_combinations or current_combination == 1:
-                        now = datetime.datetime.now()
-                        elapsed = now - start_time_sens
-                        if current_combination > 1 and elapsed.total_seconds() > 1:
-                            est_total_time = elapsed * (total_combinations / current_combination)
-                            est_remaining = est_total_time - elapsed
-                            print(f"\rBerechne Kostenlandschaft: Punkt {current_combination}/{total_combinations}. Verbleibend ca.: {str(est_remaining).split('.')[0]}", end="")
-                        else:
-                            print(f"\rBerechne Kostenlandschaft: Punkt {current_combination}/{total_combinations}...", end="")
-
-                    # Kosten für diese Kombination berechnen
-                    cost = calculate_total_cost_for_fixed_pv_wind_optimal_battery(pv_val, wind_val)
-                    cost_grid[i, j] = cost # Speichern im Grid (Zeile i -> Wind, Spalte j -> PV)
-
-            end_time_sens = datetime.datetime.now()
-            print(f"\nBerechnung der Kostenlandschaft abgeschlossen. Dauer: {end_time_sens - start_time_sens}")
-
-            # --- Konturdiagramm plotten ---
-            if not np.all(np.isnan(cost_grid)) and np.any(np.isfinite(cost_grid)):
-                plt.figure(figsize=(11, 8)) # Etwas größer für bessere Lesbarkeit
-                cost_grid_mio = cost_grid / 1_000_000 # Kosten in Mio. € für bessere Skala
-
-                # Meshgrid für die Achsen erstellen
-                pv_mesh, wind_mesh = np.meshgrid(pv_range, wind_range)
-
-                # Sinnvolle Levels für die Konturen bestimmen (ignoriere unendliche Werte)
-                finite_costs = cost_grid_mio[np.isfinite(cost_grid_mio)]
-                if len(finite_costs) > 0:
-                    # Dynamische Levels: Vom Minimum bis zum 98. Perzentil, um Ausreißer abzuschneiden
-                    min_cost_plot = np.min(finite_costs)
-                    # Stelle sicher, dass max > min ist
-                    max_cost_plot = np.percentile(finite_costs, 98)
-                    if max_cost_plot <= min_cost_plot + 1e-6: # Füge kleine Toleranz hinzu
-                         max_cost_plot = np.max(finite_costs) # Fallback auf Maximum
-
-                    # Sicherstellen, dass min und max unterschiedlich sind für linspace
-                    if abs(max_cost_plot - min_cost_plot) < 1e-6:
-                         levels = [min_cost_plot] # Nur ein Level, wenn alle Kosten (fast) gleich sind
-                    else:
-                         levels = np.linspace(min_cost_plot, max_cost_plot, 15) # 15 Konturlinien
-
-                    extend_contour = 'max' if max_cost_plot < np.max(finite_costs) else 'neither' # Zeige Pfeil, wenn Werte abgeschnitten wurden
+                    points_mask = None
+                    if landscape_screening: # Schranken aus Simulation (oben) und Relaxation (unten), beide ohne LP
+                        upper_grid, lower_grid = screen_cost_landscape(pv_range, wind_range, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw,
+                                                                       demand_profile_mwh, feed_in_tariff_profile_eur_per_mwh, operational_lp_args,
+                                                                       grid_connection_limit_mw=grid_connection_limit_mw)
+                        points_mask = base_fixed_costs + lower_grid <= np.min(base_fixed_costs + upper_grid)
+                        print(f"Vorauswahl: {np.count_nonzero(points_mask)} von {points_mask.size} Punkten werden mit dem LP gelöst, "
+                              f"übrige bleiben im Diagramm leer (teurer als die beste regelbasierte Lösung).")
+                    if landscape_workers == 1:
+                        op_lp = build_operational_lp(demand_profile_mwh, feed_in_tariff_profile_eur_per_mwh, *operational_lp_args,
+                                                     grid_connection_limit_mw=grid_connection_limit_mw)
+                        landscape_solver = ParametricOperationalSolver(op_lp, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                                                                       greedy_args=(feed_in_tariff_profile_eur_per_mwh, *operational_lp_args),
+                                                                       grid_connection_limit_mw=grid_connection_limit_mw)
+                        op_cost_grid = compute_cost_landscape(landscape_solver, pv_range, wind_range, points_mask=points_mask)
+                    else: # Rasterpunkte auf Prozess-Pool verteilen, Zeitreihen liegen einmalig im Shared Memory
+                        op_cost_grid = compute_cost_landscape_parallel(pv_range, wind_range, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw,
+                                                                       demand_profile_mwh, feed_in_tariff_profile_eur_per_mwh, operational_lp_args,
+                                                                       num_workers=landscape_workers, points_mask=points_mask,
+                                                                       grid_connection_limit_mw=grid_connection_limit_mw)
+
+                cost_grid = base_fixed_costs + op_cost_grid # Zielwert: Feste ann. Kosten + Perioden-Betriebskosten - Perioden-Betriebserlöse
+
+                end_time_sens = datetime.datetime.now()
+                print(f"\nBerechnung der Kostenlandschaft abgeschlossen. Dauer: {end_time_sens - start_time_sens}")
+
+                # --- Konturdiagramm plotten ---
+                contour_filename = result_plots.plot_cost_landscape(pv_mesh, wind_mesh, cost_grid, opt_pv_mw, opt_wind_mw, opt_total_cost,
+                                                                    fixed_optimal_batt_mwh, fixed_optimal_batt_mw, days_in_period,
+                                                                    f"kostenlandschaft_optimierung_kontur_{days_in_period}tage.png")
+                if contour_filename is not None:
+                    print(f"Konturdiagramm '{contour_filename}' gespeichert.")
                 else:
-                    levels = 10 # Fallback
-                    extend_contour = 'neither'
-                    print("Warnung: Konnte keine gültigen Kosten für die Konturlevel finden.")
-
+                    print("Kostenlandschaft konnte nicht erstellt werden (keine gültigen Kosten berechnet oder alle unendlich).")
 
-                # Konturdiagramm erstellen ('contourf' für gefüllte Konturen)
-                contour = plt.contourf(pv_mesh, wind_mesh, cost_grid_mio, levels=levels, cmap='viridis_r', extend=extend_contour) #'viridis_r' (reversed) oft gut für Kosten
-
-                # Farbleiste hinzufügen
-                cbar = plt.colorbar(contour)
-                cbar.set_label('Gesamtkosten (Zielwert, Mio. €)') # Angepasst Label
-
-                # Optimum aus der Hauptoptimierung (366 Tage) hervorheben
-                plt.scatter(opt_pv_mw, opt_wind_mw, color='red', s=200, edgecolors='black', marker='*',
-                             label=f'Optimum ({opt_pv_mw:.1f} MWp PV, {opt_wind_mw:.1f} MW Wind)\nKosten: {opt_total_cost/1_000_000:.2f} Mio. €')
-
-                # Achsenbeschriftungen und Titel
-                plt.xlabel('Installierte PV-Leistung (MWp)')
-                plt.ylabel('Installierte Wind-Leistung (MW)')
-                # *** ANGEPASST: Titel und Dateiname ***
-                plt.title(f'Kostenlandschaft (PV/Wind) bei fester Batterie ({fixed_optimal_batt_mwh:.1f} MWh / {fixed_optimal_batt_mw:.1f} MW) - {days_in_period} Tage')
-
-                # Legende und Gitter
-                plt.legend(loc='upper right')
-                plt.grid(True, linestyle=':', alpha=0.6)
-                plt.tight_layout() # Passt Plot-Elemente an
+            except Exception as e:
+                print(f"\nFEHLER bei der Erstellung der Kostenlandschaft: {e}")
+                # Optional: Traceback ausgeben für detaillierte Fehlersuche
+                import traceback
+                traceback.print_exc()
+        else:
+            print("\nBerechnung der Kostenlandschaft übersprungen (create_cost_landscape = False).")
 
-                # Speichern des Diagramms
-                contour_filename = f"kostenlandschaft_optimierung_kontur_{days_in_period}tage.png"
-                plt.savefig(contour_filename)
-                print(f"Konturdiagramm '{contour_filename}' gespeichert.")
-                plt.close() # Schließt die Figur
 
-            else:
-                print("Kostenlandschaft konnte nicht erstellt werden (keine gültigen Kosten berechnet oder alle unendlich).")
+    elif solution.status != 'Optimal':
+        print(f"\nOptimierung nicht erfolgreich. Status: {solution.status}")
+        print("Keine Ergebnisse zum Plotten oder Analysieren vorhanden.")
+    else: # Sollte nicht vorkommen, wenn Status optimal war
+        print(f"Optimierung endete mit Status '{solution.status}', aber Status wurde nicht als 'Optimal' erkannt.")
 
-        except Exception as e:
-            print(f"\nFEHLER bei der Erstellung der Kostenlandschaft: {e}")
-            # Optional: Traceback ausgeben für detaillierte Fehlersuche
-            import traceback
-            traceback.print_exc()
-    else:
-        print("\nBerechnung der Kostenlandschaft übersprungen (create_cost_landscape = False).")
+    # *** ANGEPASST: Hinweis ***
+    print(f"\n**WICHTIGER HINWEIS:** Ergebnisse basieren auf realen Ertragsdaten für eine Periode von {num_timesteps} Zeitschritten ({days_in_period} Tage).")
+    print("Stelle sicher, dass die Eingabe-Excel-Datei diesen Zeitraum korrekt abdeckt.")
 
+    # Alle erstellten Plots anzeigen (falls interaktive Session)
+    # plt.show() # In vielen Umgebungen (wie Skripten) nicht nötig, da Plots gespeichert werden.
+    #            # Kann auskommentiert bleiben oder entfernt werden, wenn die gespeicherten Dateien reichen.
 
-elif pulp.LpStatus[model.status] != 'Optimal':
-    print(f"\nOptimierung nicht erfolgreich. Status: {pulp.LpStatus[model.status]}")
-    print("Keine Ergebnisse zum Plotten oder Analysieren vorhanden.")
-else: # Sollte nicht vorkommen, wenn Status optimal war
-    print(f"Optimierung endete mit Status '{pulp.LpStatus[model.status]}', aber Status wurde nicht als 'Optimal' erkannt.")
+    run_log.end()
+    print("\n--- Laufzeiten je Abschnitt ---")
+    print(run_log.summary())
+    if run_log_filename:
+        run_log.write(run_log_filename); print(f"Laufprotokoll '{run_log_filename}' geschrieben.")
 
-# *** ANGEPASST: Hinweis ***
-print(f"\n**WICHTIGER HINWEIS:** Ergebnisse basieren auf realen Ertragsdaten für eine Periode von {num_timesteps} Zeitschritten ({days_in_period} Tage).")
-print("Stelle sicher, dass die Eingabe-Excel-Datei diesen Zeitraum korrekt abdeckt.")
+    print("\nSkriptausführung beendet.")
 
-# Alle erstellten Plots anzeigen (falls interaktive Session)
-# plt.show() # In vielen Umgebungen (wie Skripten) nicht nötig, da Plots gespeichert werden.
-#            # Kann auskommentiert bleiben oder entfernt werden, wenn die gespeicherten Dateien reichen.
+    return 0
 
-print("\nSkriptausführung beendet.")
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Auslegung als Gesamtmodell vs. Benders-Zerlegung in Betriebsfenster (benders_decomposition.py).
+
+Löst das Auslegungs-LP auf synthetischen Profilen einmal als Ganzes und einmal zerlegt (Master über die Kapazitäten,
+Betrieb in Fenstern) und vergleicht Zielwert, Kapazitäten, Iterationen und Rechenzeit. Mit --years werden mehrere
+synthetische Jahre aneinandergehängt; --skip-full löst nur zerlegt (für Horizonte, die als Ganzes zu groß sind).
+Die Kapazitätskosten werden auf die Länge des Zeitraums skaliert.
+
+    python benchmarks/benchmark_benders.py --days 112 --window-days 14
+    python benchmarks/benchmark_benders.py --years 3 --window-days 28 --workers 4 --skip-full
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Projektverzeichnis
+from benchmark_model_build import (battery_efficiency, battery_soc_min_percent, capacity_costs, grid_purchase_price_eur_per_mwh,
+                                   synthetic_profiles, time_resolution_hours)
+from benders_decomposition import benders_sizing
+from lp_matrix import build_sizing_lp
+from solver_backend import highspy, solve_lp
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=112, help="Länge des Betrachtungszeitraums in Tagen (je Jahr)")
+    parser.add_argument("--years", type=int, default=1, help="Anzahl aneinandergehängter synthetischer Jahre")
+    parser.add_argument("--window-days", type=int, default=14, help="Länge eines Betriebsfensters in Tagen")
+    parser.add_argument("--workers", type=int, default=None, help="Prozesse für die Betriebsfenster")
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    parser.add_argument("--skip-full", action="store_true", help="Gesamtmodell nicht lösen")
+    args = parser.parse_args()
+
+    num_timesteps = int(args.days * 24 / time_resolution_hours)
+    profiles = [synthetic_profiles(num_timesteps, seed=42 + year) for year in range(args.years)]
+    pv, wind, demand, tariff = (np.concatenate(parts) for parts in zip(*profiles))
+    eff_sqrt = math.sqrt(battery_efficiency)
+    lp_args = (pv, wind, demand, tariff, grid_purchase_price_eur_per_mwh, capacity_costs * args.days * args.years / 365.25,
+               eff_sqrt, 1.0 / eff_sqrt, battery_soc_min_percent, time_resolution_hours)
+    backend = "highspy" if highspy is not None else "highs"
+    print(f"{len(pv)} Zeitschritte, Fenster {args.window_days} Tage, Backend {backend}")
+
+    objective = None
+    if not args.skip_full:
+        start = time.perf_counter()
+        lp = build_sizing_lp(*lp_args)
+        solution = solve_lp(lp, backend=backend)
+        objective = solution.objective
+        print(f"Gesamtmodell: {solution.status}, Zielwert {solution.objective:,.2f} € in {time.perf_counter() - start:.1f} s, "
+              f"Kapazitäten {np.round(solution.x[:4], 3)}")
+    solution, history = benders_sizing(*lp_args, window_steps=int(args.window_days * 24 / time_resolution_hours), tolerance=args.tolerance,
+                                       backend=backend, num_workers=args.workers)
+    print(f"Benders: {solution.status} nach {len(history)} Iterationen, Zielwert {solution.objective:,.2f} € in {solution.solve_seconds:.1f} s, "
+          f"Kapazitäten {np.round(solution.x[:4], 3)}")
+    if objective is not None:
+        print(f"Abweichung zum Gesamtmodell: {(solution.objective - objective) / abs(objective) * 100:+.4f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark und Gegenprobe der Kostenlandschaft ohne Batterie (cost_landscape.no_battery_cost_landscape).
+
+Prüft auf einem kleinen Raster, dass die geschlossene Berechnung dieselben Betriebskosten liefert wie
+das Betriebs-LP (inkl. Zeitschritten mit negativer Vergütung), und misst die Rechenzeit für ein großes
+Raster in voller 15-Minuten-Auflösung.
+
+    python benchmarks/benchmark_cost_landscape.py --days 366 --steps 200
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Projektverzeichnis
+from benchmark_model_build import battery_soc_min_percent, grid_purchase_price_eur_per_mwh, synthetic_profiles, time_resolution_hours
+from cost_landscape import ParametricOperationalSolver, compute_cost_landscape, no_battery_cost_landscape
+from lp_matrix import build_operational_lp
+
+
+def cross_check_no_battery(days=14, steps=4, tolerance_eur=1e-3):
+    """ Vergleicht geschlossene Berechnung und Betriebs-LP ohne Batterie auf einem kleinen Raster. Liefert die max. Abweichung in €. """
+    y_pv, y_wind, demand, tariff = synthetic_profiles(int(days * 24 / time_resolution_hours))
+    tariff[::97] = -20.0 # Einige Zeitschritte mit negativer Vergütung (dort wird abgeregelt statt eingespeist)
+    pv_range = np.linspace(0, 40, steps); wind_range = np.linspace(0, 30, steps)
+    fast = no_battery_cost_landscape(pv_range, wind_range, y_pv, y_wind, demand, tariff, grid_purchase_price_eur_per_mwh)
+    eff_sqrt = math.sqrt(0.88)
+    lp = build_operational_lp(demand, tariff, grid_purchase_price_eur_per_mwh, 0.0, 0.0, eff_sqrt, 1 / eff_sqrt,
+                              battery_soc_min_percent, time_resolution_hours)
+    reference = compute_cost_landscape(ParametricOperationalSolver(lp, y_pv, y_wind, demand), pv_range, wind_range, progress=False)
+    max_deviation = float(np.max(np.abs(fast - reference)))
+    print(f"Gegenprobe ohne Batterie ({steps}x{steps} Punkte, {days} Tage): max. Abweichung zum LP {max_deviation:.2e} € "
+          f"{'(OK)' if max_deviation <= tolerance_eur else '(Abweichung!)'}")
+    return max_deviation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=366, help="Länge des Betrachtungszeitraums in Tagen")
+    parser.add_argument("--steps", type=int, default=200, help="Rasterpunkte je Achse (PV und Wind)")
+    args = parser.parse_args()
+
+    if cross_check_no_battery() > 1e-3:
+        sys.exit(1)
+
+    y_pv, y_wind, demand, tariff = synthetic_profiles(int(args.days * 24 / time_resolution_hours))
+    start = time.perf_counter()
+    grid = no_battery_cost_landscape(np.linspace(0, 50, args.steps), np.linspace(0, 50, args.steps), y_pv, y_wind, demand, tariff,
+                                     grid_purchase_price_eur_per_mwh)
+    duration = time.perf_counter() - start
+    print(f"Kostenlandschaft ohne Batterie: {grid.size} Punkte x {len(y_pv)} Zeitschritte in {duration:.2f} s "
+          f"({duration / grid.size * 1e3:.2f} ms pro Punkt)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Speicherbedarf der Datenschicht (Eingangsprofile, Auswertung, Ergebnisdatei) über einen langen Zeitraum.
+
+Vergleicht auf synthetischen Profilen (Standard: drei Jahre = 105.192 Viertelstunden) zwei Varianten:
+    Standard  konstante Profile als volle Arrays (np.full), Ergebnisdatei in float64
+    Kompakt   konstante Profile als Sichten ohne eigene Zeitreihe (input_data.constant_profile), Ergebnisdatei in float32
+und als Referenz den früheren Weg über einen DataFrame mit allen Spalten (DataFrame.to_parquet).
+Je Schritt: Spitzenspeicher laut tracemalloc (Python/NumPy/pandas; Puffer von pyarrow werden nicht erfasst), Dauer und
+Dateigröße. Gelöst wird nicht: Als Lösung dient ein fester Anlagenpark ohne Batterie (Fehlmengen aus dem Netz,
+Überschuss ins Netz); mit --solve wird das LP gelöst (dauert bei drei Jahren lange).
+Das LP selbst (Aufbau, Solver) ist in beiden Varianten gleich und wird nur zur Einordnung ausgegeben.
+
+    python benchmarks/benchmark_memory.py
+    python benchmarks/benchmark_memory.py --days 366 --formats parquet
+"""
+import argparse
+import dataclasses
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Projektverzeichnis
+from benchmark_model_build import synthetic_profiles, time_resolution_hours
+from result_sink import read_timeseries, write_timeseries
+from sizing_pipeline import InputProfiles, SizingParameters, build_model, evaluate, solve_model
+from solver_backend import LPSolution
+
+
+def measure(label, function):
+    """ Führt function() aus und gibt Spitzenspeicher (tracemalloc), danach belegten Speicher und Dauer aus. """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<28} Spitze {peak / 1e6:8.1f} MB   belegt {current / 1e6:8.1f} MB   {seconds:6.2f} s")
+    return result
+
+
+def dense_inputs(inputs):
+    """ Eingangsdaten wie vor constant_profile: konstante Profile als volle, beschreibbare Arrays. """
+    return dataclasses.replace(inputs, demand_profile_mwh=np.array(inputs.demand_profile_mwh),
+                               grid_purchase_price_profile_eur_per_mwh=np.array(inputs.grid_purchase_price_profile_eur_per_mwh))
+
+
+def dispatch_solution(lp, inputs, pv_mw=20.0, wind_mw=15.0):
+    """ Zulässige Lösung ohne Solver: feste PV-/Windleistung ohne Batterie, Fehlmengen aus dem Netz, Überschuss ins Netz. """
+    x = np.zeros(lp.num_variables)
+    slices = lp.variable_slices
+    residual = inputs.demand_profile_mwh - inputs.specific_yield_pv_mwh_per_mw * pv_mw - inputs.specific_yield_wind_mwh_per_mw * wind_mw
+    x[slices["pv_capacity_mw"]] = pv_mw
+    x[slices["wind_capacity_mw"]] = wind_mw
+    x[slices["grid_import"]] = np.maximum(residual, 0)
+    x[slices["grid_export"]] = np.maximum(-residual, 0)
+    return LPSolution("Optimal", 0.0, x, "none", "none", 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=float, default=3 * 365.25, help="Länge des Betrachtungszeitraums in Tagen")
+    parser.add_argument("--formats", nargs="+", default=["parquet", "csv"], choices=["parquet", "csv", "hdf5"], help="Ergebnisformate")
+    parser.add_argument("--solve", action="store_true", help="LP lösen statt fester Anlagen ohne Batterie")
+    args = parser.parse_args()
+
+    num_timesteps = int(args.days * 24 / time_resolution_hours)
+    pv, wind = synthetic_profiles(num_timesteps)[:2]
+    params = SizingParameters(time_resolution_hours=time_resolution_hours)
+    print(f"{num_timesteps} Zeitschritte ({args.days:g} Tage)")
+
+    print("LP (beide Varianten gleich):")
+    inputs = InputProfiles.from_yields(params, pv, wind)
+    lp, _ = measure("Modellaufbau", lambda: build_model(params, inputs))
+    solution = measure("Lösung", lambda: solve_model(lp) if args.solve else dispatch_solution(lp, inputs))
+
+    extensions = {"parquet": ".parquet", "csv": ".csv", "hdf5": ".h5"}
+    with tempfile.TemporaryDirectory() as directory:
+        for label, compact in (("Standard", False), ("Kompakt", True)):
+            print(f"{label}:")
+            inputs = measure("Eingangsprofile", lambda: InputProfiles.from_yields(params, pv, wind) if compact
+                             else dense_inputs(InputProfiles.from_yields(params, pv, wind)))
+            result = measure("Auswertung", lambda: evaluate(params, inputs, lp, solution))
+            columns = measure("Zeitreihen-Spalten", lambda: result.timeseries(inputs))
+            for fmt in args.formats:
+                filename = os.path.join(directory, f"{label}{extensions[fmt]}")
+                measure(f"Ergebnisdatei {fmt}", lambda: write_timeseries(filename, columns, dtype=np.float32 if compact else None))
+                check = read_timeseries(filename)
+                deviation = np.max(np.abs(check["Netzbezug (MWh)"].to_numpy() - columns["Netzbezug (MWh)"]))
+                print(f"  {'':<28} Datei {os.path.getsize(filename) / 1e6:8.1f} MB   Abweichung Netzbezug {deviation:.2g} MWh")
+
+        if "parquet" in args.formats:
+            print("Referenz (ein DataFrame mit allen Spalten):")
+            filename = os.path.join(directory, "referenz.parquet")
+            measure("DataFrame.to_parquet", lambda: pd.DataFrame(columns).to_parquet(filename, index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Modellaufbau per PuLP-Schleife (Abschnitt 4 in LP_Optimierung.py) vs. Matrix-Builder (lp_matrix.py).
+
+Misst Aufbauzeit und Spitzenspeicher (tracemalloc) beider Varianten auf synthetischen
+Profilen und prüft optional (--solve), dass beide Modelle denselben Zielwert liefern.
+
+    python benchmarks/benchmark_model_build.py --days 366
+    python benchmarks/benchmark_model_build.py --days 14 --solve
+"""
+import argparse
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pulp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Projektverzeichnis
+from lp_matrix import annualized_capacity_costs, build_sizing_lp
+
+time_resolution_hours = 0.25
+grid_purchase_price_eur_per_mwh = 169.9
+feed_in_tariff_eur_per_mwh = 50
+battery_efficiency = 0.88
+battery_soc_min_percent = 0.10
+af_pv_wind = 0.0872; af_battery = 0.1030 # Annuitätsfaktoren für r=6%, n=20 bzw. 15
+capacity_costs = annualized_capacity_costs(af_pv_wind, af_battery, 800e3, 13.3e3, 1600e3, 32e3, 600e3, 6.65e3)
+
+
+def synthetic_profiles(num_timesteps, seed=42):
+    """ Synthetische PV/Wind-Ertragsprofile (MWh/MW pro Zeitschritt), Bedarf und Einspeiseprofil. """
+    rng = np.random.default_rng(seed)
+    steps_per_day = int(24 / time_resolution_hours)
+    hour = (np.arange(num_timesteps) % steps_per_day) * time_resolution_hours
+    day = np.arange(num_timesteps) // steps_per_day
+    season = 0.6 + 0.4 * np.sin(2 * np.pi * (day - 80) / 365)
+    pv = np.maximum(0, np.sin(np.pi * (hour - 6) / 12)) * season * time_resolution_hours * rng.uniform(0.3, 1.0, num_timesteps)
+    wind = np.clip(0.35 + 0.25 * np.sin(2 * np.pi * day / 9) + rng.normal(0, 0.15, num_timesteps), 0, 1) * time_resolution_hours
+    demand = np.full(num_timesteps, 3629 * time_resolution_hours / 1000)
+    tariff = np.full(num_timesteps, float(feed_in_tariff_eur_per_mwh))
+    tariff[rng.choice(num_timesteps, int(num_timesteps * 459 / 8784), replace=False)] = 0
+    return pv, wind, demand, tariff
+
+
+def build_pulp_model_loop(y_pv, y_wind, demand, tariff):
+    """ Referenz: Modellaufbau wie bisher mit einer Python-Schleife über alle Zeitschritte. """
+    num_timesteps = len(y_pv)
+    eff_sqrt = math.sqrt(battery_efficiency); eff_sqrt_inv = 1.0 / eff_sqrt
+    model = pulp.LpProblem("Renewable_Energy_System_Optimization", pulp.LpMinimize)
+    pv_capacity_mw = pulp.LpVariable("PV_Capacity_MWp", lowBound=0); wind_capacity_mw = pulp.LpVariable("Wind_Capacity_MW", lowBound=0)
+    battery_capacity_mwh = pulp.LpVariable("Battery_Capacity_MWh", lowBound=0); battery_power_mw = pulp.LpVariable("Battery_Power_MW", lowBound=0)
+    timesteps = range(num_timesteps); soc_timesteps = range(num_timesteps + 1)
+    grid_import = pulp.LpVariable.dicts("Grid_Import", timesteps, lowBound=0); grid_export = pulp.LpVariable.dicts("Grid_Export", timesteps, lowBound=0)
+    curtailment = pulp.LpVariable.dicts("Curtailment", timesteps, lowBound=0); battery_soc = pulp.LpVariable.dicts("Battery_SoC", soc_timesteps, lowBound=0)
+    battery_charge = pulp.LpVariable.dicts("Battery_Charge", timesteps, lowBound=0); battery_discharge = pulp.LpVariable.dicts("Battery_Discharge", timesteps, lowBound=0)
+    model += (capacity_costs[0] * pv_capacity_mw + capacity_costs[1] * wind_capacity_mw + capacity_costs[2] * battery_capacity_mwh + capacity_costs[3] * battery_power_mw
+              + pulp.lpSum(grid_import[t] * grid_purchase_price_eur_per_mwh for t in timesteps)
+              - pulp.lpSum(grid_export[t] * tariff[t] for t in timesteps)), "Total_Annualized_System_Cost"
+    for t in timesteps:
+        model += y_pv[t] * pv_capacity_mw + y_wind[t] * wind_capacity_mw + grid_import[t] + battery_discharge[t] == demand[t] + grid_export[t] + curtailment[t] + battery_charge[t], f"Energy_Balance_{t}"
+        model += battery_soc[t+1] == battery_soc[t] + battery_charge[t] * eff_sqrt - battery_discharge[t] * eff_sqrt_inv, f"Battery_SoC_Update_{t}"
+        model += battery_charge[t] <= battery_power_mw * time_resolution_hours, f"Battery_Charge_Power_Limit_{t}"
+        model += battery_discharge[t] <= battery_power_mw * time_resolution_hours, f"Battery_Discharge_Power_Limit_{t}"
+        model += battery_soc[t] >= battery_soc_min_percent * battery_capacity_mwh, f"Battery_SoC_Min_Limit_{t}"
+        model += battery_soc[t] <= battery_capacity_mwh, f"Battery_SoC_Max_Limit_{t}"
+    model += battery_soc[num_timesteps] >= battery_soc_min_percent * battery_capacity_mwh, "Battery_SoC_Min_Limit_End"
+    model += battery_soc[num_timesteps] <= battery_capacity_mwh, "Battery_SoC_Max_Limit_End"
+    model += battery_soc[num_timesteps] == battery_soc[0], "Battery_Cyclic_SoC"
+    return model
+
+
+def build_matrix_model(y_pv, y_wind, demand, tariff):
+    eff_sqrt = math.sqrt(battery_efficiency)
+    return build_sizing_lp(y_pv, y_wind, demand, tariff, grid_purchase_price_eur_per_mwh, capacity_costs,
+                           eff_sqrt, 1.0 / eff_sqrt, battery_soc_min_percent, time_resolution_hours)
+
+
+def measure(build, *args):
+    """ Führt build(*args) aus und liefert (Ergebnis, Dauer in s, Spitzenspeicher in MB). """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(*args)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=366, help="Länge des Betrachtungszeitraums in Tagen")
+    parser.add_argument("--solve", action="store_true", help="Beide Modelle lösen und Zielwerte vergleichen (nur für kurze Zeiträume sinnvoll)")
+    args = parser.parse_args()
+
+    num_timesteps = int(args.days * 24 / time_resolution_hours)
+    profiles = synthetic_profiles(num_timesteps)
+    print(f"Benchmark Modellaufbau: {num_timesteps} Zeitschritte ({args.days} Tage)")
+
+    model, t_loop, mem_loop = measure(build_pulp_model_loop, *profiles)
+    lp, t_matrix, mem_matrix = measure(build_matrix_model, *profiles)
+    print(f"  PuLP-Schleife:  {t_loop:8.2f} s, Spitzenspeicher {mem_loop:8.1f} MB, {len(model.constraints)} Nebenbedingungen")
+    print(f"  Matrix-Builder: {t_matrix:8.2f} s, Spitzenspeicher {mem_matrix:8.1f} MB, "
+          f"{lp.A_eq.shape[0] + lp.A_ub.shape[0]} Zeilen, {lp.num_variables} Spalten, {lp.A_eq.nnz + lp.A_ub.nnz} Nicht-Nullen")
+    print(f"  -> Faktor Zeit: {t_loop / max(t_matrix, 1e-9):.1f}x, Faktor Speicher: {mem_loop / max(mem_matrix, 1e-9):.1f}x")
+
+    if args.solve:
+        from scipy.optimize import linprog
+        model.solve(pulp.PULP_CBC_CMD(msg=False))
+        res = linprog(lp.c, A_ub=lp.A_ub, b_ub=lp.b_ub, A_eq=lp.A_eq, b_eq=lp.b_eq, bounds=lp.bounds, method="highs")
+        obj_loop = pulp.value(model.objective)
+        print(f"  Zielwert PuLP/CBC: {obj_loop:,.2f} €, Matrix/HiGHS: {res.fun:,.2f} € "
+              f"{'(OK)' if abs(obj_loop - res.fun) <= 1e-6 * max(1.0, abs(obj_loop)) else '(Abweichung!)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Netzmodell mit mehreren Knoten (network_model.py) - Aufbau und Lösung des Gesamtmodells.
+
+Erzeugt ein synthetisches Netz (Knoten mit eigenen Profilen, Leitungen in einer Kette, gemeinsame Grenzen am
+Anschlusspunkt), misst Aufbauzeit, Größe und Spitzenspeicher (tracemalloc) des blockweise aufgebauten Gesamtmodells,
+löst es optional (--solve) und gibt Zielwert, Rechenzeit und Kapazitäten je Knoten aus.
+Die Kapazitätskosten werden auf die Länge des Zeitraums skaliert, damit auch kurze Zeiträume sinnvolle Kapazitäten ergeben.
+
+    python benchmarks/benchmark_network.py --nodes 24 --days 366                      # nur Aufbau
+    python benchmarks/benchmark_network.py --nodes 3 --days 2 --solve
+"""
+import argparse
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Projektverzeichnis
+from benchmark_model_build import (battery_efficiency, battery_soc_min_percent, capacity_costs, grid_purchase_price_eur_per_mwh,
+                                   synthetic_profiles, time_resolution_hours)
+from network_model import Link, Network, Node, build_network_lp, network_capacities
+from solver_backend import highspy, solve_lp
+
+
+def synthetic_network(num_nodes, num_timesteps, link_capacity_mw, shared_limit_mw):
+    """ Knoten mit unterschiedlich skalierten synthetischen Profilen, Leitungen als Kette n0 - n1 - ... """
+    nodes = []
+    for k in range(num_nodes):
+        pv, wind, demand, tariff = synthetic_profiles(num_timesteps, seed=k)
+        nodes.append(Node(f"n{k}", pv * (0.8 + 0.4 * (k % 3) / 2), wind * (1.2 - 0.5 * (k % 4) / 3), demand * (0.5 + k % 5 / 4)))
+    links = [Link(f"l{k}", f"n{k}", f"n{k + 1}", link_capacity_mw, efficiency=0.97) for k in range(num_nodes - 1)]
+    return Network(nodes, links, shared_import_limit_mw=shared_limit_mw * num_nodes, shared_export_limit_mw=shared_limit_mw * num_nodes), tariff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=3, help="Anzahl Knoten")
+    parser.add_argument("--days", type=int, default=2, help="Länge des Betrachtungszeitraums in Tagen")
+    parser.add_argument("--link-capacity-mw", type=float, default=0.5)
+    parser.add_argument("--shared-limit-mw", type=float, default=0.6, help="Gemeinsame Grenze je Knoten (Summe = Knoten * Wert)")
+    parser.add_argument("--solve", action="store_true", help="Gesamtmodell lösen")
+    args = parser.parse_args()
+
+    num_timesteps = int(args.days * 24 / time_resolution_hours)
+    network, tariff = synthetic_network(args.nodes, num_timesteps, args.link_capacity_mw, args.shared_limit_mw)
+    eff_sqrt = math.sqrt(battery_efficiency)
+    lp_args = (capacity_costs * args.days / 365.25, grid_purchase_price_eur_per_mwh, tariff, eff_sqrt, 1.0 / eff_sqrt,
+               battery_soc_min_percent, time_resolution_hours)
+    backend = "highspy" if highspy is not None else "highs"
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    lp = build_network_lp(network, *lp_args)
+    build_seconds = time.perf_counter() - start
+    peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    print(f"Gesamtmodell: {args.nodes} Knoten x {num_timesteps} Zeitschritte, {lp.num_variables} Variablen, "
+          f"{lp.A_eq.shape[0] + lp.A_ub.shape[0]} Zeilen, {lp.A_eq.nnz + lp.A_ub.nnz} Nicht-Nullen, "
+          f"Aufbau {build_seconds:.2f} s, Spitzenspeicher {peak_mb:.0f} MB")
+
+    if args.solve:
+        solution = solve_lp(lp, backend=backend)
+        print(f"Gesamtmodell: {solution.status}, Zielwert {solution.objective:,.2f} € in {solution.solve_seconds:.1f} s")
+        print(network_capacities(lp, solution.x, network).to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Diagramme 1-4 (result_plots.py) mit allen Punkten vs. Min/Max-Ausdünnung, nacheinander vs. parallel.
+
+Zeichnet die vier Zeitreihen-Diagramme auf synthetischen Profilen (ein Jahr = 35.136 Viertelstunden) in ein temporäres
+Verzeichnis und gibt je Variante die Gesamtzeit aus. Gegenprobe der Ausdünnung: Minimum und Maximum jeder Pixelspalte
+bleiben erhalten (größte Abweichung der Hüllkurve, muss 0 sein).
+
+    python benchmarks/benchmark_plots.py
+    python benchmarks/benchmark_plots.py --days 732 --workers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Projektverzeichnis
+from benchmark_model_build import battery_soc_min_percent, synthetic_profiles, time_resolution_hours
+from lp_results import CUBE_FLOWS, flow_cube
+from result_plots import (minmax_envelope, plot_battery_soc, plot_daily_generation, plot_generation_profile, plot_monthly_generation,
+                          render_plots, time_index)
+
+
+def envelope_error(values, keep, num_bins):
+    """ Größte Abweichung von Minimum/Maximum je Abschnitt zwischen allen Punkten und den behaltenen Punkten. """
+    size = -(-len(values) // num_bins)
+    bins = np.arange(len(values)) // size
+    kept = np.zeros(len(values), dtype=bool); kept[keep] = True
+    error = 0.0
+    for b in np.unique(bins):
+        block = values[bins == b]; block_kept = values[(bins == b) & kept]
+        error = max(error, abs(block.max() - block_kept.max()), abs(block.min() - block_kept.min()))
+    return error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=366, help="Länge des Betrachtungszeitraums in Tagen")
+    parser.add_argument("--workers", type=int, default=4, help="Prozesse für die parallele Variante")
+    args = parser.parse_args()
+
+    num_timesteps = int(args.days * 24 / time_resolution_hours)
+    pv, wind, demand, _ = synthetic_profiles(num_timesteps)
+    pv_gen = pv * 20; wind_gen = wind * 15
+    soc = np.clip(np.cumsum(np.random.default_rng(1).normal(0, 0.2, num_timesteps + 1)) % 10, 1, 10)
+    soc_index = time_index("2024-01-01", num_timesteps + 1, time_resolution_hours); index = soc_index[:-1]
+    flows = dict.fromkeys(CUBE_FLOWS, np.zeros(num_timesteps)); flows.update(demand=demand, pv_gen=pv_gen, wind_gen=wind_gen)
+    cube = flow_cube(flows, soc[:-1], soc_index[0], time_resolution_hours)
+
+    keep = minmax_envelope(demand + pv_gen, 1500)
+    print(f"{num_timesteps} Zeitschritte, nach Ausdünnung {len(keep)} Punkte je Linie, "
+          f"Hüllkurvenabweichung {envelope_error(demand + pv_gen, keep, 1500):.3g}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        def jobs(decimate):
+            path = lambda name: os.path.join(directory, f"{decimate}_{name}")
+            return [(plot_generation_profile, (index, demand, pv_gen, wind_gen, 20, 15, args.days, time_resolution_hours, path("profil.png"), decimate)),
+                    (plot_monthly_generation, (cube, args.days, path("monat.png"))),
+                    (plot_daily_generation, (cube, 20, 15, args.days, path("tag.png"))),
+                    (plot_battery_soc, (soc_index, soc, 10, battery_soc_min_percent, args.days, path("soc.png"), decimate))]
+
+        for label, decimate, workers in (("alle Punkte, nacheinander", False, 1), ("ausgedünnt, nacheinander", True, 1),
+                                         (f"ausgedünnt, {args.workers} Prozesse", True, args.workers)):
+            start = time.perf_counter()
+            results = render_plots(jobs(decimate), num_workers=workers)
+            seconds = time.perf_counter() - start
+            errors = [str(error) for _, error in results if error is not None]
+            print(f"{label:<32} {seconds:7.2f} s" + (f"  Fehler: {'; '.join(errors)}" if errors else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Rollierender Betrieb (rolling_horizon.py) vs. ein Betriebs-LP über den ganzen Zeitraum.
+
+Vergleicht Rechenzeit, Spitzenspeicher (tracemalloc) und Betriebskosten für feste Kapazitäten
+auf synthetischen Profilen; mit --skip-full nur der rollierende Betrieb (z.B. für mehrere Jahre).
+
+    python benchmarks/benchmark_rolling_horizon.py --days 366 --window-days 7 --lookahead-days 1
+    python benchmarks/benchmark_rolling_horizon.py --days 1098 --skip-full
+"""
+import argparse
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Projektverzeichnis
+from benchmark_model_build import battery_efficiency, battery_soc_min_percent, grid_purchase_price_eur_per_mwh, synthetic_profiles, time_resolution_hours
+from lp_matrix import build_operational_lp, operational_balance_rhs
+from rolling_horizon import rolling_horizon_dispatch
+from solver_backend import solve_lp
+
+
+def measure(func):
+    """ Führt func aus und liefert (Ergebnis, Sekunden, Spitzenspeicher in MiB). """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, duration, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=366, help="Länge des Betrachtungszeitraums in Tagen")
+    parser.add_argument("--window-days", type=float, default=7, help="Fensterlänge (übernommener Teil) in Tagen")
+    parser.add_argument("--lookahead-days", type=float, default=1, help="Vorausschau je Fenster in Tagen")
+    parser.add_argument("--pv", type=float, default=5.0, help="PV-Leistung in MWp")
+    parser.add_argument("--wind", type=float, default=20.0, help="Wind-Leistung in MW")
+    parser.add_argument("--battery-mwh", type=float, default=4.0)
+    parser.add_argument("--battery-mw", type=float, default=2.5)
+    parser.add_argument("--skip-full", action="store_true", help="Kein LP über den ganzen Zeitraum lösen")
+    args = parser.parse_args()
+
+    y_pv, y_wind, demand, tariff = synthetic_profiles(int(args.days * 24 / time_resolution_hours))
+    residual = operational_balance_rhs(y_pv, y_wind, demand, args.pv, args.wind)
+    eff_sqrt = math.sqrt(battery_efficiency)
+    lp_args = (grid_purchase_price_eur_per_mwh, args.battery_mwh, args.battery_mw, eff_sqrt, 1.0 / eff_sqrt,
+               battery_soc_min_percent, time_resolution_hours)
+    steps_per_day = 24 / time_resolution_hours
+
+    rolling, rolling_seconds, rolling_peak = measure(lambda: rolling_horizon_dispatch(
+        residual, tariff, *lp_args, int(args.window_days * steps_per_day), int(args.lookahead_days * steps_per_day)))
+    print(f"Rollierend ({args.window_days:g} + {args.lookahead_days:g} Tage, {rolling['num_windows']} Fenster): "
+          f"{rolling['operational_cost']:,.2f} € in {rolling_seconds:.1f} s, Spitzenspeicher {rolling_peak:.1f} MiB")
+    if args.skip_full:
+        return
+    full, full_seconds, full_peak = measure(lambda: solve_lp(build_operational_lp(residual, tariff, *lp_args)))
+    print(f"Ein LP ({len(residual)} Zeitschritte): {full.objective:,.2f} € in {full_seconds:.1f} s, Spitzenspeicher {full_peak:.1f} MiB")
+    print(f"Mehrkosten rollierend: {rolling['operational_cost'] - full.objective:,.2f} € "
+          f"({(rolling['operational_cost'] - full.objective) / abs(full.objective):+.3%})")
+
+
+if __name__ == "__main__":
+    main()
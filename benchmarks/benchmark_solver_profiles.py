@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Solver-Profile (solver_backend.SOLVER_PROFILES) auf dem Auslegungs-LP im Vergleich.
+
+Löst das Auslegungs-LP auf synthetischen Profilen mit jedem angegebenen Profil und gibt Status, Zeit, Iterationen und
+Zielwertabweichung zum ersten Profil als Tabelle aus. Die Kapazitätskosten werden auf die Länge des Zeitraums skaliert.
+
+    python benchmarks/benchmark_solver_profiles.py --days 56
+    python benchmarks/benchmark_solver_profiles.py --days 366 --profiles default barrier barrier_no_crossover --backend highspy
+"""
+import argparse
+import math
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Projektverzeichnis
+from benchmark_model_build import (battery_efficiency, battery_soc_min_percent, capacity_costs, grid_purchase_price_eur_per_mwh,
+                                   synthetic_profiles, time_resolution_hours)
+from lp_matrix import build_sizing_lp
+from solver_backend import SOLVER_PROFILES, compare_profiles, highspy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=56, help="Länge des Betrachtungszeitraums in Tagen")
+    parser.add_argument("--profiles", nargs="+", default=["default", "dual_simplex", "barrier", "barrier_no_crossover", "barrier_fast"],
+                        choices=sorted(SOLVER_PROFILES))
+    parser.add_argument("--backend", default="highspy" if highspy is not None else "highs", choices=["highs", "highspy", "cbc"])
+    args = parser.parse_args()
+
+    num_timesteps = int(args.days * 24 / time_resolution_hours)
+    pv, wind, demand, tariff = synthetic_profiles(num_timesteps)
+    eff_sqrt = math.sqrt(battery_efficiency)
+    lp = build_sizing_lp(pv, wind, demand, tariff, grid_purchase_price_eur_per_mwh, capacity_costs * args.days / 365.25,
+                         eff_sqrt, 1.0 / eff_sqrt, battery_soc_min_percent, time_resolution_hours)
+    print(f"{num_timesteps} Zeitschritte, {lp.num_variables} Variablen, Backend {args.backend}")
+    rows = compare_profiles(lp, args.profiles, backend=args.backend)
+    print(pd.DataFrame(rows).set_index("profile").to_string(float_format=lambda v: f"{v:.6g}"))
+
+
+if __name__ == "__main__":
+    main()
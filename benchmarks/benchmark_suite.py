@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark-Suite: Auslegung und Kostenlandschaft auf synthetischen Profilen, mit Baseline und Regressionsschwelle.
+
+Arbeitslasten (--workloads, Standard: alle):
+    sizing_1w, sizing_1m, sizing_1y, sizing_2y   Auslegungs-LP über 7, 30, 366 bzw. 731 Tage;
+                                                 Stufen build (lp_matrix), solve (solver_backend), extract (lp_results)
+    landscape_5x5, landscape_20x20               Kostenlandschaft; Stufen no_battery (geschlossene Berechnung über
+                                                 --landscape-days) und battery_lp (Betriebs-LP je Punkt über --landscape-lp-days)
+
+Je Stufe werden Wandzeit (Minimum über --repeat Wiederholungen), Python-Spitzenspeicher (tracemalloc, inkl. NumPy)
+und der Spitzenspeicher des Prozesses (RSS) gemessen, dazu Zielwert bzw. Kostensumme als Gegenprobe. Keine Excel-Datei nötig.
+
+Mit --save-baseline werden die Ergebnisse als Baseline gespeichert (Standard: benchmarks/baseline.json, rechnerabhängig,
+daher nicht im Repository). Ohne diese Option wird gegen die Baseline verglichen: Ist eine Stufe um mehr als --threshold
+(relativ) und mehr als --min-seconds langsamer, braucht sie mehr als --memory-threshold mehr Speicher oder weicht das
+Ergebnis ab, endet das Skript mit Exit-Code 1.
+
+    python benchmarks/benchmark_suite.py --workloads sizing_1w sizing_1m landscape_5x5 --save-baseline
+    python benchmarks/benchmark_suite.py --workloads sizing_1w sizing_1m landscape_5x5 --threshold 0.2
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Projektverzeichnis
+from benchmark_model_build import (battery_efficiency, battery_soc_min_percent, capacity_costs, grid_purchase_price_eur_per_mwh,
+                                   synthetic_profiles, time_resolution_hours)
+from cost_landscape import ParametricOperationalSolver, compute_cost_landscape, no_battery_cost_landscape
+from lp_matrix import build_operational_lp, build_sizing_lp
+from lp_results import LPResult, energy_kpis
+from run_log import peak_rss_mb
+from solver_backend import highspy, solve_lp
+
+SIZING_HORIZONS = {"sizing_1w": 7, "sizing_1m": 30, "sizing_1y": 366, "sizing_2y": 731} # Tage
+LANDSCAPE_GRIDS = {"landscape_5x5": 5, "landscape_20x20": 20} # Rasterpunkte je Achse
+WORKLOADS = list(SIZING_HORIZONS) + list(LANDSCAPE_GRIDS)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+landscape_battery_mwh = 20.0; landscape_battery_mw = 5.0 # Feste Batterie für die Betriebs-LP der Kostenlandschaft
+
+
+def measure(function, *args, repeat=1):
+    """ Führt function(*args) repeat-mal aus. Liefert (Ergebnis, Messwerte: kürzeste Dauer, Python- und Prozess-Spitzenspeicher in MB). """
+    seconds = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        seconds.append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {"seconds": min(seconds), "py_peak_mb": peak / 1e6, "rss_peak_mb": peak_rss_mb()}
+
+
+def _lp_args(days):
+    pv, wind, demand, tariff = synthetic_profiles(int(days * 24 / time_resolution_hours))
+    eff_sqrt = math.sqrt(battery_efficiency)
+    return (pv, wind, demand, tariff, grid_purchase_price_eur_per_mwh, capacity_costs * days / 365.25,
+            eff_sqrt, 1.0 / eff_sqrt, battery_soc_min_percent, time_resolution_hours)
+
+
+def _extract(lp, solution, pv, wind, demand, tariff):
+    """ Auswertung wie in Abschnitt 6: Kennzahlen, Dualwerte der Energiebilanz und Zeitreihen-Tabelle. """
+    result = LPResult(lp, solution)
+    kpis = energy_kpis(result, pv, wind, demand, grid_purchase_price_eur_per_mwh, tariff)
+    marginal_cost = result.dual("energy_balance")
+    table = pd.DataFrame({name: result[name] for name in ("grid_import", "grid_export", "curtailment", "battery_charge", "battery_discharge")})
+    table["battery_soc"] = result["battery_soc"][:-1]
+    return kpis, marginal_cost, table
+
+
+def run_sizing(days, backend, repeat):
+    """ Auslegung über days Tage: Aufbau, Lösung und Auswertung. """
+    lp_args = _lp_args(days)
+    stages = {}
+    lp, stages["build"] = measure(build_sizing_lp, *lp_args, repeat=repeat)
+    solution, stages["solve"] = measure(lambda: solve_lp(lp, backend=backend), repeat=repeat)
+    if solution.status != "Optimal":
+        raise RuntimeError(f"Auslegung über {days} Tage: Status {solution.status}")
+    _, stages["extract"] = measure(_extract, lp, solution, *lp_args[:4], repeat=repeat)
+    stages["solve"]["check"] = solution.objective
+    return {"num_timesteps": lp.num_timesteps, "stages": stages}
+
+
+def run_landscape(steps, days, lp_days, repeat):
+    """ Kostenlandschaft auf einem steps x steps Raster: ohne Batterie (geschlossen) und mit fester Batterie (Betriebs-LP). """
+    pv_range = np.linspace(0, 50, steps); wind_range = np.linspace(0, 50, steps)
+    stages = {}
+    pv, wind, demand, tariff = synthetic_profiles(int(days * 24 / time_resolution_hours))
+    grid, stages["no_battery"] = measure(no_battery_cost_landscape, pv_range, wind_range, pv, wind, demand, tariff,
+                                         grid_purchase_price_eur_per_mwh, repeat=repeat)
+    stages["no_battery"]["check"] = float(np.sum(grid))
+    pv, wind, demand, tariff = synthetic_profiles(int(lp_days * 24 / time_resolution_hours))
+    eff_sqrt = math.sqrt(battery_efficiency)
+
+    def battery_landscape():
+        lp = build_operational_lp(demand, tariff, grid_purchase_price_eur_per_mwh, landscape_battery_mwh, landscape_battery_mw,
+                                  eff_sqrt, 1.0 / eff_sqrt, battery_soc_min_percent, time_resolution_hours)
+        return compute_cost_landscape(ParametricOperationalSolver(lp, pv, wind, demand), pv_range, wind_range, progress=False)
+
+    grid, stages["battery_lp"] = measure(battery_landscape, repeat=repeat)
+    stages["battery_lp"]["check"] = float(np.sum(grid))
+    return {"points": steps * steps, "stages": stages}
+
+
+def compare(results, baseline, threshold, memory_threshold, min_seconds, min_memory_mb=1.0, check_tolerance=1e-6):
+    """ Vergleicht Ergebnisse mit der Baseline. Liefert (Tabellenzeilen, Liste der Regressionen). """
+    rows, regressions = [], []
+    for workload, data in results.items():
+        for stage, current in data["stages"].items():
+            reference = baseline.get(workload, {}).get("stages", {}).get(stage)
+            row = {"workload": workload, "stage": stage, "seconds": current["seconds"], "py_peak_mb": current["py_peak_mb"],
+                   "rss_peak_mb": current["rss_peak_mb"]}
+            if reference is not None:
+                row["base_seconds"] = reference["seconds"]
+                row["time_ratio"] = current["seconds"] / max(reference["seconds"], 1e-9)
+                row["memory_ratio"] = current["py_peak_mb"] / max(reference["py_peak_mb"], 1e-9)
+                if current["seconds"] > reference["seconds"] * (1 + threshold) and current["seconds"] - reference["seconds"] > min_seconds:
+                    regressions.append(f"{workload}/{stage}: {current['seconds']:.3f} s statt {reference['seconds']:.3f} s "
+                                       f"(+{(row['time_ratio'] - 1) * 100:.0f} %)")
+                if (current["py_peak_mb"] > reference["py_peak_mb"] * (1 + memory_threshold)
+                        and current["py_peak_mb"] - reference["py_peak_mb"] > min_memory_mb):
+                    regressions.append(f"{workload}/{stage}: Spitzenspeicher {current['py_peak_mb']:.1f} MB statt {reference['py_peak_mb']:.1f} MB")
+                if "check" in current and "check" in reference:
+                    deviation = abs(current["check"] - reference["check"]) / max(1.0, abs(reference["check"]))
+                    if deviation > check_tolerance:
+                        regressions.append(f"{workload}/{stage}: Ergebnis {current['check']:,.2f} statt {reference['check']:,.2f}")
+            rows.append(row)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workloads", nargs="+", default=WORKLOADS, choices=WORKLOADS)
+    parser.add_argument("--backend", default="highspy" if highspy is not None else "highs", choices=["highs", "highspy", "cbc"])
+    parser.add_argument("--repeat", type=int, default=1, help="Wiederholungen je Stufe (gemessen wird die kürzeste)")
+    parser.add_argument("--landscape-days", type=int, default=366, help="Zeitraum der Kostenlandschaft ohne Batterie in Tagen")
+    parser.add_argument("--landscape-lp-days", type=int, default=7, help="Zeitraum der Betriebs-LP der Kostenlandschaft in Tagen")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Pfad der Baseline-Datei (JSON)")
+    parser.add_argument("--save-baseline", action="store_true", help="Ergebnisse als neue Baseline speichern statt zu vergleichen")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Zulässige relative Verlangsamung je Stufe")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="Zulässiger relativer Mehrbedarf an Speicher je Stufe")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Kleinere absolute Verlangsamungen gelten als Messrauschen")
+    parser.add_argument("--output", default=None, help="Ergebnisse zusätzlich als JSON schreiben")
+    args = parser.parse_args()
+
+    print(f"Benchmark-Suite: {', '.join(args.workloads)} (Backend {args.backend}, {args.repeat}x)")
+    results = {}
+    for workload in args.workloads:
+        start = time.perf_counter()
+        if workload in SIZING_HORIZONS:
+            results[workload] = run_sizing(SIZING_HORIZONS[workload], args.backend, args.repeat)
+        else:
+            results[workload] = run_landscape(LANDSCAPE_GRIDS[workload], args.landscape_days, args.landscape_lp_days, args.repeat)
+        print(f"  {workload}: {time.perf_counter() - start:.1f} s")
+    document = {"machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+                "settings": {"backend": args.backend, "landscape_days": args.landscape_days, "landscape_lp_days": args.landscape_lp_days},
+                "workloads": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {"machine": document["machine"], "settings": document["settings"], "workloads": {}}
+        if os.path.exists(args.baseline): # Andere Arbeitslasten der bestehenden Baseline beibehalten
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline["workloads"] = json.load(f).get("workloads", {})
+        baseline["workloads"].update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        rows, regressions = compare(results, {}, args.threshold, args.memory_threshold, args.min_seconds)
+        print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        print(f"Baseline '{args.baseline}' gespeichert.")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"FEHLER: Keine Baseline '{args.baseline}' gefunden. Zuerst mit --save-baseline erzeugen.")
+        sys.exit(2)
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("machine", {}).get("platform") != document["machine"]["platform"] or baseline.get("settings") != document["settings"]:
+        print("WARNUNG: Baseline stammt von einem anderen Rechner oder mit anderen Einstellungen; Zeiten sind nur bedingt vergleichbar.")
+    rows, regressions = compare(results, baseline["workloads"], args.threshold, args.memory_threshold, args.min_seconds)
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    if regressions:
+        print(f"\nREGRESSION (Schwelle {args.threshold * 100:.0f} % Zeit, {args.memory_threshold * 100:.0f} % Speicher):")
+        for message in regressions:
+            print(f"  {message}")
+        sys.exit(1)
+    print("\nKeine Regression gegenüber der Baseline.")
+
+
+if __name__ == "__main__":
+    main()
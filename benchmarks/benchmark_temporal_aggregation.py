@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Auslegung mit typischen Perioden (temporal_aggregation.py) vs. volle Auflösung.
+
+Löst das Auslegungs-LP einmal in voller Auflösung und für mehrere Anzahlen typischer Tage/Wochen,
+rechnet den Betrieb der aggregierten Kapazitäten in voller Auflösung nach und gibt Modellgröße,
+Rechenzeit sowie die Abweichung von Kapazitäten und Zielwert aus (synthetische Profile).
+
+    python benchmarks/benchmark_temporal_aggregation.py --days 366 --clusters 12 24 48 --weeks 4 8
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Projektverzeichnis
+from benchmark_model_build import (battery_efficiency, battery_soc_min_percent, build_matrix_model, capacity_costs,
+                                   grid_purchase_price_eur_per_mwh, synthetic_profiles, time_resolution_hours)
+from solver_backend import solve_lp
+from temporal_aggregation import (aggregation_error_report, build_aggregated_sizing_lp, capacity_values, cluster_periods,
+                                  full_resolution_dispatch)
+
+
+def run_aggregated(y_pv, y_wind, demand, tariff, steps_per_period, num_clusters, method):
+    """ Clustering, aggregiertes LP und Betrieb in voller Auflösung. Liefert (LP, Lösung, Kapazitäten, Betrieb, Sekunden). """
+    eff_sqrt = math.sqrt(battery_efficiency)
+    start = time.perf_counter()
+    clustering = cluster_periods([y_pv, y_wind, demand, tariff], steps_per_period, num_clusters, method=method)
+    lp = build_aggregated_sizing_lp(clustering, y_pv, y_wind, demand, tariff, grid_purchase_price_eur_per_mwh, capacity_costs,
+                                    eff_sqrt, 1.0 / eff_sqrt, battery_soc_min_percent, time_resolution_hours)
+    solution = solve_lp(lp)
+    duration = time.perf_counter() - start
+    capacities = capacity_values(lp, solution.x)
+    dispatch = full_resolution_dispatch(capacities, y_pv, y_wind, demand, tariff, grid_purchase_price_eur_per_mwh, capacity_costs,
+                                        eff_sqrt, 1.0 / eff_sqrt, battery_soc_min_percent, time_resolution_hours)
+    return lp, solution, capacities, dispatch, duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=366, help="Länge des Betrachtungszeitraums in Tagen")
+    parser.add_argument("--clusters", type=int, nargs="*", default=[12, 24, 48], help="Anzahl typischer Tage")
+    parser.add_argument("--weeks", type=int, nargs="*", default=[4, 8], help="Anzahl typischer Wochen")
+    parser.add_argument("--method", default="kmedoids", choices=("kmedoids", "kmeans"))
+    args = parser.parse_args()
+
+    y_pv, y_wind, demand, tariff = synthetic_profiles(int(args.days * 24 / time_resolution_hours))
+    start = time.perf_counter()
+    full_lp = build_matrix_model(y_pv, y_wind, demand, tariff)
+    full = solve_lp(full_lp)
+    full_seconds = time.perf_counter() - start
+    print(f"Volle Auflösung: {full_lp.num_variables} Variablen, {full.status}, Zielwert {full.objective:,.2f} € in {full_seconds:.1f} s")
+    if full.status != "Optimal":
+        sys.exit(1)
+
+    steps_per_day = int(24 / time_resolution_hours)
+    for period_days, cluster_counts in ((1, args.clusters), (7, args.weeks)):
+        for num_clusters in cluster_counts:
+            lp, solution, capacities, dispatch, seconds = run_aggregated(y_pv, y_wind, demand, tariff, period_days * steps_per_day,
+                                                                         num_clusters, args.method)
+            print(f"\n{num_clusters} typische Perioden à {period_days} Tag(e): {lp.num_variables} Variablen "
+                  f"({full_lp.num_variables / lp.num_variables:.1f}x kleiner), {solution.status} in {seconds:.2f} s "
+                  f"({full_seconds / seconds:.1f}x schneller)")
+            aggregation_error_report(capacity_values(full_lp, full.x), full.objective, capacities, solution.objective, dispatch.objective)
+
+
+if __name__ == "__main__":
+    main()
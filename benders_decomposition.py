@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+Benders-Zerlegung der Auslegung: Investition (vier Kapazitäten) getrennt vom Betrieb in Zeitfenstern.
+
+Die vier Kapazitäten koppeln ein großes Betriebs-LP. Statt es als Ganzes zu lösen, wird der Zeitraum in Fenster
+(z.B. Wochen oder Monate) zerlegt:
+
+    Master:      min  Kapazitätskosten @ y + sum_k theta_k
+                 über die Kapazitäten y, den SoC an jeder Fenstergrenze s_k (s_K = s_0, zyklisch) und je Fenster eine
+                 Schätzung theta_k der Betriebskosten; Schnitte theta_k >= Q_k(y^, s^) + g @ ((y, s_k, s_k+1) - (y^, s^)).
+                 SoC-Grenzen (SoC_min*E <= s_k <= E) und die in einem Fenster erreichbare SoC-Änderung (Lade-/Entladeleistung)
+                 stehen direkt im Master, damit jedes Fenster lösbar ist.
+    Fenster k:   Betrieb mit festen Kapazitäten und festem Start-/End-SoC (lp_matrix.build_sizing_lp ohne zyklischen SoC,
+                 Kapazitäten und Rand-SoC über Gleichungen fixiert). Zielwert Q_k, die Dualwerte dieser Gleichungen sind
+                 der Subgradient g für den Schnitt.
+
+Die Fenster werden fest auf Worker-Prozesse verteilt und bleiben (mit 'highspy') im Speicher: je Iteration ändern sich
+nur die rechten Seiten der Fixier-Gleichungen, jedes Fenster startet aus seiner letzten Basis. Kein Solver-Lauf enthält
+mehr als ein Fenster, der Speicherbedarf je LP hängt nur von der Fensterlänge ab (mehrjährige Zeitreihen).
+
+Der Master wird in einem Vertrauensbereich um die beste bisherige Lösung gelöst (Linderoth & Wright 2003): Der Radius
+wächst nach erfolgreichen Schritten am Rand und schrumpft, wenn Kandidaten deutlich schlechter sind. Abbruch, sobald
+der Masterwert im Vertrauensbereich bis auf tolerance an die beste Lösung heranreicht (dann ist er eine untere Schranke).
+
+Mit mehreren Szenarien (z.B. Wetterjahre, benders_scenario_sizing) teilen alle Fenster dieselben Kapazitäten; jedes
+Szenario hat eigene Fenster mit eigenem zyklischen SoC, die Betriebskosten werden mit der Wahrscheinlichkeit gewichtet.
+"""
+import datetime
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+
+from lp_matrix import CAPACITY_VARIABLES, OPERATION_VARIABLES, MatrixLP, build_sizing_lp, set_grid_connection_limit, variable_layout
+from solver_backend import LPSolution, create_highs, highs_result, highspy, process_pool_context, solve_lp
+
+NUM_CAPACITIES = len(CAPACITY_VARIABLES)
+
+
+def window_bounds(num_timesteps, window_steps):
+    """ (Start, Ende) der Fenster; das letzte Fenster ist ggf. kürzer. """
+    if window_steps < 1:
+        raise ValueError(f"Fensterlänge muss mindestens 1 Zeitschritt betragen (angegeben: {window_steps}).")
+    return [(start, min(start + window_steps, num_timesteps)) for start in range(0, num_timesteps, window_steps)]
+
+
+def build_window_lp(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                    feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh,
+                    charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                    grid_connection_limit_mw=None, weight=1.0):
+    """
+    Betriebs-LP eines Fensters in der Variablenreihenfolge von build_sizing_lp (Kapazitätskosten 0, ohne zyklischen SoC,
+    Betriebskosten mit weight gewichtet, z.B. Wahrscheinlichkeit eines Wetterjahres).
+    Zusätzliche Gleichungen: "fixed_capacities" (Kapazität = rechte Seite) und "fixed_boundary_soc" (SoC am Anfang und
+    am Ende des Fensters = rechte Seite); ihre Dualwerte sind die Ableitungen der Betriebskosten nach diesen Werten.
+    """
+    lp = build_sizing_lp(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                         feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh, np.zeros(NUM_CAPACITIES),
+                         charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                         cyclic_soc=False)
+    lp.c *= weight
+    set_grid_connection_limit(lp, grid_connection_limit_mw, time_resolution_hours)
+    soc = lp.variable_slices["battery_soc"]
+    fixed_columns = np.concatenate([np.arange(NUM_CAPACITIES), [soc.start, soc.stop - 1]])
+    num_eq = lp.A_eq.shape[0]
+    fixing = sp.csr_matrix((np.ones(len(fixed_columns)), (np.arange(len(fixed_columns)), fixed_columns)),
+                           shape=(len(fixed_columns), lp.num_variables))
+    lp.A_eq = sp.vstack([lp.A_eq, fixing], format="csr")
+    lp.b_eq = np.concatenate([lp.b_eq, np.zeros(len(fixed_columns))])
+    lp.eq_row_slices["fixed_capacities"] = slice(num_eq, num_eq + NUM_CAPACITIES)
+    lp.eq_row_slices["fixed_boundary_soc"] = slice(num_eq + NUM_CAPACITIES, num_eq + NUM_CAPACITIES + 2)
+    return lp
+
+
+class _WindowModel:
+    """ Betriebs-LP eines Fensters; mit 'highspy' bleibt das Modell für Warmstarts zwischen den Iterationen im Speicher. """
+
+    def __init__(self, lp, backend, method):
+        self.lp = lp
+        self.backend = backend; self.method = method
+        start = lp.eq_row_slices["fixed_capacities"].start
+        self.fixed_rows = np.arange(start, start + NUM_CAPACITIES + 2, dtype=np.int32)
+        self.highs = create_highs(lp, method=method) if backend == "highspy" else None
+
+    def solve(self, fixed_values):
+        """ Löst mit Kapazitäten und Rand-SoC fixed_values (6 Werte). Liefert (Status, Zielwert, x, Dualwerte der Fixierung). """
+        self.lp.b_eq[self.fixed_rows] = fixed_values
+        if self.highs is None:
+            solution = solve_lp(self.lp, backend=self.backend, method=self.method)
+            status, objective, x, duals = solution.status, solution.objective, solution.x, solution.row_duals
+        else:
+            self.highs.changeRowsBounds(len(self.fixed_rows), self.fixed_rows, fixed_values, fixed_values)
+            self.highs.run()
+            status, objective, x, duals = highs_result(self.highs)
+            if status != "Optimal": self.highs.clearSolver()
+        return status, objective, x, (duals[self.fixed_rows] if duals is not None else None)
+
+
+_worker_state = {} # Pro Worker-Prozess: Betriebs-LPs der zugeordneten Fenster
+
+
+def _init_worker(scenarios, probabilities, windows, window_indices, lp_args, backend, method):
+    """ Initialisierung eines Worker-Prozesses: Betriebs-LPs der Fenster window_indices (Szenario, Start, Ende) einmal aufbauen. """
+    models = {}
+    for k in window_indices:
+        scenario, start, end = windows[k]
+        models[k] = _WindowModel(build_window_lp(*(profile[start:end] for profile in scenarios[scenario]), *lp_args,
+                                                 weight=probabilities[scenario]), backend, method)
+    _worker_state["models"] = models
+
+
+def _solve_windows(tasks, return_solution=False):
+    """ Aufgabe im Worker: löst die Fenster (Index -> 6 fixierte Werte). Liefert je Fenster (Status, Zielwert, Subgradient[, x]). """
+    results = {}
+    for k, fixed_values in tasks.items():
+        status, objective, x, gradient = _worker_state["models"][k].solve(np.asarray(fixed_values, dtype=float))
+        results[k] = (status, objective, gradient, x) if return_solution else (status, objective, gradient)
+    return results
+
+
+class _WindowPool:
+    """ Verteilt die Fenster fest auf Worker-Prozesse (je Prozess ein Executor), damit jedes Fenster-LP warm bleibt. """
+
+    def __init__(self, scenarios, probabilities, windows, lp_args, backend, method, num_workers):
+        num_workers = max(1, min(num_workers or multiprocessing.cpu_count(), len(windows)))
+        self.groups = [list(range(len(windows)))[k::num_workers] for k in range(num_workers)]
+        self.executors = None
+        if num_workers > 1:
+            context = process_pool_context()
+            self.executors = [ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker,
+                                                  initargs=(scenarios, probabilities, windows, group, lp_args, backend, method)) for group in self.groups]
+        else:
+            _init_worker(scenarios, probabilities, windows, range(len(windows)), lp_args, backend, method)
+
+    def solve(self, tasks, return_solution=False):
+        """ Löst alle Fenster (Index -> fixierte Werte), parallel je Fenstergruppe. """
+        if self.executors is None:
+            return _solve_windows(tasks, return_solution)
+        futures = [executor.submit(_solve_windows, {k: tasks[k] for k in group}, return_solution)
+                   for executor, group in zip(self.executors, self.groups)]
+        results = {}
+        for future in futures:
+            results.update(future.result())
+        return results
+
+    def close(self):
+        for executor in self.executors or []:
+            executor.shutdown()
+
+
+def _master_lp(capacity_costs, cuts, windows, next_window, center, radius, charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv,
+               battery_soc_min_percent, time_resolution_hours):
+    """
+    Master-LP über x = (Kapazitäten[4], SoC an den Fenstergrenzen[K], theta[K]) mit allen bisherigen Schnitten
+    (Fenster, Konstante, Subgradient[6]) und dem Vertrauensbereich center +/- radius für die Kapazitäten.
+    next_window[k]: Fenster, dessen Start-SoC das Ende von Fenster k ist (letztes Fenster eines Szenarios -> erstes).
+    """
+    num_windows = len(windows)
+    soc0 = NUM_CAPACITIES; theta0 = NUM_CAPACITIES + num_windows
+    num_variables = theta0 + num_windows
+    rows, cols, data, b_ub = [], [], [], []
+
+    def add_row(columns, values, rhs):
+        rows.append(np.full(len(columns), len(b_ub))); cols.append(columns); data.append(values); b_ub.append(rhs)
+
+    E, P = 2, 3 # Index von Batteriekapazität (MWh) und -leistung (MW)
+    for k, (_, start, end) in enumerate(windows):
+        s_start = soc0 + k; s_end = soc0 + next_window[k]
+        add_row([s_start, E], [1.0, -1.0], 0.0)                                # s_k <= E
+        add_row([s_start, E], [-1.0, battery_soc_min_percent], 0.0)            # SoC_min*E <= s_k
+        steps = (end - start) * time_resolution_hours
+        if s_start != s_end: # Erreichbare SoC-Änderung im Fenster (Laden bzw. Entladen mit voller Leistung)
+            add_row([s_end, s_start, P], [1.0, -1.0, -charge_discharge_eff_sqrt * steps], 0.0)
+            add_row([s_start, s_end, P], [1.0, -1.0, -charge_discharge_eff_sqrt_inv * steps], 0.0)
+    for k, constant, gradient in cuts: # g @ (y, s_k, s_next) - theta_k <= -(Q - g @ (y^, s^))
+        s_start = soc0 + k; s_end = soc0 + next_window[k]
+        columns = np.array([0, 1, 2, 3, s_start, s_end, theta0 + k])
+        values = np.concatenate([gradient, [-1.0]])
+        if s_start == s_end: # Nur ein Fenster im Szenario: Start- und End-SoC sind dieselbe Variable
+            columns = np.array([0, 1, 2, 3, s_start, theta0 + k]); values = np.concatenate([gradient[:4], [gradient[4] + gradient[5], -1.0]])
+        add_row(columns, values, -constant)
+
+    A_ub = sp.csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))), shape=(len(b_ub), num_variables))
+    lb = np.concatenate([np.maximum(0.0, center - radius), np.zeros(num_windows), np.full(num_windows, -np.inf)])
+    ub = np.concatenate([center + radius, np.full(2 * num_windows, np.inf)])
+    c = np.concatenate([capacity_costs, np.zeros(num_windows), np.ones(num_windows)])
+    return MatrixLP(c=c, A_ub=A_ub, b_ub=np.array(b_ub), A_eq=sp.csr_matrix((0, num_variables)), b_eq=np.zeros(0), lb=lb, ub=ub,
+                    num_timesteps=0, variable_slices={"capacities": slice(0, NUM_CAPACITIES), "boundary_soc": slice(soc0, theta0),
+                                                      "theta": slice(theta0, num_variables)},
+                    ub_row_slices={}, eq_row_slices={})
+
+
+@dataclass
+class BendersResult:
+    """ Ergebnis von benders_scenario_sizing. """
+    status: str              # 'Optimal' (Lücke <= tolerance), sonst 'Not Solved' bzw. Status des Masters
+    capacities: np.ndarray   # Kapazitäten (Reihenfolge wie CAPACITY_VARIABLES)
+    objective: float         # Kapazitätskosten + erwartete Betriebskosten
+    operating_costs: list    # Betriebskosten je Szenario (ungewichtet)
+    x: list                  # Lösung je Szenario in der Variablenreihenfolge von build_sizing_lp (mit den gemeinsamen Kapazitäten)
+    history: list            # Verlauf je Iteration (Dicts)
+    solve_seconds: float
+
+
+def _scenario_profiles(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                       feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh):
+    """ Profile eines Szenarios als Arrays gleicher Länge (Skalare werden auf alle Zeitschritte verteilt). """
+    num_timesteps = len(specific_yield_pv_mwh_per_mw)
+    return tuple(np.broadcast_to(np.asarray(profile, dtype=float), (num_timesteps,))
+                 for profile in (specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                                 feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh))
+
+
+def benders_scenario_sizing(scenarios, probabilities, capacity_costs,
+                            charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                            window_steps, grid_connection_limit_mw=None, initial_capacities=None, trust_region_radius=None,
+                            tolerance=1e-4, max_iterations=100, backend=None, method="simplex", num_workers=None, progress=True):
+    """
+    Auslegung per Benders-Zerlegung über mehrere Szenarien mit gemeinsamen Kapazitäten (siehe Moduldokumentation).
+    scenarios: je Szenario (PV-Ertrag, Wind-Ertrag, Bedarf, Einspeisevergütung, Netzbezugspreis), Längen dürfen sich unterscheiden.
+    probabilities: Gewichte der Betriebskosten je Szenario (> 0).
+    trust_region_radius: Startradius für die Kapazitäten (MW bzw. MWh, Standard: doppelter mittlerer Bedarf in MW).
+    Es werden nur Optimalitätsschnitte erzeugt: Mit grid_connection_limit_mw müssen alle Kandidaten im Betrieb zulässig sein
+    (z.B. Anschlussleistung über dem Spitzenbedarf), sonst RuntimeError.
+    """
+    backend = backend or ("highspy" if highspy is not None else "highs")
+    scenarios = [_scenario_profiles(*scenario) for scenario in scenarios]
+    probabilities = np.asarray(probabilities, dtype=float)
+    if len(probabilities) != len(scenarios) or np.any(probabilities <= 0):
+        raise ValueError(f"Je Szenario wird ein positives Gewicht benötigt ({len(scenarios)} Szenarien, Gewichte: {probabilities}).")
+    windows = []; next_window = []
+    for scenario, profiles in enumerate(scenarios):
+        first = len(windows)
+        scenario_windows = window_bounds(len(profiles[0]), window_steps)
+        windows += [(scenario, start, end) for start, end in scenario_windows]
+        next_window += list(range(first + 1, len(windows))) + [first] # Zyklischer SoC je Szenario
+    num_windows = len(windows)
+    lp_args = (charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours, grid_connection_limit_mw)
+    capacity_costs = np.asarray(capacity_costs, dtype=float)
+    radius = trust_region_radius or max(1.0, 2 * float(np.mean(np.concatenate([profiles[2] for profiles in scenarios]))) / time_resolution_hours)
+    max_radius = 1e3 * radius
+
+    def evaluate(capacities, boundary_soc, return_solution=False):
+        """ Betriebskosten aller Fenster bei festen Kapazitäten und Rand-SoC; liefert (Gesamtkosten, Schnitte, Ergebnisse). """
+        tasks = {k: np.concatenate([capacities, [boundary_soc[k], boundary_soc[next_window[k]]]]) for k in range(num_windows)}
+        results = pool.solve(tasks, return_solution)
+        failed = [k for k, result in results.items() if result[0] != "Optimal"]
+        if failed:
+            scenario, start, _ = windows[failed[0]]
+            raise RuntimeError(f"Betriebsfenster nicht lösbar (Status: {results[failed[0]][0]}) in Szenario {scenario} ab Zeitschritt {start}.")
+        new_cuts = [(k, results[k][1] - float(results[k][2] @ tasks[k]), results[k][2]) for k in range(num_windows)]
+        return float(capacity_costs @ capacities) + sum(results[k][1] for k in range(num_windows)), new_cuts, results
+
+    start_time = time.perf_counter()
+    pool = _WindowPool(scenarios, probabilities, windows, lp_args, backend, method, num_workers)
+    history = []
+    status = "Not Solved"
+    try:
+        incumbent = np.zeros(NUM_CAPACITIES) if initial_capacities is None else np.asarray(initial_capacities, dtype=float)
+        incumbent_soc = np.full(num_windows, battery_soc_min_percent * incumbent[2])
+        incumbent_cost, cuts, _ = evaluate(incumbent, incumbent_soc)
+        null_steps = 0
+        for iteration in range(1, max_iterations + 1):
+            master = _master_lp(capacity_costs, cuts, windows, next_window, incumbent, radius, charge_discharge_eff_sqrt,
+                                charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours)
+            master_solution = solve_lp(master, backend=backend, method=method)
+            if master_solution.status != "Optimal":
+                status = master_solution.status
+                break
+            model_value = master_solution.objective
+            predicted = incumbent_cost - model_value # Vom Master vorhergesagte Verbesserung
+            gap = predicted / max(1.0, abs(incumbent_cost))
+            history.append({"iteration": iteration, "best_cost": incumbent_cost, "model_value": model_value, "gap": gap,
+                            "radius": radius, "cuts": len(cuts), "seconds": time.perf_counter() - start_time})
+            if progress:
+                print(f"\rBenders: Iteration {iteration}, beste Lösung {incumbent_cost:,.0f} €, Master {model_value:,.0f} €, "
+                      f"Lücke {gap:.2e}, Radius {radius:.2f}, {len(cuts)} Schnitte "
+                      f"({str(datetime.timedelta(seconds=int(time.perf_counter() - start_time)))})", end="")
+            if gap <= tolerance:
+                status = "Optimal"
+                break
+            candidate = master.view(master_solution.x, "capacities").copy()
+            candidate_soc = master.view(master_solution.x, "boundary_soc").copy()
+            candidate_cost, new_cuts, _ = evaluate(candidate, candidate_soc)
+            cuts.extend(new_cuts)
+            if candidate_cost <= incumbent_cost - 1e-4 * predicted: # Erfolgreicher Schritt
+                at_boundary = np.max(np.abs(candidate - incumbent)) >= radius * (1 - 1e-6)
+                if at_boundary and incumbent_cost - candidate_cost >= 0.5 * predicted:
+                    radius = min(2 * radius, max_radius)
+                incumbent, incumbent_soc, incumbent_cost = candidate, candidate_soc, candidate_cost
+                null_steps = 0
+            else: # Kandidat nicht besser: Radius verkleinern, wenn er deutlich schlechter ist
+                rho = min(1.0, radius) * (candidate_cost - incumbent_cost) / predicted
+                null_steps += rho > 0
+                if rho > 3 or (null_steps >= 3 and rho > 1):
+                    radius /= min(rho, 4)
+                    null_steps = 0
+        if progress: print()
+        # Betrieb der besten Lösung zusammensetzen (je Szenario in der Variablenreihenfolge von build_sizing_lp)
+        total_cost, _, results = evaluate(incumbent, incumbent_soc, return_solution=True)
+    finally:
+        pool.close()
+
+    x = []; operating_costs = np.zeros(len(scenarios))
+    for profiles in scenarios:
+        x.append(np.zeros(variable_layout(len(profiles[0]))[1])); x[-1][:NUM_CAPACITIES] = incumbent
+    for k, (scenario, start, end) in enumerate(windows):
+        slices, _ = variable_layout(len(scenarios[scenario][0]))
+        window_slices, _ = variable_layout(end - start)
+        window_x = results[k][3]
+        for name in OPERATION_VARIABLES:
+            offset = slices[name].start + start
+            values = window_x[window_slices[name]]
+            x[scenario][offset:offset + len(values)] = values # SoC: Fensterende = Anfang des nächsten Fensters (gleicher Wert)
+        operating_costs[scenario] += results[k][1] / probabilities[scenario]
+    return BendersResult(status=status, capacities=incumbent, objective=total_cost, operating_costs=list(operating_costs), x=x,
+                         history=history, solve_seconds=time.perf_counter() - start_time)
+
+
+def benders_sizing(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                   feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh, capacity_costs,
+                   charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                   window_steps, backend=None, method="simplex", **options):
+    """
+    Auslegung eines Zeitraums per Benders-Zerlegung mit Betriebsfenstern der Länge window_steps (Optionen wie benders_scenario_sizing).
+    Liefert (LPSolution in der Variablenreihenfolge von build_sizing_lp, Verlauf als Liste von Dicts je Iteration).
+    """
+    backend = backend or ("highspy" if highspy is not None else "highs")
+    result = benders_scenario_sizing([(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                                       feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh)], [1.0], capacity_costs,
+                                     charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                                     window_steps, backend=backend, method=method, **options)
+    return LPSolution(status=result.status, objective=result.objective, x=result.x[0], backend=backend, method=method,
+                      solve_seconds=result.solve_seconds), result.history
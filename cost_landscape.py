@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+Kostenlandschaft (Abschnitt 7): Betriebskosten für ein PV/Wind-Raster bei fester Batterie.
+
+Das Betriebs-LP (lp_matrix.build_operational_lp) wird nur einmal aufgebaut. Zwischen den
+Rasterpunkten ändert sich ausschließlich die rechte Seite der Energiebilanz
+(Bedarf - PV-Erzeugung - Wind-Erzeugung). Mit 'highspy' bleibt das HiGHS-Modell im Speicher
+und jeder Punkt startet mit dem dualen Simplex aus der Basis des vorherigen Punktes
+(die alte Basis bleibt bei geänderter rechter Seite dual zulässig). Das Raster wird in
+Schlangenlinie durchlaufen, damit aufeinanderfolgende Punkte benachbart sind. Der erste Punkt
+startet optional aus einer Basis, die aus der regelbasierten Simulation (greedy_dispatch) abgeleitet ist.
+
+screen_cost_landscape liefert mit der Simulation obere und mit operational_cost_lower_bound untere
+Schranken für alle Punkte; Punkte, deren untere Schranke über der besten oberen liegt, brauchen kein LP.
+
+compute_cost_landscape_parallel verteilt die Rasterpunkte auf einen Prozess-Pool. Die großen
+Zeitreihen liegen dabei einmalig in einem Shared-Memory-Block und werden von den Worker-Prozessen
+nur gelesen (kein Pickling pro Aufgabe); jeder Worker baut sein Betriebs-LP einmal auf.
+
+Ohne Batterie ist der Betrieb je Zeitschritt trivial (Defizit importieren, Überschuss bei positiver
+Vergütung einspeisen, sonst abregeln). no_battery_cost_landscape berechnet dafür das ganze Raster
+geschlossen mit NumPy, ohne LP.
+"""
+import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from greedy_dispatch import greedy_basis_status, greedy_dispatch, greedy_solution_vector, operational_cost_lower_bound
+from lp_matrix import build_operational_lp, operational_balance_rhs
+from solver_backend import create_highs, highspy, process_pool_context
+
+
+def no_battery_cost_landscape(pv_range, wind_range, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                              feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh, max_chunk_bytes=256 * 2**20,
+                              grid_connection_limit_mw=None, time_resolution_hours=None):
+    """
+    Betriebskosten (Periode) ohne Batterie für das ganze Raster (Zeilen = Wind, Spalten = PV), geschlossen berechnet.
+
+    Mit Residuallast r = Bedarf - PV - Wind gilt: Import = max(r, 0), Export = max(-r, 0) bei Vergütung > 0.
+    Wegen max(-r, 0) = max(r, 0) - r ist nur ein max() nötig:
+        Kosten = sum((Preis - Vergütung+) * max(r, 0)) + sum(Vergütung+ * r)
+    Der zweite Term ist linear in PV/Wind. Das (Wind, PV, T)-Gitter wird in Blöcken von Wind-Zeilen
+    ausgewertet, sodass ein Block höchstens max_chunk_bytes belegt.
+
+    Mit Anschlussleistung L = grid_connection_limit_mw * time_resolution_hours je Zeitschritt:
+        Kosten = sum(Preis * max(r, 0) - Vergütung+ * min(max(-r, 0), L) - (Vergütung - Preis)+ * max(L - |r|, 0))
+    (Einspeisung begrenzt, gleichzeitiger Bezug und Einspeisung bei Vergütung > Preis); r > L ist unzulässig (np.inf).
+    """
+    pv_range = np.asarray(pv_range, dtype=float); wind_range = np.asarray(wind_range, dtype=float)
+    y_pv = np.asarray(specific_yield_pv_mwh_per_mw, dtype=float); y_wind = np.asarray(specific_yield_wind_mwh_per_mw, dtype=float)
+    demand = np.broadcast_to(np.asarray(demand_profile_mwh, dtype=float), y_pv.shape)
+    tariff_pos = np.maximum(np.asarray(feed_in_tariff_profile_eur_per_mwh, dtype=float), 0) # Bei Vergütung <= 0 wird abgeregelt
+    deficit_weight = np.broadcast_to(grid_purchase_price_eur_per_mwh - tariff_pos, y_pv.shape)
+
+    # Linearer Anteil sum(Vergütung+ * r) für alle Rasterpunkte
+    linear_part = (tariff_pos @ demand) - (pv_range * (tariff_pos @ y_pv))[None, :] - (wind_range * (tariff_pos @ y_wind))[:, None]
+    op_cost_grid = np.empty((len(wind_range), len(pv_range)))
+    if grid_connection_limit_mw is not None:
+        return _limited_no_battery_cost(pv_range, wind_range, y_pv, y_wind, demand, tariff_pos, grid_purchase_price_eur_per_mwh,
+                                        grid_connection_limit_mw * time_resolution_hours, max_chunk_bytes, op_cost_grid)
+    rows_per_chunk = max(1, int(max_chunk_bytes // max(1, len(pv_range) * len(y_pv) * 8)))
+    pv_gen = np.outer(pv_range, y_pv) # (PV, T), für alle Wind-Zeilen gleich
+    for start in range(0, len(wind_range), rows_per_chunk):
+        w = wind_range[start:start + rows_per_chunk]
+        residual = demand - pv_gen[None, :, :] - (w[:, None] * y_wind)[:, None, :] # (Wind-Block, PV, T)
+        np.maximum(residual, 0, out=residual)
+        op_cost_grid[start:start + len(w)] = residual @ deficit_weight
+    return op_cost_grid + linear_part
+
+
+def _limited_no_battery_cost(pv_range, wind_range, y_pv, y_wind, demand, tariff_pos, price, limit_mwh, max_chunk_bytes, op_cost_grid):
+    """ Wie no_battery_cost_landscape mit Anschlussleistung limit_mwh je Zeitschritt (blockweise, ohne linearen Anteil). """
+    price = np.broadcast_to(np.asarray(price, dtype=float), y_pv.shape)
+    arbitrage = np.maximum(tariff_pos - price, 0)
+    rows_per_chunk = max(1, int(max_chunk_bytes // max(1, 2 * len(pv_range) * len(y_pv) * 8)))
+    pv_gen = np.outer(pv_range, y_pv)
+    for start in range(0, len(wind_range), rows_per_chunk):
+        w = wind_range[start:start + rows_per_chunk]
+        residual = demand - pv_gen[None, :, :] - (w[:, None] * y_wind)[:, None, :] # (Wind-Block, PV, T)
+        infeasible = np.any(residual > limit_mwh * (1 + 1e-9), axis=2)
+        cost = np.maximum(residual, 0) @ price
+        cost -= np.minimum(np.maximum(-residual, 0), limit_mwh) @ tariff_pos
+        cost -= np.maximum(limit_mwh - np.abs(residual), 0) @ arbitrage
+        cost[infeasible] = np.inf
+        op_cost_grid[start:start + len(w)] = cost
+    return op_cost_grid
+
+
+def snake_order(num_rows, num_cols):
+    """ Rasterindizes (i, j) zeilenweise, jede zweite Zeile rückwärts (Nachbarpunkte folgen aufeinander). """
+    order = []
+    for i in range(num_rows):
+        cols = range(num_cols) if i % 2 == 0 else range(num_cols - 1, -1, -1)
+        order.extend((i, j) for j in cols)
+    return order
+
+
+class ParametricOperationalSolver:
+    """ Löst das Betriebs-LP für wechselnde PV/Wind-Leistungen; nur die rechte Seite der Energiebilanz wird angepasst. """
+
+    def __init__(self, lp, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh, warm_start=True, greedy_args=None,
+                 grid_connection_limit_mw=None):
+        """
+        greedy_args: (Einspeiseprofil, *operational_lp_args) für eine Start-Basis aus der regelbasierten Simulation (optional).
+        grid_connection_limit_mw: Anschlussleistung des LP (lp_matrix.build_operational_lp), auch für die Simulation.
+        """
+        self.lp = lp
+        self.greedy_args = greedy_args
+        self.grid_connection_limit_mw = grid_connection_limit_mw
+        self._has_basis = False
+        self.specific_yield_pv_mwh_per_mw = specific_yield_pv_mwh_per_mw
+        self.specific_yield_wind_mwh_per_mw = specific_yield_wind_mwh_per_mw
+        self.demand_profile_mwh = demand_profile_mwh
+        self.balance_rows = np.arange(lp.eq_row_slices["energy_balance"].start, lp.eq_row_slices["energy_balance"].stop, dtype=np.int32)
+        self.warm_start = warm_start and highspy is not None
+        if warm_start and highspy is None:
+            print("WARNUNG: 'highspy' nicht gefunden. Kostenlandschaft wird ohne Warmstart über scipy/HiGHS gelöst.")
+        self._highs = self._create_highs() if self.warm_start else None
+
+    def _create_highs(self):
+        """ Übergibt das Betriebs-LP einmalig an eine HiGHS-Instanz (duales Simplex, ohne Ausgabe). """
+        h = create_highs(self.lp, method="simplex")
+        h.setOptionValue("simplex_strategy", 1) # Duales Simplex: nach Änderung der rechten Seite bleibt die Basis dual zulässig
+        return h
+
+    def solve(self, pv_mw, wind_mw):
+        """ Löst den Betrieb für die gegebenen PV/Wind-Leistungen. Liefert (Status, Betriebskosten der Periode). """
+        rhs = operational_balance_rhs(self.specific_yield_pv_mwh_per_mw, self.specific_yield_wind_mwh_per_mw,
+                                      self.demand_profile_mwh, pv_mw, wind_mw)
+        if self._highs is not None:
+            h = self._highs
+            h.changeRowsBounds(len(self.balance_rows), self.balance_rows, rhs, rhs)
+            if not self._has_basis and self.greedy_args is not None:
+                self._seed_basis(rhs)
+            h.run()
+            if h.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+                h.clearSolver() # Ungültige Basis nicht an den nächsten Punkt weitergeben
+                self._has_basis = False
+                return "Not Solved", np.inf
+            self._has_basis = True
+            return "Optimal", h.getInfo().objective_function_value
+
+        from scipy.optimize import linprog
+        self.lp.b_eq[self.lp.eq_row_slices["energy_balance"]] = rhs
+        res = linprog(self.lp.c, A_eq=self.lp.A_eq, b_eq=self.lp.b_eq, bounds=self.lp.bounds, method="highs-ds")
+        if res.status != 0:
+            return "Not Solved", np.inf
+        return "Optimal", res.fun
+
+
+    def _seed_basis(self, rhs):
+        """ Start-Basis aus der regelbasierten Simulation für den ersten (kalten) Lösungslauf setzen. """
+        tariff, *operational_lp_args = self.greedy_args
+        x = greedy_solution_vector(self.lp, greedy_dispatch(rhs, tariff, *operational_lp_args, grid_connection_limit_mw=self.grid_connection_limit_mw))
+        col_status, row_status = greedy_basis_status(self.lp, x)
+        statuses = (highspy.HighsBasisStatus.kLower, highspy.HighsBasisStatus.kBasic, highspy.HighsBasisStatus.kUpper)
+        basis = highspy.HighsBasis()
+        basis.col_status = [statuses[k] for k in col_status]
+        basis.row_status = [statuses[k] for k in row_status]
+        basis.valid = True
+        self._highs.setBasis(basis) # Bei singulärer Basis ersetzt HiGHS einzelne Spalten selbständig
+
+
+def screen_cost_landscape(pv_range, wind_range, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                          feed_in_tariff_profile_eur_per_mwh, operational_lp_args, grid_connection_limit_mw=None):
+    """
+    Schranken der Betriebskosten für alle Rasterpunkte ohne LP: (obere Schranke aus der regelbasierten Simulation,
+    untere Schranke aus operational_cost_lower_bound). operational_lp_args wie bei build_operational_lp.
+    Mit grid_connection_limit_mw beziehen sich beide Schranken auf das LP mit Anschlussleistung.
+    """
+    price, _, battery_power_mw, eff_sqrt, _, _, time_resolution_hours = operational_lp_args
+    upper = np.empty((len(wind_range), len(pv_range))); lower = np.empty_like(upper)
+    for i, wind_mw in enumerate(wind_range):
+        for j, pv_mw in enumerate(pv_range):
+            residual = operational_balance_rhs(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh, pv_mw, wind_mw)
+            upper[i, j] = greedy_dispatch(residual, feed_in_tariff_profile_eur_per_mwh, *operational_lp_args,
+                                          grid_connection_limit_mw=grid_connection_limit_mw)["operational_cost"]
+            lower[i, j] = operational_cost_lower_bound(residual, feed_in_tariff_profile_eur_per_mwh, price, battery_power_mw,
+                                                       eff_sqrt ** 2, time_resolution_hours, grid_connection_limit_mw)
+    return upper, lower
+
+
+def compute_cost_landscape(solver, pv_range, wind_range, progress=True, points_mask=None):
+    """
+    Betriebskosten (Periode) für alle Rasterpunkte; Zeilen = Wind, Spalten = PV. Fehlgeschlagene Punkte = np.inf.
+    Mit points_mask (bool, Form des Rasters) werden nur die markierten Punkte gelöst, die übrigen bleiben np.nan.
+    """
+    op_cost_grid = np.full((len(wind_range), len(pv_range)), np.nan)
+    order = [(i, j) for i, j in snake_order(len(wind_range), len(pv_range)) if points_mask is None or points_mask[i, j]]
+    total_combinations = len(order)
+    start_time_sens = datetime.datetime.now()
+    solve_seconds = []
+    for current_combination, (i, j) in enumerate(order, start=1):
+        # Fortschrittsanzeige (weniger häufig updaten)
+        if progress and (current_combination % 5 == 0 or current_combination == total_combinations or current_combination == 1):
+            elapsed = datetime.datetime.now() - start_time_sens
+            if current_combination > 1 and elapsed.total_seconds() > 1:
+                est_remaining = elapsed * (total_combinations / current_combination) - elapsed
+                print(f"\rBerechne Kostenlandschaft: Punkt {current_combination}/{total_combinations}. Verbleibend ca.: {str(est_remaining).split('.')[0]}", end="")
+            else:
+                print(f"\rBerechne Kostenlandschaft: Punkt {current_combination}/{total_combinations}...", end="")
+        start = time.perf_counter()
+        _, op_cost = solver.solve(pv_range[j], wind_range[i])
+        solve_seconds.append(time.perf_counter() - start)
+        op_cost_grid[i, j] = op_cost # Zeile i -> Wind, Spalte j -> PV
+    if progress and solve_seconds:
+        print(f"\nMittlere Lösungszeit pro Punkt: {np.mean(solve_seconds):.3f} s (erster Punkt: {solve_seconds[0]:.3f} s)")
+    return op_cost_grid
+
+
+# Reihenfolge der Zeitreihen im Shared-Memory-Block
+_SHARED_PROFILES = ("specific_yield_pv_mwh_per_mw", "specific_yield_wind_mwh_per_mw", "demand_profile_mwh", "feed_in_tariff_profile_eur_per_mwh")
+_worker_state = {} # Pro Worker-Prozess: Shared-Memory-Verbindung und Betriebs-LP-Solver
+
+
+def _init_worker(shm_name, num_timesteps, operational_lp_args, grid_connection_limit_mw):
+    """ Initialisierung eines Worker-Prozesses: Zeitreihen aus dem Shared Memory lesen, Betriebs-LP einmal aufbauen. """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    profiles = np.ndarray((len(_SHARED_PROFILES), num_timesteps), dtype=np.float64, buffer=shm.buf)
+    profiles.flags.writeable = False
+    y_pv, y_wind, demand, tariff = profiles
+    lp = build_operational_lp(demand, tariff, *operational_lp_args, grid_connection_limit_mw=grid_connection_limit_mw)
+    _worker_state["shm"] = shm # Referenz halten, sonst wird der Puffer freigegeben
+    _worker_state["solver"] = ParametricOperationalSolver(lp, y_pv, y_wind, demand, greedy_args=(tariff, *operational_lp_args),
+                                                          grid_connection_limit_mw=grid_connection_limit_mw)
+
+
+def _solve_point(i, j, pv_mw, wind_mw):
+    """ Aufgabe im Worker: ein Rasterpunkt. Liefert (i, j, Betriebskosten, Lösungszeit in s). """
+    start = time.perf_counter()
+    _, op_cost = _worker_state["solver"].solve(pv_mw, wind_mw)
+    return i, j, op_cost, time.perf_counter() - start
+
+
+def _run_pool(points, pv_range, wind_range, num_workers, initargs, on_result):
+    """ Löst die Punkte in einem Prozess-Pool. Liefert die Punkte, die durch einen abgestürzten Worker verloren gingen. """
+    lost_points = []
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=process_pool_context(),
+                             initializer=_init_worker, initargs=initargs) as pool:
+        futures = {pool.submit(_solve_point, i, j, pv_range[j], wind_range[i]): (i, j) for i, j in points}
+        for future in as_completed(futures):
+            i, j = futures[future]
+            try:
+                _, _, op_cost, seconds = future.result()
+            except BrokenProcessPool:
+                lost_points.append((i, j)); continue
+            except Exception as e: # Fehler im Worker: Punkt als nicht lösbar markieren
+                print(f"\nWARNUNG: Punkt (Wind={wind_range[i]:.1f}, PV={pv_range[j]:.1f}) fehlgeschlagen: {e}")
+                op_cost, seconds = np.inf, float("nan")
+            on_result(i, j, op_cost, seconds)
+    return lost_points
+
+
+def compute_cost_landscape_parallel(pv_range, wind_range, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw,
+                                    demand_profile_mwh, feed_in_tariff_profile_eur_per_mwh, operational_lp_args,
+                                    num_workers=None, progress=True, points_mask=None, grid_connection_limit_mw=None):
+    """
+    Wie compute_cost_landscape, aber verteilt auf einen Prozess-Pool mit num_workers Prozessen.
+    operational_lp_args: restliche Argumente von build_operational_lp ab grid_purchase_price_eur_per_mwh;
+    grid_connection_limit_mw wird an build_operational_lp weitergegeben.
+    Nicht lösbare Punkte und Punkte, deren Worker abstürzt, ergeben np.inf; der Rest des Rasters wird weiter berechnet.
+    """
+    op_cost_grid = np.full((len(wind_range), len(pv_range)), np.nan)
+    order = [(i, j) for i, j in snake_order(len(wind_range), len(pv_range)) if points_mask is None or points_mask[i, j]]
+    total_combinations = len(order)
+    num_timesteps = len(demand_profile_mwh)
+    shm = shared_memory.SharedMemory(create=True, size=len(_SHARED_PROFILES) * num_timesteps * 8)
+    start_time_sens = datetime.datetime.now()
+    solve_seconds = []
+
+    def on_result(i, j, op_cost, seconds):
+        """ Trägt ein fertiges Ergebnis ins Raster ein und meldet Fortschritt, Restzeit und Lösungszeit. """
+        op_cost_grid[i, j] = op_cost # Zeile i -> Wind, Spalte j -> PV
+        if np.isfinite(seconds): solve_seconds.append(seconds)
+        if progress:
+            done = np.count_nonzero(~np.isnan(op_cost_grid)) if points_mask is None else np.count_nonzero(~np.isnan(op_cost_grid[points_mask]))
+            elapsed = datetime.datetime.now() - start_time_sens
+            est_remaining = elapsed * (total_combinations / done) - elapsed
+            print(f"\rBerechne Kostenlandschaft: Punkt {done}/{total_combinations}, letzter Punkt {seconds:.2f} s. "
+                  f"Verbleibend ca.: {str(est_remaining).split('.')[0]}", end="")
+
+    try:
+        profiles = np.ndarray((len(_SHARED_PROFILES), num_timesteps), dtype=np.float64, buffer=shm.buf)
+        profiles[:] = (specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh, feed_in_tariff_profile_eur_per_mwh)
+        del profiles # Keine Sicht auf den Puffer behalten, sonst schlägt shm.close() fehl
+        initargs = (shm.name, num_timesteps, tuple(operational_lp_args), grid_connection_limit_mw)
+
+        lost_points = _run_pool(order, pv_range, wind_range, num_workers, initargs, on_result)
+        # Ein abgestürzter Worker reißt alle gerade laufenden Punkte mit. Diese einzeln in eigenen Prozessen
+        # wiederholen, damit nur der tatsächlich fehlerhafte Punkt np.inf erhält.
+        for i, j in lost_points:
+            if _run_pool([(i, j)], pv_range, wind_range, 1, initargs, on_result):
+                print(f"\nWARNUNG: Worker bei Punkt (Wind={wind_range[i]:.1f}, PV={pv_range[j]:.1f}) abgestürzt.")
+                on_result(i, j, np.inf, float("nan"))
+    finally:
+        shm.close()
+        shm.unlink()
+    if progress and solve_seconds:
+        print(f"\nMittlere Lösungszeit pro Punkt: {np.mean(solve_seconds):.3f} s (max. {np.max(solve_seconds):.3f} s)")
+    return op_cost_grid
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Regelbasierte (gierige) Batterie-Betriebssimulation für feste PV/Wind/Batterie-Größen.
+
+Regeln je Zeitschritt:
+    Überschuss -> Batterie laden (Leistungs- und SoC-Grenze), Rest einspeisen (Vergütung > 0) oder abregeln
+    Defizit    -> Batterie entladen (Leistungs- und SoC_min-Grenze), Rest aus dem Netz beziehen
+
+Die zyklische Randbedingung SoC(Ende) = SoC(Anfang) wird über eine Fixpunkt-Iteration des Start-SoC
+erfüllt: Der End-SoC hängt monoton vom Start-SoC ab und wird unabhängig davon, sobald die Batterie
+einmal voll oder leer ist. Eine verbleibende Lücke wird konservativ mit dem Netzbezugspreis bewertet.
+
+Die Kosten sind damit eine zulässige Lösung des Betriebs-LP und eine obere Schranke für dessen Optimum.
+Sie dienen zum Vorsortieren von Rasterpunkten/Szenarien (zusammen mit operational_cost_lower_bound) und
+über greedy_basis_status als Start-Basis für das Simplex-Verfahren.
+"""
+import numpy as np
+
+try:
+    import numba # Optional: kompiliert die Zeitschleife (35k Schritte in ~1 ms)
+except ImportError:
+    numba = None
+
+
+def _dispatch_loop(residual, tariff, power_limit, export_limit, soc_min, soc_max, eff_sqrt, eff_sqrt_inv, soc_start,
+                   grid_import, grid_export, curtailment, charge, discharge, soc):
+    """ Zeitschleife der Simulation; schreibt in die übergebenen Ausgabe-Arrays und liefert den End-SoC. """
+    level = soc_start
+    for t in range(residual.shape[0]):
+        soc[t] = level
+        r = residual[t]
+        if r < 0: # Überschuss
+            surplus = -r
+            ch = min(surplus, power_limit, (soc_max - level) * eff_sqrt_inv)
+            if ch < 0: ch = 0.0
+            level += ch * eff_sqrt
+            rest = surplus - ch
+            charge[t] = ch; discharge[t] = 0.0; grid_import[t] = 0.0
+            if tariff[t] > 0:
+                grid_export[t] = min(rest, export_limit); curtailment[t] = rest - grid_export[t]
+            else:
+                grid_export[t] = 0.0; curtailment[t] = rest
+        else: # Defizit
+            dis = min(r, power_limit, (level - soc_min) * eff_sqrt)
+            if dis < 0: dis = 0.0
+            level -= dis * eff_sqrt_inv
+            charge[t] = 0.0; discharge[t] = dis; grid_import[t] = r - dis
+            grid_export[t] = 0.0; curtailment[t] = 0.0
+    soc[residual.shape[0]] = level
+    return level
+
+
+if numba is not None:
+    _dispatch_loop = numba.njit(cache=True)(_dispatch_loop)
+
+
+def greedy_dispatch(residual_load_mwh, feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh,
+                    battery_capacity_mwh, battery_power_mw, charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv,
+                    battery_soc_min_percent, time_resolution_hours, max_iterations=5, grid_connection_limit_mw=None):
+    """
+    Simuliert den regelbasierten Betrieb über alle Zeitschritte (residual_load_mwh = Bedarf - PV - Wind).
+    Liefert ein Dict mit den Zeitreihen (wie die LP-Variablen), den Betriebskosten der Periode und der
+    verbleibenden Lücke der zyklischen Randbedingung. Mit grid_connection_limit_mw (MW) wird die Einspeisung darauf
+    begrenzt (Rest abgeregelt); übersteigt der Netzbezug die Anschlussleistung, ist die Simulation unzulässig
+    und die Betriebskosten sind np.inf.
+    """
+    residual = np.ascontiguousarray(residual_load_mwh, dtype=np.float64)
+    tariff = np.ascontiguousarray(np.broadcast_to(feed_in_tariff_profile_eur_per_mwh, residual.shape), dtype=np.float64)
+    num_timesteps = len(residual)
+    result = {name: np.zeros(num_timesteps) for name in ("grid_import", "grid_export", "curtailment", "battery_charge", "battery_discharge")}
+    result["battery_soc"] = np.zeros(num_timesteps + 1)
+    soc_min = battery_soc_min_percent * battery_capacity_mwh
+    power_limit = battery_power_mw * time_resolution_hours
+    grid_limit = np.inf if grid_connection_limit_mw is None else grid_connection_limit_mw * time_resolution_hours
+
+    soc_start = soc_min
+    for _ in range(max_iterations):
+        soc_end = _dispatch_loop(residual, tariff, power_limit, grid_limit, soc_min, battery_capacity_mwh, charge_discharge_eff_sqrt,
+                                 charge_discharge_eff_sqrt_inv, soc_start, result["grid_import"], result["grid_export"],
+                                 result["curtailment"], result["battery_charge"], result["battery_discharge"], result["battery_soc"])
+        if abs(soc_end - soc_start) <= 1e-9 * max(1.0, battery_capacity_mwh):
+            break
+        soc_start = soc_end # Start-SoC auf End-SoC setzen (Fixpunkt-Iteration)
+
+    # Verbleibende Lücke: fehlende Energie am Ende konservativ zum Netzbezugspreis nachladen
+    cyclic_gap_mwh = max(0.0, result["battery_soc"][0] - result["battery_soc"][-1])
+    cyclic_penalty = cyclic_gap_mwh * charge_discharge_eff_sqrt_inv * np.max(grid_purchase_price_eur_per_mwh)
+    result["operational_cost"] = float(np.sum(result["grid_import"] * grid_purchase_price_eur_per_mwh)
+                                       - np.dot(result["grid_export"], tariff) + cyclic_penalty)
+    if np.any(result["grid_import"] > grid_limit * (1 + 1e-9)): # Defizit über der Anschlussleistung: keine zulässige Lösung
+        result["operational_cost"] = np.inf
+    result["cyclic_gap_mwh"] = cyclic_gap_mwh
+    return result
+
+
+def greedy_solution_vector(lp, result):
+    """ Überträgt eine Simulation in die Variablenreihenfolge des Betriebs-LP (lp_matrix.build_operational_lp), z.B. als Startlösung. """
+    x = np.zeros(lp.num_variables)
+    for name in ("grid_import", "grid_export", "curtailment", "battery_charge", "battery_discharge", "battery_soc"):
+        x[lp.variable_slices[name]] = result[name]
+    return x
+
+
+# Basisstatus-Codes (Reihenfolge wie highspy.HighsBasisStatus: kLower, kBasic, kUpper)
+BASIS_LOWER, BASIS_BASIC, BASIS_UPPER = 0, 1, 2
+
+
+def greedy_basis_status(lp, x, tol=1e-9):
+    """
+    Konstruiert aus einer Simulation x (Variablenreihenfolge des Betriebs-LP) eine Start-Basis für das Simplex-Verfahren.
+    Je Zeitschritt ist für die Energiebilanz die aktive Netzvariable (Import, sonst Export, sonst Abregelung) basisch,
+    für das SoC-Update der SoC(t+1), falls er zwischen seinen Grenzen liegt, sonst Ladung bzw. Entladung.
+    Für die zyklische Randbedingung ist SoC(0) basisch. Liefert Codes für Spalten und Zeilen (Zeilen alle nicht-basisch).
+    """
+    col_status = np.full(lp.num_variables, BASIS_LOWER, dtype=np.int8)
+    col_status[np.isfinite(lp.ub) & (lp.ub > lp.lb) & (np.abs(x - lp.ub) <= tol)] = BASIS_UPPER
+    inside = (x > lp.lb + tol) & (x < lp.ub - tol)
+    sl = lp.variable_slices
+    ts = np.arange(lp.num_timesteps)
+    imp = sl["grid_import"].start + ts; exp = sl["grid_export"].start + ts; cur = sl["curtailment"].start + ts
+    grid_basic = np.where(x[imp] > tol, imp, np.where(x[exp] > tol, exp, np.where(x[cur] > tol, cur, imp)))
+    ch = sl["battery_charge"].start + ts; dis = sl["battery_discharge"].start + ts; soc_next = sl["battery_soc"].start + ts + 1
+    soc_basic = np.where(inside[soc_next], soc_next, np.where(inside[ch], ch, np.where(inside[dis], dis, soc_next)))
+    col_status[grid_basic] = BASIS_BASIC
+    col_status[soc_basic] = BASIS_BASIC
+    if "battery_cyclic_soc" in lp.eq_row_slices:
+        col_status[sl["battery_soc"].start] = BASIS_BASIC
+    row_status = np.full(lp.A_eq.shape[0] + lp.A_ub.shape[0], BASIS_LOWER, dtype=np.int8)
+    return col_status, row_status
+
+
+def operational_cost_lower_bound(residual_load_mwh, feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh,
+                                 battery_power_mw, battery_efficiency, time_resolution_hours, grid_connection_limit_mw=None):
+    """
+    Untere Schranke der Betriebskosten mit Batterie: Kosten ohne Batterie minus den größtmöglichen Batterienutzen.
+    Relaxation ohne SoC-Grenzen und zeitliche Reihenfolge: Entladung spart im Defizit den Netzbezugspreis, darüber
+    hinaus bringt sie die Einspeisevergütung; Ladung kostet im Überschuss die entgangene Vergütung, darüber hinaus
+    den Netzbezugspreis. Die wertvollste Entladung wird mit der günstigsten Ladung (1/Wirkungsgrad MWh je MWh) gepaart.
+    Mit grid_connection_limit_mw (MW) ist zusätzlich gleichzeitiger Bezug und Einspeisung lohnend, wo die Vergütung den
+    Preis übersteigt; höchstens Anschlussleistung * Zeitschritt je Zeitschritt, dieser Erlös wird abgezogen.
+    """
+    residual = np.asarray(residual_load_mwh, dtype=float)
+    tariff_pos = np.broadcast_to(np.maximum(feed_in_tariff_profile_eur_per_mwh, 0), residual.shape)
+    price = np.broadcast_to(grid_purchase_price_eur_per_mwh, residual.shape)
+    deficit = np.maximum(residual, 0); surplus = np.maximum(-residual, 0)
+    no_battery_cost = np.sum(deficit * price) - np.dot(surplus, tariff_pos)
+    if grid_connection_limit_mw is not None: # Bezug und Einspeisung im selben Zeitschritt (nur bei Vergütung > Preis)
+        no_battery_cost -= np.sum(np.maximum(tariff_pos - price, 0)) * grid_connection_limit_mw * time_resolution_hours
+
+    power_limit = battery_power_mw * time_resolution_hours
+    if power_limit <= 0 or battery_efficiency <= 0:
+        return float(no_battery_cost)
+    discharge_to_load = np.minimum(deficit, power_limit); charge_from_surplus = np.minimum(surplus, power_limit)
+    # Entlade-Möglichkeiten absteigend nach Wert, Lade-Möglichkeiten aufsteigend nach Kosten (Mengen in MWh)
+    discharge_value = np.concatenate([price, tariff_pos]); discharge_amount = np.concatenate([discharge_to_load, power_limit - discharge_to_load])
+    order = np.argsort(-discharge_value, kind="stable"); discharge_value = discharge_value[order]; discharge_amount = discharge_amount[order]
+    charge_cost = np.concatenate([tariff_pos, price]); charge_amount = np.concatenate([charge_from_surplus, power_limit - charge_from_surplus])
+    order = np.argsort(charge_cost, kind="stable"); charge_cost = charge_cost[order]; charge_amount = charge_amount[order]
+
+    # Kumulierter Entladewert V(D) ist konkav, Ladekosten C(D/Wirkungsgrad) konvex -> Maximum von V - C an einem Knickpunkt
+    discharge_cum = np.concatenate([[0.0], np.cumsum(discharge_amount)]); value_cum = np.concatenate([[0.0], np.cumsum(discharge_amount * discharge_value)])
+    charge_cum = np.concatenate([[0.0], np.cumsum(charge_amount)]) * battery_efficiency; cost_cum = np.concatenate([[0.0], np.cumsum(charge_amount * charge_cost)])
+    candidates = np.concatenate([discharge_cum, charge_cum])
+    candidates = candidates[candidates <= min(discharge_cum[-1], charge_cum[-1])]
+    battery_benefit = np.max(np.interp(candidates, discharge_cum, value_cum) - np.interp(candidates, charge_cum, cost_cum))
+    return float(no_battery_cost - max(battery_benefit, 0.0))
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Laden der Ertragszeitreihen (SMARD-Arbeitsmappe) mit spaltenweisem Zwischenspeicher.
+
+Beim ersten Laden wird die Excel-Datei gelesen und die daraus abgeleiteten spezifischen Erträge
+(MWh pro installiertem MW) werden als .npy-Dateien in einem Cache-Verzeichnis neben der Arbeitsmappe
+abgelegt (<Datei>.cache/). meta.json enthält Pfad, Änderungszeit und SHA-256 der Quelldatei; stimmen
+diese nicht mehr überein, wird der Cache neu erzeugt. Weitere Läufe lesen die Arrays per Memory-Mapping
+in Millisekunden statt die Arbeitsmappe erneut über openpyxl zu parsen.
+
+Aufbau der Arbeitsmappe (erstes Blatt, Kopfzeile in Zeile 1):
+    A: Zeitstempel, B: Wind (MWh), C: PV (MWh), D: installierte Wind-Leistung (MW), E: installierte PV-Leistung (MWp)
+Fehlen D/E, werden B/C bereits als spezifische Erträge (pro 1 MW) interpretiert.
+
+feed_in_tariff_profile erzeugt das Einspeiseprofil (feste Vergütung, in zufällig gewählten Zeitschritten oder Blöcken 0 €).
+load_price_profiles liest stattdessen reale Preise (z.B. Day-Ahead-Preise aus einem SMARD-Export, stündlich oder viertelstündlich)
+als Netzbezugspreis und Einspeisevergütung je Zeitschritt.
+
+pandas wird erst beim Lesen einer Arbeitsmappe bzw. Preisdatei importiert; Läufe aus dem Cache kommen ohne pandas aus.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+CACHE_FORMAT_VERSION = 1
+CACHED_PROFILES = ("specific_yield_pv_mwh_per_mw", "specific_yield_wind_mwh_per_mw")
+
+
+def file_fingerprint(path):
+    """ Cache-Schlüssel einer Quelldatei: absoluter Pfad, Änderungszeit (ns) und SHA-256 des Inhalts. """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(block)
+    return {"path": os.path.abspath(path), "mtime_ns": os.stat(path).st_mtime_ns, "sha256": sha256.hexdigest()}
+
+
+def cache_directory(excel_filename):
+    return f"{excel_filename}.cache"
+
+
+def read_yield_workbook(excel_filename):
+    """ Liest die Arbeitsmappe und berechnet die spezifischen Erträge. Liefert (PV, Wind, Info-Dict). """
+    import pandas as pd
+    df_input = pd.read_excel(excel_filename, sheet_name=0, header=0)
+    try:
+        wind_mwh_col = df_input.columns[1]; pv_mwh_col = df_input.columns[2]
+    except IndexError: raise IndexError("Fehler: Nicht genügend Spalten in Excel gefunden (mind. A-C erwartet, A-E für spez. Ertrag).")
+    if len(df_input.columns) >= 5: # Installierte Leistung aus der ersten Zeile (Basis für spezifische Erträge)
+        installed_wind_cap = float(df_input[df_input.columns[3]].iloc[0]); installed_pv_cap = float(df_input[df_input.columns[4]].iloc[0])
+        if installed_wind_cap <= 1e-6 or installed_pv_cap <= 1e-6: raise ValueError("Fehler: Installierte Leistung in Excel ungültig (<= 0).")
+    else:
+        print("WARNUNG: Spalten für installierte Leistung nicht gefunden. Nehme an, die Ertragsspalten sind spezifisch (pro 1 MW).")
+        installed_wind_cap = 1.0; installed_pv_cap = 1.0
+    specific_yield_wind_mwh_per_mw = np.maximum(0, df_input[wind_mwh_col].to_numpy(dtype=float) / installed_wind_cap)
+    specific_yield_pv_mwh_per_mw = np.maximum(0, df_input[pv_mwh_col].to_numpy(dtype=float) / installed_pv_cap)
+    info = {"num_rows": len(df_input), "installed_wind_cap": installed_wind_cap, "installed_pv_cap": installed_pv_cap}
+    return specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, info
+
+
+def _read_cache(cache_dir, fingerprint):
+    """ Liefert (PV, Wind, Info) aus dem Cache, falls er zur Quelldatei passt, sonst None. """
+    try:
+        with open(os.path.join(cache_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format_version") != CACHE_FORMAT_VERSION or meta.get("source") != fingerprint:
+        return None
+    try:
+        profiles = [np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r") for name in CACHED_PROFILES]
+    except (OSError, ValueError):
+        return None
+    return profiles[0], profiles[1], meta["info"]
+
+
+def _write_cache(cache_dir, fingerprint, profiles, info):
+    """ Schreibt die Arrays und zuletzt meta.json (erst damit ist der Cache gültig). """
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, "meta.json")
+    if os.path.exists(meta_path): os.remove(meta_path) # Alten Cache ungültig machen, bevor die Arrays überschrieben werden
+    for name, values in zip(CACHED_PROFILES, profiles):
+        np.save(os.path.join(cache_dir, f"{name}.npy"), np.ascontiguousarray(values, dtype=np.float64))
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"format_version": CACHE_FORMAT_VERSION, "source": fingerprint, "info": info}, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def load_yield_profiles(excel_filename, use_cache=True):
+    """
+    Spezifische PV- und Wind-Erträge (MWh/MW je Zeitschritt) aus der Arbeitsmappe, bei gültigem Cache per Memory-Mapping
+    (schreibgeschützte Arrays). Liefert (PV, Wind, Info-Dict mit num_rows, installierten Leistungen und 'source').
+    """
+    if not use_cache:
+        y_pv, y_wind, info = read_yield_workbook(excel_filename)
+        return y_pv, y_wind, dict(info, source="excel")
+    fingerprint = file_fingerprint(excel_filename) # FileNotFoundError, falls die Arbeitsmappe fehlt
+    cache_dir = cache_directory(excel_filename)
+    cached = _read_cache(cache_dir, fingerprint)
+    if cached is not None:
+        y_pv, y_wind, info = cached
+        return y_pv, y_wind, dict(info, source="cache")
+    y_pv, y_wind, info = read_yield_workbook(excel_filename)
+    try:
+        _write_cache(cache_dir, fingerprint, (y_pv, y_wind), info)
+    except OSError as e:
+        print(f"WARNUNG: Cache '{cache_dir}' konnte nicht geschrieben werden ({e}). Daten werden beim nächsten Lauf erneut aus Excel gelesen.")
+    return y_pv, y_wind, dict(info, source="excel")
+
+
+def constant_profile(value, num_timesteps):
+    """
+    Konstantes Profil (z.B. Bedarf, fester Netzbezugspreis) als schreibgeschützte Sicht auf einen einzelnen Wert
+    (np.broadcast_to, Schrittweite 0): belegt 8 Byte statt 8 Byte je Zeitschritt. Beschreibbare Kopie: np.array(profile).
+    """
+    return np.broadcast_to(np.float64(value), (num_timesteps,))
+
+
+def feed_in_tariff_profile(num_timesteps, feed_in_tariff_eur_per_mwh, negative_price_hours, time_resolution_hours, seed=42,
+                           pattern="random", block_hours=4, weights=None):
+    """
+    Einspeisevergütung je Zeitschritt: feste Vergütung, in negative_price_hours Stunden (umgerechnet in Zeitschritte) 0 €.
+    pattern="random": einzelne zufällige Zeitschritte ohne Wiederholung (seed=42 ergibt das bisherige Profil aus Abschnitt 2).
+    pattern="blocks": zusammenhängende Blöcke von block_hours Stunden (an Blockgrenzen ausgerichtet, ohne Überlappung);
+    mit weights (z.B. PV-Ertrag je Zeitschritt) werden Blöcke mit großer Summe der Gewichte bevorzugt (sonnige Mittagsstunden).
+    """
+    negative_price_timesteps = negative_price_hours / time_resolution_hours # Stunden in Zeitschritte umrechnen
+    num_negative_timesteps = int(min(negative_price_timesteps, num_timesteps)) # Absolute Anzahl, max. alle Zeitschritte
+    profile = np.full(num_timesteps, float(feed_in_tariff_eur_per_mwh))
+    rng = np.random.RandomState(seed)
+    if pattern == "random":
+        random_indices = rng.choice(num_timesteps, num_negative_timesteps, replace=False)
+    elif pattern == "blocks":
+        block_steps = max(1, int(round(block_hours / time_resolution_hours)))
+        num_slots = -(-num_timesteps // block_steps)
+        num_blocks = -(-num_negative_timesteps // block_steps)
+        p = None
+        if weights is not None:
+            slot_weights = np.add.reduceat(np.maximum(np.asarray(weights, dtype=float), 0), np.arange(0, num_timesteps, block_steps))
+            if np.count_nonzero(slot_weights) >= num_blocks: p = slot_weights / slot_weights.sum()
+        slots = rng.choice(num_slots, num_blocks, replace=False, p=p)
+        random_indices = (slots[:, None] * block_steps + np.arange(block_steps)).ravel()
+        random_indices = random_indices[random_indices < num_timesteps][:num_negative_timesteps]
+    else:
+        raise ValueError(f"Unbekanntes Muster '{pattern}' für Stunden ohne Vergütung. Verfügbar: random, blocks")
+    profile[random_indices] = 0
+    return profile
+
+
+def _price_column(df, column):
+    """ Spalte der Preise: Name oder Index; ohne Angabe die erste Spalte mit '€/MWh' bzw. 'EUR/MWh' im Namen, sonst die erste numerische. """
+    import pandas as pd
+    if column is not None:
+        return df.columns[column] if isinstance(column, int) else column
+    for name in df.columns:
+        if "€/mwh" in str(name).lower() or "eur/mwh" in str(name).lower():
+            return name
+    for name in df.columns:
+        if pd.to_numeric(df[name], errors="coerce").notna().mean() > 0.9:
+            return name
+    raise ValueError("Keine Preisspalte gefunden. Bitte price_column angeben.")
+
+
+def load_price_profiles(price_filename, num_timesteps, time_resolution_hours, price_column=None, export_price_column=None,
+                        import_price_surcharge_eur_per_mwh=0.0, grid_connection_limit_mw=None):
+    """
+    Reale Preiszeitreihen (€/MWh) aus Excel oder CSV (SMARD-Export: ';' und Dezimalkomma). Stündliche Werte werden auf
+    die Zeitschritte wiederholt. Netzbezugspreis = Preis + import_price_surcharge_eur_per_mwh (Netzentgelte, Umlagen, Steuern),
+    nach unten auf 0 begrenzt: Bei negativem Bezugspreis wäre unbegrenzter Bezug mit Abregelung ein Gewinn (LP unbeschränkt).
+    Einspeisevergütung = export_price_column bzw. derselbe Preis (negative Preise bleiben erhalten).
+    Liegt die Vergütung in einem Zeitschritt über dem Bezugspreis, ist gleichzeitiger Bezug und Einspeisung unbegrenzt
+    lohnend; ohne grid_connection_limit_mw (MW) wird dann ValueError ausgelöst.
+    Liefert (Netzbezugspreis, Einspeisevergütung, Info-Dict).
+    """
+    import pandas as pd
+    if os.path.splitext(price_filename)[1].lower() == ".csv":
+        df = pd.read_csv(price_filename, sep=";", decimal=",", thousands=".")
+    else:
+        df = pd.read_excel(price_filename, sheet_name=0, header=0)
+    steps_per_hour = int(round(1 / time_resolution_hours))
+    if len(df) == num_timesteps: repeat = 1
+    elif len(df) * steps_per_hour == num_timesteps: repeat = steps_per_hour # Stundenwerte auf Viertelstunden
+    else:
+        raise ValueError(f"Preisdatei '{price_filename}' hat {len(df)} Zeilen; erwartet {num_timesteps} (je Zeitschritt) "
+                         f"oder {num_timesteps // steps_per_hour} (je Stunde).")
+    profiles = []
+    for column in (price_column, export_price_column if export_price_column is not None else price_column):
+        name = _price_column(df, column)
+        values = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+        if np.isnan(values).any():
+            raise ValueError(f"Preisspalte '{name}' enthält {int(np.isnan(values).sum())} fehlende oder nicht numerische Werte.")
+        profiles.append(np.repeat(values, repeat))
+    spot_price, export_price = profiles
+    import_price = spot_price + import_price_surcharge_eur_per_mwh
+    clipped_steps = int(np.sum(import_price < 0))
+    np.maximum(import_price, 0, out=import_price)
+    arbitrage_steps = int(np.sum(export_price > import_price))
+    if arbitrage_steps and grid_connection_limit_mw is None:
+        raise ValueError(f"Einspeisevergütung liegt in {arbitrage_steps} Zeitschritten über dem Netzbezugspreis; ohne Netzanschlussleistung "
+                         f"(grid_connection_limit_mw) ist das LP unbeschränkt. Aufschlag erhöhen oder Anschlussleistung angeben.")
+    info = {"num_rows": len(df), "steps_per_row": repeat, "mean_price": float(spot_price.mean()),
+            "negative_price_hours": float(np.sum(export_price < 0) * time_resolution_hours),
+            "clipped_import_hours": float(clipped_steps * time_resolution_hours)}
+    return import_price, export_price, info
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+Matrixform des Auslegungsmodells (PV + Wind + Batterie) und des Betriebsmodells bei festen Kapazitäten.
+
+build_sizing_lp baut dasselbe LP wie Abschnitt 4 in LP_Optimierung.py, aber direkt als dünnbesetzte
+Matrizen (scipy.sparse) statt über >210k einzeln benannte PuLP-Nebenbedingungen:
+
+    min  c @ x
+    u.d.N.  A_ub @ x <= b_ub
+            A_eq @ x == b_eq
+            lb <= x <= ub
+
+Variablenreihenfolge in x (T = num_timesteps):
+    PV_Capacity_MWp, Wind_Capacity_MW, Battery_Capacity_MWh, Battery_Power_MW,
+    Grid_Import[T], Grid_Export[T], Curtailment[T], Battery_Charge[T], Battery_Discharge[T],
+    Battery_SoC[T+1]
+
+build_operational_lp baut das reine Betriebs-LP (Abschnitt 7, Kostenlandschaft) ohne Kapazitätsvariablen;
+Leistungs- und SoC-Grenzen sind dort Variablengrenzen, PV/Wind-Erzeugung steht nur in der rechten Seite.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+
+# Reihenfolge der Kapazitätsvariablen (entspricht den PuLP-Variablen in Abschnitt 4)
+CAPACITY_VARIABLES = ("pv_capacity_mw", "wind_capacity_mw", "battery_capacity_mwh", "battery_power_mw")
+# Reihenfolge der Betriebsvariablen (je num_timesteps Werte, SoC hat einen Wert mehr)
+OPERATION_VARIABLES = ("grid_import", "grid_export", "curtailment", "battery_charge", "battery_discharge", "battery_soc")
+
+
+@dataclass
+class MatrixLP:
+    """ LP in Matrixform inkl. Index-Bereichen der Variablen- und Nebenbedingungsgruppen. """
+    c: np.ndarray
+    A_ub: sp.csr_matrix
+    b_ub: np.ndarray
+    A_eq: sp.csr_matrix
+    b_eq: np.ndarray
+    lb: np.ndarray
+    ub: np.ndarray
+    num_timesteps: int
+    variable_slices: dict # Name -> slice in x
+    ub_row_slices: dict   # Name -> slice in A_ub / b_ub
+    eq_row_slices: dict   # Name -> slice in A_eq / b_eq
+
+    @property
+    def bounds(self):
+        """ Variablengrenzen als (n, 2)-Array (Format für scipy.optimize.linprog). """
+        return np.column_stack((self.lb, self.ub))
+
+    @property
+    def num_variables(self):
+        return len(self.c)
+
+    def view(self, x, name):
+        """ Sicht (ohne Kopie) auf die Werte einer Variablengruppe im Lösungsvektor x. """
+        return x[self.variable_slices[name]]
+
+
+def variable_layout(num_timesteps, capacity_variables=CAPACITY_VARIABLES):
+    """ Liefert die Index-Bereiche aller Variablengruppen und die Gesamtzahl der Variablen. """
+    slices = {}
+    for k, name in enumerate(capacity_variables):
+        slices[name] = slice(k, k + 1)
+    offset = len(capacity_variables)
+    for name in OPERATION_VARIABLES:
+        length = num_timesteps + 1 if name == "battery_soc" else num_timesteps
+        slices[name] = slice(offset, offset + length)
+        offset += length
+    return slices, offset
+
+
+def annuity_factor(rate, years):
+    """ Annuitätenfaktor für Zinssatz rate und Laufzeit years (0 bei ungültiger Laufzeit oder Fehler). """
+    if years <= 0: return 0;
+    if rate == 0: return 1 / years # Sonderfall Zinssatz 0
+
+    # Rate ggf. anpassen, wenn sie extrem klein ist
+    if rate < 1e-9:
+        # print(f"WARNUNG: Annuitätsfaktor - sehr kleiner Zinssatz ({rate}) wird auf 1e-9 angehoben.") # Weniger Output
+        rate = 1e-9
+
+    # q = 1 + rate *jetzt für alle gültigen Raten definieren*
+    q = 1 + rate
+
+    try:
+        qn = q**years
+        denominator = qn - 1
+
+        # Verhindere Division durch Null im Hauptterm (sollte bei rate != 0 kaum vorkommen)
+        if abs(denominator) < 1e-9:
+             # print(f"WARNUNG: Annuitätsfaktor-Nenner nahe Null für rate={rate}, years={years}") # Weniger Output
+             # Fallback auf 1/years wie bei rate=0 könnte sinnvoll sein
+             try:
+                 return 1 / years
+             except ZeroDivisionError: # Falls years auch 0 ist (bereits oben abgefangen)
+                 return 0
+
+        # Hauptformel
+        return (rate * qn) / denominator
+
+    except OverflowError:
+        # Fehler bei sehr großen Jahren oder Raten
+        print(f"ERROR: Overflow bei Annuitätsfaktor-Berechnung für rate={rate}, years={years}.")
+        return 0 # Im Fehlerfall 0 zurückgeben
+    except Exception as e:
+        # Andere unerwartete Fehler abfangen
+        print(f"ERROR: Unerwarteter Fehler bei Annuitätsfaktor-Berechnung: {e}")
+        return 0
+
+
+def annualized_capacity_costs(af_pv_wind, af_battery,
+                              specific_capex_pv_eur_per_mw, specific_opex_pv_eur_per_mw_pa,
+                              specific_capex_wind_eur_per_mw, specific_opex_wind_eur_per_mw_pa,
+                              specific_capex_battery_eur_per_mw, specific_opex_battery_eur_per_mwh_pa):
+    """ Zielfunktionskoeffizienten der vier Kapazitätsvariablen (ann. CAPEX + OPEX pro Einheit). """
+    return np.array([
+        af_pv_wind * specific_capex_pv_eur_per_mw + specific_opex_pv_eur_per_mw_pa,       # €/MWp PV
+        af_pv_wind * specific_capex_wind_eur_per_mw + specific_opex_wind_eur_per_mw_pa,   # €/MW Wind
+        specific_opex_battery_eur_per_mwh_pa,                                             # €/MWh Batterie (nur OPEX)
+        af_battery * specific_capex_battery_eur_per_mw,                                   # €/MW Batterie (nur CAPEX)
+    ], dtype=float)
+
+
+def sizing_cost_vector(num_timesteps, capacity_costs, grid_purchase_price_eur_per_mwh, feed_in_tariff_profile_eur_per_mwh):
+    """ Zielfunktionsvektor c: Kapazitätskosten + Netzbezugskosten - Einspeiseerlöse der Periode. """
+    slices, num_variables = variable_layout(num_timesteps)
+    c = np.zeros(num_variables)
+    c[:len(CAPACITY_VARIABLES)] = capacity_costs
+    c[slices["grid_import"]] = grid_purchase_price_eur_per_mwh
+    c[slices["grid_export"]] = -np.asarray(feed_in_tariff_profile_eur_per_mwh, dtype=float)
+    return c
+
+
+def set_grid_prices(lp, grid_purchase_price_eur_per_mwh=None, feed_in_tariff_profile_eur_per_mwh=None):
+    """
+    Setzt Netzbezugspreis und/oder Einspeisevergütung (Skalar oder je Zeitschritt) in der Zielfunktion eines aufgebauten
+    Auslegungs- oder Betriebs-LP (z.B. ein anderes Preisjahr). Nur lp.c wird geändert, Matrizen bleiben unverändert.
+    """
+    if grid_purchase_price_eur_per_mwh is not None:
+        lp.c[lp.variable_slices["grid_import"]] = grid_purchase_price_eur_per_mwh
+    if feed_in_tariff_profile_eur_per_mwh is not None:
+        lp.c[lp.variable_slices["grid_export"]] = -np.asarray(feed_in_tariff_profile_eur_per_mwh, dtype=float)
+
+
+def set_grid_connection_limit(lp, grid_connection_limit_mw, time_resolution_hours):
+    """ Begrenzt Netzbezug und Einspeisung je Zeitschritt auf die Anschlussleistung (Variablengrenzen; None = unbegrenzt). """
+    limit = np.inf if grid_connection_limit_mw is None else grid_connection_limit_mw * time_resolution_hours
+    lp.ub[lp.variable_slices["grid_import"]] = limit
+    lp.ub[lp.variable_slices["grid_export"]] = limit
+
+
+def build_sizing_lp(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                    feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh, capacity_costs,
+                    charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv,
+                    battery_soc_min_percent, time_resolution_hours, cyclic_soc=True):
+    """
+    Baut das Auslegungs-LP (Energiebilanz, SoC-Update, Leistungs- und SoC-Grenzen, zyklischer SoC) vektorisiert auf.
+    cyclic_soc=False lässt die zyklische Randbedingung weg (z.B. Zeitfenster mit vorgegebenem Start- und End-SoC).
+    """
+    y_pv = np.asarray(specific_yield_pv_mwh_per_mw, dtype=float)
+    y_wind = np.asarray(specific_yield_wind_mwh_per_mw, dtype=float)
+    num_timesteps = len(y_pv)
+    slices, num_variables = variable_layout(num_timesteps)
+    ts = np.arange(num_timesteps)
+    col = {name: s.start for name, s in slices.items()} # Startindex je Variablengruppe
+
+    # --- Gleichungen: Energiebilanz (T), SoC-Update (T), zyklischer SoC (1) ---
+    # Energiebilanz: PV*y_pv + Wind*y_wind + Import + Entladung - Export - Abregelung - Ladung = Bedarf
+    pv_nz = np.flatnonzero(y_pv); wind_nz = np.flatnonzero(y_wind) # Nullerträge (z.B. Nacht) nicht speichern
+    bal_rows = np.concatenate([pv_nz, wind_nz] + [ts] * 5)
+    bal_cols = np.concatenate([
+        np.full(len(pv_nz), col["pv_capacity_mw"]), np.full(len(wind_nz), col["wind_capacity_mw"]),
+        col["grid_import"] + ts, col["battery_discharge"] + ts,
+        col["grid_export"] + ts, col["curtailment"] + ts, col["battery_charge"] + ts])
+    bal_data = np.concatenate([y_pv[pv_nz], y_wind[wind_nz], np.ones(2 * num_timesteps), -np.ones(3 * num_timesteps)])
+
+    # SoC-Update: SoC[t+1] - SoC[t] - Ladung*sqrt(eff) + Entladung/sqrt(eff) = 0
+    soc_rows = num_timesteps + np.concatenate([ts] * 4)
+    soc_cols = np.concatenate([col["battery_soc"] + ts + 1, col["battery_soc"] + ts, col["battery_charge"] + ts, col["battery_discharge"] + ts])
+    soc_data = np.concatenate([np.ones(num_timesteps), -np.ones(num_timesteps),
+                               np.full(num_timesteps, -charge_discharge_eff_sqrt), np.full(num_timesteps, charge_discharge_eff_sqrt_inv)])
+
+    # Zyklische Randbedingung: SoC[T] - SoC[0] = 0
+    cyc_row = 2 * num_timesteps
+    cyc = ([cyc_row, cyc_row], [col["battery_soc"] + num_timesteps, col["battery_soc"]], [1.0, -1.0]) if cyclic_soc else ([], [], [])
+    eq_rows = np.concatenate([bal_rows, soc_rows, cyc[0]])
+    eq_cols = np.concatenate([bal_cols, soc_cols, cyc[1]])
+    eq_data = np.concatenate([bal_data, soc_data, cyc[2]])
+    num_eq = 2 * num_timesteps + (1 if cyclic_soc else 0)
+    A_eq = sp.csr_matrix((eq_data, (eq_rows, eq_cols)), shape=(num_eq, num_variables))
+    b_eq = np.zeros(num_eq)
+    b_eq[:num_timesteps] = demand_profile_mwh
+
+    # --- Ungleichungen: Lade-/Entladeleistung (je T), SoC min/max (je T+1) ---
+    soc_ts = np.arange(num_timesteps + 1)
+    ch_rows = ts; dis_rows = num_timesteps + ts
+    min_rows = 2 * num_timesteps + soc_ts; max_rows = 3 * num_timesteps + 1 + soc_ts
+    num_ub = 4 * num_timesteps + 2
+    ub_rows = np.concatenate([ch_rows, ch_rows, dis_rows, dis_rows, min_rows, min_rows, max_rows, max_rows])
+    ub_cols = np.concatenate([
+        col["battery_charge"] + ts, np.full(num_timesteps, col["battery_power_mw"]),    # Ladung - P*dt <= 0
+        col["battery_discharge"] + ts, np.full(num_timesteps, col["battery_power_mw"]), # Entladung - P*dt <= 0
+        col["battery_soc"] + soc_ts, np.full(num_timesteps + 1, col["battery_capacity_mwh"]), # SoC_min*E - SoC <= 0
+        col["battery_soc"] + soc_ts, np.full(num_timesteps + 1, col["battery_capacity_mwh"]), # SoC - E <= 0
+    ])
+    ub_data = np.concatenate([
+        np.ones(num_timesteps), np.full(num_timesteps, -time_resolution_hours),
+        np.ones(num_timesteps), np.full(num_timesteps, -time_resolution_hours),
+        -np.ones(num_timesteps + 1), np.full(num_timesteps + 1, battery_soc_min_percent),
+        np.ones(num_timesteps + 1), -np.ones(num_timesteps + 1),
+    ])
+    A_ub = sp.csr_matrix((ub_data, (ub_rows, ub_cols)), shape=(num_ub, num_variables))
+    b_ub = np.zeros(num_ub)
+
+    c = sizing_cost_vector(num_timesteps, capacity_costs, grid_purchase_price_eur_per_mwh, feed_in_tariff_profile_eur_per_mwh)
+    lb = np.zeros(num_variables); ub = np.full(num_variables, np.inf) # Alle Variablen >= 0 (wie lowBound=0)
+
+    eq_row_slices = {"energy_balance": slice(0, num_timesteps), "battery_soc_update": slice(num_timesteps, 2 * num_timesteps)}
+    if cyclic_soc: eq_row_slices["battery_cyclic_soc"] = slice(2 * num_timesteps, num_eq)
+    ub_row_slices = {"battery_charge_power_limit": slice(0, num_timesteps), "battery_discharge_power_limit": slice(num_timesteps, 2 * num_timesteps),
+                     "battery_soc_min_limit": slice(2 * num_timesteps, 3 * num_timesteps + 1), "battery_soc_max_limit": slice(3 * num_timesteps + 1, num_ub)}
+
+    return MatrixLP(c=c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, lb=lb, ub=ub, num_timesteps=num_timesteps,
+                    variable_slices=slices, ub_row_slices=ub_row_slices, eq_row_slices=eq_row_slices)
+
+
+def operational_balance_rhs(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh, pv_mw, wind_mw):
+    """ Rechte Seite der Energiebilanz im Betriebs-LP: Bedarf - PV-Erzeugung - Wind-Erzeugung (Residuallast). """
+    return demand_profile_mwh - specific_yield_pv_mwh_per_mw * pv_mw - specific_yield_wind_mwh_per_mw * wind_mw
+
+
+def build_operational_lp(residual_load_mwh, feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh,
+                         battery_capacity_mwh, battery_power_mw, charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv,
+                         battery_soc_min_percent, time_resolution_hours, cyclic_soc=True, grid_connection_limit_mw=None):
+    """
+    Baut das Betriebs-LP für feste Kapazitäten (Import, Export, Abregelung, Ladung, Entladung, SoC je Zeitschritt).
+    grid_connection_limit_mw begrenzt Netzbezug und Einspeisung wie im Auslegungs-LP (set_grid_connection_limit).
+    """
+    residual_load_mwh = np.asarray(residual_load_mwh, dtype=float)
+    num_timesteps = len(residual_load_mwh)
+    slices, num_variables = variable_layout(num_timesteps, capacity_variables=())
+    ts = np.arange(num_timesteps)
+    col = {name: s.start for name, s in slices.items()}
+
+    # Energiebilanz: Import + Entladung - Export - Abregelung - Ladung = Bedarf - PV - Wind
+    bal_rows = np.concatenate([ts] * 5)
+    bal_cols = np.concatenate([col["grid_import"] + ts, col["battery_discharge"] + ts,
+                               col["grid_export"] + ts, col["curtailment"] + ts, col["battery_charge"] + ts])
+    bal_data = np.concatenate([np.ones(2 * num_timesteps), -np.ones(3 * num_timesteps)])
+    # SoC-Update: SoC[t+1] - SoC[t] - Ladung*sqrt(eff) + Entladung/sqrt(eff) = 0
+    soc_rows = num_timesteps + np.concatenate([ts] * 4)
+    soc_cols = np.concatenate([col["battery_soc"] + ts + 1, col["battery_soc"] + ts, col["battery_charge"] + ts, col["battery_discharge"] + ts])
+    soc_data = np.concatenate([np.ones(num_timesteps), -np.ones(num_timesteps),
+                               np.full(num_timesteps, -charge_discharge_eff_sqrt), np.full(num_timesteps, charge_discharge_eff_sqrt_inv)])
+    eq_rows = [bal_rows, soc_rows]; eq_cols = [bal_cols, soc_cols]; eq_data = [bal_data, soc_data]
+    num_eq = 2 * num_timesteps
+    if cyclic_soc: # SoC[T] - SoC[0] = 0
+        eq_rows.append([num_eq, num_eq]); eq_cols.append([col["battery_soc"] + num_timesteps, col["battery_soc"]]); eq_data.append([1.0, -1.0])
+        num_eq += 1
+    A_eq = sp.csr_matrix((np.concatenate(eq_data), (np.concatenate(eq_rows), np.concatenate(eq_cols))), shape=(num_eq, num_variables))
+    b_eq = np.zeros(num_eq)
+    b_eq[:num_timesteps] = residual_load_mwh
+
+    # Feste Batterie: Leistungsgrenzen und SoC-Grenzen als Variablengrenzen
+    lb = np.zeros(num_variables); ub = np.full(num_variables, np.inf)
+    ub[slices["battery_charge"]] = battery_power_mw * time_resolution_hours
+    ub[slices["battery_discharge"]] = battery_power_mw * time_resolution_hours
+    lb[slices["battery_soc"]] = battery_soc_min_percent * battery_capacity_mwh
+    ub[slices["battery_soc"]] = battery_capacity_mwh
+
+    c = np.zeros(num_variables)
+    c[slices["grid_import"]] = grid_purchase_price_eur_per_mwh
+    c[slices["grid_export"]] = -np.asarray(feed_in_tariff_profile_eur_per_mwh, dtype=float)
+
+    eq_row_slices = {"energy_balance": slice(0, num_timesteps), "battery_soc_update": slice(num_timesteps, 2 * num_timesteps)}
+    if cyclic_soc: eq_row_slices["battery_cyclic_soc"] = slice(2 * num_timesteps, num_eq)
+    lp = MatrixLP(c=c, A_ub=sp.csr_matrix((0, num_variables)), b_ub=np.zeros(0), A_eq=A_eq, b_eq=b_eq, lb=lb, ub=ub,
+                  num_timesteps=num_timesteps, variable_slices=slices, ub_row_slices={}, eq_row_slices=eq_row_slices)
+    set_grid_connection_limit(lp, grid_connection_limit_mw, time_resolution_hours)
+    return lp
+
+
+def coefficient_positions(A, rows, columns):
+    """
+    Positionen in A.data (CSR) aller gespeicherten Koeffizienten mit Zeile in rows und Spalte in columns (je ein slice).
+    Damit lassen sich Koeffizienten eines aufgebauten LP (z.B. Wirkungsgrad im SoC-Update) ohne Neuaufbau ändern.
+    """
+    row_of_entry = np.repeat(np.arange(A.shape[0]), np.diff(A.indptr))
+    mask = (row_of_entry >= rows.start) & (row_of_entry < rows.stop) & (A.indices >= columns.start) & (A.indices < columns.stop)
+    return np.flatnonzero(mask)
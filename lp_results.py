@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Auswertung einer LP-Lösung über benannte Sichten statt einzelner Variablenabfragen.
+
+LPResult verbindet ein MatrixLP (lp_matrix.py) mit seiner Lösung (solver_backend.LPSolution):
+result["grid_import"] ist eine Sicht (ohne Kopie) auf den Lösungsvektor, result.dual("energy_balance")
+die Dualwerte einer Nebenbedingungsgruppe (z.B. Grenzkosten der Energieversorgung je Zeitschritt).
+energy_kpis berechnet die Kennzahlen aus Abschnitt 6 (Energiebilanz, Netzkosten, Autarkie, LCOE)
+vektorisiert aus diesen Sichten, cost_breakdown die annualisierten CAPEX/OPEX je Technologie.
+
+flow_cube fasst alle Energieflüsse und den SoC in einem Durchlauf zu Tages-, Wochen- und Monatswerten zusammen (FlowCube);
+Diagramme, Konsolenausgabe und Excel-Export lesen daraus, statt je Bericht eigene Summen oder resample-Aufrufe zu bilden.
+"""
+import datetime
+from dataclasses import dataclass
+
+import numpy as np
+
+from lp_matrix import MatrixLP, annuity_factor
+from solver_backend import LPSolution
+
+
+@dataclass
+class LPResult:
+    """ Lösung eines Matrix-LP mit benannten Sichten auf Primal- und Dualwerte. """
+    lp: MatrixLP
+    solution: LPSolution
+
+    def __getitem__(self, name):
+        """ Sicht auf die Werte einer Variablengruppe (z.B. "grid_import", "battery_soc"). """
+        return self.lp.view(self.solution.x, name)
+
+    def value(self, name):
+        """ Einzelwert einer Variablengruppe der Länge 1 (z.B. "pv_capacity_mw"). """
+        return float(self[name][0])
+
+    def dual(self, name):
+        """ Dualwerte einer Nebenbedingungsgruppe (Gleichungen oder Ungleichungen); None, falls nicht verfügbar. """
+        if self.solution.row_duals is None:
+            return None
+        if name in self.lp.eq_row_slices:
+            return self.solution.row_duals[self.lp.eq_row_slices[name]]
+        rows = self.lp.ub_row_slices[name]
+        offset = self.lp.A_eq.shape[0]
+        return self.solution.row_duals[offset + rows.start:offset + rows.stop]
+
+
+# Energieflüsse im FlowCube (Reihenfolge der ersten Achse von FlowCube.sums), Aggregationsstufen und SoC-Kennwerte
+CUBE_FLOWS = ("demand", "pv_gen", "wind_gen", "grid_import", "grid_export", "curtailment", "battery_charge", "battery_discharge")
+CUBE_LEVELS = ("day", "week", "month")
+SOC_STATISTICS = ("soc_min", "soc_mean", "soc_max")
+
+
+def result_flows(result, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh):
+    """ Energieflüsse je Zeitschritt (Dict mit den Namen aus CUBE_FLOWS, MWh) einer Auslegungslösung. """
+    flows = {"demand": demand_profile_mwh,
+             "pv_gen": specific_yield_pv_mwh_per_mw * result.value("pv_capacity_mw"),
+             "wind_gen": specific_yield_wind_mwh_per_mw * result.value("wind_capacity_mw")}
+    flows.update((name, result[name]) for name in CUBE_FLOWS[3:])
+    return flows
+
+
+@dataclass
+class FlowCube:
+    """
+    Summen der Energieflüsse (MWh) und SoC-Kennwerte (MWh) je Tag, Woche (ab Montag) und Monat.
+    sums[level]: Array (len(CUBE_FLOWS), Perioden), soc[level]: Array (len(SOC_STATISTICS), Perioden),
+    starts[level]: erster Tag je Periode (datetime64[D]), totals: Fluss -> Summe der ganzen Periode.
+    """
+    sums: dict
+    soc: dict
+    starts: dict
+    totals: dict
+
+    def flow(self, name, level="day"):
+        """ Summen eines Flusses (Name aus CUBE_FLOWS) je Periode der Stufe level. """
+        return self.sums[level][CUBE_FLOWS.index(name)]
+
+    def table(self, level="month"):
+        """ Spalten (Dict) einer Aggregat-Tabelle: Periodenbeginn, Summen der Flüsse und SoC-Kennwerte. """
+        columns = {"period_start": self.starts[level]}
+        columns.update(zip(CUBE_FLOWS, self.sums[level]))
+        columns.update(zip(SOC_STATISTICS, self.soc[level]))
+        return columns
+
+
+def flow_cube(flows, soc_start, start_date, time_resolution_hours):
+    """
+    FlowCube aus Zeitreihen je Zeitschritt: flows = Dict Fluss -> Array (CUBE_FLOWS, z.B. result_flows), soc_start = SoC am
+    Anfang jedes Zeitschritts. Tageswerte in einem Durchlauf über reshape (Flüsse, Tage, Zeitschritte je Tag), Wochen und
+    Monate aus den Tageswerten (reduceat). Ein angebrochener letzter Tag zählt als eigener Tag.
+    """
+    soc_start = np.asarray(soc_start, dtype=float)
+    num_timesteps = len(soc_start)
+    steps_per_day = int(round(24 / time_resolution_hours))
+    num_days = -(-num_timesteps // steps_per_day)
+    padding = num_days * steps_per_day - num_timesteps
+
+    values = np.zeros((len(CUBE_FLOWS) + 1, num_days * steps_per_day)) # Letzte Zeile: SoC (aufgefüllt mit dem letzten Wert)
+    for k, name in enumerate(CUBE_FLOWS):
+        values[k, :num_timesteps] = flows[name]
+    values[-1, :num_timesteps] = soc_start; values[-1, num_timesteps:] = soc_start[-1]
+    values = values.reshape(len(CUBE_FLOWS) + 1, num_days, steps_per_day)
+    daily = values.sum(axis=2)
+    steps_in_day = np.full(num_days, steps_per_day); steps_in_day[-1] -= padding
+    soc_sum = daily[-1].copy(); soc_sum[-1] -= padding * soc_start[-1] # Summe nur über die echten Zeitschritte
+    soc_days = values[-1]
+
+    days = np.datetime64(start_date.date() if isinstance(start_date, datetime.datetime) else start_date, "D") + np.arange(num_days)
+    weekday = (days.astype(np.int64) + 3) % 7 # 0 = Montag (1970-01-01 war ein Donnerstag)
+    sums = {"day": daily[:-1]}
+    soc = {"day": np.vstack([soc_days.min(axis=1), soc_sum / steps_in_day, soc_days.max(axis=1)])}
+    starts = {"day": days}
+    for level, key in (("week", days - weekday.astype("timedelta64[D]")), ("month", days.astype("datetime64[M]"))):
+        first = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        sums[level] = np.add.reduceat(daily[:-1], first, axis=1)
+        soc[level] = np.vstack([np.minimum.reduceat(soc["day"][0], first),
+                                np.add.reduceat(soc_sum, first) / np.add.reduceat(steps_in_day, first),
+                                np.maximum.reduceat(soc["day"][2], first)])
+        starts[level] = days[first]
+    totals = {name: float(total) for name, total in zip(CUBE_FLOWS, daily[:-1].sum(axis=1))}
+    return FlowCube(sums, soc, starts, totals)
+
+
+def energy_kpis(result, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                grid_purchase_price_eur_per_mwh, feed_in_tariff_profile_eur_per_mwh, cube=None):
+    """
+    Energiebilanz und Kennzahlen der Periode aus einer Auslegungslösung (Variablenreihenfolge wie build_sizing_lp).
+    Mit cube (flow_cube derselben Lösung) werden die Summen der Flüsse aus dessen totals übernommen.
+    Liefert ein Dict mit Summen (MWh), Netzkosten/-erlösen (€) sowie Autarkiegrad und EE-Deckungsrate (%).
+    """
+    if cube is None:
+        totals = {name: float(np.sum(values)) for name, values in
+                  result_flows(result, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh).items()}
+    else:
+        totals = cube.totals
+    soc = result["battery_soc"]
+    kpis = {"total_" + name: totals[name] for name in CUBE_FLOWS}
+    kpis.update({
+        "soc_diff": float(soc[-1] - soc[0]),
+        "grid_import_cost": float(np.sum(result["grid_import"] * grid_purchase_price_eur_per_mwh)),
+        "feed_in_revenue": float(np.dot(result["grid_export"], feed_in_tariff_profile_eur_per_mwh)),
+    })
+    kpis["total_generation"] = kpis["total_pv_gen"] + kpis["total_wind_gen"]
+    kpis["total_sources"] = kpis["total_generation"] + kpis["total_grid_import"] + kpis["total_battery_discharge"]
+    kpis["total_sinks"] = kpis["total_demand"] + kpis["total_grid_export"] + kpis["total_curtailment"] + kpis["total_battery_charge"]
+    kpis["balance_diff"] = kpis["total_sources"] - kpis["total_sinks"]
+    demand = kpis["total_demand"]
+    kpis["self_sufficiency_rate"] = (demand - kpis["total_grid_import"]) / demand * 100 if demand > 1e-6 else 0
+    kpis["renewable_coverage_rate"] = kpis["total_generation"] / demand * 100 if demand > 1e-6 else 0
+    return kpis
+
+
+def system_lcoe(annualized_costs, net_grid_cost_period, demand_period_mwh, days_in_period):
+    """
+    LCOE (€/MWh) bezogen auf den auf ein Standardjahr (365,25 Tage) skalierten Bedarf:
+    (nur Anlagen: ann. CAPEX+OPEX, Gesamtsystem: zusätzlich skalierte Netzkosten - Einspeiseerlöse). None bei Bedarf 0.
+    """
+    scale = 365.25 / days_in_period
+    annual_demand = demand_period_mwh * scale
+    if annual_demand <= 1e-6:
+        return None, None
+    return annualized_costs / annual_demand, (annualized_costs + net_grid_cost_period * scale) / annual_demand
+
+
+def cost_breakdown(params, capacities):
+    """ Annualisierte CAPEX/OPEX je Technologie (wie Abschnitt 6, params mit den Namen aus Abschnitt 1) für Kapazitäten (PV, Wind, Batterie MWh, Batterie MW). """
+    pv_mw, wind_mw, batt_mwh, batt_mw = capacities
+    af_pv_wind = annuity_factor(params["discount_rate"], params["lifetime_pv_wind_years"])
+    af_battery = annuity_factor(params["discount_rate"], params["lifetime_battery_years"])
+    costs = {
+        "capex_pv": af_pv_wind * pv_mw * params["specific_capex_pv_eur_per_mw"],
+        "capex_wind": af_pv_wind * wind_mw * params["specific_capex_wind_eur_per_mw"],
+        "capex_battery": af_battery * batt_mw * params["specific_capex_battery_eur_per_mw"],
+        "opex_pv": pv_mw * params["specific_opex_pv_eur_per_mw_pa"],
+        "opex_wind": wind_mw * params["specific_opex_wind_eur_per_mw_pa"],
+        "opex_battery": batt_mwh * params["specific_opex_battery_eur_per_mwh_pa"],
+    }
+    costs["annualized_capex"] = costs["capex_pv"] + costs["capex_wind"] + costs["capex_battery"]
+    costs["annual_opex"] = costs["opex_pv"] + costs["opex_wind"] + costs["opex_battery"]
+    return costs
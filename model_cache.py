@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Persistenter Modell-Cache: Auslegungs-LP und Simplex-Basis über Skriptläufe hinweg wiederverwenden.
+
+Schlüssel ist der SHA-256 der Struktur-Eingaben (Zeitschritte, PV-/Wind-Ertragsprofile, Wirkungsgrad, Mindest-SoC,
+Zeitauflösung). Je Schlüssel liegen in <Cache-Verzeichnis>/model_<Schlüssel>/ die Matrizen und Vektoren des LP
+(lp.npz), nach einem Lauf mit 'highspy' die Basis der optimalen Lösung (basis.npz) und zuletzt meta.json (erst damit
+ist der Eintrag gültig, wie beim Ertrags-Cache in input_data.py).
+
+Ändern sich nur Kosten (discount_rate, CAPEX/OPEX, Preise, Einspeiseprofil), der Bedarf oder die Anschlussleistung,
+wird das LP geladen statt aufgebaut und nur c, die rechte Seite der Energiebilanz und die Grenzen von Netzbezug und
+Einspeisung neu gesetzt. Der Solver startet dann mit primalem Simplex aus der gespeicherten Basis: Bei geänderter
+Zielfunktion bleibt sie primal zulässig, HiGHS braucht nur einen Bruchteil der Iterationen eines Kaltstarts.
+"""
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from lp_matrix import MatrixLP, build_sizing_lp, set_grid_connection_limit, sizing_cost_vector
+from solver_backend import LPSolution, create_highs, highs_result, highs_statistics, highspy, resolve_profile
+
+MODEL_CACHE_FORMAT_VERSION = 1
+
+
+def structure_key(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv,
+                  battery_soc_min_percent, time_resolution_hours):
+    """ SHA-256 der Eingaben, die die Matrixstruktur des Auslegungs-LP bestimmen (nicht: Kosten, Preise, Bedarf). """
+    sha256 = hashlib.sha256(f"v{MODEL_CACHE_FORMAT_VERSION}".encode())
+    for profile in (specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw):
+        sha256.update(np.ascontiguousarray(profile, dtype=np.float64).tobytes())
+    sha256.update(np.array([charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours],
+                           dtype=np.float64).tobytes())
+    return sha256.hexdigest()
+
+
+def model_directory(cache_dir, key):
+    return os.path.join(cache_dir, f"model_{key[:16]}")
+
+
+def _slices_to_json(slices):
+    return {name: [s.start, s.stop] for name, s in slices.items()}
+
+
+def _slices_from_json(data):
+    return {name: slice(start, stop) for name, (start, stop) in data.items()}
+
+
+def save_model(cache_dir, key, lp):
+    """ Schreibt das LP (Matrizen, Vektoren, Bereiche) und zuletzt meta.json; eine vorhandene Basis wird verworfen. """
+    model_dir = model_directory(cache_dir, key)
+    os.makedirs(model_dir, exist_ok=True)
+    meta_path = os.path.join(model_dir, "meta.json")
+    for name in ("meta.json", "basis.npz"):
+        if os.path.exists(os.path.join(model_dir, name)): os.remove(os.path.join(model_dir, name))
+    arrays = {"c": lp.c, "b_ub": lp.b_ub, "b_eq": lp.b_eq, "lb": lp.lb, "ub": lp.ub}
+    for label, A in (("A_ub", lp.A_ub.tocsr()), ("A_eq", lp.A_eq.tocsr())):
+        arrays.update({f"{label}_data": A.data, f"{label}_indices": A.indices, f"{label}_indptr": A.indptr, f"{label}_shape": np.array(A.shape)})
+    np.savez(os.path.join(model_dir, "lp.npz"), **arrays)
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"format_version": MODEL_CACHE_FORMAT_VERSION, "key": key, "num_timesteps": lp.num_timesteps,
+                   "variable_slices": _slices_to_json(lp.variable_slices), "ub_row_slices": _slices_to_json(lp.ub_row_slices),
+                   "eq_row_slices": _slices_to_json(lp.eq_row_slices)}, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def load_model(cache_dir, key):
+    """ Liefert das LP zum Schlüssel aus dem Cache oder None (kein/ungültiger Eintrag). """
+    model_dir = model_directory(cache_dir, key)
+    try:
+        with open(os.path.join(model_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != MODEL_CACHE_FORMAT_VERSION or meta.get("key") != key:
+            return None
+        with np.load(os.path.join(model_dir, "lp.npz")) as arrays:
+            matrices = {label: sp.csr_matrix((arrays[f"{label}_data"], arrays[f"{label}_indices"], arrays[f"{label}_indptr"]),
+                                             shape=tuple(arrays[f"{label}_shape"])) for label in ("A_ub", "A_eq")}
+            return MatrixLP(c=arrays["c"], A_ub=matrices["A_ub"], b_ub=arrays["b_ub"], A_eq=matrices["A_eq"], b_eq=arrays["b_eq"],
+                            lb=arrays["lb"], ub=arrays["ub"], num_timesteps=meta["num_timesteps"],
+                            variable_slices=_slices_from_json(meta["variable_slices"]), ub_row_slices=_slices_from_json(meta["ub_row_slices"]),
+                            eq_row_slices=_slices_from_json(meta["eq_row_slices"]))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_basis(cache_dir, key, h):
+    """ Speichert die Basis einer gelösten HiGHS-Instanz (Status je Spalte und Zeile) zum Modell. """
+    basis = h.getBasis()
+    if not basis.valid: return
+    np.savez(os.path.join(model_directory(cache_dir, key), "basis.npz"),
+             col_status=np.array([int(s) for s in basis.col_status], dtype=np.int8),
+             row_status=np.array([int(s) for s in basis.row_status], dtype=np.int8))
+
+
+def load_basis(cache_dir, key, lp):
+    """ Gespeicherte Basis als highspy.HighsBasis, falls vorhanden und zur Größe des LP passend, sonst None. """
+    try:
+        with np.load(os.path.join(model_directory(cache_dir, key), "basis.npz")) as arrays:
+            col_status, row_status = arrays["col_status"], arrays["row_status"]
+    except (OSError, ValueError, KeyError):
+        return None
+    if len(col_status) != lp.num_variables or len(row_status) != lp.A_eq.shape[0] + lp.A_ub.shape[0]:
+        return None
+    basis = highspy.HighsBasis()
+    basis.col_status = [highspy.HighsBasisStatus(int(s)) for s in col_status]
+    basis.row_status = [highspy.HighsBasisStatus(int(s)) for s in row_status]
+    basis.valid = True
+    return basis
+
+
+def cached_sizing_lp(cache_dir, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                     feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh, capacity_costs,
+                     charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                     grid_connection_limit_mw=None):
+    """
+    Auslegungs-LP wie build_sizing_lp (+ set_grid_connection_limit), bei passender Struktur aus dem Cache geladen und nur
+    in Zielfunktion, Bedarf und Anschlussleistung angepasst. Liefert (lp, Info-Dict mit 'key', 'source' und 'cache_dir').
+    """
+    key = structure_key(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv,
+                        battery_soc_min_percent, time_resolution_hours)
+    lp = load_model(cache_dir, key)
+    source = "cache"
+    if lp is None:
+        lp = build_sizing_lp(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                             feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh, capacity_costs,
+                             charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours)
+        source = "built"
+        try:
+            save_model(cache_dir, key, lp)
+        except OSError as e:
+            print(f"WARNUNG: Modell-Cache '{cache_dir}' konnte nicht geschrieben werden ({e}). Das Modell wird beim nächsten Lauf neu aufgebaut.")
+    else:
+        lp.c = sizing_cost_vector(lp.num_timesteps, capacity_costs, grid_purchase_price_eur_per_mwh, feed_in_tariff_profile_eur_per_mwh)
+        lp.b_eq[lp.eq_row_slices["energy_balance"]] = demand_profile_mwh
+    set_grid_connection_limit(lp, grid_connection_limit_mw, time_resolution_hours)
+    return lp, {"key": key, "source": source, "cache_dir": cache_dir}
+
+
+def solve_with_cached_basis(lp, cache_info, msg=False, profile=None):
+    """
+    Löst das LP mit 'highspy' (Simplex) und speichert die optimale Basis im Modell-Cache. Ist bereits eine Basis
+    gespeichert, startet HiGHS mit primalem Simplex aus ihr (ohne Presolve). profile: Solver-Profil (Threads, Zeitlimit, ...).
+    """
+    if highspy is None:
+        raise ImportError("Warmstart aus dem Modell-Cache benötigt das Paket 'highspy' (pip install highspy).")
+    start = time.perf_counter()
+    options = resolve_profile(profile); options.pop("method", None)
+    h = create_highs(lp, method="simplex", msg=msg, options=options)
+    basis = load_basis(cache_info["cache_dir"], cache_info["key"], lp)
+    if basis is not None:
+        h.setOptionValue("simplex_strategy", 4) # Primaler Simplex: Basis bleibt bei geänderter Zielfunktion zulässig
+        h.setBasis(basis)
+    h.run()
+    status, objective, x, row_duals = highs_result(h)
+    if status == "Optimal":
+        try:
+            save_basis(cache_info["cache_dir"], cache_info["key"], h)
+        except OSError as e:
+            print(f"WARNUNG: Basis konnte nicht im Modell-Cache gespeichert werden ({e}).")
+    return LPSolution(status=status, objective=objective, x=np.asarray(x, dtype=float), backend="highspy", method="simplex",
+                      solve_seconds=time.perf_counter() - start, row_duals=row_duals, stats=dict(highs_statistics(h), warm_start=basis is not None))
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Monte-Carlo-Simulation über die Lage der Stunden ohne Einspeisevergütung (negative Preise).
+
+Das Einspeiseprofil in Abschnitt 2 legt negative_price_hours Stunden zufällig mit seed=42 fest; jedes Ergebnis
+hängt damit an einer einzigen Ziehung. tariff_monte_carlo löst die Auslegung für viele Ziehungen (seeds), wahlweise
+als einzelne Zeitschritte ("random") oder als zusammenhängende Blöcke ("blocks", optional bevorzugt in Stunden mit
+hohem PV-Ertrag), verteilt auf einen Prozess-Pool. Jeder Worker baut das Auslegungs-LP einmal auf
+(scenario_runner.ScenarioModel) und ändert je Ziehung nur die Koeffizienten von grid_export in der Zielfunktion.
+
+Kapazitäten und Kosten werden laufend über RunningStatistics (Welford) zusammengefasst: Mittelwert, Standardabweichung,
+Minimum und Maximum brauchen konstanten Speicher, unabhängig von der Zahl der Ziehungen. Die einzelnen Ziehungen
+können zusätzlich zeilenweise in eine CSV-Datei geschrieben werden (draws_file).
+
+    python monte_carlo.py --draws 100 --workers 4
+    python monte_carlo.py --draws 200 --pattern blocks --block-hours 4 --weight-by-pv --draws-file mc_ziehungen.csv
+"""
+import argparse
+import csv
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from input_data import feed_in_tariff_profile, load_yield_profiles
+from scenario_runner import ScenarioModel, scenario_parameters
+from solver_backend import highspy, process_pool_context
+
+# Kennzahlen je Ziehung, die zusammengefasst werden (Spalten aus ScenarioModel.evaluate)
+MONTE_CARLO_VALUES = ("pv_capacity_mw", "wind_capacity_mw", "battery_capacity_mwh", "battery_power_mw", "total_cost",
+                      "annualized_capex", "annual_opex", "grid_import_cost", "feed_in_revenue", "lcoe_system",
+                      "self_sufficiency_rate", "total_grid_export", "total_curtailment")
+
+
+class RunningStatistics:
+    """ Laufender Mittelwert und Varianz (Welford) sowie Minimum/Maximum je Kennzahl, mit konstantem Speicherbedarf. """
+
+    def __init__(self, names):
+        self.names = tuple(names)
+        self.count = 0
+        self.mean = np.zeros(len(self.names)); self.m2 = np.zeros(len(self.names))
+        self.min = np.full(len(self.names), np.inf); self.max = np.full(len(self.names), -np.inf)
+
+    def update(self, values):
+        """ Nimmt eine Ziehung auf (Dict Name -> Wert). """
+        x = np.array([values[name] for name in self.names], dtype=float)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        np.minimum(self.min, x, out=self.min); np.maximum(self.max, x, out=self.max)
+
+    @property
+    def std(self):
+        """ Stichproben-Standardabweichung (NaN bei weniger als zwei Ziehungen). """
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.full(len(self.names), np.nan)
+
+    def summary(self):
+        """ DataFrame mit einer Zeile je Kennzahl: Anzahl, Mittelwert, Standardabweichung, Standardfehler, Minimum, Maximum. """
+        std = self.std
+        return pd.DataFrame({"count": self.count, "mean": self.mean, "std": std, "sem": std / np.sqrt(max(self.count, 1)),
+                             "min": self.min, "max": self.max}, index=pd.Index(self.names, name="value"))
+
+
+_worker_state = {} # Pro Worker-Prozess: ScenarioModel und Parameter
+
+
+def _init_worker(y_pv, y_wind, time_resolution_hours, params, backend, method, tariff_options):
+    """ Initialisierung eines Worker-Prozesses: Auslegungs-LP einmal aufbauen und Parameter setzen. """
+    model = ScenarioModel(y_pv, y_wind, time_resolution_hours, backend=backend, method=method)
+    demand, _ = model.apply(params)
+    _worker_state.update(model=model, params=params, demand=demand, tariff_options=tariff_options)
+
+
+def _solve_draw(seed):
+    """ Aufgabe im Worker: eine Ziehung. Liefert die Ergebniszeile (Dict) aus ScenarioModel.evaluate. """
+    model = _worker_state["model"]; params = _worker_state["params"]
+    tariff = feed_in_tariff_profile(model.num_timesteps, params["feed_in_tariff_eur_per_mwh"], params["negative_price_hours"],
+                                    model.time_resolution_hours, seed=seed, **_worker_state["tariff_options"])
+    model.set_feed_in_tariff(tariff)
+    row = model.evaluate(f"seed_{seed}", dict(params, tariff_seed=seed), model.solve_current(), _worker_state["demand"], tariff)
+    return row
+
+
+def tariff_monte_carlo(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, seeds, params=None, time_resolution_hours=0.25,
+                       pattern="random", block_hours=4, weights=None, backend="highs", method="simplex", num_workers=None,
+                       draws_file=None, progress=True):
+    """
+    Löst die Auslegung für jede Ziehung in seeds (Lage der Stunden ohne Vergütung, siehe input_data.feed_in_tariff_profile).
+    params: Parameter-Dict (scenario_runner.scenario_parameters), Standard = Abschnitt 1. num_workers=1 rechnet ohne Pool.
+    Liefert (RunningStatistics über MONTE_CARLO_VALUES, Anzahl nicht lösbarer Ziehungen).
+    """
+    params = params or scenario_parameters()
+    seeds = [int(seed) for seed in seeds]
+    tariff_options = {"pattern": pattern, "block_hours": block_hours, "weights": weights}
+    initargs = (specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, time_resolution_hours, params, backend, method, tariff_options)
+    stats = RunningStatistics(MONTE_CARLO_VALUES)
+    num_failed = 0
+    start_time = datetime.datetime.now()
+    draws_handle = open(draws_file, "w", encoding="utf-8", newline="") if draws_file else None
+    draws_writer = None
+
+    def on_result(row):
+        """ Nimmt eine fertige Ziehung in die Statistik auf und schreibt sie optional in draws_file. """
+        nonlocal num_failed, draws_writer
+        if row["status"] == "Optimal":
+            stats.update(row)
+        else:
+            num_failed += 1
+        if draws_handle is not None:
+            if draws_writer is None:
+                draws_writer = csv.DictWriter(draws_handle, fieldnames=list(row) + [name for name in MONTE_CARLO_VALUES if name not in row],
+                                              extrasaction="ignore")
+                draws_writer.writeheader()
+            draws_writer.writerow(row); draws_handle.flush()
+        if progress:
+            done = stats.count + num_failed
+            elapsed = datetime.datetime.now() - start_time
+            est_remaining = elapsed * (len(seeds) / done) - elapsed
+            mean_cost = stats.mean[MONTE_CARLO_VALUES.index("total_cost")] if stats.count else float("nan")
+            print(f"\rMonte-Carlo: Ziehung {done}/{len(seeds)}, mittlere Gesamtkosten {mean_cost:,.0f} €. "
+                  f"Verbleibend ca.: {str(est_remaining).split('.')[0]}", end="")
+
+    try:
+        if num_workers == 1:
+            _init_worker(*initargs)
+            for seed in seeds:
+                on_result(_solve_draw(seed))
+        else:
+            with ProcessPoolExecutor(max_workers=num_workers, mp_context=process_pool_context(),
+                                     initializer=_init_worker, initargs=initargs) as pool:
+                futures = {pool.submit(_solve_draw, seed): seed for seed in seeds}
+                for future in as_completed(futures):
+                    try:
+                        row = future.result()
+                    except Exception as e: # Fehler im Worker: Ziehung als nicht lösbar zählen
+                        print(f"\nWARNUNG: Ziehung {futures[future]} fehlgeschlagen: {e}")
+                        row = {"scenario": f"seed_{futures[future]}", "status": "Not Solved"}
+                    on_result(row)
+    finally:
+        if draws_handle is not None: draws_handle.close()
+    if progress: print()
+    return stats, num_failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--excel", default="Smard_Daten_Jahreswert.xlsx", help="Arbeitsmappe mit den Ertragsdaten")
+    parser.add_argument("--draws", type=int, default=50, help="Anzahl Ziehungen")
+    parser.add_argument("--first-seed", type=int, default=0, help="Erster Seed (Ziehungen first-seed ... first-seed + draws - 1)")
+    parser.add_argument("--pattern", choices=("random", "blocks"), default="random", help="Einzelne Zeitschritte oder zusammenhängende Blöcke")
+    parser.add_argument("--block-hours", type=float, default=4, help="Blocklänge in Stunden (pattern=blocks)")
+    parser.add_argument("--weight-by-pv", action="store_true", help="Blöcke bevorzugt in Stunden mit hohem PV-Ertrag (pattern=blocks)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=WERT", help="Parameter aus Abschnitt 1 überschreiben (mehrfach möglich)")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Worker-Prozesse (Standard: alle Kerne, 1 = ohne Pool)")
+    parser.add_argument("--backend", default="highspy" if highspy is not None else "highs", help="Solver-Backend (highspy: Warmstart je Worker)")
+    parser.add_argument("--method", default="simplex", help="simplex oder ipm")
+    parser.add_argument("--time-resolution-hours", type=float, default=0.25)
+    parser.add_argument("--draws-file", default=None, help="CSV-Datei mit einer Zeile je Ziehung")
+    parser.add_argument("--summary", default="monte_carlo_zusammenfassung.csv", help="CSV-Datei mit der Verteilung der Kennzahlen")
+    args = parser.parse_args()
+
+    params = scenario_parameters(dict(item.split("=", 1) for item in args.set))
+    y_pv, y_wind, info = load_yield_profiles(args.excel)
+    print(f"{args.draws} Ziehungen ({args.pattern}), {info['num_rows']} Zeitschritte, Solver: {args.backend}/{args.method}, "
+          f"Worker: {args.workers or os.cpu_count()}")
+    start = time.perf_counter()
+    stats, num_failed = tariff_monte_carlo(y_pv, y_wind, range(args.first_seed, args.first_seed + args.draws), params=params,
+                                           time_resolution_hours=args.time_resolution_hours, pattern=args.pattern,
+                                           block_hours=args.block_hours, weights=y_pv if args.weight_by_pv else None,
+                                           backend=args.backend, method=args.method, num_workers=args.workers, draws_file=args.draws_file)
+    summary = stats.summary()
+    print(summary.to_string(float_format=lambda v: f"{v:,.3f}"))
+    if num_failed: print(f"WARNUNG: {num_failed} Ziehungen nicht lösbar (nicht in der Zusammenfassung enthalten).")
+    summary.to_csv(args.summary)
+    print(f"Zusammenfassung gespeichert: {os.path.abspath(args.summary)} ({time.perf_counter() - start:.1f} s gesamt)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Netzmodell mit mehreren Standorten (Knoten) hinter einem gemeinsamen Netzanschlusspunkt.
+
+Jeder Knoten hat eigene PV-, Wind- und Batteriekapazitäten, eigene Ertragsprofile und eigenen Bedarf und bezieht bzw.
+speist über den gemeinsamen Anschlusspunkt ins Netz ein. Zwischen Knoten können Leitungen (Link) mit begrenzter
+Leistung und Übertragungswirkungsgrad Energie in beide Richtungen transportieren. Gemeinsame Grenzen am Anschlusspunkt:
+
+    sum_n Netzbezug_n[t]   <= shared_import_limit_mw * dt
+    sum_n Einspeisung_n[t] <= shared_export_limit_mw * dt
+
+build_network_lp baut das Gesamtmodell blockweise dünnbesetzt: die Knoten-LPs (lp_matrix.build_sizing_lp) liegen als
+Blockdiagonale in A_eq/A_ub (scipy.sparse.block_diag), nur die Leitungsflüsse (Spalten in den Energiebilanzen zweier
+Knoten) und die gemeinsamen Grenzen (Zeilen über alle Knoten) koppeln die Blöcke. Variablen- und Zeilennamen sind
+"<Knoten>:<Gruppe>" bzw. "<Leitung>:forward"/"<Leitung>:backward", die Auswertung läuft über lp_results.LPResult.
+Gelöst wird das Gesamtmodell in einem Solver-Lauf (solver_backend.solve_lp).
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from lp_matrix import CAPACITY_VARIABLES, MatrixLP, build_sizing_lp, set_grid_connection_limit
+
+
+@dataclass
+class Node:
+    """ Standort mit eigenen Ertragsprofilen und eigenem Bedarf (je Zeitschritt). """
+    name: str
+    specific_yield_pv_mwh_per_mw: np.ndarray
+    specific_yield_wind_mwh_per_mw: np.ndarray
+    demand_profile_mwh: np.ndarray
+    capacity_costs: np.ndarray = None     # Kosten je Kapazitätseinheit (wie annualized_capacity_costs); None = Netzvorgabe
+    max_capacities: dict = None           # Obergrenzen je Kapazitätsvariable (z.B. {"wind_capacity_mw": 10}, Flächen)
+    grid_connection_limit_mw: float = None # Eigene Anschlussleistung des Knotens (zusätzlich zu den gemeinsamen Grenzen)
+
+
+@dataclass
+class Link:
+    """ Leitung zwischen zwei Knoten, in beide Richtungen nutzbar; Verluste fallen beim empfangenden Knoten an. """
+    name: str
+    from_node: str
+    to_node: str
+    capacity_mw: float
+    efficiency: float = 1.0
+
+
+@dataclass
+class Network:
+    """ Knoten, Leitungen und gemeinsame Grenzen am Netzanschlusspunkt (None = unbegrenzt). """
+    nodes: list
+    links: list = field(default_factory=list)
+    shared_import_limit_mw: float = None
+    shared_export_limit_mw: float = None
+
+    def __post_init__(self):
+        names = [node.name for node in self.nodes]
+        if not names or len(set(names)) != len(names):
+            raise ValueError(f"Knotennamen müssen vorhanden und eindeutig sein: {names}")
+        lengths = {len(node.specific_yield_pv_mwh_per_mw) for node in self.nodes}
+        if len(lengths) != 1:
+            raise ValueError(f"Alle Knoten brauchen gleich lange Zeitreihen (gefunden: {sorted(lengths)}).")
+        link_names = [link.name for link in self.links]
+        if len(set(link_names)) != len(link_names):
+            raise ValueError(f"Leitungsnamen müssen eindeutig sein: {link_names}")
+        for link in self.links:
+            if link.from_node not in names or link.to_node not in names or link.from_node == link.to_node:
+                raise ValueError(f"Leitung '{link.name}' verbindet ungültige Knoten '{link.from_node}' -> '{link.to_node}'.")
+            if not (0 < link.efficiency <= 1) or link.capacity_mw < 0:
+                raise ValueError(f"Leitung '{link.name}': Wirkungsgrad muss in (0, 1] liegen und Leistung >= 0 sein.")
+
+    @property
+    def num_timesteps(self):
+        return len(self.nodes[0].specific_yield_pv_mwh_per_mw)
+
+    def node_links(self, name):
+        """ Leitungen, die am Knoten name enden oder beginnen. """
+        return [link for link in self.links if name in (link.from_node, link.to_node)]
+
+
+def link_coefficients(link, node_name):
+    """ Koeffizienten (forward, backward) der Leitungsflüsse im Zufluss des Knotens node_name. """
+    if node_name == link.from_node:
+        return -1.0, link.efficiency
+    return link.efficiency, -1.0
+
+
+def build_node_lp(node, capacity_costs, grid_purchase_price_eur_per_mwh, feed_in_tariff_profile_eur_per_mwh,
+                  charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours):
+    """ Auslegungs-LP eines Knotens (build_sizing_lp) mit den Obergrenzen und der Anschlussleistung des Knotens. """
+    lp = build_sizing_lp(node.specific_yield_pv_mwh_per_mw, node.specific_yield_wind_mwh_per_mw, node.demand_profile_mwh,
+                         feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh,
+                         capacity_costs if node.capacity_costs is None else node.capacity_costs,
+                         charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours)
+    for name, limit in (node.max_capacities or {}).items():
+        if name not in CAPACITY_VARIABLES:
+            raise ValueError(f"Knoten '{node.name}': unbekannte Kapazitätsvariable '{name}'. Verfügbar: {', '.join(CAPACITY_VARIABLES)}")
+        lp.ub[lp.variable_slices[name]] = limit
+    if node.grid_connection_limit_mw is not None:
+        set_grid_connection_limit(lp, node.grid_connection_limit_mw, time_resolution_hours)
+    return lp
+
+def _offset_slices(slices, prefix, offset):
+    return {f"{prefix}:{name}": slice(s.start + offset, s.stop + offset) for name, s in slices.items()}
+
+
+def build_network_lp(network, capacity_costs, grid_purchase_price_eur_per_mwh, feed_in_tariff_profile_eur_per_mwh,
+                     charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours):
+    """
+    Gesamtmodell aller Knoten als ein Matrix-LP: Knotenblöcke blockdiagonal, danach die Leitungsflüsse
+    ("<Leitung>:forward"/"<Leitung>:backward", je T) und die gemeinsamen Grenzen als zusätzliche Ungleichungen.
+    """
+    num_timesteps = network.num_timesteps
+    ts = np.arange(num_timesteps)
+    node_lps = [build_node_lp(node, capacity_costs, grid_purchase_price_eur_per_mwh, feed_in_tariff_profile_eur_per_mwh,
+                              charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours)
+                for node in network.nodes]
+    A_eq_nodes = sp.block_diag([lp.A_eq for lp in node_lps], format="csr")
+    A_ub_nodes = sp.block_diag([lp.A_ub for lp in node_lps], format="csr")
+    variable_slices = {}; eq_row_slices = {}; ub_row_slices = {}
+    col_offset = eq_offset = ub_offset = 0
+    balance_start = {} # Erste Zeile der Energiebilanz je Knoten in A_eq
+    for node, lp in zip(network.nodes, node_lps):
+        variable_slices.update(_offset_slices(lp.variable_slices, node.name, col_offset))
+        eq_row_slices.update(_offset_slices(lp.eq_row_slices, node.name, eq_offset))
+        ub_row_slices.update(_offset_slices(lp.ub_row_slices, node.name, ub_offset))
+        balance_start[node.name] = eq_offset + lp.eq_row_slices["energy_balance"].start
+        col_offset += lp.num_variables; eq_offset += lp.A_eq.shape[0]; ub_offset += lp.A_ub.shape[0]
+    num_node_variables = col_offset
+
+    # Leitungsflüsse: je Leitung forward/backward (T), Einträge in den Energiebilanzen beider Knoten
+    link_rows, link_cols, link_data = [np.zeros(0, dtype=int)], [np.zeros(0, dtype=int)], [np.zeros(0)]
+    for link in network.links:
+        for direction in ("forward", "backward"):
+            variable_slices[f"{link.name}:{direction}"] = slice(col_offset, col_offset + num_timesteps)
+            for node_name in (link.from_node, link.to_node):
+                coefficient = link_coefficients(link, node_name)[0 if direction == "forward" else 1]
+                link_rows.append(balance_start[node_name] + ts); link_cols.append(col_offset + ts)
+                link_data.append(np.full(num_timesteps, coefficient))
+            col_offset += num_timesteps
+    num_variables = col_offset
+    A_links = sp.csr_matrix((np.concatenate(link_data), (np.concatenate(link_rows), np.concatenate(link_cols) - num_node_variables)),
+                            shape=(eq_offset, num_variables - num_node_variables))
+    A_eq = sp.hstack([A_eq_nodes, A_links], format="csr")
+
+    # Gemeinsame Grenzen am Anschlusspunkt: Summe über alle Knoten je Zeitschritt
+    shared_blocks = [A_ub_nodes.tocsr()]; b_ub = [np.concatenate([lp.b_ub for lp in node_lps])]
+    for group, limit in (("grid_import", network.shared_import_limit_mw), ("grid_export", network.shared_export_limit_mw)):
+        if limit is None: continue
+        cols = np.concatenate([variable_slices[f"{node.name}:{group}"].start + ts for node in network.nodes])
+        rows = np.tile(ts, len(network.nodes))
+        shared_blocks.append(sp.csr_matrix((np.ones(len(cols)), (rows, cols)), shape=(num_timesteps, num_node_variables)))
+        b_ub.append(np.full(num_timesteps, limit * time_resolution_hours))
+        ub_row_slices[f"shared_{group}_limit"] = slice(ub_offset, ub_offset + num_timesteps)
+        ub_offset += num_timesteps
+    A_ub = sp.hstack([sp.vstack(shared_blocks, format="csr"), sp.csr_matrix((ub_offset, num_variables - num_node_variables))], format="csr")
+
+    link_ub = np.concatenate([np.zeros(0)] + [np.full(2 * num_timesteps, link.capacity_mw * time_resolution_hours) for link in network.links])
+    return MatrixLP(c=np.concatenate([lp.c for lp in node_lps] + [np.zeros(num_variables - num_node_variables)]),
+                    A_ub=A_ub, b_ub=np.concatenate(b_ub), A_eq=A_eq, b_eq=np.concatenate([lp.b_eq for lp in node_lps]),
+                    lb=np.concatenate([lp.lb for lp in node_lps] + [np.zeros(num_variables - num_node_variables)]),
+                    ub=np.concatenate([lp.ub for lp in node_lps] + [link_ub]), num_timesteps=num_timesteps,
+                    variable_slices=variable_slices, ub_row_slices=ub_row_slices, eq_row_slices=eq_row_slices)
+
+
+def network_capacities(lp, x, network):
+    """ Kapazitäten je Knoten aus einer Lösung des Gesamtmodells (DataFrame: Knoten x CAPACITY_VARIABLES). """
+    return pd.DataFrame([[float(lp.view(x, f"{node.name}:{name}")[0]) for name in CAPACITY_VARIABLES] for node in network.nodes],
+                        index=pd.Index([node.name for node in network.nodes], name="node"), columns=list(CAPACITY_VARIABLES))
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Diagramme der Auslegung (Abschnitte 6 und 7 in LP_Optimierung.py) als Funktionen.
+
+matplotlib und pandas werden erst beim ersten Diagramm importiert, damit Läufe ohne
+Diagramme (Batch-Worker, Szenario-Läufe) sie nicht laden. Jede Funktion speichert ein Diagramm als PNG und liefert den
+Dateinamen; Fehler werden wie im Skript an den Aufrufer weitergegeben.
+
+Zeitreihen mit mehr Punkten als Pixelspalten (35.136 Viertelstunden auf 1.500 Pixel) werden vor dem Zeichnen auf Minimum
+und Maximum je Pixelspalte ausgedünnt (minmax_envelope): Das Bild zeigt dieselbe Hüllkurve, matplotlib zeichnet aber nur
+rund 3.000 statt 35.000 Punkte je Linie. render_plots rendert unabhängige Diagramme parallel in Worker-Prozessen (Agg).
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from solver_backend import process_pool_context
+
+
+def _pyplot():
+    """ matplotlib.pyplot erst beim ersten Diagramm importieren. """
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def minmax_envelope(values, num_bins):
+    """
+    Indizes (aufsteigend) von Minimum und Maximum je Abschnitt, wenn values in num_bins gleich lange Abschnitte geteilt wird,
+    plus erster und letzter Punkt. Bei höchstens 2 * num_bins Werten werden alle Indizes geliefert.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if num_bins <= 0 or n <= 2 * num_bins:
+        return np.arange(n)
+    size = -(-n // num_bins) # Punkte je Abschnitt (aufgerundet)
+    num_bins = -(-n // size)
+    blocks = np.empty(num_bins * size); blocks[:n] = values; blocks[n:] = values[-1] # Letzten Abschnitt mit dem Endwert auffüllen
+    blocks = blocks.reshape(num_bins, size)
+    offsets = np.arange(num_bins) * size
+    indices = np.concatenate([offsets + blocks.argmin(axis=1), offsets + blocks.argmax(axis=1), [0, n - 1]])
+    return np.unique(np.minimum(indices, n - 1))
+
+
+def _plot_series(plt, x, y, decimate, **kwargs):
+    """ plt.plot(x, y), mit decimate auf die Pixelbreite der aktuellen Figur ausgedünnt (minmax_envelope). """
+    if decimate:
+        figure = plt.gcf()
+        keep = minmax_envelope(y, int(figure.get_figwidth() * figure.dpi))
+        if len(keep) < len(y):
+            x = x[keep] if not isinstance(x, range) else np.asarray(x)[keep]
+            y = np.asarray(y)[keep]
+    plt.plot(x, y, **kwargs)
+
+
+def _init_plot_worker():
+    """ Initialisierung eines Worker-Prozesses: Agg-Backend (ohne Fenster) vor dem ersten Import von pyplot. """
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def render_plots(jobs, num_workers=None):
+    """
+    Rendert mehrere Diagramme. jobs: Liste von (Funktion, Argumente), z.B. (plot_battery_soc, (index, soc, ...)).
+    num_workers > 1 verteilt die Diagramme auf Worker-Prozesse mit Agg-Backend (höchstens einer je Kern), 1 zeichnet nacheinander
+    in diesem Prozess.
+    Liefert je Auftrag (Dateiname oder None, Ausnahme oder None) in der Reihenfolge von jobs.
+    """
+    num_workers = min(num_workers or os.cpu_count() or 1, os.cpu_count() or 1, len(jobs))
+    results = []
+    if num_workers <= 1:
+        for function, args in jobs:
+            try:
+                results.append((function(*args), None))
+            except Exception as e:
+                results.append((None, e))
+        return results
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=process_pool_context(), initializer=_init_plot_worker) as pool:
+        futures = [pool.submit(function, *args) for function, args in jobs]
+        for future in futures:
+            try:
+                results.append((future.result(), None))
+            except Exception as e:
+                results.append((None, e))
+    return results
+
+
+def time_index(start_date, num_steps, time_resolution_hours):
+    """ pandas.DatetimeIndex mit num_steps Zeitschritten ab start_date. """
+    import pandas as pd
+    return pd.date_range(start_date, periods=num_steps, freq=pd.Timedelta(hours=time_resolution_hours))
+
+
+def plot_generation_profile(time_index_plot, demand_profile_mwh, pv_gen_profile, wind_gen_profile, pv_mw, wind_mw, days_in_period,
+                            time_resolution_hours, filename, decimate=True):
+    """ Diagramm 1: Lastprofil und EE-Erzeugung (Werte je Zeitschritt, mit decimate auf die Pixelbreite ausgedünnt). """
+    plt = _pyplot()
+    plt.figure(figsize=(15, 7))
+    _plot_series(plt, time_index_plot, demand_profile_mwh, decimate, label='Bedarf', color='black', linewidth=1.0)
+    _plot_series(plt, time_index_plot, pv_gen_profile, decimate, label=f'PV Erzeugung ({pv_mw:.1f} MWp)', color='orange', linewidth=0.7, alpha=0.8)
+    _plot_series(plt, time_index_plot, wind_gen_profile, decimate, label=f'Wind Erzeugung ({wind_mw:.1f} MW)', color='deepskyblue', linewidth=0.7, alpha=0.8)
+    plt.title(f'Lastprofil und Optimierte Erzeugung ({days_in_period} Tage, reale Daten)')
+    plt.xlabel('Datum'); plt.ylabel(f'Energie (MWh pro {time_resolution_hours*60:.0f} min)')
+    plt.grid(True, linestyle=':', alpha=0.7); plt.legend(loc='upper left'); plt.ylim(bottom=0); plt.tight_layout()
+    plt.savefig(filename)
+    plt.close() # Schließt die Figur, um Speicher freizugeben
+    return filename
+
+
+def plot_monthly_generation(cube, days_in_period, filename):
+    """ Diagramm 2: Monatliche Erzeugung (PV/Wind) als gestapeltes Säulendiagramm aus den Monatssummen (lp_results.FlowCube). """
+    plt = _pyplot()
+    months_labels = list(np.datetime_as_string(cube.starts["month"], unit="M")) # Monatnamen für die Achse (Format YYYY-MM)
+    pv_monthly_mwh = cube.flow("pv_gen", "month")
+    wind_monthly_mwh = cube.flow("wind_gen", "month")
+
+    plt.figure(figsize=(12, 7))
+    bar_width = 0.8 # Breite der Säulen
+    plt.bar(months_labels, pv_monthly_mwh, width=bar_width, label='PV Erzeugung', color='orange')
+    plt.bar(months_labels, wind_monthly_mwh, bottom=pv_monthly_mwh, width=bar_width, label='Wind Erzeugung', color='deepskyblue')
+    plt.xlabel('Monat (YYYY-MM)')
+    plt.ylabel('Monatlicher Energieertrag (MWh)')
+    plt.title(f'Optimierter monatlicher Energieertrag ({days_in_period} Tage)')
+    plt.xticks(rotation=45, ha='right') # Rotiert Monatslabel für bessere Lesbarkeit
+    plt.legend()
+    plt.grid(axis='y', linestyle=':')
+    plt.tight_layout()
+    plt.savefig(filename)
+    plt.close()
+    return filename
+
+
+def plot_daily_generation(cube, pv_mw, wind_mw, days_in_period, filename):
+    """ Diagramm 3: Tägliche Erzeugung (PV/Wind) als Liniendiagramm aus den Tagessummen (lp_results.FlowCube). """
+    plt = _pyplot()
+    day_index = cube.starts["day"]
+
+    plt.figure(figsize=(15, 7))
+    plt.plot(day_index, cube.flow("pv_gen", "day"), label=f'Tägliche PV Erzeugung ({pv_mw:.1f} MWp)', color='orange', linewidth=1.0)
+    plt.plot(day_index, cube.flow("wind_gen", "day"), label=f'Tägliche Wind Erzeugung ({wind_mw:.1f} MW)', color='deepskyblue', linewidth=1.0)
+    plt.xlabel('Datum (Tag)')
+    plt.ylabel('Täglicher Energieertrag (MWh)')
+    plt.title(f'Optimierter täglicher Energieertrag ({days_in_period} Tage)')
+    plt.legend()
+    plt.grid(True, linestyle=':', alpha=0.7)
+    plt.ylim(bottom=0) # Startet Y-Achse bei 0
+    plt.tight_layout()
+    plt.savefig(filename)
+    plt.close()
+    return filename
+
+
+def plot_battery_soc(soc_time_index, battery_soc_mwh, battery_capacity_mwh, battery_soc_min_percent, days_in_period, filename, decimate=True):
+    """ Diagramm 4: Batterie-Ladezustand in % der Kapazität (Zeitachse mit num_timesteps + 1 Punkten, mit decimate ausgedünnt). """
+    plt = _pyplot()
+    battery_soc_percent = (np.asarray(battery_soc_mwh) / battery_capacity_mwh) * 100
+    plt.figure(figsize=(15, 6)); _plot_series(plt, soc_time_index, battery_soc_percent, decimate, label='Batterie SoC (%)', color='purple', linewidth=0.7)
+    plt.axhline(battery_soc_min_percent * 100, color='red', linestyle='--', linewidth=0.8, label=f'Min SoC ({battery_soc_min_percent:.0%})')
+    plt.axhline(100, color='grey', linestyle='--', linewidth=0.8, label='Max SoC (100%)')
+    plt.title(f'Batterie Ladezustand (SoC) über die Analyseperiode ({days_in_period} Tage)'); plt.xlabel('Datum'); plt.ylabel('Ladezustand (SoC) [%]')
+    plt.ylim(-5, 105); plt.grid(True, linestyle=':', alpha=0.6); plt.legend(loc='best'); plt.tight_layout()
+    plt.savefig(filename)
+    plt.close()
+    return filename
+
+
+def plot_cost_landscape(pv_mesh, wind_mesh, cost_grid, opt_pv_mw, opt_wind_mw, opt_total_cost, battery_mwh, battery_mw, days_in_period, filename):
+    """
+    Konturdiagramm der Gesamtkosten (€) über PV- und Wind-Leistung mit dem Optimum der Hauptoptimierung.
+    Liefert None, falls das Raster keine endlichen Kosten enthält.
+    """
+    if np.all(np.isnan(cost_grid)) or not np.any(np.isfinite(cost_grid)):
+        return None
+    plt = _pyplot()
+    plt.figure(figsize=(11, 8)) # Etwas größer für bessere Lesbarkeit
+    cost_grid_mio = cost_grid / 1_000_000 # Kosten in Mio. € für bessere Skala
+
+    # Sinnvolle Levels für die Konturen bestimmen (ignoriere unendliche Werte)
+    finite_costs = cost_grid_mio[np.isfinite(cost_grid_mio)]
+    # Dynamische Levels: Vom Minimum bis zum 98. Perzentil, um Ausreißer abzuschneiden
+    min_cost_plot = np.min(finite_costs)
+    max_cost_plot = np.percentile(finite_costs, 98)
+    if max_cost_plot <= min_cost_plot + 1e-6: # Füge kleine Toleranz hinzu
+        max_cost_plot = np.max(finite_costs) # Fallback auf Maximum
+    if abs(max_cost_plot - min_cost_plot) < 1e-6:
+        levels = [min_cost_plot] # Nur ein Level, wenn alle Kosten (fast) gleich sind
+    else:
+        levels = np.linspace(min_cost_plot, max_cost_plot, 15) # 15 Konturlinien
+    extend_contour = 'max' if max_cost_plot < np.max(finite_costs) else 'neither' # Zeige Pfeil, wenn Werte abgeschnitten wurden
+
+    contour = plt.contourf(pv_mesh, wind_mesh, cost_grid_mio, levels=levels, cmap='viridis_r', extend=extend_contour)
+    cbar = plt.colorbar(contour)
+    cbar.set_label('Gesamtkosten (Zielwert, Mio. €)')
+    plt.scatter(opt_pv_mw, opt_wind_mw, color='red', s=200, edgecolors='black', marker='*',
+                label=f'Optimum ({opt_pv_mw:.1f} MWp PV, {opt_wind_mw:.1f} MW Wind)\nKosten: {opt_total_cost/1_000_000:.2f} Mio. €')
+    plt.xlabel('Installierte PV-Leistung (MWp)')
+    plt.ylabel('Installierte Wind-Leistung (MW)')
+    plt.title(f'Kostenlandschaft (PV/Wind) bei fester Batterie ({battery_mwh:.1f} MWh / {battery_mw:.1f} MW) - {days_in_period} Tage')
+    plt.legend(loc='upper right')
+    plt.grid(True, linestyle=':', alpha=0.6)
+    plt.tight_layout()
+    plt.savefig(filename)
+    plt.close()
+    return filename
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Schreiben der Ergebnis-Zeitreihen in Blöcken nach CSV, Parquet oder HDF5 (statt eines großen DataFrames per openpyxl).
+
+write_timeseries schreibt ein Dict von gleich langen Arrays blockweise (chunk_rows Zeilen je Block); es wird nie
+mehr als ein Block als Tabelle angelegt. Parquet-Blöcke gehen ohne Umweg über pandas an pyarrow (Sichten auf die Arrays,
+keine Kopie), CSV/HDF5-Blöcke werden als DataFrame ohne Kopie der Spalten gebildet. Mit dtype=np.float32 werden
+Gleitkommaspalten blockweise in float32 gespeichert (halbe Dateigröße, ca. 7 signifikante Stellen).
+Excel ist nur noch eine optionale Umwandlung am Ende (convert_to_excel).
+
+ResultStore legt viele Szenario-Läufe in einem Verzeichnis ab, nur anhängend: Jedes Szenario ist eine eigene
+Datei (bzw. ein eigener Schlüssel in results.h5), scenarios.csv führt die Liste der Szenarien mit Metadaten.
+Frühere Szenarien werden dabei weder gelesen noch neu geschrieben.
+
+Formate:
+    "csv"     - immer verfügbar
+    "parquet" - benötigt 'pyarrow'
+    "hdf5"    - benötigt 'tables' (PyTables, über pandas.HDFStore)
+"""
+import csv
+import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None # Format "parquet" nicht verfügbar
+
+DEFAULT_CHUNK_ROWS = 8784 # Zeilen je Block (ein Viertel eines Jahres in 15-Minuten-Auflösung)
+FILE_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "hdf5": ".h5"}
+
+
+class _CsvWriter:
+    def __init__(self, filename, key=None):
+        self.file = open(filename, "w", encoding="utf-8", newline="")
+        self.header = True
+
+    def write(self, block):
+        pd.DataFrame(block, copy=False).to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, filename, key=None):
+        if pyarrow is None:
+            raise ImportError("Format 'parquet' benötigt das Paket 'pyarrow' (pip install pyarrow).")
+        self.filename = filename
+        self.writer = None
+
+    def write(self, block):
+        table = pyarrow.table({name: pyarrow.array(values) for name, values in block.items()}) # Ohne Kopie für zusammenhängende Arrays
+        if self.writer is None: # Schema aus dem ersten Block
+            self.writer = pyarrow.parquet.ParquetWriter(self.filename, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None: self.writer.close()
+
+
+class _Hdf5Writer:
+    def __init__(self, filename, key="results"):
+        self.store = pd.HDFStore(filename, mode="a") # ImportError, falls 'tables' fehlt
+        self.key = key
+        if key in self.store: self.store.remove(key) # Nur diesen Schlüssel ersetzen, andere bleiben erhalten
+
+    def write(self, block):
+        self.store.append(self.key, pd.DataFrame(block, copy=False), format="table", index=False)
+
+    def close(self):
+        self.store.close()
+
+
+# Registrierte Formate (Name -> Writer-Klasse mit write(Block = Dict Spaltenname -> Array) und close())
+RESULT_WRITERS = {
+    "csv": _CsvWriter,
+    "parquet": _ParquetWriter,
+    "hdf5": _Hdf5Writer,
+}
+
+
+def result_format_from_filename(filename):
+    """ Format anhand der Dateiendung (.csv, .parquet, .h5/.hdf5). """
+    extension = os.path.splitext(filename)[1].lower()
+    for fmt, ext in FILE_EXTENSIONS.items():
+        if extension == ext or (fmt == "hdf5" and extension == ".hdf5"):
+            return fmt
+    raise ValueError(f"Unbekannte Dateiendung '{extension}'. Verfügbar: {', '.join(FILE_EXTENSIONS.values())}")
+
+
+def _block_values(values, dtype):
+    """ Spaltenblock als NumPy-Array (Sicht, falls möglich); Gleitkommaspalten mit dtype in diesen Typ umgewandelt. """
+    values = np.asarray(values)
+    if dtype is not None and np.issubdtype(values.dtype, np.floating):
+        return values.astype(dtype, copy=False)
+    return values
+
+
+def write_timeseries(filename, columns, fmt=None, chunk_rows=DEFAULT_CHUNK_ROWS, key="results", dtype=None):
+    """
+    Schreibt die Zeitreihen in columns (Dict Spaltenname -> Array/Index gleicher Länge) blockweise in filename.
+    fmt: "csv", "parquet" oder "hdf5" (Standard: aus der Dateiendung). key: Schlüssel in der HDF5-Datei.
+    dtype: Speichertyp der Gleitkommaspalten (z.B. np.float32), None = unverändert (float64).
+    """
+    fmt = fmt or result_format_from_filename(filename)
+    if fmt not in RESULT_WRITERS:
+        raise ValueError(f"Unbekanntes Ergebnisformat '{fmt}'. Verfügbar: {', '.join(RESULT_WRITERS)}")
+    lengths = {name: len(values) for name, values in columns.items()}
+    num_rows = next(iter(lengths.values()))
+    if any(length != num_rows for length in lengths.values()):
+        raise ValueError(f"Zeitreihen unterschiedlich lang: {lengths}")
+    writer = RESULT_WRITERS[fmt](filename, key=key)
+    try:
+        for start in range(0, max(num_rows, 1), chunk_rows):
+            rows = slice(start, min(start + chunk_rows, num_rows))
+            writer.write({name: _block_values(values[rows], dtype) for name, values in columns.items()})
+    finally:
+        writer.close()
+    return filename
+
+
+def read_timeseries(filename, fmt=None, key="results"):
+    """ Liest eine mit write_timeseries geschriebene Datei als DataFrame. """
+    fmt = fmt or result_format_from_filename(filename)
+    if fmt == "csv":
+        return pd.read_csv(filename)
+    if fmt == "parquet":
+        return pd.read_parquet(filename)
+    return pd.read_hdf(filename, key=key)
+
+
+# Blätter der Excel-Datei mit den Aggregaten (Stufe von lp_results.FlowCube -> Blattname)
+AGGREGATE_SHEETS = {"day": "Tag", "week": "Woche", "month": "Monat"}
+
+
+def convert_to_excel(filename, excel_filename, fmt=None, key="results", aggregates=None):
+    """
+    Optionale Umwandlung einer Ergebnisdatei in eine Excel-Datei (openpyxl, hält die ganze Tabelle im Speicher).
+    aggregates: lp_results.FlowCube; dessen Tages-, Wochen- und Monatswerte kommen als weitere Blätter dazu (AGGREGATE_SHEETS).
+    """
+    with pd.ExcelWriter(excel_filename, engine="openpyxl") as writer:
+        read_timeseries(filename, fmt=fmt, key=key).to_excel(writer, sheet_name="Zeitreihen", index=False)
+        if aggregates is not None:
+            for level, sheet_name in AGGREGATE_SHEETS.items():
+                pd.DataFrame(aggregates.table(level)).to_excel(writer, sheet_name=sheet_name, index=False)
+    return excel_filename
+
+
+class ResultStore:
+    """ Nur anhängender Speicher für viele Szenario-Läufe in einem Verzeichnis (ein Eintrag je Szenario in scenarios.csv). """
+
+    MANIFEST = "scenarios.csv"
+
+    def __init__(self, directory, fmt="parquet", chunk_rows=DEFAULT_CHUNK_ROWS, dtype=None):
+        """ dtype: Speichertyp der Gleitkommaspalten aller Szenarien (z.B. np.float32), None = float64. """
+        if fmt not in RESULT_WRITERS:
+            raise ValueError(f"Unbekanntes Ergebnisformat '{fmt}'. Verfügbar: {', '.join(RESULT_WRITERS)}")
+        self.directory = directory
+        self.fmt = fmt
+        self.chunk_rows = chunk_rows
+        self.dtype = dtype
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, self.MANIFEST)
+
+    def _location(self, name):
+        """ (Dateiname, HDF5-Schlüssel) eines Szenarios. """
+        if self.fmt == "hdf5":
+            return os.path.join(self.directory, "results.h5"), f"scenario_{name}"
+        return os.path.join(self.directory, f"{name}{FILE_EXTENSIONS[self.fmt]}"), "results"
+
+    def scenarios(self):
+        """ Einträge aus scenarios.csv als Liste von Dicts (in Schreibreihenfolge, Metadaten als Dict). """
+        if not os.path.exists(self.manifest_path):
+            return []
+        with open(self.manifest_path, encoding="utf-8", newline="") as f:
+            entries = list(csv.DictReader(f))
+        for entry in entries:
+            entry["metadata"] = json.loads(entry["metadata"])
+        return entries
+
+    def append(self, name, columns, metadata=None):
+        """ Schreibt ein weiteres Szenario (Name muss neu sein) und hängt seinen Eintrag an scenarios.csv an. """
+        name = str(name)
+        if any(entry["scenario"] == name for entry in self.scenarios()):
+            raise ValueError(f"Szenario '{name}' ist bereits gespeichert (Speicher ist nur anhängend).")
+        filename, key = self._location(name)
+        write_timeseries(filename, columns, fmt=self.fmt, chunk_rows=self.chunk_rows, key=key, dtype=self.dtype)
+        entry = {"scenario": name, "file": os.path.basename(filename), "key": key, "rows": len(next(iter(columns.values()))),
+                 "written": datetime.datetime.now().isoformat(timespec="seconds"), "metadata": metadata or {}}
+        new_manifest = not os.path.exists(self.manifest_path)
+        with open(self.manifest_path, "a", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            if new_manifest: writer.writerow(["scenario", "file", "key", "rows", "written", "metadata"])
+            writer.writerow([entry["scenario"], entry["file"], entry["key"], entry["rows"], entry["written"],
+                             json.dumps(metadata or {}, default=float)])
+        return entry
+
+    def load(self, name):
+        """ Zeitreihen eines Szenarios als DataFrame. """
+        filename, key = self._location(str(name))
+        return read_timeseries(filename, fmt=self.fmt, key=key)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Rollierender Betrieb (Rolling Horizon) für feste Kapazitäten bei langen oder hoch aufgelösten Zeitreihen.
+
+Statt eines LP über den ganzen Zeitraum wird der Betrieb in überlappenden Fenstern gelöst
+(z.B. 7 Tage plus 1 Tag Vorausschau): Von jedem Fenster werden nur die ersten window_steps Zeitschritte
+übernommen, der SoC am Ende dieses Abschnitts ist der Start-SoC des nächsten Fensters. Die Vorausschau
+verhindert, dass die Batterie am Fensterende grundlos entleert wird.
+
+Der Speicherbedarf der LPs hängt nur von der Fenstergröße ab; die Ergebnis-Zeitreihen können über out
+auch in vorab angelegte Arrays (z.B. np.lib.format.open_memmap) geschrieben werden.
+"""
+import time
+
+import numpy as np
+
+from lp_matrix import build_operational_lp
+from solver_backend import solve_lp
+
+DISPATCH_SERIES = ("grid_import", "grid_export", "curtailment", "battery_charge", "battery_discharge")
+
+
+def rolling_horizon_dispatch(residual_load_mwh, feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh,
+                             battery_capacity_mwh, battery_power_mw, charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv,
+                             battery_soc_min_percent, time_resolution_hours, window_steps, lookahead_steps=0,
+                             initial_soc_mwh=None, grid_connection_limit_mw=None, backend="highs", method="simplex", out=None,
+                             progress=False):
+    """
+    Löst den Betrieb fensterweise und setzt die Zeitreihen zusammen (Dict wie greedy_dispatch.greedy_dispatch).
+    Der Betrieb beginnt bei initial_soc_mwh (None = Mindest-SoC, auf die SoC-Grenzen begrenzt). Im letzten Fenster muss
+    der End-SoC mindestens den Start-SoC erreichen (Ersatz für die zyklische Randbedingung; beim Mindest-SoC als Start
+    stets erfüllt); ist das nicht möglich, wird ohne diese Bedingung gelöst, die Lücke in 'cyclic_gap_mwh' ausgewiesen
+    und wie bei greedy_dispatch konservativ zum höchsten Netzbezugspreis nachgeladen ('operational_cost' enthält diese
+    Kosten).
+    """
+    residual = np.asarray(residual_load_mwh, dtype=float)
+    num_timesteps = len(residual)
+    tariff = np.broadcast_to(np.asarray(feed_in_tariff_profile_eur_per_mwh, dtype=float), (num_timesteps,))
+    price = np.broadcast_to(np.asarray(grid_purchase_price_eur_per_mwh, dtype=float), (num_timesteps,))
+    if window_steps < 1:
+        raise ValueError(f"Fensterlänge muss mindestens 1 Zeitschritt betragen (angegeben: {window_steps}).")
+    result = out if out is not None else {name: np.zeros(num_timesteps) for name in DISPATCH_SERIES}
+    if "battery_soc" not in result: result["battery_soc"] = np.zeros(num_timesteps + 1)
+
+    soc_min = battery_soc_min_percent * battery_capacity_mwh
+    initial_soc = soc_min if initial_soc_mwh is None else min(max(initial_soc_mwh, soc_min), battery_capacity_mwh)
+    soc = initial_soc
+    result["battery_soc"][0] = soc
+    operational_cost = 0.0; solve_seconds = 0.0; num_windows = 0
+    start_time = time.perf_counter()
+    for start in range(0, num_timesteps, window_steps):
+        end = min(start + window_steps + lookahead_steps, num_timesteps)
+        keep = min(window_steps, num_timesteps - start)
+        lp = build_operational_lp(residual[start:end], tariff[start:end], price[start:end], battery_capacity_mwh, battery_power_mw,
+                                  charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent,
+                                  time_resolution_hours, cyclic_soc=False, grid_connection_limit_mw=grid_connection_limit_mw)
+        soc_slice = lp.variable_slices["battery_soc"]
+        lp.lb[soc_slice.start] = soc; lp.ub[soc_slice.start] = soc # Start-SoC aus dem vorherigen Fenster
+        is_last = end == num_timesteps
+        if is_last:
+            lp.lb[soc_slice.stop - 1] = max(lp.lb[soc_slice.stop - 1], initial_soc)
+        solution = solve_lp(lp, backend=backend, method=method)
+        if solution.status != "Optimal" and is_last: # End-SoC nicht erreichbar: ohne Bedingung lösen
+            lp.lb[soc_slice.stop - 1] = soc_min
+            solution = solve_lp(lp, backend=backend, method=method)
+        if solution.status != "Optimal":
+            raise RuntimeError(f"Fenster ab Zeitschritt {start} nicht lösbar (Status: {solution.status}).")
+        solve_seconds += solution.solve_seconds; num_windows += 1
+
+        for name in DISPATCH_SERIES:
+            result[name][start:start + keep] = lp.view(solution.x, name)[:keep]
+        window_soc = lp.view(solution.x, "battery_soc")
+        result["battery_soc"][start + 1:start + keep + 1] = window_soc[1:keep + 1]
+        soc = window_soc[keep]
+        kept = slice(start, start + keep)
+        operational_cost += float(np.dot(price[kept], result["grid_import"][kept]) - np.dot(tariff[kept], result["grid_export"][kept]))
+        if progress:
+            elapsed = time.perf_counter() - start_time
+            print(f"\rRollierender Betrieb: Fenster {num_windows}/{-(-num_timesteps // window_steps)}, {elapsed:.1f} s", end="")
+    if progress: print()
+
+    # Verbleibende Lücke zum Start-SoC: fehlende Energie am Ende zum höchsten Netzbezugspreis nachladen
+    cyclic_gap_mwh = max(0.0, initial_soc - soc)
+    if cyclic_gap_mwh > 1e-6 * max(1.0, battery_capacity_mwh):
+        print(f"WARNUNG: End-SoC liegt {cyclic_gap_mwh:.3f} MWh unter dem Start-SoC; Nachladen zum Netzbezugspreis eingerechnet.")
+    result["operational_cost"] = operational_cost + cyclic_gap_mwh * charge_discharge_eff_sqrt_inv * np.max(price)
+    result["cyclic_gap_mwh"] = cyclic_gap_mwh
+    result["num_windows"] = num_windows
+    result["solve_seconds"] = solve_seconds
+    return result
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Laufprotokoll: Wandzeit, CPU-Zeit und Speicher je Abschnitt eines Skriptlaufs plus Kennzahlen (Modellgröße,
+Solver-Statistik) als strukturiertes JSON.
+
+    run_log = RunLog("LP_Optimierung", settings={"solver_profile": "default"})
+    run_log.begin("2_daten")            # beendet den vorherigen Abschnitt und startet den nächsten
+    ...
+    run_log.record("model", **lp_size(sizing_lp))
+    run_log.end(); run_log.write("laufprotokoll.json")
+
+In Bibliotheksfunktionen kann statt begin/end der Kontextmanager section(name) verwendet werden. Der Spitzenspeicher
+(peak_rss_mb) ist der Höchstwert des Prozesses seit Start (resource.getrusage, nicht unter Windows); rss_mb ist der
+aktuelle Wert am Ende des Abschnitts, children_peak_rss_mb der größte beendete Kindprozess (z.B. Prozess-Pools).
+"""
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None # Windows: kein getrusage, Speicherwerte bleiben leer
+
+
+def _rusage_mb(who):
+    if resource is None: return None
+    maxrss = resource.getrusage(who).ru_maxrss
+    return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 2**10 # macOS: Bytes, Linux: KiB
+
+
+def peak_rss_mb():
+    """ Höchster Arbeitsspeicher (RSS) des Prozesses seit Start in MB (None, falls nicht verfügbar). """
+    return _rusage_mb(resource.RUSAGE_SELF) if resource is not None else None
+
+
+def current_rss_mb():
+    """ Aktueller Arbeitsspeicher (RSS) in MB, nur unter Linux (/proc), sonst None. """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def lp_size(lp):
+    """ Modellgröße eines Matrix-LP: Spalten, Zeilen und Nicht-Null-Einträge. """
+    return {"cols": int(lp.num_variables), "rows": int(lp.A_eq.shape[0] + lp.A_ub.shape[0]), "nnz": int(lp.A_eq.nnz + lp.A_ub.nnz)}
+
+
+def solution_metrics(solution):
+    """ Kennzahlen eines LPSolution-Objekts für das Protokoll (Status, Zielwert, Zeit, Solver-Statistik). """
+    return {"status": solution.status, "objective": solution.objective, "backend": solution.backend, "method": solution.method,
+            "solve_seconds": solution.solve_seconds, **(solution.stats or {})}
+
+
+def _json_default(value):
+    """ NumPy-Werte und sonstige Objekte für json.dump. """
+    if isinstance(value, np.generic): return value.item()
+    if isinstance(value, np.ndarray): return value.tolist()
+    return str(value)
+
+
+class RunLog:
+    """ Sammelt Abschnittszeiten und Kennzahlen eines Laufs; write() schreibt alles als JSON. """
+
+    def __init__(self, name, settings=None):
+        self.name = name
+        self.settings = dict(settings or {})
+        self.started = datetime.datetime.now()
+        self.sections = []
+        self.metrics = {}
+        self._open = None # (Name, Startzeit, CPU-Startzeit) des laufenden Abschnitts
+        self._start = time.perf_counter()
+
+    def begin(self, name):
+        """ Beendet den laufenden Abschnitt (falls vorhanden) und startet den Abschnitt name. """
+        self.end()
+        self._open = (name, time.perf_counter(), time.process_time())
+
+    def end(self):
+        """ Beendet den laufenden Abschnitt. """
+        if self._open is None: return
+        name, wall_start, cpu_start = self._open
+        self._open = None
+        self.sections.append({"section": name, "wall_seconds": time.perf_counter() - wall_start, "cpu_seconds": time.process_time() - cpu_start,
+                              "rss_mb": current_rss_mb(), "peak_rss_mb": peak_rss_mb(),
+                              "children_peak_rss_mb": _rusage_mb(resource.RUSAGE_CHILDREN) if resource is not None else None})
+
+    @contextmanager
+    def section(self, name):
+        """ Kontextmanager für einen Abschnitt (verschachtelt nicht; ein laufender Abschnitt wird vorher beendet). """
+        self.begin(name)
+        try:
+            yield self
+        finally:
+            self.end()
+
+    def record(self, key, **values):
+        """ Legt Kennzahlen unter key ab (mehrfache Aufrufe ergänzen). """
+        self.metrics.setdefault(key, {}).update(values)
+
+    def to_dict(self):
+        return {"name": self.name, "started": self.started.isoformat(timespec="seconds"),
+                "total_seconds": time.perf_counter() - self._start, "python": platform.python_version(), "platform": platform.platform(),
+                "settings": self.settings, "sections": self.sections, "metrics": self.metrics}
+
+    def summary(self):
+        """ Abschnittszeiten als Text-Tabelle für die Konsole. """
+        lines = [f"{'Abschnitt':<28} {'Wandzeit [s]':>12} {'CPU [s]':>10} {'RSS [MB]':>10} {'Spitze [MB]':>12}"]
+        for s in self.sections:
+            fmt = lambda v: f"{v:.0f}" if v is not None else "-"
+            lines.append(f"{s['section']:<28} {s['wall_seconds']:>12.2f} {s['cpu_seconds']:>10.2f} {fmt(s['rss_mb']):>10} {fmt(s['peak_rss_mb']):>12}")
+        return "\n".join(lines)
+
+    def write(self, path):
+        """ Schreibt das Protokoll als JSON (beendet vorher den laufenden Abschnitt). """
+        self.end()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False, default=_json_default)
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Szenario-Läufe (Sensitivitäten) für Preise, Kosten und Wirkungsgrad ohne Änderung von LP_Optimierung.py.
+
+Eine Tabelle (CSV oder YAML) enthält je Zeile bzw. Eintrag ein Szenario: Spalte 'name' und beliebige Parameter
+aus Abschnitt 1 (SCENARIO_PARAMETERS); fehlende oder leere Werte übernehmen den Standardwert. Die Ertragsprofile
+werden einmal geladen und das Auslegungs-LP einmal aufgebaut (ScenarioModel). Je Szenario werden nur geändert:
+
+    Zielfunktion      - Kapazitätskosten (CAPEX/OPEX, Zinssatz, Lebensdauer), Netzbezugspreis, Einspeiseprofil
+    Koeffizienten     - Wirkungsgrad im SoC-Update, Mindest-SoC in den SoC-Grenzen
+    rechte Seite      - Bedarf in der Energiebilanz
+
+Mit dem Backend 'highspy' bleibt das HiGHS-Modell im Speicher und jedes Szenario startet aus der Basis des
+vorherigen. Ergebnis ist eine Tabelle mit einer Zeile je Szenario (Kapazitäten, Kostenaufschlüsselung, LCOE,
+Autarkiegrad); optional werden die Zeitreihen je Szenario in einem result_sink.ResultStore abgelegt.
+Mit --prices gelten für alle Szenarien reale Preiszeitreihen (input_data.load_price_profiles) statt fester Preise.
+
+    python scenario_runner.py szenarien_beispiel.csv --output szenario_ergebnisse.csv
+    python scenario_runner.py szenarien.yaml --backend highspy --store szenario_zeitreihen
+    python scenario_runner.py szenarien_beispiel.csv --prices Smard_Preise_2024.csv --import-surcharge 120
+"""
+import argparse
+import csv
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import yaml
+except ImportError:
+    yaml = None # Szenario-Dateien nur als CSV
+
+from input_data import constant_profile, feed_in_tariff_profile, load_price_profiles, load_yield_profiles
+from lp_matrix import CAPACITY_VARIABLES, annualized_capacity_costs, annuity_factor, build_sizing_lp, coefficient_positions, set_grid_prices, sizing_cost_vector
+from lp_results import LPResult, cost_breakdown, energy_kpis, system_lcoe
+from solver_backend import LPSolution, create_highs, highs_result, highspy, solve_lp
+
+# Standardwerte der Parameter (wie Abschnitt 1 in LP_Optimierung.py)
+SCENARIO_PARAMETERS = {
+    "demand_per_hour_kwh": 3629,
+    "specific_capex_pv_eur_per_mw": 800 * 1000,
+    "specific_opex_pv_eur_per_mw_pa": 13.3 * 1000,
+    "specific_capex_wind_eur_per_mw": 1600 * 1000,
+    "specific_opex_wind_eur_per_mw_pa": 32 * 1000,
+    "specific_capex_battery_eur_per_mw": 600 * 1000,
+    "specific_opex_battery_eur_per_mwh_pa": 6.65 * 1000,
+    "discount_rate": 0.06,
+    "lifetime_pv_wind_years": 20,
+    "lifetime_battery_years": 15,
+    "battery_efficiency": 0.88,
+    "battery_soc_min_percent": 0.10,
+    "grid_purchase_price_eur_per_mwh": 169.9,
+    "feed_in_tariff_eur_per_mwh": 50,
+    "negative_price_hours": 459,
+    "tariff_seed": 42, # Zufallszahl für die Lage der Stunden ohne Vergütung
+}
+
+
+def scenario_parameters(overrides=None):
+    """ Vollständiger Parametersatz: Standardwerte, überschrieben durch overrides (unbekannte Namen -> ValueError). """
+    overrides = {name: value for name, value in (overrides or {}).items() if value is not None and value != ""}
+    unknown = sorted(set(overrides) - set(SCENARIO_PARAMETERS))
+    if unknown:
+        raise ValueError(f"Unbekannte Szenario-Parameter: {', '.join(unknown)}. Verfügbar: {', '.join(SCENARIO_PARAMETERS)}")
+    params = dict(SCENARIO_PARAMETERS)
+    params.update({name: float(value) for name, value in overrides.items()})
+    if not (0 < params["battery_efficiency"] <= 1):
+        raise ValueError(f"Batterie-Wirkungsgrad muss in (0, 1] liegen (angegeben: {params['battery_efficiency']}).")
+    if not (0 <= params["battery_soc_min_percent"] < 1):
+        raise ValueError(f"Mindest-SoC muss in [0, 1) liegen (angegeben: {params['battery_soc_min_percent']}).")
+    return params
+
+
+def read_scenarios(filename):
+    """
+    Liest eine Szenario-Tabelle: CSV (Kopfzeile mit 'name' und Parameternamen) oder YAML (Liste von Einträgen mit
+    'name' und Parametern, optional unter dem Schlüssel 'scenarios'). Liefert eine Liste von (Name, Parameter-Dict).
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in (".yaml", ".yml"):
+        if yaml is None:
+            raise ImportError("YAML-Szenario-Dateien benötigen das Paket 'pyyaml' (pip install pyyaml).")
+        with open(filename, encoding="utf-8") as f:
+            entries = yaml.safe_load(f) or []
+        if isinstance(entries, dict): entries = entries.get("scenarios", [])
+    else:
+        with open(filename, encoding="utf-8", newline="") as f:
+            entries = list(csv.DictReader(f))
+    scenarios = []
+    for k, entry in enumerate(entries):
+        entry = dict(entry)
+        name = str(entry.pop("name", None) or f"szenario_{k + 1}")
+        scenarios.append((name, scenario_parameters(entry)))
+    names = [name for name, _ in scenarios]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Szenario-Namen in '{filename}' sind nicht eindeutig.")
+    return scenarios
+
+
+class ScenarioModel:
+    """ Auslegungs-LP, das einmal aufgebaut wird; je Szenario werden nur Zielfunktion, Koeffizienten und Bedarf gesetzt. """
+
+    def __init__(self, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, time_resolution_hours=0.25,
+                 backend="highs", method="simplex", warm_start=True, price_profiles=None):
+        """ price_profiles: (Netzbezugspreis, Einspeisevergütung) je Zeitschritt, ersetzt die festen Preise aller Szenarien. """
+        self.price_profiles = price_profiles
+        self.specific_yield_pv_mwh_per_mw = specific_yield_pv_mwh_per_mw
+        self.specific_yield_wind_mwh_per_mw = specific_yield_wind_mwh_per_mw
+        self.time_resolution_hours = time_resolution_hours
+        self.num_timesteps = len(specific_yield_pv_mwh_per_mw)
+        self.days_in_period = self.num_timesteps * time_resolution_hours / 24
+        self.backend = backend; self.method = method
+
+        self.params = scenario_parameters()
+        eff_sqrt = math.sqrt(self.params["battery_efficiency"])
+        price, tariff = self._grid_prices(self.params)
+        self.lp = build_sizing_lp(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, self._demand(self.params),
+                                  tariff, price, self._capacity_costs(self.params),
+                                  eff_sqrt, 1.0 / eff_sqrt, self.params["battery_soc_min_percent"], time_resolution_hours)
+        # Positionen der änderbaren Koeffizienten in A_eq.data / A_ub.data
+        soc_rows = self.lp.eq_row_slices["battery_soc_update"]
+        self.charge_positions = coefficient_positions(self.lp.A_eq, soc_rows, self.lp.variable_slices["battery_charge"])
+        self.discharge_positions = coefficient_positions(self.lp.A_eq, soc_rows, self.lp.variable_slices["battery_discharge"])
+        self.soc_min_positions = coefficient_positions(self.lp.A_ub, self.lp.ub_row_slices["battery_soc_min_limit"],
+                                                       self.lp.variable_slices["battery_capacity_mwh"])
+
+        self.warm_start = warm_start and backend == "highspy"
+        if self.warm_start and highspy is None:
+            raise ImportError("Backend 'highspy' benötigt das Paket 'highspy' (pip install highspy).")
+        self._highs = create_highs(self.lp, method=method) if self.warm_start else None
+
+    def _demand(self, params):
+        return constant_profile(params["demand_per_hour_kwh"] * self.time_resolution_hours / 1000, self.num_timesteps)
+
+    def _grid_prices(self, params):
+        """ (Netzbezugspreis, Einspeiseprofil): reale Preise, falls vorgegeben, sonst feste Preise aus den Parametern. """
+        if self.price_profiles is not None:
+            return self.price_profiles
+        return params["grid_purchase_price_eur_per_mwh"], feed_in_tariff_profile(
+            self.num_timesteps, params["feed_in_tariff_eur_per_mwh"], params["negative_price_hours"],
+            self.time_resolution_hours, seed=int(params["tariff_seed"]))
+
+    @staticmethod
+    def _capacity_costs(params):
+        af_pv_wind = annuity_factor(params["discount_rate"], params["lifetime_pv_wind_years"])
+        af_battery = annuity_factor(params["discount_rate"], params["lifetime_battery_years"])
+        return annualized_capacity_costs(af_pv_wind, af_battery, params["specific_capex_pv_eur_per_mw"], params["specific_opex_pv_eur_per_mw_pa"],
+                                         params["specific_capex_wind_eur_per_mw"], params["specific_opex_wind_eur_per_mw_pa"],
+                                         params["specific_capex_battery_eur_per_mw"], params["specific_opex_battery_eur_per_mwh_pa"])
+
+    def apply(self, params):
+        """ Setzt die Koeffizienten des Szenarios im LP (und in der HiGHS-Instanz). Liefert (Bedarf, Einspeiseprofil). """
+        lp = self.lp
+        demand = self._demand(params); price, tariff = self._grid_prices(params)
+        lp.c[:] = sizing_cost_vector(self.num_timesteps, self._capacity_costs(params), price, tariff)
+        eff_sqrt = math.sqrt(params["battery_efficiency"])
+        changed_eq = params["battery_efficiency"] != self.params["battery_efficiency"]
+        changed_ub = params["battery_soc_min_percent"] != self.params["battery_soc_min_percent"]
+        changed_demand = params["demand_per_hour_kwh"] != self.params["demand_per_hour_kwh"]
+        lp.A_eq.data[self.charge_positions] = -eff_sqrt
+        lp.A_eq.data[self.discharge_positions] = 1.0 / eff_sqrt
+        lp.A_ub.data[self.soc_min_positions] = params["battery_soc_min_percent"]
+        balance_rows = lp.eq_row_slices["energy_balance"]
+        lp.b_eq[balance_rows] = demand
+
+        h = self._highs
+        if h is not None:
+            h.changeColsCost(lp.num_variables, np.arange(lp.num_variables, dtype=np.int32), lp.c)
+            if changed_eq: # Zeilen in HiGHS: erst A_eq, dann A_ub (lp_row_form)
+                soc_rows = np.repeat(np.arange(lp.A_eq.shape[0]), np.diff(lp.A_eq.indptr))
+                for pos in np.concatenate([self.charge_positions, self.discharge_positions]):
+                    h.changeCoeff(int(soc_rows[pos]), int(lp.A_eq.indices[pos]), float(lp.A_eq.data[pos]))
+            if changed_ub:
+                ub_rows = np.repeat(np.arange(lp.A_ub.shape[0]), np.diff(lp.A_ub.indptr)) + lp.A_eq.shape[0]
+                for pos in self.soc_min_positions:
+                    h.changeCoeff(int(ub_rows[pos]), int(lp.A_ub.indices[pos]), float(lp.A_ub.data[pos]))
+            if changed_demand:
+                rows = np.arange(balance_rows.start, balance_rows.stop, dtype=np.int32)
+                h.changeRowsBounds(len(rows), rows, demand, demand)
+        self.params = params
+        return demand, tariff
+
+    def set_grid_prices(self, grid_purchase_price_eur_per_mwh=None, feed_in_tariff_profile_eur_per_mwh=None):
+        """ Tauscht nur die Preiskoeffizienten von grid_import/grid_export aus (z.B. ein anderes Preisjahr), ohne Neuaufbau. """
+        set_grid_prices(self.lp, grid_purchase_price_eur_per_mwh, feed_in_tariff_profile_eur_per_mwh)
+        if self._highs is not None:
+            for name, values in (("grid_import", grid_purchase_price_eur_per_mwh), ("grid_export", feed_in_tariff_profile_eur_per_mwh)):
+                if values is None: continue
+                columns = self.lp.variable_slices[name]
+                self._highs.changeColsCost(columns.stop - columns.start, np.arange(columns.start, columns.stop, dtype=np.int32), self.lp.c[columns])
+
+    def set_feed_in_tariff(self, feed_in_tariff_profile_eur_per_mwh):
+        """ Ändert nur die Zielfunktionskoeffizienten von grid_export (z.B. je Ziehung der Monte-Carlo-Simulation). """
+        self.set_grid_prices(feed_in_tariff_profile_eur_per_mwh=feed_in_tariff_profile_eur_per_mwh)
+
+    def solve_current(self):
+        """ Löst das LP mit den aktuell gesetzten Koeffizienten. Liefert ein LPSolution-Objekt. """
+        if self._highs is None:
+            return solve_lp(self.lp, backend=self.backend, method=self.method)
+        start = time.perf_counter()
+        self._highs.run()
+        status, objective, x, row_duals = highs_result(self._highs)
+        if status != "Optimal": self._highs.clearSolver() # Ungültige Basis nicht an das nächste Szenario weitergeben
+        return LPSolution(status=status, objective=objective, x=x, backend=self.backend, method=self.method,
+                          solve_seconds=time.perf_counter() - start, row_duals=row_duals)
+
+    def solve(self, params):
+        """ Löst das Szenario. Liefert (LPSolution, Bedarf, Einspeiseprofil). """
+        demand, tariff = self.apply(params)
+        return self.solve_current(), demand, tariff
+
+    def evaluate(self, name, params, solution, demand, tariff):
+        """ Eine Ergebniszeile (Dict): Parameter, Kapazitäten, Kostenaufschlüsselung, LCOE, Autarkie. """
+        row = {"scenario": name, "status": solution.status}
+        row.update(params)
+        row["solve_seconds"] = solution.solve_seconds
+        if solution.status != "Optimal":
+            return row
+        result = LPResult(self.lp, solution)
+        capacities = [result.value(variable) for variable in CAPACITY_VARIABLES]
+        row.update(zip(CAPACITY_VARIABLES, capacities))
+        price = self.lp.c[self.lp.variable_slices["grid_import"]] # Netzbezugspreis, wie aktuell im LP gesetzt
+        kpis = energy_kpis(result, self.specific_yield_pv_mwh_per_mw, self.specific_yield_wind_mwh_per_mw, demand, price, tariff)
+        costs = cost_breakdown(params, capacities)
+        row["total_cost"] = solution.objective
+        row.update(costs)
+        row["grid_import_cost"] = kpis["grid_import_cost"]; row["feed_in_revenue"] = kpis["feed_in_revenue"]
+        row["lcoe_generation"], row["lcoe_system"] = system_lcoe(costs["annualized_capex"] + costs["annual_opex"],
+                                                                 kpis["grid_import_cost"] - kpis["feed_in_revenue"],
+                                                                 kpis["total_demand"], self.days_in_period)
+        for key in ("self_sufficiency_rate", "renewable_coverage_rate", "total_demand", "total_generation", "total_grid_import",
+                    "total_grid_export", "total_curtailment", "total_battery_discharge"):
+            row[key] = kpis[key]
+        return row
+
+
+def run_scenarios(model, scenarios, result_store=None, progress=True):
+    """
+    Löst alle Szenarien (Liste von (Name, Parameter-Dict), z.B. aus read_scenarios) nacheinander mit demselben ScenarioModel.
+    Liefert einen DataFrame mit einer Zeile je Szenario; mit result_store werden die Zeitreihen je Szenario angehängt.
+    """
+    rows = []
+    for k, (name, params) in enumerate(scenarios, start=1):
+        solution, demand, tariff = model.solve(params)
+        row = model.evaluate(name, params, solution, demand, tariff)
+        rows.append(row)
+        if progress:
+            caps = f"PV {row['pv_capacity_mw']:.2f} MWp, Wind {row['wind_capacity_mw']:.2f} MW, Batterie {row['battery_capacity_mwh']:.2f} MWh, " \
+                   f"LCOE {row['lcoe_system']:.2f} €/MWh" if solution.status == "Optimal" else solution.status
+            print(f"Szenario {k}/{len(scenarios)} '{name}': {caps} ({solution.solve_seconds:.1f} s)")
+        if result_store is not None and solution.status == "Optimal":
+            result = LPResult(model.lp, solution)
+            columns = {series: result[series] for series in ("grid_import", "grid_export", "curtailment", "battery_charge", "battery_discharge")}
+            columns["battery_soc_end"] = result["battery_soc"][1:]
+            result_store.append(name, columns, metadata={key: row[key] for key in row if key != "scenario"})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scenarios", help="Szenario-Tabelle (.csv oder .yaml)")
+    parser.add_argument("--excel", default="Smard_Daten_Jahreswert.xlsx", help="Arbeitsmappe mit den Ertragsdaten")
+    parser.add_argument("--output", default="szenario_ergebnisse.csv", help="Ergebnistabelle (eine Zeile je Szenario)")
+    parser.add_argument("--backend", default="highspy" if highspy is not None else "highs", help="Solver-Backend (highspy: Warmstart)")
+    parser.add_argument("--method", default="simplex", help="simplex oder ipm")
+    parser.add_argument("--time-resolution-hours", type=float, default=0.25)
+    parser.add_argument("--store", default=None, help="Verzeichnis für die Zeitreihen je Szenario (result_sink.ResultStore)")
+    parser.add_argument("--float32", action="store_true", help="Zeitreihen im --store als float32 speichern (halbe Dateigröße)")
+    parser.add_argument("--no-cache", action="store_true", help="Arbeitsmappe ohne Cache lesen")
+    parser.add_argument("--prices", default=None, help="Reale Preise (Excel/CSV) für alle Szenarien statt fester Preise")
+    parser.add_argument("--price-column", default=None, help="Spalte der Preise (Standard: erste Spalte mit €/MWh)")
+    parser.add_argument("--import-surcharge", type=float, default=0.0, help="Aufschlag auf den Börsenpreis beim Netzbezug in €/MWh (Bezugspreis mindestens 0)")
+    args = parser.parse_args()
+
+    scenarios = read_scenarios(args.scenarios)
+    y_pv, y_wind, info = load_yield_profiles(args.excel, use_cache=not args.no_cache)
+    print(f"{len(scenarios)} Szenarien, {info['num_rows']} Zeitschritte ({'Cache' if info['source'] == 'cache' else 'Excel'}), Solver: {args.backend}/{args.method}")
+    start = time.perf_counter()
+    price_profiles = None
+    if args.prices:
+        import_price, export_price, price_info = load_price_profiles(args.prices, info["num_rows"], args.time_resolution_hours, args.price_column,
+                                                                     import_price_surcharge_eur_per_mwh=args.import_surcharge)
+        price_profiles = (import_price, export_price)
+        print(f"Reale Preise aus '{args.prices}': Mittel {price_info['mean_price']:.2f} €/MWh, {price_info['negative_price_hours']:.0f} h negativ "
+              f"(feste Preise und Einspeiseparameter der Szenarien werden nicht verwendet)")
+    model = ScenarioModel(y_pv, y_wind, args.time_resolution_hours, backend=args.backend, method=args.method, price_profiles=price_profiles)
+    print(f"Modell einmalig aufgebaut in {time.perf_counter() - start:.1f} s ({model.lp.num_variables} Variablen).")
+    store = None
+    if args.store:
+        from result_sink import ResultStore, pyarrow
+        store = ResultStore(args.store, fmt="parquet" if pyarrow is not None else "csv", dtype=np.float32 if args.float32 else None)
+    table = run_scenarios(model, scenarios, result_store=store)
+    table.to_csv(args.output, index=False)
+    print(f"Ergebnisse gespeichert: {os.path.abspath(args.output)} ({time.perf_counter() - start:.1f} s gesamt)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Auslegung als importierbare Pipeline ohne Seiteneffekte beim Import:
+Parametersatz -> Eingangsdaten -> Modell -> Lösung -> Kennzahlen -> Ausgaben.
+
+    from sizing_pipeline import SizingParameters, load_inputs, optimize
+    params = SizingParameters(discount_rate=0.05)
+    inputs = load_inputs(params, "Smard_Daten_Jahreswert.xlsx")
+    result = optimize(params, inputs)       # SizingResult: Kapazitäten, Kosten, Energiebilanz, LCOE
+    print(result.capacities, result.lcoe_system)
+
+Für viele Läufe in einem Prozess (Batch-Worker) werden die Eingangsdaten einmal geladen bzw. mit InputProfiles.from_yields
+aus Arrays gebildet und optimize je Parametersatz aufgerufen. Beim Import werden nur NumPy/SciPy und die Solver-Anbindung
+geladen; pandas erst beim Lesen von Excel/CSV (input_data.py), matplotlib erst in write_outputs (result_plots.py).
+Fehler werden als Ausnahmen gemeldet (FileNotFoundError, ValueError), nicht per exit().
+
+LP_Optimierung.py führt dieselben Schritte als Skript aus, mit allen Optionen (Zerlegung, Aggregation, Kostenlandschaft).
+"""
+import dataclasses
+import datetime
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from input_data import constant_profile, feed_in_tariff_profile, load_price_profiles, load_yield_profiles
+from lp_matrix import CAPACITY_VARIABLES, MatrixLP, annualized_capacity_costs, annuity_factor, build_sizing_lp, set_grid_connection_limit
+from lp_results import FlowCube, LPResult, cost_breakdown, energy_kpis, flow_cube, result_flows, system_lcoe
+from model_cache import cached_sizing_lp, solve_with_cached_basis
+from solver_backend import LPSolution, highspy, resolve_profile, solve_lp
+
+
+@dataclass
+class SizingParameters:
+    """ Parametersatz der Auslegung (Abschnitt 1 in LP_Optimierung.py), Standardwerte wie im Skript. """
+    time_resolution_hours: float = 0.25
+    data_year: int = 2024 # Jahr der Ertragsdaten; bestimmt Startdatum und Anzahl der Zeitschritte
+    demand_per_hour_kwh: float = 3629
+    specific_capex_pv_eur_per_mw: float = 800 * 1000
+    specific_opex_pv_eur_per_mw_pa: float = 13.3 * 1000
+    specific_capex_wind_eur_per_mw: float = 1600 * 1000
+    specific_opex_wind_eur_per_mw_pa: float = 32 * 1000
+    specific_capex_battery_eur_per_mw: float = 600 * 1000
+    specific_opex_battery_eur_per_mwh_pa: float = 6.65 * 1000
+    discount_rate: float = 0.06
+    lifetime_pv_wind_years: int = 20
+    lifetime_battery_years: int = 15
+    battery_efficiency: float = 0.88
+    battery_soc_min_percent: float = 0.10
+    grid_purchase_price_eur_per_mwh: float = 169.9
+    feed_in_tariff_eur_per_mwh: float = 50
+    negative_price_hours: float = 459 # Stunden mit 0 € Vergütung (zufällig verteilt, tariff_seed)
+    tariff_seed: int = 42
+    grid_connection_limit_mw: Optional[float] = None
+
+    def __post_init__(self):
+        if not (0 < self.battery_efficiency <= 1):
+            raise ValueError(f"Batterie-Wirkungsgrad muss in (0, 1] liegen (angegeben: {self.battery_efficiency}).")
+        if not (0 <= self.battery_soc_min_percent < 1):
+            raise ValueError(f"Mindest-SoC muss in [0, 1) liegen (angegeben: {self.battery_soc_min_percent}).")
+
+    @property
+    def start_date(self):
+        return datetime.datetime(self.data_year, 1, 1)
+
+    @property
+    def days_in_period(self):
+        return (datetime.datetime(self.data_year + 1, 1, 1) - self.start_date).days
+
+    @property
+    def num_timesteps(self):
+        return int(self.days_in_period * 24 / self.time_resolution_hours)
+
+    def efficiency_factors(self):
+        """ (sqrt(Wirkungsgrad), 1 / sqrt(Wirkungsgrad)) für Laden bzw. Entladen. """
+        eff_sqrt = math.sqrt(self.battery_efficiency)
+        return eff_sqrt, 1.0 / eff_sqrt
+
+    def annuity_factors(self):
+        """ (Annuitätsfaktor PV/Wind, Annuitätsfaktor Batterie). """
+        return annuity_factor(self.discount_rate, self.lifetime_pv_wind_years), annuity_factor(self.discount_rate, self.lifetime_battery_years)
+
+    def capacity_costs(self):
+        """ Annualisierte Kosten je Kapazitätseinheit (PV, Wind, Batterie MWh, Batterie MW) wie in der Zielfunktion. """
+        return annualized_capacity_costs(*self.annuity_factors(), self.specific_capex_pv_eur_per_mw, self.specific_opex_pv_eur_per_mw_pa,
+                                         self.specific_capex_wind_eur_per_mw, self.specific_opex_wind_eur_per_mw_pa,
+                                         self.specific_capex_battery_eur_per_mw, self.specific_opex_battery_eur_per_mwh_pa)
+
+    def replace(self, **changes):
+        """ Kopie mit geänderten Werten (z.B. für Sensitivitäten). """
+        return dataclasses.replace(self, **changes)
+
+
+@dataclass
+class InputProfiles:
+    """ Zeitreihen einer Periode je Zeitschritt: spezifische Erträge (MWh/MW), Bedarf (MWh), Einspeisevergütung und Netzbezugspreis (€/MWh). """
+    specific_yield_pv_mwh_per_mw: np.ndarray
+    specific_yield_wind_mwh_per_mw: np.ndarray
+    demand_profile_mwh: np.ndarray
+    feed_in_tariff_profile_eur_per_mwh: np.ndarray
+    grid_purchase_price_profile_eur_per_mwh: np.ndarray
+    time_resolution_hours: float = 0.25
+    start_date: datetime.datetime = datetime.datetime(2024, 1, 1)
+    info: dict = field(default_factory=dict) # Herkunft: Info-Dicts von load_yield_profiles ('yields') und load_price_profiles ('prices')
+
+    @property
+    def num_timesteps(self):
+        return len(self.specific_yield_pv_mwh_per_mw)
+
+    @property
+    def days_in_period(self):
+        return round(self.num_timesteps * self.time_resolution_hours / 24)
+
+    @classmethod
+    def from_yields(cls, params, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, grid_purchase_price_profile_eur_per_mwh=None,
+                    feed_in_tariff_profile_eur_per_mwh=None, info=None):
+        """
+        Eingangsdaten aus Ertragsprofilen (Arrays): Bedarf, Einspeiseprofil und Netzbezugspreis aus params, sofern keine
+        Preisprofile übergeben werden. Für Batch-Läufe ohne Excel-Datei. Konstante Profile (Bedarf, fester Netzbezugspreis)
+        sind schreibgeschützte Sichten ohne eigene Zeitreihe (input_data.constant_profile).
+        """
+        num_timesteps = len(specific_yield_pv_mwh_per_mw)
+        demand = constant_profile(params.demand_per_hour_kwh * params.time_resolution_hours / 1000, num_timesteps)
+        if feed_in_tariff_profile_eur_per_mwh is None:
+            feed_in_tariff_profile_eur_per_mwh = feed_in_tariff_profile(num_timesteps, params.feed_in_tariff_eur_per_mwh, params.negative_price_hours,
+                                                                        params.time_resolution_hours, seed=int(params.tariff_seed))
+        if grid_purchase_price_profile_eur_per_mwh is None:
+            grid_purchase_price_profile_eur_per_mwh = constant_profile(params.grid_purchase_price_eur_per_mwh, num_timesteps)
+        return cls(np.asarray(specific_yield_pv_mwh_per_mw, dtype=float), np.asarray(specific_yield_wind_mwh_per_mw, dtype=float), demand,
+                   np.asarray(feed_in_tariff_profile_eur_per_mwh, dtype=float), np.asarray(grid_purchase_price_profile_eur_per_mwh, dtype=float),
+                   params.time_resolution_hours, params.start_date, dict(info or {}))
+
+    def time_index(self, num_steps=None):
+        """ pandas.DatetimeIndex der Zeitschritte (num_steps, Standard: num_timesteps). """
+        from result_plots import time_index
+        return time_index(self.start_date, self.num_timesteps if num_steps is None else num_steps, self.time_resolution_hours)
+
+
+def load_inputs(params, excel_filename, price_filename=None, price_column=None, export_price_column=None,
+                import_price_surcharge_eur_per_mwh=0.0, use_cache=True):
+    """
+    Ertragsprofile aus der SMARD-Arbeitsmappe (mit Cache, input_data.py) und optional reale Preise. Liefert InputProfiles.
+    FileNotFoundError, falls eine Datei fehlt; ValueError, falls die Zeilenzahl nicht zum Datenjahr passt oder die Preise
+    ohne Netzanschlussleistung ein unbeschränktes LP ergäben (input_data.load_price_profiles).
+    """
+    if not os.path.exists(excel_filename):
+        raise FileNotFoundError(f"Excel-Datei '{excel_filename}' nicht gefunden.")
+    pv, wind, yield_info = load_yield_profiles(excel_filename, use_cache=use_cache)
+    if yield_info["num_rows"] != params.num_timesteps:
+        raise ValueError(f"Fehler: Anzahl Zeilen in Excel ({yield_info['num_rows']}) stimmt nicht mit erwarteten Zeitschritten "
+                         f"({params.num_timesteps}) für {params.days_in_period} Tage überein. Bitte Excel-Datei prüfen.")
+    info = {"yields": yield_info, "excel_filename": excel_filename}
+    price = tariff = None
+    if price_filename:
+        price, tariff, info["prices"] = load_price_profiles(price_filename, params.num_timesteps, params.time_resolution_hours, price_column,
+                                                            export_price_column, import_price_surcharge_eur_per_mwh, params.grid_connection_limit_mw)
+    return InputProfiles.from_yields(params, pv, wind, price, tariff, info=info)
+
+
+def build_model(params, inputs, cache_dir=None):
+    """
+    Auslegungs-LP (lp_matrix.build_sizing_lp) mit Anschlussleistung. Mit cache_dir wird es über model_cache.py geladen bzw.
+    gespeichert. Liefert (MatrixLP, Cache-Info-Dict oder None).
+    """
+    eff_sqrt, eff_sqrt_inv = params.efficiency_factors()
+    args = (inputs.specific_yield_pv_mwh_per_mw, inputs.specific_yield_wind_mwh_per_mw, inputs.demand_profile_mwh,
+            inputs.feed_in_tariff_profile_eur_per_mwh, inputs.grid_purchase_price_profile_eur_per_mwh, params.capacity_costs(),
+            eff_sqrt, eff_sqrt_inv, params.battery_soc_min_percent, inputs.time_resolution_hours)
+    if cache_dir is not None:
+        return cached_sizing_lp(cache_dir, *args, params.grid_connection_limit_mw)
+    lp = build_sizing_lp(*args)
+    set_grid_connection_limit(lp, params.grid_connection_limit_mw, inputs.time_resolution_hours)
+    return lp, None
+
+
+def solve_model(lp, backend="highs", method="simplex", profile=None, cache_info=None, msg=False):
+    """
+    Löst das Auslegungs-LP (solver_backend.solve_lp; das Verfahren eines Solver-Profils hat Vorrang vor method). Mit cache_info
+    aus build_model, HiGHS-Simplex und installiertem 'highspy' startet die Lösung aus der gespeicherten Basis. Liefert LPSolution.
+    """
+    method = resolve_profile(profile).get("method", method)
+    if cache_info is not None and backend in ("highs", "highspy") and method == "simplex" and highspy is not None:
+        return solve_with_cached_basis(lp, cache_info, msg=msg, profile=profile)
+    return solve_lp(lp, backend=backend, method=method, msg=msg, profile=profile)
+
+
+@dataclass
+class SizingResult:
+    """ Ergebnis einer Auslegung: Kapazitäten, Kostenaufschlüsselung (€/Jahr), Energiebilanz und Kennzahlen der Periode. """
+    status: str
+    objective: Optional[float] # Annualisierte Anlagenkosten + Netzkosten - Einspeiseerlöse der Periode (€)
+    capacities: dict # CAPACITY_VARIABLES -> Wert (MW bzw. MWh)
+    costs: dict # lp_results.cost_breakdown
+    kpis: dict # lp_results.energy_kpis
+    lcoe_generation: Optional[float] = None # €/MWh, nur Anlagen
+    lcoe_system: Optional[float] = None # €/MWh, inkl. Netzkosten und -erlösen
+    marginal_cost: Optional[np.ndarray] = field(default=None, repr=False) # Dualwerte der Energiebilanz (€/MWh je Zeitschritt)
+    lp: Optional[MatrixLP] = field(default=None, repr=False)
+    solution: Optional[LPSolution] = field(default=None, repr=False)
+    cube: Optional[FlowCube] = field(default=None, repr=False) # Tages-/Wochen-/Monatswerte aller Flüsse (lp_results.flow_cube)
+
+    @property
+    def optimal(self):
+        return self.status == "Optimal"
+
+    @property
+    def operational_cost(self):
+        """ Netzbezugskosten - Einspeiseerlöse der Periode (€). """
+        return self.kpis["grid_import_cost"] - self.kpis["feed_in_revenue"]
+
+    def view(self, name):
+        """ Zeitreihe einer Variablengruppe der Lösung (z.B. "grid_import", "battery_soc"), Sicht ohne Kopie. """
+        return LPResult(self.lp, self.solution)[name]
+
+    def timeseries(self, inputs):
+        """ Spalten der Ergebnisdatei (Abschnitt 6): Zeitstempel, Bedarf, Erzeugung und Energieflüsse je Zeitschritt. """
+        grid_import = self.view("grid_import")
+        return {
+            'Timestamp': inputs.time_index(), 'Bedarf (MWh)': inputs.demand_profile_mwh,
+            'PV Erzeugung (MWh)': inputs.specific_yield_pv_mwh_per_mw * self.capacities["pv_capacity_mw"],
+            'Wind Erzeugung (MWh)': inputs.specific_yield_wind_mwh_per_mw * self.capacities["wind_capacity_mw"],
+            'Netzbezug (MWh)': grid_import, 'Netzeinspeisung (MWh)': self.view("grid_export"), 'Abregelung (MWh)': self.view("curtailment"),
+            'Batterie Ladung (MWh)': self.view("battery_charge"), 'Batterie Entladung (MWh)': self.view("battery_discharge"),
+            'Batterie SoC (MWh)': self.view("battery_soc")[:-1], # SoC am *Anfang* des Timesteps t
+            'Eigenverbrauch (MWh)': np.maximum(0, inputs.demand_profile_mwh - grid_import), # Bedarf - Netzbezug (wenn positiv)
+        }
+
+    def summary(self):
+        """ Flaches Dict (eine Tabellenzeile): Status, Zielwert, Kapazitäten, Kosten, LCOE und Kennzahlen. """
+        row = {"status": self.status, "total_cost": self.objective, **self.capacities, **self.costs,
+               "lcoe_generation": self.lcoe_generation, "lcoe_system": self.lcoe_system}
+        row.update(self.kpis)
+        if self.solution is not None: row["solve_seconds"] = self.solution.solve_seconds
+        return row
+
+
+def evaluate(params, inputs, lp, solution):
+    """ Kennzahlen einer Lösung des Auslegungs-LP (Variablenreihenfolge wie build_sizing_lp). Liefert SizingResult. """
+    if solution.status != "Optimal":
+        return SizingResult(solution.status, solution.objective, {}, {}, {}, lp=lp, solution=solution)
+    result = LPResult(lp, solution)
+    capacities = {variable: result.value(variable) for variable in CAPACITY_VARIABLES}
+    flows = result_flows(result, inputs.specific_yield_pv_mwh_per_mw, inputs.specific_yield_wind_mwh_per_mw, inputs.demand_profile_mwh)
+    cube = flow_cube(flows, result["battery_soc"][:-1], inputs.start_date, inputs.time_resolution_hours)
+    kpis = energy_kpis(result, inputs.specific_yield_pv_mwh_per_mw, inputs.specific_yield_wind_mwh_per_mw, inputs.demand_profile_mwh,
+                       inputs.grid_purchase_price_profile_eur_per_mwh, inputs.feed_in_tariff_profile_eur_per_mwh, cube=cube)
+    costs = cost_breakdown(dataclasses.asdict(params), list(capacities.values()))
+    lcoe_generation, lcoe_system = system_lcoe(costs["annualized_capex"] + costs["annual_opex"], kpis["grid_import_cost"] - kpis["feed_in_revenue"],
+                                               kpis["total_demand"], inputs.days_in_period)
+    return SizingResult(solution.status, solution.objective, capacities, costs, kpis, lcoe_generation, lcoe_system,
+                        result.dual("energy_balance"), lp, solution, cube)
+
+
+def optimize(params, inputs, backend="highs", method="simplex", profile=None, cache_dir=None, msg=False):
+    """ Modell aufbauen, lösen und auswerten (build_model, solve_model, evaluate). Liefert SizingResult. """
+    lp, cache_info = build_model(params, inputs, cache_dir)
+    solution = solve_model(lp, backend=backend, method=method, profile=profile, cache_info=cache_info, msg=msg)
+    return evaluate(params, inputs, lp, solution)
+
+
+def write_outputs(result, inputs, params, output_dir=".", result_format="parquet", excel_copy=False, plots=True, plot_workers=None,
+                  compact=False):
+    """
+    Ergebnisdatei (result_sink.write_timeseries) und Diagramme 1-4 (result_plots.py) einer optimalen Auslegung in output_dir.
+    compact=True speichert die Zeitreihen als float32 (halbe Dateigröße).
+    Die Diagramme werden mit plot_workers Prozessen gerendert (None = alle Kerne, 1 = in diesem Prozess).
+    Ein fehlgeschlagenes Diagramm wird gemeldet und übersprungen. Liefert die Liste der geschriebenen Dateien.
+    """
+    import result_plots
+    from result_sink import FILE_EXTENSIONS, convert_to_excel, write_timeseries
+    days = inputs.days_in_period
+    files = []
+    path = lambda name: os.path.join(output_dir, name)
+    if plots:
+        pv_mw = result.capacities["pv_capacity_mw"]; wind_mw = result.capacities["wind_capacity_mw"]
+        batt_mwh = result.capacities["battery_capacity_mwh"]
+        soc_index = inputs.time_index(inputs.num_timesteps + 1); index = soc_index[:-1] # Eine Zeitachse für alle Diagramme
+        pv_gen = inputs.specific_yield_pv_mwh_per_mw * pv_mw; wind_gen = inputs.specific_yield_wind_mwh_per_mw * wind_mw
+        charts = [(result_plots.plot_generation_profile, (index, inputs.demand_profile_mwh, pv_gen, wind_gen, pv_mw, wind_mw, days,
+                                                          inputs.time_resolution_hours), f"lastprofil_reale_erzeugung_{days}tage.png"),
+                  (result_plots.plot_monthly_generation, (result.cube, days), f"monatliche_erzeugung_pv_wind_{days}tage.png"),
+                  (result_plots.plot_daily_generation, (result.cube, pv_mw, wind_mw, days), f"taegliche_erzeugung_pv_wind_{days}tage.png")]
+        if batt_mwh > 1e-3:
+            charts.append((result_plots.plot_battery_soc, (soc_index, result.view("battery_soc"), batt_mwh,
+                                                           params.battery_soc_min_percent, days), f"batterie_soc_{days}tage.png"))
+        rendered = result_plots.render_plots([(plot, args + (path(name),)) for plot, args, name in charts], num_workers=plot_workers)
+        for (_, _, name), (filename, error) in zip(charts, rendered):
+            if error is None: files.append(filename)
+            else: print(f"WARNUNG: Diagramm '{name}' konnte nicht erstellt werden ({error}).")
+    result_filename = path(f"energiebilanz_15min_{days}tage{FILE_EXTENSIONS[result_format]}")
+    write_timeseries(result_filename, result.timeseries(inputs), fmt=result_format, dtype=np.float32 if compact else None)
+    files.append(result_filename)
+    if excel_copy:
+        excel_filename = path(f"energiebilanz_15min_{days}tage.xlsx")
+        convert_to_excel(result_filename, excel_filename, fmt=result_format, aggregates=result.cube)
+        files.append(excel_filename)
+    return files
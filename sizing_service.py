@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+"""
+Optimierungsdienst: hält Ertragsprofile und Auslegungs-LP im Speicher und beantwortet Parametersätze als JSON-Aufträge.
+
+Ein Aufruf von LP_Optimierung.py bezahlt jedes Mal Python-Start, Einlesen der Arbeitsmappe und Modellaufbau. Der Dienst
+lädt die Profile einmal und startet num_workers Worker-Prozesse, die je ein scenario_runner.ScenarioModel aufbauen und
+danach nur noch die Koeffizienten eines Auftrags setzen (mit 'highspy' aus der Basis des vorherigen Auftrags).
+Aufträge warten in einer begrenzten Warteschlange; ist sie voll, wird der Auftrag mit einer Fehlermeldung abgelehnt.
+Ergebnisse liegen in einem LRU-Cache, dessen Schlüssel der SHA-256 des vollständigen Parametersatzes ist; identische
+Aufträge werden aus dem Cache beantwortet, gleichzeitig laufende identische Aufträge teilen sich eine Lösung.
+
+Protokoll (TCP oder Unix-Socket): je Zeile ein JSON-Objekt, Antwort ebenfalls als eine Zeile JSON.
+
+    {"op": "solve", "name": "zins_5", "params": {"discount_rate": 0.05}}
+        -> {"status": "ok", "cached": false, "seconds": 41.2, "result": {...Ergebniszeile wie scenario_runner...}}
+    {"op": "stats"}  -> Zähler (Aufträge, Cache-Treffer, Warteschlange, Worker)
+    {"op": "ping"}
+
+    python sizing_service.py --workers 2 --port 8765
+    python sizing_service.py --socket /tmp/auslegung.sock --backend highspy
+    python sizing_service.py --send '{"discount_rate": 0.05}' --port 8765
+
+LocalClient startet denselben Dienst im eigenen Prozess (ohne Socket) und hat dieselbe Schnittstelle wie ServiceClient,
+z.B. für Tests und Notebooks.
+"""
+import argparse
+import asyncio
+import collections
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from input_data import load_price_profiles, load_yield_profiles
+from scenario_runner import ScenarioModel, scenario_parameters
+from solver_backend import highspy, process_pool_context
+
+SERVICE_OPERATIONS = ("solve", "stats", "ping")
+
+
+def request_key(params):
+    """ Cache-Schlüssel eines vollständigen Parametersatzes (scenario_parameters): SHA-256 über das sortierte JSON. """
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """ LRU-Cache (Schlüssel -> Ergebniszeile) mit fester Anzahl Einträge; zählt Treffer und Fehlversuche. """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.hits = 0; self.misses = 0
+
+    def get(self, key):
+        """ Ergebniszeile oder None; ein Treffer wird zum zuletzt benutzten Eintrag. """
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, row):
+        """ Legt eine Ergebniszeile ab und verdrängt bei Bedarf den am längsten nicht benutzten Eintrag. """
+        if self.max_entries <= 0: return
+        self.entries[key] = row
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+_worker_state = {} # Pro Worker-Prozess: ScenarioModel
+
+
+def _init_worker(y_pv, y_wind, time_resolution_hours, backend, method, price_profiles):
+    """ Initialisierung eines Worker-Prozesses: Auslegungs-LP einmal aufbauen. """
+    _worker_state["model"] = ScenarioModel(y_pv, y_wind, time_resolution_hours, backend=backend, method=method, price_profiles=price_profiles)
+
+
+def _warm_up():
+    """ Aufgabe im Worker: nichts lösen, nur den Initializer auslösen. Liefert die Anzahl der LP-Variablen. """
+    return _worker_state["model"].lp.num_variables
+
+
+def _solve_job(params):
+    """ Aufgabe im Worker: ein Parametersatz. Liefert die Ergebniszeile (ScenarioModel.evaluate) ohne Szenario-Namen. """
+    model = _worker_state["model"]
+    solution, demand, tariff = model.solve(params)
+    row = model.evaluate(None, params, solution, demand, tariff)
+    row.pop("scenario")
+    return {key: float(value) if isinstance(value, np.generic) else value for key, value in row.items()}
+
+
+class SizingService:
+    """ Warteschlange, Worker-Prozesse und Ergebnis-Cache des Dienstes (ohne Netzwerk; siehe serve und LocalClient). """
+
+    def __init__(self, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, time_resolution_hours=0.25, backend="highs",
+                 method="simplex", num_workers=2, queue_size=64, cache_size=256, price_profiles=None):
+        self.initargs = (specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, time_resolution_hours, backend, method, price_profiles)
+        self.num_workers = max(1, num_workers or 1)
+        self.queue_size = queue_size
+        self.cache = ResultCache(cache_size)
+        self.executors = []; self.tasks = []
+        self.pending = {} # Schlüssel -> Future laufender Aufträge (gleiche Aufträge teilen sich eine Lösung)
+        self.counters = {"jobs": 0, "solved": 0, "failed": 0, "rejected": 0, "solve_seconds": 0.0}
+        self.queue = None
+        self.started = None
+
+    async def start(self):
+        """ Startet die Worker-Prozesse (je einer mit eigenem Executor, damit jedes Modell warm bleibt) und baut die Modelle auf. """
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        context = process_pool_context()
+        self.executors = [ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker, initargs=self.initargs)
+                          for _ in range(self.num_workers)]
+        await asyncio.gather(*(loop.run_in_executor(executor, _warm_up) for executor in self.executors))
+        self.tasks = [asyncio.create_task(self._worker_loop(executor)) for executor in self.executors]
+        self.started = time.perf_counter()
+
+    async def close(self):
+        """ Beendet die Worker; wartende Aufträge werden mit einem Fehler beantwortet. """
+        for task in self.tasks: task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        for future in self.pending.values():
+            if not future.done(): future.set_exception(RuntimeError("Dienst wurde beendet."))
+        for executor in self.executors: executor.shutdown(cancel_futures=True)
+        self.tasks = []; self.executors = []
+
+    async def _worker_loop(self, executor):
+        """ Holt Aufträge aus der Warteschlange und löst sie im zugehörigen Worker-Prozess. """
+        loop = asyncio.get_running_loop()
+        while True:
+            key, params, future = await self.queue.get()
+            start = time.perf_counter()
+            try:
+                row = await loop.run_in_executor(executor, _solve_job, params)
+            except Exception as e: # Fehler im Worker: nicht cachen, Auftrag mit Fehler beantworten
+                self.counters["failed"] += 1
+                if not future.done(): future.set_exception(e)
+            else:
+                self.counters["solved"] += 1; self.counters["solve_seconds"] += time.perf_counter() - start
+                self.cache.put(key, row)
+                if not future.done(): future.set_result(row)
+            finally:
+                self.pending.pop(key, None)
+                self.queue.task_done()
+
+    async def submit(self, params):
+        """
+        Löst einen Parametersatz (Abweichungen von Abschnitt 1, siehe scenario_runner.SCENARIO_PARAMETERS).
+        Liefert (Ergebniszeile, aus dem Cache). ValueError bei unbekannten/ungültigen Parametern, RuntimeError bei voller Warteschlange.
+        """
+        params = scenario_parameters(params)
+        key = request_key(params)
+        self.counters["jobs"] += 1
+        row = self.cache.get(key)
+        if row is not None:
+            return row, True
+        future = self.pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            try:
+                self.queue.put_nowait((key, params, future))
+            except asyncio.QueueFull:
+                self.counters["rejected"] += 1
+                raise RuntimeError(f"Warteschlange voll ({self.queue_size} Aufträge), später erneut versuchen.")
+            self.pending[key] = future
+        return await asyncio.shield(future), False
+
+    def stats(self):
+        """ Zähler des Dienstes (Dict). """
+        return dict(self.counters, workers=len(self.executors), queued=self.queue.qsize() if self.queue is not None else 0,
+                    running=len(self.pending), cache_entries=len(self.cache.entries), cache_hits=self.cache.hits,
+                    cache_misses=self.cache.misses, uptime_seconds=time.perf_counter() - self.started if self.started else 0.0)
+
+    async def dispatch(self, request):
+        """ Beantwortet einen Auftrag (Dict, siehe Protokoll im Modulkopf). Fehler werden als {"status": "error"} geliefert. """
+        op = request.get("op", "solve")
+        response = {"id": request["id"]} if "id" in request else {}
+        try:
+            if op == "solve":
+                start = time.perf_counter()
+                row, cached = await self.submit(request.get("params") or {})
+                response.update(status="ok", cached=cached, seconds=time.perf_counter() - start,
+                                result=dict(row, scenario=request.get("name")))
+            elif op == "stats":
+                response.update(status="ok", stats=self.stats())
+            elif op == "ping":
+                response.update(status="ok")
+            else:
+                raise ValueError(f"Unbekannte Operation '{op}'. Verfügbar: {', '.join(SERVICE_OPERATIONS)}")
+        except Exception as e:
+            response.update(status="error", error=f"{type(e).__name__}: {e}")
+        return response
+
+    async def handle_connection(self, reader, writer):
+        """ Eine Verbindung: Aufträge zeilenweise nacheinander beantworten, bis der Client die Verbindung schließt. """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict): raise ValueError("Auftrag muss ein JSON-Objekt sein.")
+                except ValueError as e:
+                    response = {"status": "error", "error": f"Ungültiger Auftrag: {e}"}
+                else:
+                    response = await self.dispatch(request)
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass # Client hat die Verbindung abgebrochen; laufende Aufträge werden trotzdem fertig gelöst und gecacht
+        finally:
+            writer.close()
+
+
+async def serve(service, host="127.0.0.1", port=8765, socket_path=None):
+    """ Startet den Dienst und nimmt Verbindungen über TCP (host, port) oder einen Unix-Socket (socket_path) an. """
+    await service.start()
+    try:
+        if socket_path:
+            server = await asyncio.start_unix_server(service.handle_connection, path=socket_path)
+            address = socket_path
+        else:
+            server = await asyncio.start_server(service.handle_connection, host=host, port=port)
+            address = f"{host}:{port}"
+        print(f"Dienst bereit auf {address} ({service.num_workers} Worker, Warteschlange {service.queue_size}, "
+              f"Cache {service.cache.max_entries} Einträge).")
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+class ServiceClient:
+    """ Blockierender Client für einen laufenden Dienst (TCP oder Unix-Socket). """
+
+    def __init__(self, host="127.0.0.1", port=8765, socket_path=None, timeout=None):
+        if socket_path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM); self.sock.settimeout(timeout); self.sock.connect(socket_path)
+        else:
+            self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.stream = self.sock.makefile("rwb")
+
+    def request(self, request):
+        """ Sendet einen Auftrag (Dict) und liefert die Antwort (Dict). """
+        self.stream.write(json.dumps(request).encode("utf-8") + b"\n"); self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("Dienst hat die Verbindung geschlossen.")
+        return json.loads(line)
+
+    def solve(self, params=None, name=None):
+        """ Löst einen Parametersatz. Liefert die Antwort (result, cached, seconds); RuntimeError, falls der Dienst einen Fehler meldet. """
+        return _checked(self.request({"op": "solve", "name": name, "params": params or {}}))
+
+    def stats(self):
+        return _checked(self.request({"op": "stats"}))["stats"]
+
+    def close(self):
+        self.stream.close(); self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LocalClient:
+    """
+    Stellvertreter für ServiceClient ohne Netzwerk: startet einen SizingService mit eigener Ereignisschleife in einem
+    Hintergrund-Thread dieses Prozesses. Gleiche Methoden und Antworten wie ServiceClient (für Tests und Notebooks).
+    """
+
+    def __init__(self, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, **service_options):
+        self.service = SizingService(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, **service_options)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self._run(self.service.start())
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def request(self, request):
+        """ Beantwortet einen Auftrag (Dict) wie der Dienst, inklusive JSON-Umwandlung der Antwort. """
+        return json.loads(json.dumps(self._run(self.service.dispatch(request))))
+
+    def solve(self, params=None, name=None):
+        return _checked(self.request({"op": "solve", "name": name, "params": params or {}}))
+
+    def stats(self):
+        return _checked(self.request({"op": "stats"}))["stats"]
+
+    def close(self):
+        self._run(self.service.close())
+        self.loop.call_soon_threadsafe(self.loop.stop); self.thread.join()
+        self.loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _checked(response):
+    """ Antwort des Dienstes oder RuntimeError mit dessen Fehlermeldung. """
+    if response.get("status") != "ok":
+        raise RuntimeError(response.get("error", "Unbekannter Fehler des Dienstes."))
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--excel", default="Smard_Daten_Jahreswert.xlsx", help="Arbeitsmappe mit den Ertragsdaten")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", default=None, help="Unix-Socket statt TCP")
+    parser.add_argument("--workers", type=int, default=2, help="Anzahl Worker-Prozesse (je ein Modell im Speicher)")
+    parser.add_argument("--queue-size", type=int, default=64, help="Maximale Zahl wartender Aufträge")
+    parser.add_argument("--cache-size", type=int, default=256, help="Maximale Zahl gecachter Ergebnisse (0 = kein Cache)")
+    parser.add_argument("--backend", default="highspy" if highspy is not None else "highs", help="Solver-Backend (highspy: Warmstart je Worker)")
+    parser.add_argument("--method", default="simplex", help="simplex oder ipm")
+    parser.add_argument("--time-resolution-hours", type=float, default=0.25)
+    parser.add_argument("--no-cache", action="store_true", help="Arbeitsmappe ohne Cache lesen")
+    parser.add_argument("--prices", default=None, help="Reale Preise (Excel/CSV) für alle Aufträge statt fester Preise")
+    parser.add_argument("--price-column", default=None, help="Spalte der Preise (Standard: erste Spalte mit €/MWh)")
+    parser.add_argument("--import-surcharge", type=float, default=0.0, help="Aufschlag auf den Börsenpreis beim Netzbezug in €/MWh (Bezugspreis mindestens 0)")
+    parser.add_argument("--send", default=None, metavar="JSON", help="Als Client: Parametersatz an einen laufenden Dienst senden")
+    args = parser.parse_args()
+
+    if args.send is not None:
+        with ServiceClient(args.host, args.port, args.socket) as client:
+            response = client.solve(json.loads(args.send))
+        print(json.dumps(response, indent=2, ensure_ascii=False))
+        return
+
+    y_pv, y_wind, info = load_yield_profiles(args.excel, use_cache=not args.no_cache)
+    price_profiles = None
+    if args.prices:
+        import_price, export_price, _ = load_price_profiles(args.prices, info["num_rows"], args.time_resolution_hours, args.price_column,
+                                                            import_price_surcharge_eur_per_mwh=args.import_surcharge)
+        price_profiles = (import_price, export_price)
+    print(f"{info['num_rows']} Zeitschritte ({'Cache' if info['source'] == 'cache' else 'Excel'}), Solver: {args.backend}/{args.method}")
+    service = SizingService(y_pv, y_wind, args.time_resolution_hours, backend=args.backend, method=args.method, num_workers=args.workers,
+                            queue_size=args.queue_size, cache_size=args.cache_size, price_profiles=price_profiles)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        print("\nDienst beendet.")
+    finally:
+        if args.socket and os.path.exists(args.socket): os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Austauschbare Solver-Anbindung für LPs in Matrixform (siehe lp_matrix.MatrixLP).
+
+Backends:
+    "highs"   - HiGHS im Speicher über scipy.optimize.linprog (kein Umweg über LP/MPS-Dateien)
+    "highspy" - HiGHS direkt über das Paket 'highspy' (optional installiert)
+    "cbc"     - Fallback: Übergabe an PuLP/CBC (schreibt wie bisher eine temporäre LP/MPS-Datei)
+
+Alle Backends liefern ein LPSolution-Objekt mit dem Lösungsvektor und den Dualwerten der Nebenbedingungen
+als NumPy-Arrays (in einem Stück aus dem Solver übernommen) und einem Status-Text im Format von
+pulp.LpStatus ('Optimal', 'Infeasible', ...).
+
+Solver-Profile (SOLVER_PROFILES) fassen Einstellungen unter einem Namen zusammen (Verfahren, Threads, Zeitlimit,
+Presolve, Crossover, Toleranz) und werden je Backend übersetzt; Einstellungen, die ein Backend nicht kennt, werden mit
+einer Warnung ignoriert. LPSolution.stats enthält die Solver-Statistik (Iterationen, reine Solver-Zeit).
+"""
+import multiprocessing
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+
+try:
+    import highspy
+except ImportError:
+    highspy = None # Backend "highspy" nicht verfügbar, "highs" (über scipy) funktioniert trotzdem
+
+# Lösungsverfahren von HiGHS: duales Simplex oder Innere-Punkte-Verfahren (mit Crossover)
+SOLVER_METHODS = ("simplex", "ipm")
+
+# Benannte Solver-Profile (Name -> Einstellungen). Schlüssel: method ("simplex"/"ipm", überschreibt das Verfahren des Aufrufs),
+# threads, time_limit (s), presolve (bool), crossover (bool, nur "ipm"), optimality_tolerance (Abbruchtoleranz des IPM)
+SOLVER_PROFILES = {
+    "default": {},
+    "dual_simplex": {"method": "simplex"},
+    "barrier": {"method": "ipm", "crossover": True},
+    "barrier_no_crossover": {"method": "ipm", "crossover": False}, # Lösung im Inneren statt Ecke, ohne Basis
+    "barrier_fast": {"method": "ipm", "crossover": False, "optimality_tolerance": 1e-6},
+    "no_presolve": {"presolve": False},
+    "time_limited": {"time_limit": 300},
+}
+
+
+@dataclass
+class LPSolution:
+    """ Ergebnis eines LP-Solver-Laufs. """
+    status: str          # 'Optimal', 'Infeasible', 'Unbounded', 'Not Solved' oder 'Undefined'
+    objective: float     # Zielwert (np.inf, falls nicht optimal)
+    x: np.ndarray        # Primale Lösung (Reihenfolge wie lp.c)
+    backend: str
+    method: str
+    solve_seconds: float
+    row_duals: np.ndarray = None # Dualwerte (d Zielwert / d rechte Seite), Zeilen von A_eq, dann A_ub (wie lp_row_form)
+    stats: dict = None           # Solver-Statistik (Iterationen, solver_seconds = Zeit im Solver ohne Modellübergabe), je Backend verschieden
+
+
+def lp_row_form(lp):
+    """ Fasst A_eq und A_ub zu einer Matrix mit Zeilengrenzen zusammen (row_lower <= A @ x <= row_upper). """
+    A = sp.vstack([lp.A_eq, lp.A_ub], format="csr")
+    row_lower = np.concatenate([lp.b_eq, np.full(len(lp.b_ub), -np.inf)])
+    row_upper = np.concatenate([lp.b_eq, lp.b_ub])
+    return A, row_lower, row_upper
+
+
+def process_pool_context():
+    """
+    Startmethode für Prozess-Pools: 'fork' (Worker erben Modul und Daten ohne Neuimport), sonst 'spawn'.
+    Mit 'spawn' importiert jeder Worker das Hauptmodul neu; aufrufende Skripte brauchen daher einen __main__-Schutz.
+    """
+    return multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+def resolve_profile(profile):
+    """ Einstellungen eines Profils (Name aus SOLVER_PROFILES, Dict oder None = "default"). """
+    if profile is None: return {}
+    if isinstance(profile, dict): return dict(profile)
+    if profile not in SOLVER_PROFILES:
+        raise ValueError(f"Unbekanntes Solver-Profil '{profile}'. Verfügbar: {', '.join(SOLVER_PROFILES)}")
+    return dict(SOLVER_PROFILES[profile])
+
+
+def _warn_unsupported(options, supported, backend):
+    ignored = sorted(set(options) - set(supported))
+    if ignored:
+        print(f"WARNUNG: Einstellungen {', '.join(ignored)} werden vom Backend '{backend}' ignoriert.")
+
+
+def _solve_scipy_highs(lp, method, msg, options):
+    from scipy.optimize import linprog
+    _warn_unsupported(options, ("time_limit", "presolve", "optimality_tolerance"), "highs")
+    scipy_method = {"simplex": "highs-ds", "ipm": "highs-ipm"}.get(method, "highs")
+    scipy_options = {"disp": msg}
+    if "time_limit" in options: scipy_options["time_limit"] = options["time_limit"]
+    if "presolve" in options: scipy_options["presolve"] = bool(options["presolve"])
+    if "optimality_tolerance" in options: scipy_options["ipm_optimality_tolerance"] = options["optimality_tolerance"]
+    res = linprog(lp.c, A_ub=lp.A_ub, b_ub=lp.b_ub, A_eq=lp.A_eq, b_eq=lp.b_eq, bounds=lp.bounds,
+                  method=scipy_method, options=scipy_options)
+    status = {0: "Optimal", 2: "Infeasible", 3: "Unbounded"}.get(res.status, "Not Solved")
+    x = res.x if res.x is not None else np.full(lp.num_variables, np.nan)
+    duals = None
+    if status == "Optimal":
+        duals = np.concatenate([res.eqlin.marginals if len(lp.b_eq) else [], res.ineqlin.marginals if len(lp.b_ub) else []])
+    return status, (res.fun if status == "Optimal" else np.inf), x, duals, {"iterations": int(getattr(res, "nit", 0) or 0)}
+
+
+def create_highs(lp, method=None, msg=False, options=None):
+    """
+    Übergibt ein Matrix-LP an eine neue HiGHS-Instanz (highspy), z.B. um es mit geänderten Koeffizienten erneut zu lösen.
+    options: Einstellungen eines Solver-Profils (siehe SOLVER_PROFILES).
+    """
+    if highspy is None:
+        raise ImportError("Backend 'highspy' benötigt das Paket 'highspy' (pip install highspy).")
+    A, row_lower, row_upper = lp_row_form(lp)
+    A = A.tocsc()
+    model = highspy.HighsLp()
+    model.num_col_ = lp.num_variables; model.num_row_ = A.shape[0]
+    model.col_cost_ = lp.c; model.col_lower_ = lp.lb; model.col_upper_ = lp.ub
+    model.row_lower_ = row_lower; model.row_upper_ = row_upper
+    model.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    model.a_matrix_.num_col_ = lp.num_variables; model.a_matrix_.num_row_ = A.shape[0]
+    model.a_matrix_.start_ = A.indptr; model.a_matrix_.index_ = A.indices; model.a_matrix_.value_ = A.data
+
+    h = highspy.Highs()
+    h.setOptionValue("output_flag", bool(msg))
+    if method in SOLVER_METHODS: h.setOptionValue("solver", method)
+    options = options or {}
+    if "threads" in options: h.setOptionValue("threads", int(options["threads"]))
+    if "time_limit" in options: h.setOptionValue("time_limit", float(options["time_limit"]))
+    if "presolve" in options: h.setOptionValue("presolve", "on" if options["presolve"] else "off")
+    if "crossover" in options: h.setOptionValue("run_crossover", "on" if options["crossover"] else "off")
+    if "optimality_tolerance" in options: h.setOptionValue("ipm_optimality_tolerance", float(options["optimality_tolerance"]))
+    h.passModel(model)
+    return h
+
+
+def highs_result(h):
+    """ (status, objective, x, row_duals) einer gelösten HiGHS-Instanz. """
+    model_status = h.getModelStatus()
+    status = {highspy.HighsModelStatus.kOptimal: "Optimal", highspy.HighsModelStatus.kInfeasible: "Infeasible",
+              highspy.HighsModelStatus.kUnbounded: "Unbounded"}.get(model_status, "Not Solved")
+    highs_solution = h.getSolution()
+    x = np.array(highs_solution.col_value)
+    duals = np.array(highs_solution.row_dual) if status == "Optimal" and highs_solution.dual_valid else None
+    return status, (h.getInfo().objective_function_value if status == "Optimal" else np.inf), x, duals
+
+
+def highs_statistics(h):
+    """ Solver-Statistik einer gelösten HiGHS-Instanz: Iterationen je Verfahren und reine Solver-Zeit. """
+    info = h.getInfo()
+    return {"simplex_iterations": int(info.simplex_iteration_count), "ipm_iterations": int(info.ipm_iteration_count),
+            "crossover_iterations": int(info.crossover_iteration_count), "solver_seconds": float(h.getRunTime())}
+
+
+def _solve_highspy(lp, method, msg, options):
+    _warn_unsupported(options, ("threads", "time_limit", "presolve", "crossover", "optimality_tolerance"), "highspy")
+    h = create_highs(lp, method=method, msg=msg, options=options)
+    h.run()
+    return (*highs_result(h), highs_statistics(h))
+
+
+def _solve_pulp_cbc(lp, method, msg, options):
+    """ Überträgt das Matrix-LP in ein PuLP-Modell und löst es mit CBC (bisheriger Weg über LP/MPS-Datei). """
+    import pulp
+    _warn_unsupported(options, ("threads", "time_limit", "presolve", "crossover"), "cbc")
+    names = [None] * lp.num_variables
+    for group, s in lp.variable_slices.items():
+        for k, idx in enumerate(range(s.start, s.stop)):
+            names[idx] = group if s.stop - s.start == 1 else f"{group}_{k}"
+    variables = [pulp.LpVariable(name, lowBound=lo, upBound=(None if np.isinf(up) else up)) for name, lo, up in zip(names, lp.lb, lp.ub)]
+    model = pulp.LpProblem("Renewable_Energy_System_Optimization", pulp.LpMinimize)
+    model += pulp.LpAffineExpression([(variables[j], cj) for j, cj in enumerate(lp.c) if cj != 0]), "Total_Annualized_System_Cost"
+    constraints = []
+    for A, b, sense, prefix in ((lp.A_eq.tocsr(), lp.b_eq, pulp.LpConstraintEQ, "eq"), (lp.A_ub.tocsr(), lp.b_ub, pulp.LpConstraintLE, "ub")):
+        for i in range(A.shape[0]):
+            row = slice(A.indptr[i], A.indptr[i + 1])
+            expr = pulp.LpAffineExpression([(variables[j], a) for j, a in zip(A.indices[row], A.data[row])])
+            constraints.append(pulp.LpConstraint(expr, sense, rhs=b[i]))
+            model.addConstraint(constraints[-1], name=f"{prefix}_{i}")
+    cbc_options = []
+    if method == "ipm": cbc_options.append("barrier") # CLP-Barrier statt Simplex
+    if options.get("crossover") is False: cbc_options.append("crossover off")
+    model.solve(pulp.PULP_CBC_CMD(msg=msg, threads=options.get("threads"), timeLimit=options.get("time_limit"),
+                                  presolve=options.get("presolve"), options=cbc_options))
+    status = pulp.LpStatus[model.status]
+    x = np.array([v.varValue if v.varValue is not None else np.nan for v in variables])
+    duals = np.array([c.pi if c.pi is not None else np.nan for c in constraints]) if status == "Optimal" else None
+    return status, (pulp.value(model.objective) if status == "Optimal" else np.inf), x, duals, {"solver_seconds": float(model.solutionTime)}
+
+
+# Registrierte Backends (Name -> Funktion(lp, method, msg, options) -> (status, objective, x, row_duals, stats))
+SOLVER_BACKENDS = {
+    "highs": _solve_scipy_highs,
+    "highspy": _solve_highspy,
+    "cbc": _solve_pulp_cbc,
+}
+
+
+def solve_lp(lp, backend="highs", method="simplex", msg=False, profile=None):
+    """
+    Löst ein LP in Matrixform mit dem gewählten Backend und liefert ein LPSolution-Objekt.
+    profile: Name aus SOLVER_PROFILES oder Dict mit Einstellungen (None = Standardeinstellungen des Solvers).
+    """
+    options = resolve_profile(profile)
+    method = options.pop("method", method)
+    if backend not in SOLVER_BACKENDS:
+        raise ValueError(f"Unbekanntes Solver-Backend '{backend}'. Verfügbar: {', '.join(SOLVER_BACKENDS)}")
+    if method not in SOLVER_METHODS:
+        raise ValueError(f"Unbekanntes Lösungsverfahren '{method}'. Verfügbar: {', '.join(SOLVER_METHODS)}")
+    start = time.perf_counter()
+    status, objective, x, row_duals, stats = SOLVER_BACKENDS[backend](lp, method, msg, options)
+    return LPSolution(status=status, objective=objective, x=np.asarray(x, dtype=float), backend=backend,
+                      method=method, solve_seconds=time.perf_counter() - start, row_duals=row_duals, stats=stats)
+
+
+def compare_profiles(lp, profiles, backend="highspy", reference=None):
+    """
+    Löst dasselbe LP nacheinander mit mehreren Solver-Profilen. Liefert je Profil ein Dict (Profil, Status, Zielwert,
+    Abweichung zum ersten optimalen bzw. reference-Zielwert, Rechenzeit und Solver-Statistik) für eine Vergleichstabelle.
+    """
+    rows = []
+    for profile in profiles:
+        solution = solve_lp(lp, backend=backend, profile=profile)
+        if reference is None and solution.status == "Optimal": reference = solution.objective
+        rows.append({"profile": profile if isinstance(profile, str) else str(profile), "method": solution.method, "status": solution.status,
+                     "objective": solution.objective, "deviation": (solution.objective - reference) / abs(reference) if reference else np.nan,
+                     "seconds": solution.solve_seconds, **(solution.stats or {})})
+    return rows
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Zweistufige stochastische Auslegung über mehrere Wetterjahre.
+
+Stufe 1 sind die vier Kapazitäten (für alle Jahre gleich), Stufe 2 der Betrieb je Wetterjahr mit dessen eigenen
+Profilen und eigener Länge (z.B. 365 und 366 Tage) und eigenem zyklischen SoC. Zielfunktion:
+
+    annualisierte Kapazitätskosten + sum_j p_j * Betriebskosten_j      (p_j: Wahrscheinlichkeit des Jahres, Summe 1)
+
+build_stochastic_sizing_lp baut das Gesamtmodell (ein Betriebsblock je Jahr, gemeinsame Kapazitätsspalten; Namen
+"<Jahr>:<Gruppe>" wie im Netzmodell). solve_stochastic_sizing löst es als Ganzes oder zerlegt
+(benders_decomposition.benders_scenario_sizing): jedes Jahr bzw. jedes Fenster eines Jahres ist ein eigenes
+Betriebs-LP, das in den Worker-Prozessen aufgebaut und parallel gelöst wird. Ergebnis sind die Kapazitäten, die
+erwarteten Kosten und die Kosten je Jahr bei diesen Kapazitäten (Streuung über die Jahre).
+"""
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from benders_decomposition import benders_scenario_sizing
+from lp_matrix import CAPACITY_VARIABLES, MatrixLP, build_sizing_lp, set_grid_connection_limit
+from solver_backend import highspy, solve_lp
+
+NUM_CAPACITIES = len(CAPACITY_VARIABLES)
+
+
+@dataclass
+class WeatherYear:
+    """ Profile eines Wetterjahres (Länge beliebig, z.B. 35040 oder 35136 Viertelstunden). """
+    name: str
+    specific_yield_pv_mwh_per_mw: np.ndarray
+    specific_yield_wind_mwh_per_mw: np.ndarray
+    demand_profile_mwh: np.ndarray
+    feed_in_tariff_profile_eur_per_mwh: np.ndarray
+    grid_purchase_price_eur_per_mwh: np.ndarray # Profil oder Skalar
+    probability: float = None # None = gleiche Wahrscheinlichkeit für alle Jahre ohne Angabe
+
+    def __post_init__(self):
+        self.name = str(self.name)
+        num_timesteps = len(self.specific_yield_pv_mwh_per_mw)
+        for label in ("specific_yield_wind_mwh_per_mw", "demand_profile_mwh", "feed_in_tariff_profile_eur_per_mwh", "grid_purchase_price_eur_per_mwh"):
+            length = np.size(getattr(self, label))
+            if length not in (1, num_timesteps):
+                raise ValueError(f"Wetterjahr '{self.name}': {label} hat {length} Werte, erwartet {num_timesteps}.")
+
+    @property
+    def num_timesteps(self):
+        return len(self.specific_yield_pv_mwh_per_mw)
+
+    @property
+    def profiles(self):
+        """ (PV-Ertrag, Wind-Ertrag, Bedarf, Einspeisevergütung, Netzbezugspreis) in der Reihenfolge von build_sizing_lp. """
+        return (self.specific_yield_pv_mwh_per_mw, self.specific_yield_wind_mwh_per_mw, self.demand_profile_mwh,
+                self.feed_in_tariff_profile_eur_per_mwh, self.grid_purchase_price_eur_per_mwh)
+
+
+def year_probabilities(years):
+    """ Wahrscheinlichkeiten der Jahre (Summe 1): Jahre ohne Angabe teilen sich gleichmäßig den Rest. """
+    given = np.array([year.probability if year.probability is not None else np.nan for year in years], dtype=float)
+    if len(set(year.name for year in years)) != len(years):
+        raise ValueError("Namen der Wetterjahre müssen eindeutig sein.")
+    if np.any(given[~np.isnan(given)] <= 0) or np.nansum(given) > 1 + 1e-9:
+        raise ValueError(f"Ungültige Wahrscheinlichkeiten der Wetterjahre: {given}")
+    missing = np.isnan(given)
+    if missing.any():
+        given[missing] = (1 - np.nansum(given)) / missing.sum()
+        if np.any(given[missing] <= 0):
+            raise ValueError("Angegebene Wahrscheinlichkeiten summieren sich zu 1, es bleibt nichts für die übrigen Jahre.")
+    return given / given.sum()
+
+
+def build_stochastic_sizing_lp(years, capacity_costs, charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv,
+                               battery_soc_min_percent, time_resolution_hours, grid_connection_limit_mw=None):
+    """
+    Gesamtmodell über alle Wetterjahre: gemeinsame Kapazitätsspalten (CAPACITY_VARIABLES), danach je Jahr dessen
+    Betriebsvariablen ("<Jahr>:<Gruppe>") und Nebenbedingungen ("<Jahr>:<Zeilengruppe>") als Blockdiagonale.
+    Betriebskosten je Jahr mit der Wahrscheinlichkeit gewichtet; num_timesteps = Summe über alle Jahre.
+    """
+    probabilities = year_probabilities(years)
+    year_lps = []
+    for year, probability in zip(years, probabilities):
+        lp = build_sizing_lp(*year.profiles, np.zeros(NUM_CAPACITIES), charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv,
+                             battery_soc_min_percent, time_resolution_hours)
+        set_grid_connection_limit(lp, grid_connection_limit_mw, time_resolution_hours)
+        lp.c *= probability
+        year_lps.append(lp)
+
+    variable_slices = {name: slice(k, k + 1) for k, name in enumerate(CAPACITY_VARIABLES)}
+    eq_row_slices = {}; ub_row_slices = {}
+    col_offset = NUM_CAPACITIES; eq_offset = ub_offset = 0
+    for year, lp in zip(years, year_lps):
+        for name, s in lp.variable_slices.items():
+            if name not in CAPACITY_VARIABLES:
+                variable_slices[f"{year.name}:{name}"] = slice(s.start - NUM_CAPACITIES + col_offset, s.stop - NUM_CAPACITIES + col_offset)
+        eq_row_slices.update({f"{year.name}:{name}": slice(s.start + eq_offset, s.stop + eq_offset) for name, s in lp.eq_row_slices.items()})
+        ub_row_slices.update({f"{year.name}:{name}": slice(s.start + ub_offset, s.stop + ub_offset) for name, s in lp.ub_row_slices.items()})
+        col_offset += lp.num_variables - NUM_CAPACITIES; eq_offset += lp.A_eq.shape[0]; ub_offset += lp.A_ub.shape[0]
+
+    def stack(matrices):
+        """ Kapazitätsspalten untereinander, Betriebsspalten blockdiagonal. """
+        shared = sp.vstack([A[:, :NUM_CAPACITIES] for A in matrices], format="csr")
+        blocks = sp.block_diag([A[:, NUM_CAPACITIES:] for A in matrices], format="csr")
+        return sp.hstack([shared, blocks], format="csr")
+
+    return MatrixLP(c=np.concatenate([np.asarray(capacity_costs, dtype=float)] + [lp.c[NUM_CAPACITIES:] for lp in year_lps]),
+                    A_ub=stack([lp.A_ub for lp in year_lps]), b_ub=np.concatenate([lp.b_ub for lp in year_lps]),
+                    A_eq=stack([lp.A_eq for lp in year_lps]), b_eq=np.concatenate([lp.b_eq for lp in year_lps]),
+                    lb=np.concatenate([np.zeros(NUM_CAPACITIES)] + [lp.lb[NUM_CAPACITIES:] for lp in year_lps]),
+                    ub=np.concatenate([np.full(NUM_CAPACITIES, np.inf)] + [lp.ub[NUM_CAPACITIES:] for lp in year_lps]),
+                    num_timesteps=sum(year.num_timesteps for year in years),
+                    variable_slices=variable_slices, ub_row_slices=ub_row_slices, eq_row_slices=eq_row_slices)
+
+
+def year_solution(lp, x, year):
+    """ Lösung eines Jahres aus dem Gesamtmodell in der Variablenreihenfolge von build_sizing_lp (Kapazitäten + Betrieb des Jahres). """
+    first = lp.variable_slices[f"{year.name}:grid_import"].start
+    last = lp.variable_slices[f"{year.name}:battery_soc"].stop
+    return np.concatenate([x[:NUM_CAPACITIES], x[first:last]])
+
+
+@dataclass
+class StochasticSizingResult:
+    """ Ergebnis der stochastischen Auslegung. """
+    status: str
+    capacities: pd.Series      # Gemeinsame Kapazitäten (Index: CAPACITY_VARIABLES)
+    expected_cost: float       # Kapazitätskosten + erwartete Betriebskosten (Zielwert)
+    year_costs: pd.DataFrame   # Je Jahr: Wahrscheinlichkeit, Zeitschritte, Betriebskosten, Gesamtkosten
+    x: dict                    # Jahr -> Lösung in der Variablenreihenfolge von build_sizing_lp (für LPResult/Auswertung)
+    solve_seconds: float
+    history: list = None       # Verlauf der Zerlegung (nur decompose=True)
+
+    def cost_spread(self):
+        """ Streuung der Gesamtkosten über die Jahre: Erwartungswert, Minimum, Maximum, Spannweite, Standardabweichung (gewichtet). """
+        total = self.year_costs["total_cost_eur"]; p = self.year_costs["probability"]
+        mean = float((p * total).sum())
+        return pd.Series({"expected_eur": mean, "min_eur": total.min(), "max_eur": total.max(), "range_eur": total.max() - total.min(),
+                          "std_eur": float(np.sqrt((p * (total - mean) ** 2).sum())), "worst_year": total.idxmax()})
+
+
+def solve_stochastic_sizing(years, capacity_costs, charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent,
+                            time_resolution_hours, grid_connection_limit_mw=None, decompose=False, window_steps=None,
+                            backend=None, method="simplex", num_workers=None, msg=False, **benders_options):
+    """
+    Löst die stochastische Auslegung über die Wetterjahre years.
+    decompose=False: Gesamtmodell (build_stochastic_sizing_lp) in einem Solver-Lauf.
+    decompose=True: Benders-Zerlegung mit je einem Betriebs-LP pro Jahr (bzw. pro Fenster von window_steps Zeitschritten),
+    parallel auf num_workers Prozessen; weitere Optionen (tolerance, max_iterations, ...) wie benders_scenario_sizing.
+    """
+    backend = backend or ("highspy" if highspy is not None else "highs")
+    probabilities = year_probabilities(years)
+    capacity_costs = np.asarray(capacity_costs, dtype=float)
+    start = time.perf_counter()
+    history = None
+    if decompose:
+        result = benders_scenario_sizing([year.profiles for year in years], probabilities, capacity_costs,
+                                         charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                                         window_steps or max(year.num_timesteps for year in years), grid_connection_limit_mw=grid_connection_limit_mw,
+                                         backend=backend, method=method, num_workers=num_workers, **benders_options)
+        status, capacities, objective, history = result.status, result.capacities, result.objective, result.history
+        operating_costs = result.operating_costs
+        x = {year.name: year_x for year, year_x in zip(years, result.x)}
+    else:
+        lp = build_stochastic_sizing_lp(years, capacity_costs, charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv,
+                                        battery_soc_min_percent, time_resolution_hours, grid_connection_limit_mw)
+        solution = solve_lp(lp, backend=backend, method=method, msg=msg)
+        status, objective = solution.status, solution.objective
+        capacities = solution.x[:NUM_CAPACITIES]
+        x = {year.name: year_solution(lp, solution.x, year) for year in years}
+        operating_costs = []
+        for year, probability in zip(years, probabilities):
+            first = lp.variable_slices[f"{year.name}:grid_import"].start; last = lp.variable_slices[f"{year.name}:battery_soc"].stop
+            operating_costs.append(float(lp.c[first:last] @ solution.x[first:last]) / probability)
+
+    capacity_cost = float(capacity_costs @ capacities)
+    year_costs = pd.DataFrame({"probability": probabilities, "num_timesteps": [year.num_timesteps for year in years],
+                               "operating_cost_eur": operating_costs, "total_cost_eur": capacity_cost + np.asarray(operating_costs)},
+                              index=pd.Index([year.name for year in years], name="year"))
+    return StochasticSizingResult(status=status, capacities=pd.Series(capacities, index=list(CAPACITY_VARIABLES)), expected_cost=objective,
+                                  year_costs=year_costs, x=x, solve_seconds=time.perf_counter() - start, history=history)
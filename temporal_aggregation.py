@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+Zeitliche Aggregation für die Auslegung: typische Perioden (Tage/Wochen) statt voller 15-Minuten-Auflösung.
+
+Ablauf:
+    1. cluster_periods: Das Jahr wird in Perioden gleicher Länge zerlegt; die Perioden werden anhand ihrer
+       (normierten) PV-, Wind-, Bedarfs- und Vergütungsprofile zu k typischen Perioden gruppiert
+       (k-Medoids: typische Periode = realer Tag/Woche, k-Means: Mittelwert der Gruppe).
+    2. build_aggregated_sizing_lp: Auslegungs-LP nur über die k typischen Perioden; Netzkosten/-erlöse werden
+       mit der Häufigkeit der Gruppe gewichtet. Der Speicher wird über alle Perioden in ihrer echten Reihenfolge
+       verknüpft (Inter-Perioden-SoC nach Kotzur et al. 2018): SoC = SoC_inter[Periode] + SoC_intra[typische Periode],
+       die SoC-Grenzen werden über Minimum/Maximum des Intra-SoC je typischer Periode eingehalten.
+    3. full_resolution_dispatch: Betrieb in voller Auflösung mit den aggregiert bestimmten Kapazitäten
+       (als ein LP oder rollierend in Fenstern, siehe rolling_horizon.py).
+    4. aggregation_error_report: Abweichung von Kapazitäten und Zielwert gegenüber der Vollauflösung.
+
+Zeitschritte am Ende, die keine ganze Periode ergeben, gehen nicht in das Clustering ein; die Gewichte
+werden so skaliert, dass die gewichtete Dauer wieder dem ganzen Betrachtungszeitraum entspricht.
+"""
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.spatial.distance import cdist
+
+from lp_matrix import CAPACITY_VARIABLES, OPERATION_VARIABLES, MatrixLP, build_operational_lp, operational_balance_rhs
+from rolling_horizon import rolling_horizon_dispatch
+from solver_backend import LPSolution, solve_lp
+
+CLUSTER_METHODS = ("kmedoids", "kmeans")
+
+# Variablengruppen des aggregierten LP (zusätzlich zu den Kapazitäten); Betriebsvariablen je typischem Zeitschritt (k*S)
+AGGREGATED_VARIABLES = ("grid_import", "grid_export", "curtailment", "battery_charge", "battery_discharge",
+                        "battery_soc_intra", "battery_soc_intra_max", "battery_soc_intra_min", "battery_soc_inter")
+
+
+@dataclass
+class PeriodClustering:
+    """ Ergebnis des Clusterings: Zuordnung jeder Periode zu einer typischen Periode und deren Gewichte. """
+    steps_per_period: int
+    num_timesteps: int         # Länge der Original-Zeitreihen
+    assignment: np.ndarray     # (Anzahl Perioden,) Index der typischen Periode je Periode
+    weights: np.ndarray        # (k,) gewichtete Anzahl Perioden je typischer Periode
+    medoids: np.ndarray        # (k,) Index der realen Periode je typischer Periode (nur k-Medoids, sonst None)
+    method: str
+
+    @property
+    def num_clusters(self):
+        return len(self.weights)
+
+    @property
+    def num_periods(self):
+        return len(self.assignment)
+
+    def aggregate(self, profile):
+        """ Typische Profile einer Zeitreihe, hintereinander (Länge k*S): Medoid-Periode bzw. Mittelwert der Gruppe. """
+        periods = self._periods(profile)
+        if self.medoids is not None:
+            return periods[self.medoids].ravel()
+        sums = np.zeros((self.num_clusters, self.steps_per_period))
+        np.add.at(sums, self.assignment, periods)
+        return (sums / np.bincount(self.assignment, minlength=self.num_clusters)[:, None]).ravel()
+
+    def expand(self, aggregated_profile):
+        """ Rekonstruiert aus typischen Profilen die Zeitreihe über alle ganzen Perioden (für Fehlermaße). """
+        return np.asarray(aggregated_profile).reshape(self.num_clusters, self.steps_per_period)[self.assignment].ravel()
+
+    def profile_rmse(self, profile):
+        """ Wurzel der mittleren quadratischen Abweichung zwischen Original und rekonstruierter Zeitreihe. """
+        original = self._periods(profile).ravel()
+        return float(np.sqrt(np.mean((original - self.expand(self.aggregate(profile))) ** 2)))
+
+    def _periods(self, profile):
+        profile = np.broadcast_to(np.asarray(profile, dtype=float), (self.num_timesteps,))
+        return profile[:self.num_periods * self.steps_per_period].reshape(self.num_periods, self.steps_per_period)
+
+
+def _initial_centers(features, num_clusters, rng):
+    """ k-Means++-Startwerte: Perioden mit Wahrscheinlichkeit proportional zur quadrierten Distanz wählen. """
+    centers = [rng.integers(len(features))]
+    dist = np.sum((features - features[centers[0]]) ** 2, axis=1)
+    for _ in range(1, num_clusters):
+        if dist.sum() > 0:
+            centers.append(rng.choice(len(features), p=dist / dist.sum()))
+        else: # Alle übrigen Perioden fallen mit einem Zentrum zusammen: unter den noch nicht gewählten ziehen
+            centers.append(rng.choice(np.setdiff1d(np.arange(len(features)), centers)))
+        dist = np.minimum(dist, np.sum((features - features[centers[-1]]) ** 2, axis=1))
+    return np.array(centers)
+
+
+def _kmeans(features, num_clusters, rng, max_iterations=100):
+    centers = features[_initial_centers(features, num_clusters, rng)].copy()
+    assignment = None
+    for _ in range(max_iterations):
+        dist = cdist(features, centers, "sqeuclidean") # (Perioden, k), ohne (Perioden, k, Merkmale)-Zwischenarray
+        new_assignment = np.argmin(dist, axis=1)
+        if assignment is not None and np.array_equal(new_assignment, assignment):
+            break
+        assignment = new_assignment
+        for c in range(num_clusters):
+            members = assignment == c
+            if members.any():
+                centers[c] = features[members].mean(axis=0)
+            else: # Leere Gruppe: Periode mit der größten Distanz zu ihrem Zentrum übernehmen
+                far = np.argmax(dist[np.arange(len(features)), assignment])
+                centers[c] = features[far]; assignment[far] = c
+    return assignment, None
+
+
+def _kmedoids(features, num_clusters, rng, max_iterations=100):
+    dist = cdist(features, features, "sqeuclidean") # (Perioden, Perioden), ohne (Perioden, Perioden, Merkmale)-Zwischenarray
+    medoids = _initial_centers(features, num_clusters, rng)
+    for _ in range(max_iterations):
+        assignment = np.argmin(dist[:, medoids], axis=1)
+        assignment[medoids] = np.arange(num_clusters) # Medoid gehört immer zu seiner eigenen Gruppe
+        new_medoids = medoids.copy()
+        for c in range(num_clusters):
+            members = np.flatnonzero(assignment == c)
+            if members.size:
+                new_medoids[c] = members[np.argmin(dist[np.ix_(members, members)].sum(axis=1))]
+            else: # Leere Gruppe: Periode mit der größten Distanz zu ihrem Medoid übernehmen
+                far = np.argmax(dist[np.arange(len(features)), medoids[assignment]])
+                new_medoids[c] = far; assignment[far] = c
+        if np.array_equal(new_medoids, medoids):
+            break
+        medoids = new_medoids
+    assignment = np.argmin(dist[:, medoids], axis=1)
+    assignment[medoids] = np.arange(num_clusters)
+    return assignment, medoids
+
+
+def cluster_periods(profiles, steps_per_period, num_clusters, method="kmedoids", seed=0):
+    """
+    Gruppiert die Perioden (je steps_per_period Zeitschritte) der Zeitreihen in profiles (Liste gleich langer Arrays)
+    zu num_clusters typischen Perioden. Jede Zeitreihe wird vorher auf ihren Wertebereich normiert.
+    """
+    if method not in CLUSTER_METHODS:
+        raise ValueError(f"Unbekanntes Clustering-Verfahren '{method}'. Verfügbar: {', '.join(CLUSTER_METHODS)}")
+    profiles = [np.asarray(p, dtype=float) for p in profiles]
+    num_timesteps = len(profiles[0])
+    num_periods = num_timesteps // steps_per_period
+    if not 1 <= num_clusters <= num_periods:
+        raise ValueError(f"Anzahl typischer Perioden muss zwischen 1 und {num_periods} liegen (angegeben: {num_clusters}).")
+    features = []
+    for p in profiles:
+        periods = p[:num_periods * steps_per_period].reshape(num_periods, steps_per_period)
+        value_range = np.ptp(periods)
+        features.append((periods - periods.min()) / value_range if value_range > 0 else np.zeros_like(periods)) # Konstante Reihen tragen nichts bei
+    features = np.hstack(features)
+
+    rng = np.random.default_rng(seed)
+    assignment, medoids = (_kmedoids if method == "kmedoids" else _kmeans)(features, num_clusters, rng)
+    weights = np.bincount(assignment, minlength=num_clusters) * (num_timesteps / (num_periods * steps_per_period))
+    return PeriodClustering(steps_per_period=steps_per_period, num_timesteps=num_timesteps, assignment=assignment,
+                            weights=weights, medoids=medoids, method=method)
+
+
+def aggregated_variable_layout(num_clusters, steps_per_period, num_periods):
+    """ Index-Bereiche der Variablengruppen des aggregierten LP und Gesamtzahl der Variablen. """
+    lengths = {"battery_soc_intra": num_clusters * (steps_per_period + 1), "battery_soc_intra_max": num_clusters,
+               "battery_soc_intra_min": num_clusters, "battery_soc_inter": num_periods + 1}
+    slices = {name: slice(k, k + 1) for k, name in enumerate(CAPACITY_VARIABLES)}
+    offset = len(CAPACITY_VARIABLES)
+    for name in AGGREGATED_VARIABLES:
+        length = lengths.get(name, num_clusters * steps_per_period)
+        slices[name] = slice(offset, offset + length)
+        offset += length
+    return slices, offset
+
+
+def build_aggregated_sizing_lp(clustering, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                               feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh, capacity_costs,
+                               charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv,
+                               battery_soc_min_percent, time_resolution_hours):
+    """ Baut das Auslegungs-LP über die typischen Perioden (gewichtete Kosten, Inter-Perioden-SoC) vektorisiert auf. """
+    K, S, P = clustering.num_clusters, clustering.steps_per_period, clustering.num_periods
+    T = K * S # Zeitschritte des aggregierten Modells
+    y_pv = clustering.aggregate(specific_yield_pv_mwh_per_mw); y_wind = clustering.aggregate(specific_yield_wind_mwh_per_mw)
+    demand = clustering.aggregate(demand_profile_mwh); tariff = clustering.aggregate(feed_in_tariff_profile_eur_per_mwh)
+    price = clustering.aggregate(grid_purchase_price_eur_per_mwh)
+    slices, num_variables = aggregated_variable_layout(K, S, P)
+    col = {name: s.start for name, s in slices.items()}
+    ts = np.arange(T)
+    cluster_of_step = ts // S
+    intra = col["battery_soc_intra"] + cluster_of_step * (S + 1) + ts % S # Intra-SoC am Anfang jedes Zeitschritts
+    periods = np.arange(P)
+
+    # --- Gleichungen: Energiebilanz (T), Intra-SoC-Update (T), Inter-SoC-Update (P), zyklischer SoC (1) ---
+    pv_nz = np.flatnonzero(y_pv); wind_nz = np.flatnonzero(y_wind)
+    bal_rows = np.concatenate([pv_nz, wind_nz] + [ts] * 5)
+    bal_cols = np.concatenate([
+        np.full(len(pv_nz), col["pv_capacity_mw"]), np.full(len(wind_nz), col["wind_capacity_mw"]),
+        col["grid_import"] + ts, col["battery_discharge"] + ts,
+        col["grid_export"] + ts, col["curtailment"] + ts, col["battery_charge"] + ts])
+    bal_data = np.concatenate([y_pv[pv_nz], y_wind[wind_nz], np.ones(2 * T), -np.ones(3 * T)])
+    # Intra-SoC: SoC_intra[s+1] - SoC_intra[s] - Ladung*sqrt(eff) + Entladung/sqrt(eff) = 0
+    soc_rows = T + np.concatenate([ts] * 4)
+    soc_cols = np.concatenate([intra + 1, intra, col["battery_charge"] + ts, col["battery_discharge"] + ts])
+    soc_data = np.concatenate([np.ones(T), -np.ones(T), np.full(T, -charge_discharge_eff_sqrt), np.full(T, charge_discharge_eff_sqrt_inv)])
+    # Inter-SoC: SoC_inter[p+1] - SoC_inter[p] - SoC_intra[typische Periode von p, Ende] = 0
+    intra_end = col["battery_soc_intra"] + clustering.assignment * (S + 1) + S
+    inter_rows = 2 * T + np.concatenate([periods] * 3)
+    inter_cols = np.concatenate([col["battery_soc_inter"] + periods + 1, col["battery_soc_inter"] + periods, intra_end])
+    inter_data = np.concatenate([np.ones(P), -np.ones(P), -np.ones(P)])
+    # Zyklisch: SoC_inter[P] - SoC_inter[0] = 0
+    cyc_row = 2 * T + P
+    num_eq = cyc_row + 1
+    A_eq = sp.csr_matrix((np.concatenate([bal_data, soc_data, inter_data, [1.0, -1.0]]),
+                          (np.concatenate([bal_rows, soc_rows, inter_rows, [cyc_row, cyc_row]]),
+                           np.concatenate([bal_cols, soc_cols, inter_cols, [col["battery_soc_inter"] + P, col["battery_soc_inter"]]]))),
+                         shape=(num_eq, num_variables))
+    b_eq = np.zeros(num_eq)
+    b_eq[:T] = demand
+
+    # --- Ungleichungen: Lade-/Entladeleistung (je T), Intra-SoC-Max/Min (je k*(S+1)), SoC-Grenzen je Periode (je P) ---
+    all_intra = np.arange(K * (S + 1)); cluster_of_intra = all_intra // (S + 1)
+    n_intra = K * (S + 1)
+    ch_rows = ts; dis_rows = T + ts
+    imax_rows = 2 * T + all_intra; imin_rows = 2 * T + n_intra + all_intra
+    min_rows = 2 * T + 2 * n_intra + periods; max_rows = 2 * T + 2 * n_intra + P + periods
+    num_ub = 2 * T + 2 * n_intra + 2 * P
+    inter = col["battery_soc_inter"] + periods
+    ub_rows = np.concatenate([ch_rows, ch_rows, dis_rows, dis_rows, imax_rows, imax_rows, imin_rows, imin_rows,
+                              min_rows, min_rows, min_rows, max_rows, max_rows, max_rows])
+    ub_cols = np.concatenate([
+        col["battery_charge"] + ts, np.full(T, col["battery_power_mw"]),      # Ladung - P*dt <= 0
+        col["battery_discharge"] + ts, np.full(T, col["battery_power_mw"]),   # Entladung - P*dt <= 0
+        col["battery_soc_intra"] + all_intra, col["battery_soc_intra_max"] + cluster_of_intra, # SoC_intra - SoC_intra_max <= 0
+        col["battery_soc_intra_min"] + cluster_of_intra, col["battery_soc_intra"] + all_intra, # SoC_intra_min - SoC_intra <= 0
+        inter, col["battery_soc_intra_min"] + clustering.assignment, np.full(P, col["battery_capacity_mwh"]), # SoC_min*E - SoC_inter - SoC_intra_min <= 0
+        inter, col["battery_soc_intra_max"] + clustering.assignment, np.full(P, col["battery_capacity_mwh"]), # SoC_inter + SoC_intra_max - E <= 0
+    ])
+    ub_data = np.concatenate([
+        np.ones(T), np.full(T, -time_resolution_hours), np.ones(T), np.full(T, -time_resolution_hours),
+        np.ones(n_intra), -np.ones(n_intra), np.ones(n_intra), -np.ones(n_intra),
+        -np.ones(P), -np.ones(P), np.full(P, battery_soc_min_percent),
+        np.ones(P), np.ones(P), -np.ones(P),
+    ])
+    A_ub = sp.csr_matrix((ub_data, (ub_rows, ub_cols)), shape=(num_ub, num_variables))
+    b_ub = np.zeros(num_ub)
+
+    # Zielfunktion: Kapazitätskosten + gewichtete Netzkosten/-erlöse der typischen Zeitschritte
+    step_weights = clustering.weights[cluster_of_step]
+    c = np.zeros(num_variables)
+    c[:len(CAPACITY_VARIABLES)] = capacity_costs
+    c[slices["grid_import"]] = step_weights * price
+    c[slices["grid_export"]] = -step_weights * tariff
+
+    lb = np.zeros(num_variables); ub = np.full(num_variables, np.inf)
+    lb[slices["battery_soc_intra"]] = -np.inf # Intra-SoC ist relativ zum Periodenanfang (kann negativ werden)
+    lb[slices["battery_soc_intra_min"]] = -np.inf
+    start_of_period = col["battery_soc_intra"] + np.arange(K) * (S + 1)
+    lb[start_of_period] = 0.0; ub[start_of_period] = 0.0 # SoC_intra = 0 am Anfang jeder typischen Periode
+
+    eq_row_slices = {"energy_balance": slice(0, T), "battery_soc_update": slice(T, 2 * T),
+                     "battery_soc_inter_update": slice(2 * T, 2 * T + P), "battery_cyclic_soc": slice(cyc_row, num_eq)}
+    ub_row_slices = {"battery_charge_power_limit": slice(0, T), "battery_discharge_power_limit": slice(T, 2 * T),
+                     "battery_soc_intra_max_limit": slice(2 * T, 2 * T + n_intra), "battery_soc_intra_min_limit": slice(2 * T + n_intra, 2 * T + 2 * n_intra),
+                     "battery_soc_min_limit": slice(2 * T + 2 * n_intra, 2 * T + 2 * n_intra + P), "battery_soc_max_limit": slice(2 * T + 2 * n_intra + P, num_ub)}
+    return MatrixLP(c=c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, lb=lb, ub=ub, num_timesteps=T,
+                    variable_slices=slices, ub_row_slices=ub_row_slices, eq_row_slices=eq_row_slices)
+
+
+def capacity_values(lp, x):
+    """ Kapazitäten (PV MWp, Wind MW, Batterie MWh, Batterie MW) aus der Lösung eines Auslegungs-LP. """
+    return np.array([lp.view(x, name)[0] for name in CAPACITY_VARIABLES])
+
+
+def aggregated_initial_soc(lp, x):
+    """ SoC am Anfang des Zeitraums (MWh) aus der Lösung des aggregierten LP: Inter-SoC der ersten Periode (Intra-SoC dort 0). """
+    return float(lp.view(x, "battery_soc_inter")[0])
+
+
+def full_resolution_dispatch(capacities, specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh,
+                             feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh, capacity_costs,
+                             charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                             backend="highs", method="simplex", window_steps=None, lookahead_steps=0, grid_connection_limit_mw=None,
+                             initial_soc_mwh=None):
+    """
+    Betrieb in voller Auflösung mit festen Kapazitäten. Liefert ein LPSolution-Objekt in der Variablenreihenfolge
+    von lp_matrix.build_sizing_lp (Kapazitäten vorn), der Zielwert enthält die Kapazitätskosten.
+    Mit window_steps wird der Betrieb rollierend in Fenstern gelöst (rolling_horizon.rolling_horizon_dispatch), beginnend
+    bei initial_soc_mwh (z.B. aggregated_initial_soc der aggregierten Lösung; None = Mindest-SoC); eine verbleibende
+    Lücke zum Start-SoC ist dann zum Netzbezugspreis im Zielwert enthalten. Ohne window_steps ist der SoC zyklisch.
+    grid_connection_limit_mw: Anschlussleistung wie im Auslegungs-LP (None = unbegrenzt).
+    """
+    pv_mw, wind_mw, battery_mwh, battery_mw = capacities
+    residual = operational_balance_rhs(specific_yield_pv_mwh_per_mw, specific_yield_wind_mwh_per_mw, demand_profile_mwh, pv_mw, wind_mw)
+    if window_steps is not None:
+        start = time.perf_counter()
+        dispatch = rolling_horizon_dispatch(residual, feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh, battery_mwh, battery_mw,
+                                            charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                                            window_steps, lookahead_steps, initial_soc_mwh=initial_soc_mwh,
+                                            grid_connection_limit_mw=grid_connection_limit_mw, backend=backend, method=method)
+        x = np.concatenate([capacities] + [dispatch[name] for name in OPERATION_VARIABLES])
+        return LPSolution(status="Optimal", objective=float(np.dot(capacity_costs, capacities)) + dispatch["operational_cost"], x=x,
+                          backend=backend, method=method, solve_seconds=time.perf_counter() - start)
+    lp = build_operational_lp(residual, feed_in_tariff_profile_eur_per_mwh, grid_purchase_price_eur_per_mwh, battery_mwh, battery_mw,
+                              charge_discharge_eff_sqrt, charge_discharge_eff_sqrt_inv, battery_soc_min_percent, time_resolution_hours,
+                              grid_connection_limit_mw=grid_connection_limit_mw)
+    dispatch = solve_lp(lp, backend=backend, method=method)
+    return LPSolution(status=dispatch.status, objective=float(np.dot(capacity_costs, capacities)) + dispatch.objective,
+                      x=np.concatenate([capacities, dispatch.x]), backend=dispatch.backend, method=dispatch.method,
+                      solve_seconds=dispatch.solve_seconds)
+
+
+def aggregation_error_report(capacities_full, objective_full, capacities_aggregated, objective_aggregated, objective_dispatch=None):
+    """
+    Gibt die Abweichung der aggregierten Auslegung gegenüber der Vollauflösung aus und liefert sie als Dict.
+    objective_dispatch: Zielwert der aggregierten Kapazitäten im Betrieb mit voller Auflösung (Mehrkosten der Auslegung).
+    """
+    labels = ("PV (MWp)", "Wind (MW)", "Batterie (MWh)", "Batterie (MW)")
+    report = {"objective_error": (objective_aggregated - objective_full) / abs(objective_full)}
+    print("\nAbweichung aggregierte Auslegung vs. volle Auflösung:")
+    for name, label, full, agg in zip(CAPACITY_VARIABLES, labels, capacities_full, capacities_aggregated):
+        report[f"{name}_error"] = agg - full
+        print(f"  {label:<15} voll {full:10.2f} | aggregiert {agg:10.2f} | Abweichung {agg - full:+10.2f}")
+    print(f"  Zielwert        voll {objective_full:,.2f} € | aggregiert {objective_aggregated:,.2f} € ({report['objective_error']:+.2%})")
+    if objective_dispatch is not None:
+        report["dispatch_cost_increase"] = (objective_dispatch - objective_full) / abs(objective_full)
+        print(f"  Aggregierte Kapazitäten im Betrieb mit voller Auflösung: {objective_dispatch:,.2f} € "
+              f"({report['dispatch_cost_increase']:+.2%} gegenüber dem Optimum)")
+    return report